@@ -6,6 +6,7 @@ trigger issues, view container logs: `docker compose logs agent-service`
 or `docker compose logs -f agent-service`. See docs/ARCHITECTURE.md §6
 (Logs and debugging) for where to find logs and how to debug failures.
 """
+import gzip
 import os
 import time
 import json
@@ -437,17 +438,20 @@ def process_log_review(job_id, exit_code):
             _save_failure_review(job_id, err, time.time() - started_at)
             return
 
-        # 2. Read Log Content
+        # 2. Read Log Content (archived logs are gzip files next to the original name)
         log_path = os.path.join(LOGS_DIR, log_file)
-        if not os.path.exists(log_path):
+        if os.path.exists(log_path):
+            with open(log_path, 'r') as f:
+                log_content = f.read()
+        elif os.path.exists(log_path + '.gz'):
+            with gzip.open(log_path + '.gz', 'rt', errors='replace') as f:
+                log_content = f.read()
+        else:
             err = f"Log file not found: {log_file}"
             logger.error(err)
             _save_failure_review(job_id, err, time.time() - started_at)
             return
 
-        with open(log_path, 'r') as f:
-            log_content = f.read()
-
         # 3. Analyze with LLM
         review = llm_client.analyze_log(job_id, playbook, exit_code, log_content)
 
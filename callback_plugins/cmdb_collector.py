@@ -13,6 +13,13 @@ Enable in ansible.cfg:
 Environment variables:
     CMDB_COLLECTOR_ENABLED=true    Enable/disable collection (default: true)
     CMDB_COLLECTOR_PLAYBOOKS=*     Comma-separated playbook patterns to collect (default: *-inventory)
+    CMDB_FACTS_FILE                Worker mode: spool facts to this file instead of saving
+                                   them (set by the worker executor, which ships them to
+                                   the primary with the job completion)
+
+Spool file (worker mode):
+    {"playbook": "hardware-inventory.yml", "collection": "hardware",
+     "hosts": {"web01": {"ansible_facts": {...}, "task_results": {...}}}}
 """
 
 from __future__ import (absolute_import, division, print_function)
@@ -25,10 +32,12 @@ DOCUMENTATION = '''
     description:
         - Automatically stores gathered facts and task results in the CMDB storage backend
         - Works with hardware-inventory, software-inventory, and similar playbooks
+        - On workers, spools the facts to CMDB_FACTS_FILE for the primary to store
     requirements:
         - Ansible Simpleweb storage module
 '''
 
+import json
 import os
 import sys
 import re
@@ -58,6 +67,7 @@ class CallbackModule(CallbackBase):
         # Configuration
         self.enabled = os.environ.get('CMDB_COLLECTOR_ENABLED', 'true').lower() == 'true'
         self.playbook_patterns = os.environ.get('CMDB_COLLECTOR_PLAYBOOKS', '*-inventory,system-health').split(',')
+        self.facts_file = os.environ.get('CMDB_FACTS_FILE')
 
         # State tracking
         self.current_playbook = None
@@ -71,7 +81,8 @@ class CallbackModule(CallbackBase):
 
     def _init_storage(self):
         """Initialize storage backend."""
-        if not self.enabled:
+        if not self.enabled or self.facts_file:
+            # Worker mode: the primary owns the CMDB
             return
 
         try:
@@ -87,7 +98,7 @@ class CallbackModule(CallbackBase):
 
     def _should_collect(self, playbook_name):
         """Check if this playbook should be collected."""
-        if not self.enabled or not self.storage:
+        if not self.enabled or not (self.storage or self.facts_file):
             return False
 
         for pattern in self.playbook_patterns:
@@ -161,11 +172,8 @@ class CallbackModule(CallbackBase):
         if not self._should_collect(self.current_playbook or ''):
             return
 
-        if not self.storage:
-            self._display.warning("CMDB Collector: No storage backend, skipping save")
-            return
-
         collection_name = self._get_collection_name(self.current_playbook or 'unknown')
+        hosts = {}
 
         for host in set(list(self.host_results.keys()) + list(self.host_facts.keys())):
             # Combine facts and task results
@@ -179,40 +187,57 @@ class CallbackModule(CallbackBase):
             if host in self.host_results:
                 data['task_results'] = self.host_results[host]
 
+            if data.get('ansible_facts') or data.get('task_results'):
+                hosts[host] = data
+
+        if self.facts_file:
+            self._spool(collection_name, hosts)
+        elif not self.storage:
+            self._display.warning("CMDB Collector: No storage backend, skipping save")
+        else:
+            self._save(collection_name, hosts)
+
+        # Clear state
+        self.host_results = {}
+        self.host_facts = {}
+
+    def _spool(self, collection_name, hosts):
+        """Write the run's facts to CMDB_FACTS_FILE for the worker to ship."""
+        try:
+            with open(self.facts_file, 'w') as f:
+                json.dump({'playbook': self.current_playbook, 'collection': collection_name,
+                           'hosts': hosts}, f, separators=(',', ':'), default=str)
+            self._display.v(f"CMDB Collector: Spooled {collection_name} for {len(hosts)} hosts")
+        except (IOError, OSError, TypeError, ValueError) as e:
+            self._display.warning(f"CMDB Collector: Could not write {self.facts_file}: {e}")
+
+    def _save(self, collection_name, hosts):
+        """Save the run's facts to the local storage backend in one batch."""
+        facts = []
+        for host, data in hosts.items():
             # Add metadata
             data['_meta'] = {
                 'playbook': self.current_playbook,
                 'collected_at': datetime.now().isoformat(),
                 'collector': 'callback_plugin'
             }
+            facts.append({'host': host, 'collection': collection_name, 'data': data, 'groups': []})
 
-            if not data.get('ansible_facts') and not data.get('task_results'):
-                continue
-
-            try:
-                # Get host groups from stats if available
-                groups = []
+        try:
+            results = self.storage.save_host_facts_bulk(facts, source='callback')
+        except Exception as e:
+            self._display.warning(f"CMDB Collector: Error saving {collection_name}: {e}")
+            return
 
-                result = self.storage.save_host_facts(
-                    host=host,
-                    collection=collection_name,
-                    data=data,
-                    groups=groups,
-                    source='callback'
+        for result in results:
+            host = result.get('host')
+            status = result.get('status', 'unknown')
+            if status == 'unchanged':
+                self._display.v(f"CMDB Collector: {host}/{collection_name} unchanged")
+            elif status == 'error':
+                self._display.warning(f"CMDB Collector: Error saving {host}: {result.get('error')}")
+            else:
+                self._display.display(
+                    f"CMDB Collector: Saved {collection_name} for {host} ({status})",
+                    color='green'
                 )
-
-                status = result.get('status', 'unknown')
-                if status == 'unchanged':
-                    self._display.v(f"CMDB Collector: {host}/{collection_name} unchanged")
-                else:
-                    self._display.display(
-                        f"CMDB Collector: Saved {collection_name} for {host} ({status})",
-                        color='green'
-                    )
-
-            except Exception as e:
-                self._display.warning(f"CMDB Collector: Error saving {host}: {e}")
-
-        # Clear state
-        self.host_results = {}
-        self.host_facts = {}
@@ -0,0 +1,96 @@
+"""
+Ansible Callback Plugin: run_results
+
+Writes the PLAY RECAP as structured JSON so the web app can store
+per-host outcomes on the job/run record instead of parsing log text.
+
+Enable in ansible.cfg:
+    [defaults]
+    callback_plugins = ./callback_plugins
+    callbacks_enabled = cmdb_collector, run_results
+
+Environment variables:
+    RUN_RESULTS_FILE    File to write results to (set by the executor; no-op when unset)
+
+Output:
+    {"playbook": "ping.yml",
+     "hosts": {"web01": {"ok": 5, "changed": 1, "unreachable": 0, "failed": 1,
+                         "skipped": 2, "rescued": 0, "ignored": 0,
+                         "failed_tasks": ["Install nginx"]}}}
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: run_results
+    type: notification
+    short_description: Writes per-host run results as JSON
+    description:
+        - Writes the PLAY RECAP counts and failed task names of every host to RUN_RESULTS_FILE
+    requirements:
+        - RUN_RESULTS_FILE set in the environment
+'''
+
+import json
+import os
+
+from ansible.plugins.callback import CallbackBase
+
+# Max failed task names kept per host
+MAX_FAILED_TASKS = 20
+
+
+class CallbackModule(CallbackBase):
+    """
+    Callback plugin to write per-host run results.
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'notification'
+    CALLBACK_NAME = 'run_results'
+    CALLBACK_NEEDS_WHITELIST = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.results_file = os.environ.get('RUN_RESULTS_FILE')
+        self.playbook = None
+        self.failed_tasks = {}  # {host: [task_name]}
+
+    def v2_playbook_on_start(self, playbook):
+        """Called when playbook starts."""
+        self.playbook = os.path.basename(playbook._file_name)
+        self.failed_tasks = {}
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        """Called when a task fails."""
+        if ignore_errors:
+            return
+        tasks = self.failed_tasks.setdefault(result._host.get_name(), [])
+        if len(tasks) < MAX_FAILED_TASKS:
+            tasks.append(result._task.get_name())
+
+    def v2_playbook_on_stats(self, stats):
+        """Called at the end of playbook - write the recap."""
+        if not self.results_file:
+            return
+
+        hosts = {}
+        for host in sorted(stats.processed.keys()):
+            summary = stats.summarize(host)
+            hosts[host] = {
+                'ok': summary.get('ok', 0),
+                'changed': summary.get('changed', 0),
+                'unreachable': summary.get('unreachable', 0),
+                'failed': summary.get('failures', 0),
+                'skipped': summary.get('skipped', 0),
+                'rescued': summary.get('rescued', 0),
+                'ignored': summary.get('ignored', 0),
+                'failed_tasks': self.failed_tasks.get(host, []),
+            }
+
+        try:
+            with open(self.results_file, 'w') as f:
+                json.dump({'playbook': self.playbook, 'hosts': hosts}, f)
+        except (IOError, OSError) as e:
+            self._display.warning(f"Run Results: Could not write {self.results_file}: {e}")
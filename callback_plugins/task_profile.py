@@ -0,0 +1,120 @@
+"""
+Ansible Callback Plugin: task_profile
+
+Records how long every task took on every host so the web app can report
+per-task percentiles, slowest hosts and trends across runs.
+
+Enable in ansible.cfg:
+    [defaults]
+    callback_plugins = ./callback_plugins
+    callbacks_enabled = cmdb_collector, run_results, task_profile
+
+Environment variables:
+    RUN_PROFILE_FILE    File to write timings to (set by the executor; no-op when unset)
+
+Output (seconds, millisecond precision; tasks in run order):
+    {"playbook": "system-health.yml", "duration": 42.105,
+     "tasks": [{"name": "Gathering Facts", "hosts": {"web01": 2.311, "web02": 3.02}}]}
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: task_profile
+    type: notification
+    short_description: Writes per-task, per-host durations as JSON
+    description:
+        - Writes the duration of every task on every host to RUN_PROFILE_FILE
+    requirements:
+        - RUN_PROFILE_FILE set in the environment
+'''
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    """
+    Callback plugin to time tasks per host.
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'notification'
+    CALLBACK_NAME = 'task_profile'
+    CALLBACK_NEEDS_WHITELIST = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.profile_file = os.environ.get('RUN_PROFILE_FILE')
+        self.playbook = None
+        self.started = None
+        self.tasks = []         # [{'name': str, 'hosts': {host: seconds}}]
+        self.task_index = {}    # {task uuid: index in self.tasks}
+        self.task_started = {}  # {task uuid: start time}
+        self.host_started = {}  # {(task uuid, host): start time}
+
+    def _start_task(self, task):
+        self.task_started[task._uuid] = time.time()
+        if task._uuid not in self.task_index:
+            self.task_index[task._uuid] = len(self.tasks)
+            self.tasks.append({'name': task.get_name(), 'hosts': {}})
+
+    def _finish(self, result):
+        task, host = result._task, result._host.get_name()
+        if task._uuid not in self.task_index:
+            return
+        started = self.host_started.pop((task._uuid, host), None) or self.task_started.get(task._uuid)
+        if started is None:
+            return
+        hosts = self.tasks[self.task_index[task._uuid]]['hosts']
+        # Loops report once per host; keep the total
+        hosts[host] = round(hosts.get(host, 0) + time.time() - started, 3)
+
+    def v2_playbook_on_start(self, playbook):
+        """Called when playbook starts."""
+        self.playbook = os.path.basename(playbook._file_name)
+        self.started = time.time()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        """Called when a task starts."""
+        self._start_task(task)
+
+    def v2_playbook_on_handler_task_start(self, task):
+        """Called when a handler starts."""
+        self._start_task(task)
+
+    def v2_runner_on_start(self, host, task):
+        """Called when a task starts on a host."""
+        self.host_started[(task._uuid, host.get_name())] = time.time()
+
+    def v2_runner_on_ok(self, result):
+        self._finish(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._finish(result)
+
+    def v2_runner_on_skipped(self, result):
+        self._finish(result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._finish(result)
+
+    def v2_playbook_on_stats(self, stats):
+        """Called at the end of playbook - write the timings."""
+        if not self.profile_file:
+            return
+
+        profile = {
+            'playbook': self.playbook,
+            'duration': round(time.time() - (self.started or time.time()), 3),
+            'tasks': [t for t in self.tasks if t['hosts']],
+        }
+        try:
+            with open(self.profile_file, 'w') as f:
+                json.dump(profile, f, separators=(',', ':'))
+        except (IOError, OSError) as e:
+            self._display.warning(f"Task Profile: Could not write {self.profile_file}: {e}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Host Facts Save Micro-Benchmark
+
+Times end-of-run CMDB fact persistence in the SQLite backend: one
+save_host_facts call (and transaction) per host versus a single
+save_host_facts_bulk call, for a first run (all hosts created) and a
+second run where a share of the hosts changed.
+
+Usage:
+    python scripts/bench_host_facts.py
+    python scripts/bench_host_facts.py --hosts 5000 --changed 0.2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add parent directories to path for imports
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, 'web'))
+
+from storage.flatfile import FlatFileStorage
+
+
+def make_facts(hosts: int, run: int, changed: float) -> list:
+    """Facts of one inventory run; the first hosts * changed differ per run."""
+    facts = []
+    for i in range(hosts):
+        n = run if i < hosts * changed else 0
+        facts.append({'host': f'host{i:05d}.example.com', 'collection': 'hardware', 'data': {
+            'ansible_facts': {
+                'ansible_hostname': f'host{i:05d}',
+                'ansible_processor_vcpus': 4 + n,
+                'ansible_memtotal_mb': 16384,
+                'ansible_memfree_mb': 8192 - n,
+                'ansible_mounts': [{'mount': f'/data{d}', 'size_total': 10 ** 11} for d in range(4)],
+                'ansible_interfaces': ['lo', 'eth0', 'eth1'],
+            },
+            'task_results': {'Gather disk usage': {'changed': False, 'rc': 0}},
+        }})
+    return facts
+
+
+def per_host(storage, facts) -> float:
+    start = time.perf_counter()
+    for f in facts:
+        storage.save_host_facts(f['host'], f['collection'], f['data'], source='bench')
+    return time.perf_counter() - start
+
+
+def bulk(storage, facts) -> float:
+    start = time.perf_counter()
+    storage.save_host_facts_bulk(facts, source='bench')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark host facts saves')
+    parser.add_argument('--hosts', type=int, default=1000, help='Hosts per run (default: 1000)')
+    parser.add_argument('--changed', type=float, default=0.1,
+                        help='Share of hosts whose facts change on the second run (default: 0.1)')
+    args = parser.parse_args()
+
+    print(f"{args.hosts} hosts, {args.changed:.0%} changed on second run")
+    for name, save in (('per-host', per_host), ('bulk', bulk)):
+        config_dir = tempfile.mkdtemp()
+        try:
+            storage = FlatFileStorage(config_dir=config_dir)
+            first = save(storage, make_facts(args.hosts, 1, args.changed))
+            second = save(storage, make_facts(args.hosts, 2, args.changed))
+        finally:
+            shutil.rmtree(config_dir, ignore_errors=True)
+        print(f"  {name:10s} first run {first:8.3f}s   second run {second:8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Log Pipeline Micro-Benchmark
+
+Compares the chunked log pipeline (web/log_pipeline.py) with the previous
+line-by-line processing (decode, regex, write per line) on synthetic
+Ansible output, and prints lines/sec for each.
+
+Usage:
+    python scripts/bench_log_pipeline.py
+    python scripts/bench_log_pipeline.py --lines 500000 --secret-every 1000
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+# Add parent directories to path for imports
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, 'web'))
+
+from log_pipeline import READ_SIZE, LogPipeline, read_chunks
+
+# Per-line redaction as previously done in app.py and worker/executor.py
+LINE_PATTERN = re.compile(
+    r'((?:ansible_ssh_pass|ansible_password|ansible_become_pass)\s*["\']?\s*[:=]\s*)(["\']?)[^"\'&\s\n]+(["\']?)',
+    re.IGNORECASE
+)
+
+
+def make_output(lines: int, secret_every: int) -> bytes:
+    """Synthetic playbook output with a task banner every 20 lines."""
+    out = []
+    for i in range(lines):
+        if secret_every and i % secret_every == secret_every - 1:
+            out.append(f'fatal: [web{i % 50:02d}]: ansible_password=hunter{i} rc=1\n')
+        elif i % 20 == 0:
+            out.append(f'TASK [Install package {i}] ' + '*' * 50 + '\n')
+        else:
+            out.append(f'ok: [web{i % 50:02d}] => (item=nginx-{i}) changed=false\n')
+    return ''.join(out).encode('utf-8')
+
+
+def per_line(data: bytes) -> float:
+    """Previous behaviour: iterate lines, decode, redact and write each."""
+    sink = io.StringIO()
+    stream = io.BufferedReader(io.BytesIO(data))
+    start = time.perf_counter()
+    for line in stream:
+        sink.write(LINE_PATTERN.sub(r'\1***', line.decode('utf-8', errors='replace')))
+    return time.perf_counter() - start
+
+
+def chunked(data: bytes) -> float:
+    """LogPipeline: read available output, process it as one chunk."""
+    sink = io.StringIO()
+    stream = io.BufferedReader(io.BytesIO(data))
+    start = time.perf_counter()
+    pipeline = LogPipeline([lambda chunk: sink.write(chunk.text)])
+    for block in read_chunks(stream, READ_SIZE):
+        pipeline.feed(block)
+    pipeline.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark log line processing')
+    parser.add_argument('--lines', type=int, default=200000, help='Lines of output (default: 200000)')
+    parser.add_argument('--secret-every', type=int, default=5000,
+                        help='Emit a line with a password every N lines (0: never)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per variant, best is reported')
+    args = parser.parse_args()
+
+    data = make_output(args.lines, args.secret_every)
+    print(f"{args.lines} lines, {len(data) / 1024 / 1024:.1f} MiB, best of {args.repeat}")
+
+    results = {}
+    for name, bench in (('per-line', per_line), ('chunked', chunked)):
+        best = min(bench(data) for _ in range(args.repeat))
+        results[name] = args.lines / best
+        print(f"  {name:10s} {results[name]:>12,.0f} lines/sec")
+    print(f"  speedup    {results['chunked'] / results['per-line']:>12.1f}x")
+
+
+if __name__ == '__main__':
+    main()
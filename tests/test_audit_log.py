@@ -366,6 +366,32 @@ class TestAuditLogAPI:
         data = json.loads(response.data)
         assert all(e['user'] == 'alice' for e in data['entries'] if e.get('user'))
 
+    def test_audit_api_cursor_pagination(self, admin_client, app_with_audit):
+        """Should page through entries with next_cursor."""
+        app, storage, users = app_with_audit
+        for i in range(5):
+            storage.add_audit_entry({
+                'user': 'carol',
+                'action': 'view',
+                'resource': 'playbooks',
+                'resource_id': str(i),
+                'success': True
+            })
+
+        first = json.loads(admin_client.get('/api/audit?user=carol&limit=3').data)
+        assert first['total'] == 5
+        assert first['next_cursor']
+
+        second = json.loads(admin_client.get(
+            f"/api/audit?user=carol&limit=3&cursor={first['next_cursor']}"
+        ).data)
+        ids = [e['resource_id'] for e in first['entries'] + second['entries']]
+        assert ids == ['4', '3', '2', '1', '0']
+        assert second['next_cursor'] is None
+
+        response = admin_client.get('/api/audit?cursor=bogus')
+        assert response.status_code == 400
+
 
 class TestAuditLogExport:
     """Tests for audit log CSV export."""
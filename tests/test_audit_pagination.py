@@ -0,0 +1,112 @@
+"""
+Unit tests for keyset-paginated audit log queries (query_audit_log).
+
+Uses flat file storage.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web.storage.flatfile import FlatFileStorage
+
+
+def _entry(n, user='alice', action='update', resource='schedules', success=True, second=None):
+    second = n if second is None else second
+    return {'timestamp': f'2026-01-01T00:{second // 60:02d}:{second % 60:02d}+00:00', 'user': user,
+            'action': action, 'resource': resource, 'resource_id': str(n), 'success': success}
+
+
+class TestAuditLogPagination(unittest.TestCase):
+    """Test cursor pages, filters and index use."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.storage = FlatFileStorage(config_dir=self.test_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _all_pages(self, filters=None, limit=7):
+        page = self.storage.query_audit_log(filters, limit=limit)
+        pages = [page]
+        while page['next_cursor']:
+            page = self.storage.query_audit_log(filters, limit=limit, cursor=page['next_cursor'])
+            pages.append(page)
+        return pages
+
+    def test_cursor_pages_cover_all_entries(self):
+        """Test following next_cursor returns every entry once, newest first."""
+        self.storage.add_audit_entries([_entry(n) for n in range(30)])
+
+        pages = self._all_pages()
+        ids = [e['resource_id'] for p in pages for e in p['entries']]
+
+        self.assertEqual(ids, [str(n) for n in reversed(range(30))])
+        self.assertEqual([len(p['entries']) for p in pages], [7, 7, 7, 7, 2])
+        self.assertEqual(pages[0]['total'], 30)
+        self.assertIsNone(pages[1]['total'])
+        self.assertIsNone(pages[-1]['next_cursor'])
+
+    def test_equal_timestamps_not_skipped(self):
+        """Test entries sharing a timestamp are split across pages by id."""
+        self.storage.add_audit_entries([_entry(n, second=n // 10) for n in range(25)])
+
+        ids = [e['resource_id'] for p in self._all_pages(limit=4) for e in p['entries']]
+
+        self.assertEqual(ids, [str(n) for n in reversed(range(25))])
+
+    def test_filters_with_cursor(self):
+        """Test filters apply to every page."""
+        self.storage.add_audit_entries([
+            _entry(n, user='alice' if n % 3 else 'bob', action='delete' if n % 2 else 'login',
+                   resource='users', success=n % 5 != 0)
+            for n in range(60)
+        ])
+
+        for filters in ({'user': 'bob'}, {'resource': 'users', 'action': 'delete'},
+                        {'user': 'alice', 'action': 'login'}, {'success': False},
+                        {'user': 'alice', 'start_time': '2026-01-01T00:00:20+00:00',
+                         'end_time': '2026-01-01T00:00:40+00:00'}):
+            pages = self._all_pages(filters, limit=4)
+            got = [e['resource_id'] for p in pages for e in p['entries']]
+            expected = [e['resource_id'] for e in self.storage.get_audit_log(filters, limit=1000)]
+            self.assertEqual(got, expected)
+            self.assertEqual(pages[0]['total'], len(expected))
+
+    def test_get_audit_log_offset(self):
+        """Test offset pagination still works without a cursor."""
+        self.storage.add_audit_entries([_entry(n) for n in range(10)])
+
+        entries = self.storage.get_audit_log(limit=3, offset=3)
+
+        self.assertEqual([e['resource_id'] for e in entries], ['6', '5', '4'])
+
+    def test_invalid_input_rejected(self):
+        """Test malformed cursors and unknown filters raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.storage.query_audit_log(cursor='not-a-cursor')
+        with self.assertRaises(ValueError):
+            self.storage.query_audit_log({'data': 'x'})
+
+    def test_pages_seek_through_index(self):
+        """Test each filter combination seeks its index instead of sorting."""
+        conn = self.storage._get_connection()
+        for where in ("1", "user = 'a'", "user = 'a' AND action = 'b'", "action = 'b'",
+                      "resource = 'c'", "resource = 'c' AND action = 'b'", "success = 0"):
+            plan = ' '.join(r[3] for r in conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT data FROM audit_log WHERE {where} AND (timestamp, id) < (?, ?) "
+                "ORDER BY timestamp DESC, id DESC LIMIT 51", ('2026-01-01T00:00:00+00:00', 1)))
+            self.assertIn('USING INDEX', plan, where)
+            self.assertNotIn('TEMP B-TREE', plan, where)
+
+
+if __name__ == '__main__':
+    unittest.main()
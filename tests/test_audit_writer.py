@@ -0,0 +1,126 @@
+"""
+Unit tests for the write-behind audit writer (web/audit_writer.py).
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from audit_writer import AuditWriter
+from web.storage.flatfile import FlatFileStorage
+
+
+def _entry(n, action='update', resource='schedules'):
+    return {'timestamp': f'2026-01-01T00:00:{n:02d}+00:00', 'user': 'alice',
+            'action': action, 'resource': resource, 'resource_id': str(n), 'success': True}
+
+
+class TestAuditWriter(unittest.TestCase):
+    """Test group commits, sync rules and shutdown flushing."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.storage = FlatFileStorage(config_dir=self.test_dir)
+        self.writer = AuditWriter(lambda: self.storage, flush_interval=60)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.writer.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _logged_ids(self):
+        return [e['resource_id'] for e in reversed(self.storage.get_audit_log(limit=1000))]
+
+    def test_entries_queued_until_flush(self):
+        """Test async entries are committed together, in order."""
+        for n in range(5):
+            self.assertTrue(self.writer.add(_entry(n)))
+        self.assertEqual(self._logged_ids(), [])
+
+        self.writer.flush()
+
+        self.assertEqual(self._logged_ids(), ['0', '1', '2', '3', '4'])
+        self.assertEqual(self.writer.get_stats()['batches'], 1)
+
+    def test_close_drains_queue(self):
+        """Test queued entries are written on shutdown."""
+        self.writer.add(_entry(1))
+        self.writer.close()
+
+        self.assertEqual(self._logged_ids(), ['1'])
+        self.assertFalse(self.writer.get_stats()['running'])
+
+        # Entries added after close are written at once
+        self.writer.add(_entry(2))
+        self.assertEqual(self._logged_ids(), ['1', '2'])
+
+    def test_batch_size_triggers_commit(self):
+        """Test a full batch is committed before the interval is up."""
+        self.writer.max_batch = 10
+        for n in range(10):
+            self.writer.add(_entry(n))
+
+        deadline = time.monotonic() + 5
+        while self.writer.get_stats()['written'] < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self._logged_ids()), 10)
+
+    def test_sync_rules(self):
+        """Test sync actions are written with everything queued before them."""
+        writer = AuditWriter(lambda: self.storage, sync_actions=['failed_login', 'users:delete', 'roles:*'],
+                             flush_interval=60)
+        self.assertTrue(writer.is_sync(_entry(0, 'failed_login', 'auth')))
+        self.assertTrue(writer.is_sync(_entry(0, 'delete', 'users')))
+        self.assertTrue(writer.is_sync(_entry(0, 'create', 'roles')))
+        self.assertFalse(writer.is_sync(_entry(0, 'update', 'users')))
+
+        writer.add(_entry(1))
+        writer.add(_entry(2, 'delete', 'users'))
+
+        self.assertEqual(self._logged_ids(), ['1', '2'])
+        writer.close()
+
+    def test_sync_mode_writes_every_entry(self):
+        """Test sync mode writes within add() and runs no thread."""
+        writer = AuditWriter(lambda: self.storage, mode='sync')
+        writer.add(_entry(1))
+
+        self.assertEqual(self._logged_ids(), ['1'])
+        self.assertFalse(writer.get_stats()['running'])
+
+    def test_failed_batch_retried_in_order(self):
+        """Test a failed commit is retried ahead of newer entries."""
+        storage = MagicMock()
+        storage.add_audit_entries.side_effect = [Exception('database is locked'), True]
+        writer = AuditWriter(lambda: storage, mode='sync')
+
+        self.assertFalse(writer.add(_entry(1)))
+        self.assertTrue(writer.add(_entry(2)))
+
+        batch = storage.add_audit_entries.call_args[0][0]
+        self.assertEqual([e['resource_id'] for e in batch], ['1', '2'])
+        self.assertEqual(writer.get_stats()['errors'], 1)
+
+    def test_queue_bounded_while_failing(self):
+        """Test the oldest entries are dropped past max_queue."""
+        storage = MagicMock()
+        storage.add_audit_entries.return_value = False
+        writer = AuditWriter(lambda: storage, mode='sync', max_queue=3)
+        for n in range(5):
+            writer.add(_entry(n))
+
+        stats = writer.get_stats()
+        self.assertEqual((stats['pending'], stats['dropped']), (3, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
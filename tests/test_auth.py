@@ -10,7 +10,7 @@ Tests:
 
 import pytest
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import sys
 import os
 
@@ -24,8 +24,10 @@ from web.auth import (
     APITokenManager,
     LoginAttemptTracker,
     AuthenticationError,
-    AccountLockedError
+    AccountLockedError,
+    authenticate_api_token
 )
+from unittest.mock import MagicMock
 
 
 class TestPasswordHashing:
@@ -198,6 +200,22 @@ class TestAPITokenManager:
 
         assert entry['expires_at'] is None
 
+    def test_authenticate_throttles_last_used(self):
+        """authenticate_api_token should not write last_used on every request."""
+        raw_token, entry = APITokenManager.create_token_entry('user123', 'Test Token')
+        storage = MagicMock()
+        storage.get_api_token_by_hash.return_value = entry
+        storage.get_user_by_id.return_value = {'id': 'user123', 'enabled': True}
+
+        assert authenticate_api_token(storage, raw_token)['id'] == 'user123'
+        assert authenticate_api_token(storage, raw_token)['id'] == 'user123'
+        assert storage.update_api_token.call_count == 1
+
+        # Written again once the interval has passed
+        entry['last_used'] = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+        authenticate_api_token(storage, raw_token)
+        assert storage.update_api_token.call_count == 2
+
 
 class TestLoginAttemptTracker:
     """Tests for LoginAttemptTracker class."""
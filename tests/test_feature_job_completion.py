@@ -350,7 +350,7 @@ web2 : ok=2 changed=0 failed=0
 class TestAPIClientJobCompletion(unittest.TestCase):
     """Test API client job completion as part of feature validation."""
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_full_completion_request(self, mock_request):
         """Test complete job completion request with all fields."""
         print("\n=== Testing Full API Completion Request ===\n")
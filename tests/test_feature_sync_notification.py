@@ -315,7 +315,7 @@ class TestWorkerServiceSyncNotification(unittest.TestCase):
 class TestSyncRevisionAPI(unittest.TestCase):
     """Test sync revision API endpoints."""
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_get_revision_for_polling(self, mock_request):
         """Test getting revision for polling comparison."""
         print("\n=== Testing Revision API ===\n")
@@ -325,7 +325,7 @@ class TestFeatureWorkerCheckin(unittest.TestCase):
 class TestWorkerClientCheckinFeature(unittest.TestCase):
     """Test worker client check-in as part of feature validation."""
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_client_checkin_workflow(self, mock_request):
         """Test complete client-side checkin workflow."""
         print("\n=== Testing Worker Client Check-in ===\n")
@@ -371,7 +371,7 @@ class TestWorkerClientCheckinFeature(unittest.TestCase):
 
         print("\n=== Worker Client Check-in Validated ===")
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_client_sync_needed_response(self, mock_request):
         """Test that client handles sync_needed response."""
         print("\n=== Testing Sync Needed Response ===\n")
@@ -0,0 +1,174 @@
+"""
+Unit tests for host facts history storage.
+
+History entries live in their own table keyed by (host, collection,
+timestamp); the host's facts document only holds current values.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web.storage.flatfile import FlatFileStorage
+
+
+class TestHostFactsHistoryFlatFile(unittest.TestCase):
+    """Test host facts history for flat file storage."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.storage = FlatFileStorage(config_dir=self.test_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _save_versions(self, count, host='web1', collection='hardware'):
+        for i in range(count):
+            self.storage.save_host_facts(host, collection, {'cpu_count': i}, source=f'run-{i}')
+
+    def _stored_blob(self, host):
+        conn = self.storage._get_connection()
+        return json.loads(conn.execute("SELECT data FROM host_facts WHERE host = ?", (host,)).fetchone()['data'])
+
+    def test_history_kept_out_of_facts_document(self):
+        """Test changes are recorded as history rows, not in the host blob."""
+        self._save_versions(3)
+
+        blob = self._stored_blob('web1')
+        self.assertNotIn('history', blob['collections']['hardware'])
+        self.assertEqual(blob['collections']['hardware']['current'], {'cpu_count': 2})
+
+        history = self.storage.get_host_history('web1', 'hardware')
+        self.assertEqual(len(history), 2)
+        # Newest first: the last change replaced run-1's facts
+        self.assertEqual([h['source'] for h in history], ['run-1', 'run-0'])
+        self.assertEqual(history[0]['diff_from_next']['changed']['cpu_count'], {'old': 1, 'new': 2})
+
+    def test_history_limit_prunes_oldest(self):
+        """Test only the newest history_limit entries are kept."""
+        self.storage.history_limit = 3
+        self._save_versions(8)
+        self._save_versions(2, collection='software')
+
+        history = self.storage.get_host_history('web1', 'hardware')
+        self.assertEqual([h['source'] for h in history], ['run-6', 'run-5', 'run-4'])
+        # Other collections are pruned independently
+        self.assertEqual(len(self.storage.get_host_history('web1', 'software')), 1)
+
+    def test_unchanged_facts_add_no_history(self):
+        """Test saving identical facts does not add history."""
+        self._save_versions(2)
+        result = self.storage.save_host_facts('web1', 'hardware', {'cpu_count': 1})
+
+        self.assertEqual(result['status'], 'unchanged')
+        self.assertEqual(len(self.storage.get_host_history('web1', 'hardware')), 1)
+
+    def test_collection_with_history(self):
+        """Test get_host_collection includes history on request."""
+        self._save_versions(3)
+
+        coll = self.storage.get_host_collection('web1', 'hardware', True)
+        self.assertEqual(coll['current'], {'cpu_count': 2})
+        self.assertEqual(len(coll['history']), 2)
+        self.assertNotIn('history', self.storage.get_host_collection('web1', 'hardware'))
+
+    def test_delete_removes_history(self):
+        """Test deleting a collection or host deletes its history."""
+        self._save_versions(3)
+        self._save_versions(3, collection='software')
+
+        self.storage.delete_host_facts('web1', 'hardware')
+        self.assertEqual(self.storage.get_host_history('web1', 'hardware'), [])
+        self.assertEqual(len(self.storage.get_host_history('web1', 'software')), 2)
+
+        self.storage.delete_host_facts('web1')
+        self.assertEqual(self.storage.get_host_history('web1', 'software'), [])
+
+    def test_export_import_round_trip(self):
+        """Test exported documents carry history that import restores."""
+        self._save_versions(4)
+        exported = self.storage.export_host_facts('web1')
+        self.assertEqual(len(exported['collections']['hardware']['history']), 3)
+
+        history = self.storage.get_host_history('web1', 'hardware')
+        self.storage = FlatFileStorage(config_dir=tempfile.mkdtemp(dir=self.test_dir))
+        self.assertTrue(self.storage.import_host_facts(exported))
+
+        self.assertEqual(self.storage.get_host_history('web1', 'hardware'), history)
+        self.assertNotIn('history', self._stored_blob('web1')['collections']['hardware'])
+        # The exported document itself is left untouched
+        self.assertEqual(len(exported['collections']['hardware']['history']), 3)
+
+    def test_migrates_embedded_history(self):
+        """Test databases with history inside host blobs are migrated on open."""
+        legacy_dir = tempfile.mkdtemp(dir=self.test_dir)
+        conn = sqlite3.connect(os.path.join(legacy_dir, 'storage.db'))
+        conn.execute("CREATE TABLE host_facts (host TEXT PRIMARY KEY COLLATE NOCASE, last_updated TEXT, groups TEXT, data TEXT)")
+        doc = {'host': 'db1', 'groups': [], 'last_updated': '2024-01-03T00:00:00',
+               'collections': {'hardware': {
+                   'current': {'cpu_count': 4}, 'last_updated': '2024-01-03T00:00:00', 'source': 'c',
+                   'history': [
+                       {'timestamp': '2024-01-02T00:00:00', 'source': 'b', 'diff_from_next': {'changed': {}}},
+                       {'timestamp': '2024-01-01T00:00:00', 'source': 'a', 'diff_from_next': {'changed': {}}},
+                   ]}}}
+        conn.execute("INSERT INTO host_facts VALUES (?, ?, ?, ?)", ('db1', doc['last_updated'], '[]', json.dumps(doc)))
+        conn.commit()
+        conn.close()
+
+        self.storage = FlatFileStorage(config_dir=legacy_dir)
+
+        history = self.storage.get_host_history('db1', 'hardware')
+        self.assertEqual([h['source'] for h in history], ['b', 'a'])
+        self.assertNotIn('history', self._stored_blob('db1')['collections']['hardware'])
+
+    def test_bulk_save_diffs_each_host(self):
+        """Test a bulk save records one change per changed host."""
+        facts = [{'host': f'web{i}', 'collection': 'hardware', 'data': {'cpu_count': 2}} for i in range(50)]
+        self.storage.save_host_facts_bulk(facts, source='run-0')
+        for f in facts[:10]:
+            f['data'] = {'cpu_count': 4}
+
+        results = self.storage.save_host_facts_bulk(facts, source='run-1')
+
+        statuses = [r['status'] for r in results]
+        self.assertEqual(statuses.count('updated'), 10)
+        self.assertEqual(statuses.count('unchanged'), 40)
+        self.assertEqual(results[0]['changes']['changed']['cpu_count'], {'old': 2, 'new': 4})
+        self.assertEqual([h['source'] for h in self.storage.get_host_history('web0', 'hardware')], ['run-0'])
+        self.assertEqual(self.storage.get_host_history('web10', 'hardware'), [])
+
+    def test_bulk_save_matches_existing_host_case(self):
+        """Test bulk saves update existing hosts regardless of name case."""
+        self.storage.save_host_facts('Web1', 'hardware', {'cpu_count': 2}, groups=['a'])
+
+        results = self.storage.save_host_facts_bulk([
+            {'host': 'web1', 'collection': 'hardware', 'data': {'cpu_count': 4}, 'groups': ['b']},
+            {'host': 'WEB1', 'collection': 'software', 'data': {'packages': []}},
+        ])
+
+        self.assertEqual([(r['host'], r['status']) for r in results], [('Web1', 'updated'), ('Web1', 'updated')])
+        hosts = self.storage.get_all_hosts()
+        self.assertEqual(len(hosts), 1)
+        self.assertEqual(sorted(hosts[0]['groups']), ['a', 'b'])
+        self.assertEqual(sorted(hosts[0]['collections']), ['hardware', 'software'])
+
+    def test_history_queries_use_index(self):
+        """Test history reads and pruning are served by the history index."""
+        conn = self.storage._get_connection()
+        plan = ' '.join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT timestamp FROM host_facts_history WHERE host = ? AND collection = ? "
+            "ORDER BY timestamp DESC LIMIT 1 OFFSET 100", ('web1', 'hardware')))
+        self.assertIn('idx_facts_history', plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
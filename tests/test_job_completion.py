@@ -262,6 +262,29 @@ class TestCMDBFactsExtraction(unittest.TestCase):
             self.assertIsNotNone(facts)
             self.assertIn('system-info', facts.get('collections', {}))
 
+    def test_bulk_save_host_facts(self):
+        """Test a run's facts shipped by a worker are saved in one call."""
+        facts = [
+            {'host': 'web1', 'collection': 'hardware', 'data': {'cpu_count': 4}},
+            {'host': 'web2', 'collection': 'hardware', 'data': {'cpu_count': 8}},
+            {'host': 'web1', 'collection': 'software', 'data': {'packages': ['nginx']}},
+        ]
+
+        results = self.storage.save_host_facts_bulk(facts, source='job')
+
+        self.assertEqual([(r['host'], r['collection'], r['status']) for r in results], [
+            ('web1', 'hardware', 'created'),
+            ('web2', 'hardware', 'created'),
+            ('web1', 'software', 'updated'),
+        ])
+        web1 = self.storage.get_host_facts('web1')
+        self.assertEqual(sorted(web1['collections']), ['hardware', 'software'])
+        self.assertEqual(web1['collections']['hardware']['source'], 'job')
+
+        # Shipping the same facts again changes nothing
+        results = self.storage.save_host_facts_bulk(facts[:2], source='job')
+        self.assertEqual([r['status'] for r in results], ['unchanged', 'unchanged'])
+
 
 class TestPiggybackCheckin(unittest.TestCase):
     """Test piggyback checkin processing on job completion."""
@@ -325,7 +348,7 @@ class TestPiggybackCheckin(unittest.TestCase):
 class TestAPIClientComplete(unittest.TestCase):
     """Test API client complete_job method."""
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job_basic(self, mock_request):
         """Test basic job completion."""
         mock_response = Mock()
@@ -346,7 +369,7 @@ class TestAPIClientComplete(unittest.TestCase):
         self.assertTrue(result.success)
         mock_request.assert_called_once()
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job_with_log_content(self, mock_request):
         """Test job completion with log content upload."""
         mock_response = Mock()
@@ -373,7 +396,7 @@ class TestAPIClientComplete(unittest.TestCase):
         sent_data = call_args[1]['json']
         self.assertEqual(sent_data['log_content'], log_content)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job_with_duration(self, mock_request):
         """Test job completion with duration."""
         mock_response = Mock()
@@ -395,7 +418,7 @@ class TestAPIClientComplete(unittest.TestCase):
         sent_data = call_args[1]['json']
         self.assertEqual(sent_data['duration_seconds'], 120.5)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job_with_cmdb_facts(self, mock_request):
         """Test job completion with CMDB facts."""
         mock_response = Mock()
@@ -424,8 +447,27 @@ class TestAPIClientComplete(unittest.TestCase):
         call_args = mock_request.call_args
         sent_data = call_args[1]['json']
         self.assertEqual(sent_data['cmdb_facts'], cmdb_facts)
+        self.assertNotIn('cmdb_collection', sent_data)
+
+    @patch('worker.api_client.requests.Session.request')
+    def test_complete_job_with_spooled_cmdb_facts(self, mock_request):
+        """Test facts spooled by the cmdb_collector callback name their collection."""
+        mock_response = Mock()
+        mock_response.ok = True
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'job_id': 'job-1', 'status': 'completed'}
+        mock_request.return_value = mock_response
+
+        from worker.api_client import PrimaryAPIClient
+        client = PrimaryAPIClient('http://localhost:3001')
+
+        client.complete_job('job-1', 'worker-1', exit_code=0,
+                            cmdb_facts={'host1': {'ansible_facts': {}}}, cmdb_collection='hardware')
+
+        sent_data = mock_request.call_args[1]['json']
+        self.assertEqual(sent_data['cmdb_collection'], 'hardware')
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job_with_piggyback_checkin(self, mock_request):
         """Test job completion with piggyback checkin."""
         mock_response = Mock()
@@ -455,7 +497,7 @@ class TestAPIClientComplete(unittest.TestCase):
         sent_data = call_args[1]['json']
         self.assertEqual(sent_data['checkin'], checkin)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job_failure(self, mock_request):
         """Test job completion with failure."""
         mock_response = Mock()
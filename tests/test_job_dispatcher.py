@@ -0,0 +1,148 @@
+"""
+Unit tests for the event-driven Job Dispatcher.
+
+Uses a fake router so the dispatcher loop can be tested without storage.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web.job_dispatcher import JobDispatcher
+
+
+class FakeRouter:
+    """Router stub that assigns queued job IDs in windows."""
+
+    def __init__(self, queued=0, assignable=None):
+        self.queued = [f'job-{i}' for i in range(queued)]
+        self.assignable = assignable
+        self.calls = 0
+        self.routed = threading.Event()
+
+    def route_pending_jobs(self, limit=10):
+        self.calls += 1
+        window, self.queued = self.queued[:limit], self.queued[limit:]
+        results = []
+        for job_id in window:
+            ok = self.assignable is None or job_id in self.assignable
+            results.append({'job_id': job_id, 'assigned': ok, 'worker_id': 'w1' if ok else None})
+        self.routed.set()
+        return results
+
+
+class TestDispatchOnce(unittest.TestCase):
+    """Test a single routing pass."""
+
+    def test_routes_windows_until_queue_drained(self):
+        """Test a pass keeps routing windows while they are full and assigning."""
+        router = FakeRouter(queued=25)
+        dispatcher = JobDispatcher(lambda: router, batch_size=10)
+
+        assigned = dispatcher.dispatch_once()
+
+        self.assertEqual(len(assigned), 25)
+        self.assertEqual(router.calls, 3)
+        self.assertEqual(dispatcher.stats['jobs_assigned'], 25)
+
+    def test_stops_when_window_assigns_nothing(self):
+        """Test a pass stops when no job in a window could be placed."""
+        router = FakeRouter(queued=30, assignable=set())
+        dispatcher = JobDispatcher(lambda: router, batch_size=10)
+
+        self.assertEqual(dispatcher.dispatch_once(), [])
+        self.assertEqual(router.calls, 1)
+
+    def test_on_assigned_callback(self):
+        """Test the callback receives the assignments of a pass."""
+        received = []
+        router = FakeRouter(queued=3)
+        dispatcher = JobDispatcher(lambda: router, on_assigned=received.extend)
+
+        dispatcher.dispatch_once()
+
+        self.assertEqual([r['job_id'] for r in received], ['job-0', 'job-1', 'job-2'])
+
+    def test_on_assigned_not_called_without_assignments(self):
+        """Test the callback is skipped for empty passes."""
+        received = []
+        dispatcher = JobDispatcher(lambda: FakeRouter(), on_assigned=received.append)
+
+        dispatcher.dispatch_once()
+
+        self.assertEqual(received, [])
+
+
+class TestDispatcherLoop(unittest.TestCase):
+    """Test the background loop wake-ups."""
+
+    def setUp(self):
+        self.router = FakeRouter()
+        self.dispatcher = JobDispatcher(lambda: self.router, safety_interval=60)
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def test_notify_routes_immediately(self):
+        """Test a notification triggers a pass well under a second."""
+        self.dispatcher.start()
+        self.assertTrue(self.dispatcher.is_running())
+
+        started = time.monotonic()
+        self.dispatcher.notify('job_completed')
+
+        self.assertTrue(self.router.routed.wait(2))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.dispatcher.stats['last_wake_reasons'], ['job_completed'])
+
+    def test_burst_of_notifications_is_coalesced(self):
+        """Test notifications sent together produce a single pass."""
+        self.dispatcher.start()
+        for reason in ('job_submitted', 'worker_checkin', 'job_submitted'):
+            self.dispatcher.notify(reason)
+
+        self.assertTrue(self.router.routed.wait(2))
+        time.sleep(0.2)
+
+        self.assertEqual(self.router.calls, 1)
+        self.assertEqual(self.dispatcher.stats['last_wake_reasons'], ['job_submitted', 'worker_checkin'])
+
+    def test_safety_timer_routes_without_notification(self):
+        """Test the loop routes periodically even if nothing notifies it."""
+        self.dispatcher.safety_interval = 0.1
+        self.dispatcher.start()
+
+        self.assertTrue(self.router.routed.wait(2))
+        self.assertEqual(self.dispatcher.stats['last_wake_reasons'], ['timer'])
+
+    def test_router_errors_do_not_kill_loop(self):
+        """Test a failing pass is counted and the loop keeps running."""
+        calls = []
+
+        def broken_router():
+            calls.append(1)
+            raise RuntimeError('storage unavailable')
+
+        self.dispatcher.get_router = broken_router
+        self.dispatcher.start()
+        self.dispatcher.notify('job_submitted')
+        time.sleep(0.3)
+
+        self.assertEqual(self.dispatcher.stats['errors'], len(calls))
+        self.assertTrue(self.dispatcher.is_running())
+
+    def test_stop(self):
+        """Test stop ends the loop."""
+        self.dispatcher.start()
+        self.dispatcher.stop()
+
+        self.assertFalse(self.dispatcher.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
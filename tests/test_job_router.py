@@ -43,11 +43,47 @@ class MockStorageBackend:
         self.jobs[job_id].update(updates)
         return True
 
+    def get_all_jobs(self, filters=None):
+        jobs = list(self.jobs.values())
+        if filters and 'status' in filters:
+            jobs = [j for j in jobs if j.get('status') in filters['status']]
+        return jobs
+
     def get_pending_jobs(self):
         jobs = [j for j in self.jobs.values() if j.get('status') == 'queued']
         jobs.sort(key=lambda x: (-x.get('priority', 50), x.get('submitted_at', '')))
         return jobs
 
+    def assign_jobs(self, assignments):
+        self.assign_calls = getattr(self, 'assign_calls', 0) + 1
+        assigned = []
+        for job_id, worker_id in assignments.items():
+            job = self.jobs.get(job_id)
+            if job and job.get('status') == 'queued':
+                job.update({'status': 'assigned', 'assigned_worker': worker_id})
+                assigned.append(job_id)
+        return assigned
+
+    def rank_queued_jobs(self, policy, worker_tags=None, limit=None, now=None):
+        ordered = JobRouter(self).order_pending_jobs(now=datetime.fromisoformat(now) if now else None)
+        ids = [job['id'] for job, _ in ordered
+               if worker_tags is None or set(job.get('required_tags') or []) <= set(worker_tags)]
+        return ids[:limit]
+
+    def claim_jobs(self, worker_id, worker_tags, slots=1, job_ids=None):
+        self.claim_calls = getattr(self, 'claim_calls', 0) + 1
+        claimed = []
+        for job in self.get_pending_jobs():
+            if job_ids is not None and job['id'] not in job_ids:
+                continue
+            if not set(job.get('required_tags', [])) <= set(worker_tags):
+                continue
+            job.update({'status': 'assigned', 'assigned_worker': worker_id})
+            claimed.append(job)
+            if len(claimed) >= slots:
+                break
+        return claimed
+
 
 class TestTagEligibility(unittest.TestCase):
     """Test tag eligibility checking."""
@@ -588,6 +624,214 @@ class TestRoutePendingJobs(unittest.TestCase):
         self.assertEqual(len(results), 1)
 
 
+class TestBatchRouting(unittest.TestCase):
+    """Test one-snapshot batch routing of the pending queue."""
+
+    def setUp(self):
+        self.storage = MockStorageBackend()
+        self.router = JobRouter(self.storage)
+
+    def _worker(self, worker_id, tags, max_jobs=2):
+        self.storage.workers[worker_id] = {
+            'id': worker_id,
+            'name': worker_id,
+            'tags': tags,
+            'status': 'online',
+            'max_concurrent_jobs': max_jobs,
+            'system_stats': {'cpu_percent': 10, 'memory_percent': 10}
+        }
+
+    def _job(self, job_id, required_tags=None, priority=50):
+        self.storage.jobs[job_id] = {
+            'id': job_id,
+            'playbook': 'test.yml',
+            'status': 'queued',
+            'required_tags': required_tags or [],
+            'preferred_tags': [],
+            'priority': priority,
+            'submitted_by': job_id,
+            'submitted_at': datetime.now().isoformat()
+        }
+
+    def test_flexible_job_leaves_scarce_worker_free(self):
+        """Test an untagged job avoids the only worker a later job can use."""
+        self._worker('gpu', ['gpu', 'cpu'], max_jobs=1)
+        self._worker('cpu', ['cpu'], max_jobs=1)
+        self._job('any', priority=90)
+        self._job('needs-gpu', required_tags=['gpu'], priority=10)
+
+        results = {r['job_id']: r for r in self.router.route_pending_jobs(limit=10)}
+
+        self.assertEqual(results['any']['worker_id'], 'cpu')
+        self.assertEqual(results['needs-gpu']['worker_id'], 'gpu')
+
+    def test_capacity_is_respected_within_a_pass(self):
+        """Test a pass never assigns more jobs than a worker has slots."""
+        self._worker('w1', [], max_jobs=2)
+        for i in range(5):
+            self._job(f'j{i}')
+
+        results = self.router.route_pending_jobs(limit=10)
+
+        self.assertEqual(sum(1 for r in results if r['assigned']), 2)
+        self.assertEqual([r['reason'] for r in results if not r['assigned']],
+                         ['No eligible worker available'] * 3)
+
+    def test_single_commit_without_per_worker_queries(self):
+        """Test a pass commits once and never queries jobs per worker."""
+        for i in range(5):
+            self._worker(f'w{i}', [], max_jobs=4)
+        for i in range(20):
+            self._job(f'j{i}')
+
+        def fail(*args, **kwargs):
+            raise AssertionError('get_worker_jobs called during batch routing')
+        self.storage.get_worker_jobs = fail
+
+        results = self.router.route_pending_jobs(limit=50)
+
+        self.assertEqual(sum(1 for r in results if r['assigned']), 20)
+        self.assertEqual(self.storage.assign_calls, 1)
+
+    def test_load_spreads_across_workers(self):
+        """Test in-memory load updates spread a window over equal workers."""
+        self._worker('w1', [], max_jobs=4)
+        self._worker('w2', [], max_jobs=4)
+        for i in range(4):
+            self._job(f'j{i}')
+
+        results = self.router.route_pending_jobs(limit=10)
+
+        per_worker = {}
+        for r in results:
+            per_worker[r['worker_id']] = per_worker.get(r['worker_id'], 0) + 1
+        self.assertEqual(per_worker, {'w1': 2, 'w2': 2})
+
+
+class TestQueueOrdering(unittest.TestCase):
+    """Test priority aging and fair-share ordering of the pending queue."""
+
+    NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+    def setUp(self):
+        self.storage = MockStorageBackend()
+        self.router = JobRouter(self.storage)
+
+    def _queue(self, job_id, submitted_by, priority=50, minutes_ago=0, **kwargs):
+        self.storage.jobs[job_id] = {
+            'id': job_id,
+            'playbook': 'test.yml',
+            'status': kwargs.get('status', 'queued'),
+            'required_tags': kwargs.get('required_tags', []),
+            'priority': priority,
+            'submitted_by': submitted_by,
+            'assigned_worker': kwargs.get('assigned_worker'),
+            'submitted_at': (self.NOW - timedelta(minutes=minutes_ago)).isoformat()
+        }
+
+    def _order(self):
+        return [job['id'] for job, _ in self.router.order_pending_jobs(now=self.NOW)]
+
+    def test_submitter_class(self):
+        """Test scheduler and batch submitters are classified by prefix."""
+        self.assertEqual(JobRouter.submitter_class('scheduler:abcd1234'), 'scheduler')
+        self.assertEqual(JobRouter.submitter_class('batch:abcd1234'), 'batch')
+        self.assertEqual(JobRouter.submitter_class('alice'), 'user')
+        self.assertEqual(JobRouter.submitter_class(None), 'user')
+
+    def test_aging_is_capped(self):
+        """Test waiting jobs gain priority up to MAX_AGING_BOOST."""
+        self._queue('fresh', 'alice', priority=10)
+        self._queue('old', 'alice', priority=10, minutes_ago=60)
+        self._queue('ancient', 'alice', priority=10, minutes_ago=100000)
+
+        self.assertEqual(self.router.calculate_effective_priority(self.storage.jobs['fresh'], self.NOW), 10)
+        self.assertEqual(self.router.calculate_effective_priority(self.storage.jobs['old'], self.NOW), 40)
+        self.assertEqual(self.router.calculate_effective_priority(self.storage.jobs['ancient'], self.NOW),
+                         10 + JobRouter.MAX_AGING_BOOST)
+
+    def test_old_low_priority_job_overtakes_new_high_priority(self):
+        """Test aging lets a long-waiting low-priority job run."""
+        self._queue('old-low', 'alice', priority=20, minutes_ago=120)
+        self._queue('new-high', 'bob', priority=60)
+
+        self.assertEqual(self._order(), ['old-low', 'new-high'])
+
+    def test_scheduled_job_not_starved_by_batch_flood(self):
+        """Test a priority-60 scheduled job runs early despite many batch jobs."""
+        for i in range(20):
+            self._queue(f'batch-{i}', 'batch:1234abcd', minutes_ago=1)
+        self._queue('sched', 'scheduler:5678abcd', priority=60)
+
+        self.assertLessEqual(self._order().index('sched'), 1)
+
+    def test_fair_share_interleaves_submitters(self):
+        """Test equal-priority submitters alternate rather than run FIFO."""
+        for i in range(3):
+            self._queue(f'alice-{i}', 'alice', minutes_ago=10 - i)
+        for i in range(3):
+            self._queue(f'bob-{i}', 'bob', minutes_ago=5 - i)
+
+        order = self._order()
+
+        self.assertEqual({order[0], order[1]} & {'alice-0', 'bob-0'}, {'alice-0', 'bob-0'})
+
+    def test_active_jobs_count_against_fair_share(self):
+        """Test a submitter with running jobs yields to one without."""
+        for i in range(3):
+            self._queue(f'alice-run-{i}', 'alice', status='running', assigned_worker='w1')
+        self._queue('alice-next', 'alice', minutes_ago=1)
+        self._queue('bob-next', 'bob')
+
+        self.assertEqual(self._order(), ['bob-next', 'alice-next'])
+
+    def test_queue_status_positions_and_wait(self):
+        """Test queue status reports positions and expected waits."""
+        self.storage.workers = {
+            'w1': {'id': 'w1', 'status': 'online', 'max_concurrent_jobs': 2,
+                   'stats': {'avg_job_duration': 60}}
+        }
+        for i in range(5):
+            self._queue(f'j{i}', f'user-{i}', priority=50 - i)
+
+        status = self.router.get_queue_status(now=self.NOW)
+
+        self.assertEqual(status['capacity'], 2)
+        self.assertEqual([e['position'] for e in status['queue']], [1, 2, 3, 4, 5])
+        self.assertEqual([e['expected_wait_seconds'] for e in status['queue']], [0, 0, 60, 60, 120])
+
+    def test_queue_status_without_workers(self):
+        """Test expected wait is unknown with no online workers."""
+        self._queue('j1', 'alice')
+
+        status = self.router.get_queue_status(now=self.NOW)
+
+        self.assertIsNone(status['queue'][0]['expected_wait_seconds'])
+
+    def test_claim_for_worker_skips_ineligible_jobs(self):
+        """Test claiming in dispatch order only takes jobs the worker can run."""
+        self._queue('gpu-job', 'alice', priority=90, required_tags=['gpu'])
+        self._queue('cpu-job', 'bob', priority=40)
+        worker = {'id': 'w1', 'tags': ['cpu']}
+
+        claimed = self.router.claim_for_worker(worker, 2)
+
+        self.assertEqual([j['id'] for j in claimed], ['cpu-job'])
+        self.assertEqual(self.storage.jobs['gpu-job']['status'], 'queued')
+
+    def test_claim_for_worker_claims_in_one_call(self):
+        """Test all slots are claimed with a single storage claim, in dispatch order."""
+        self._queue('alice-1', 'alice', minutes_ago=3)
+        self._queue('alice-2', 'alice', minutes_ago=2)
+        self._queue('bob-1', 'bob', minutes_ago=1)
+        worker = {'id': 'w1', 'tags': []}
+
+        claimed = self.router.claim_for_worker(worker, 2)
+
+        self.assertEqual([j['id'] for j in claimed], ['alice-1', 'bob-1'])
+        self.assertEqual(self.storage.claim_calls, 1)
+
+
 class TestWorkerRecommendations(unittest.TestCase):
     """Test worker recommendations."""
 
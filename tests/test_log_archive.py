@@ -0,0 +1,265 @@
+"""
+Unit tests for the compressed log archive tier and the retention policy.
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+import log_index
+from log_archive import (archive_log, archive_path, is_archived, log_exists,
+                         log_size, open_log, read_head, remove_log, table_path)
+from log_catalog import LogCatalog
+from log_index import LineIndex, index_path
+from log_ingest import LogIngestor, discard_partial_log, promote_partial_log
+from log_retention import DAY, PARTIAL_GRACE, LogRetention
+
+
+def log_lines(count):
+    return ''.join(f'TASK [step {i}] ok: [host{i % 7}] changed=false\n' for i in range(count))
+
+
+def disk_usage(directory):
+    """Bytes used by the files in a directory, hard links counted once."""
+    seen = {}
+    for name in os.listdir(directory):
+        st = os.stat(os.path.join(directory, name))
+        seen[(st.st_dev, st.st_ino)] = st.st_size
+    return sum(seen.values())
+
+
+class JobStorage:
+    """Storage stub holding one running job per ID."""
+
+    def __init__(self, *job_ids):
+        self.jobs = {j: {'id': j, 'status': 'running', 'assigned_worker': 'worker-1'} for j in job_ids}
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def update_job(self, job_id, updates):
+        self.jobs[job_id].update(updates)
+        return True
+
+
+class TestLogArchive(unittest.TestCase):
+    """Test archiving and reading archived logs."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'job.log')
+        self.content = log_lines(2000)
+        with open(self.path, 'w') as f:
+            f.write(self.content)
+        log_index._cache.clear()
+
+    def tearDown(self):
+        log_index._cache.clear()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_archive_replaces_log(self):
+        """Test the plain log is replaced by a smaller archive."""
+        mtime = os.path.getmtime(self.path)
+        size, archived_size = archive_log(self.path, chunk_size=4096)
+
+        self.assertEqual(size, len(self.content))
+        self.assertLess(archived_size, size / 5)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(is_archived(self.path))
+        self.assertTrue(log_exists(self.path))
+        self.assertEqual(log_size(self.path), size)
+        self.assertEqual(os.path.getmtime(archive_path(self.path)), mtime)
+
+    def test_archive_is_plain_gzip(self):
+        """Test the member series reads back as one gzip file."""
+        archive_log(self.path, chunk_size=4096)
+        with gzip.open(archive_path(self.path), 'rt') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_range_reads(self):
+        """Test seeks read the same bytes as the plain log, across members."""
+        archive_log(self.path, chunk_size=4096)
+        data = self.content.encode()
+        with open_log(self.path) as f:
+            for start, length in ((0, 10), (4090, 20), (10000, 9000), (len(data) - 5, 100)):
+                f.seek(start)
+                self.assertEqual(f.read(length), data[start:start + length])
+
+    def test_text_mode_and_head(self):
+        """Test text reads and the bounded head read."""
+        archive_log(self.path, chunk_size=4096)
+        with open_log(self.path, 'r') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(read_head(self.path, 50), self.content.encode()[:50])
+
+    def test_line_index_survives_archiving(self):
+        """Test pages of an archived log match the plain log."""
+        plain_page = LineIndex.open(self.path).read_lines(1500, 3)
+        archive_log(self.path, chunk_size=4096)
+        log_index._cache.clear()
+
+        page = LineIndex.open(self.path).read_lines(1500, 3)
+        self.assertEqual(page['content'], plain_page['content'])
+        self.assertEqual(page['total_lines'], 2000)
+
+    def test_remove_log(self):
+        """Test removing an archived log deletes archive and table."""
+        archive_log(self.path, chunk_size=4096)
+        self.assertGreater(remove_log(self.path), 0)
+        self.assertFalse(os.path.exists(archive_path(self.path)))
+        self.assertFalse(os.path.exists(table_path(self.path)))
+        self.assertFalse(log_exists(self.path))
+
+
+class TestLogRetention(unittest.TestCase):
+    """Test LogRetention archival and pruning."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.now = time.time()
+        log_index._cache.clear()
+
+    def tearDown(self):
+        log_index._cache.clear()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write_log(self, name, age_days, lines=200):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'w') as f:
+            f.write('=== Playbook: ping | Target: all | Worker: local-executor | Started: x ===\n')
+            f.write(log_lines(lines))
+        mtime = self.now - age_days * DAY
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def age(self, path, age_days):
+        mtime = self.now - age_days * DAY
+        os.utime(path, (mtime, mtime))
+
+    def complete_streamed_job(self, job_id, storage, lines=200):
+        """Stream a job's log through LogIngestor and promote it as on completion."""
+        ingestor = LogIngestor(lambda: storage, self.test_dir)
+        header = '=== Playbook: ping | Target: all | Worker: worker-1 | Started: x ===\n'
+        for chunk in (header, log_lines(lines)):
+            self.assertEqual(ingestor.ingest('worker-1', [{'job_id': job_id, 'content': chunk}])[0]['status'], 'ok')
+        ingestor.close_job(job_id)
+        partial = ingestor.partial_log_path(job_id)
+        path = os.path.join(self.test_dir, f'job-{job_id}.log')
+        promote_partial_log(partial, path)
+        storage.update_job(job_id, {'status': 'completed', 'log_file': os.path.basename(path)})
+        discard_partial_log(partial)
+        return path
+
+    def test_streamed_job_log_archives_to_one_copy(self):
+        """Test an archived cluster job log leaves no plain-text copy behind."""
+        path = self.complete_streamed_job('j1', JobStorage('j1'))
+        self.age(path, 10)
+        size = os.path.getsize(path)
+
+        stats = LogRetention(LogCatalog(self.test_dir), archive_after_days=7).run(now=self.now)
+
+        self.assertEqual(stats['archived'], 1)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), sorted(
+            os.path.basename(p) for p in (archive_path(path), table_path(path), index_path(path))))
+        self.assertLess(disk_usage(self.test_dir), size)
+
+    def test_deleting_streamed_job_log_frees_disk(self):
+        """Test retention deletion of a cluster job log lowers LOGS_DIR usage."""
+        path = self.complete_streamed_job('j1', JobStorage('j1'))
+        self.age(path, 40)
+        self.write_log('new.log', 1)
+        before = disk_usage(self.test_dir)
+
+        stats = LogRetention(LogCatalog(self.test_dir), archive_after_days=0, max_age_days=30).run(now=self.now)
+
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(before - disk_usage(self.test_dir), stats['bytes_freed'])
+        self.assertEqual(os.listdir(self.test_dir), ['new.log'])
+
+    def test_orphaned_partial_logs_swept(self):
+        """Test partial logs of jobs no longer running are deleted after the grace period."""
+        storage = JobStorage('running', 'requeued', 'recent')
+        storage.jobs['requeued']['status'] = 'queued'
+        storage.jobs['recent']['status'] = 'cancelled'
+        for job_id in ('running', 'requeued', 'recent', 'gone'):
+            path = os.path.join(self.test_dir, f'partial-{job_id}.log')
+            with open(path, 'w') as f:
+                f.write(log_lines(10))
+            self.age(path, 0 if job_id == 'recent' else PARTIAL_GRACE * 2 / DAY)
+        deleted = []
+
+        active = lambda job_id: (storage.get_job(job_id) or {}).get('status') in ('assigned', 'running')
+        stats = LogRetention(LogCatalog(self.test_dir), on_delete=deleted.append,
+                             partial_active=active).run(now=self.now)
+
+        self.assertEqual(stats['partials_deleted'], 2)
+        self.assertEqual(sorted(deleted), ['partial-gone.log', 'partial-requeued.log'])
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['partial-recent.log', 'partial-running.log'])
+
+    def test_archives_old_logs(self):
+        """Test logs past the archive age are compressed and stay catalogued."""
+        old = self.write_log('old.log', 10)
+        new = self.write_log('new.log', 1)
+        catalog = LogCatalog(self.test_dir)
+
+        stats = LogRetention(catalog, archive_after_days=7).run(now=self.now)
+
+        self.assertEqual(stats['archived'], 1)
+        self.assertGreater(stats['bytes_freed'], 0)
+        self.assertTrue(is_archived(old))
+        self.assertFalse(is_archived(new))
+        self.assertTrue(os.path.exists(index_path(old)))
+        entry = catalog.get('old.log')
+        self.assertTrue(entry['archived'])
+        self.assertLess(entry['disk_size'], entry['size'])
+
+        # Rebuilt from disk, the archive is found under its log name
+        rebuilt = LogCatalog(self.test_dir)
+        self.assertEqual(rebuilt.get('old.log')['playbook'], 'ping')
+        self.assertTrue(rebuilt.get('old.log')['archived'])
+
+    def test_running_logs_untouched(self):
+        """Test a running log is neither archived nor deleted."""
+        self.write_log('run.log', 30)
+        catalog = LogCatalog(self.test_dir)
+        catalog.record('run.log', status='running')
+
+        stats = LogRetention(catalog, archive_after_days=7, max_age_days=10).run(now=self.now)
+        self.assertEqual((stats['archived'], stats['deleted']), (0, 0))
+
+    def test_max_age(self):
+        """Test logs past the max age are deleted."""
+        old = self.write_log('old.log', 40)
+        self.write_log('new.log', 1)
+        catalog = LogCatalog(self.test_dir)
+
+        stats = LogRetention(catalog, archive_after_days=0, max_age_days=30).run(now=self.now)
+
+        self.assertEqual(stats['deleted'], 1)
+        self.assertFalse(log_exists(old))
+        self.assertFalse(os.path.exists(index_path(old)))
+        self.assertEqual([e['log_file'] for e in catalog.oldest()], ['new.log'])
+
+    def test_max_count_and_bytes(self):
+        """Test the oldest logs go first when over count or bytes."""
+        for i in range(5):
+            self.write_log(f'log{i}.log', 10 - i)
+        catalog = LogCatalog(self.test_dir)
+
+        LogRetention(catalog, archive_after_days=0, max_count=3).run(now=self.now)
+        self.assertEqual([e['log_file'] for e in catalog.oldest()], ['log2.log', 'log3.log', 'log4.log'])
+
+        one_log = catalog.get('log4.log')['disk_size']
+        LogRetention(catalog, archive_after_days=0, max_bytes=one_log + 1).run(now=self.now)
+        self.assertEqual([e['log_file'] for e in catalog.oldest()], ['log4.log'])
+
+
+if __name__ == '__main__':
+    unittest.main()
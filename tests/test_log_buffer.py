@@ -0,0 +1,110 @@
+"""
+Unit tests for the live log ring buffers.
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from log_buffer import LogBufferRegistry, LogRingBuffer
+
+
+class TestLogRingBuffer(unittest.TestCase):
+    """Test LogRingBuffer sequencing and catch-up."""
+
+    def test_sequence_numbers(self):
+        """Test chunks get increasing sequence numbers from 1."""
+        buffer = LogRingBuffer()
+        self.assertEqual(buffer.append('one\n'), 1)
+        self.assertEqual(buffer.append('two\n'), 2)
+        self.assertEqual(buffer.seq, 2)
+
+    def test_since_returns_missed_chunks(self):
+        """Test a reconnecting client gets only what it missed, in one string."""
+        buffer = LogRingBuffer()
+        for line in ('one\n', 'two\n', 'three\n'):
+            buffer.append(line)
+
+        self.assertEqual(buffer.since(0), ('one\ntwo\nthree\n', 3, False))
+        self.assertEqual(buffer.since(1), ('two\nthree\n', 3, False))
+        self.assertEqual(buffer.since(3), ('', 3, False))
+
+    def test_eviction_forces_fallback(self):
+        """Test a client behind the evicted chunks must read from disk."""
+        buffer = LogRingBuffer(max_bytes=10)
+        for i in range(5):
+            buffer.append(f'line {i}\n')
+
+        content, seq, reset = buffer.since(0)
+        self.assertIsNone(content)
+        self.assertEqual(seq, 5)
+        self.assertTrue(reset)
+        self.assertEqual(buffer.since(4), ('line 4\n', 5, False))
+
+    def test_replace_resets_content(self):
+        """Test a replace chunk restarts content and offsets but not seq."""
+        buffer = LogRingBuffer()
+        buffer.append('old\n')
+        seq = buffer.append('new\n', replace=True)
+
+        self.assertEqual(seq, 2)
+        self.assertEqual(buffer.since(0), ('new\n', 2, True))
+        self.assertEqual(buffer.since(1), ('new\n', 2, True))
+        self.assertEqual(buffer.snapshot(), (2, 4))
+
+    def test_snapshot_counts_utf8_bytes(self):
+        """Test the end offset matches the bytes written to the log file."""
+        buffer = LogRingBuffer(max_bytes=4)
+        buffer.append('héllo\n')
+        buffer.append('ok\n')
+
+        self.assertEqual(buffer.snapshot(), (2, len('héllo\nok\n'.encode('utf-8'))))
+
+
+class TestLogBufferRegistry(unittest.TestCase):
+    """Test LogBufferRegistry stream lifetime."""
+
+    def test_streams_created_on_append(self):
+        """Test streams are created lazily and kept separately."""
+        registry = LogBufferRegistry()
+        registry.append('run:1', 'a\n')
+        registry.append('run:2', 'b\n')
+
+        self.assertEqual(registry.get('run:1').since(0)[0], 'a\n')
+        self.assertIsNone(registry.get('run:3'))
+        self.assertEqual(registry.get_stats(), {'streams': 2, 'bytes': 4})
+
+    def test_finished_streams_expire(self):
+        """Test finished streams are dropped after the retention period."""
+        registry = LogBufferRegistry()
+        registry.RETENTION = 0.05
+        registry.append('batch:b1:site', 'a\n')
+        registry.append('batch:b1:db', 'b\n')
+        registry.append('run:1', 'c\n')
+        registry.finish_prefix('batch:b1:')
+
+        self.assertIsNotNone(registry.get('batch:b1:site'))
+        time.sleep(0.1)
+        self.assertEqual(registry.keys(), ['run:1'])
+
+    def test_append_revives_finished_stream(self):
+        """Test a finished stream appended to again is no longer expired."""
+        registry = LogBufferRegistry()
+        registry.RETENTION = 0.05
+        registry.append('job:1', 'attempt 1\n')
+        registry.finish('job:1')
+        registry.append('job:1', 'attempt 2\n', replace=True)
+
+        time.sleep(0.1)
+        self.assertEqual(registry.get('job:1').since(0)[0], 'attempt 2\n')
+        registry.finish('job:1')
+        time.sleep(0.1)
+        self.assertIsNone(registry.get('job:1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Unit tests for the log catalog that indexes LOGS_DIR.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from log_catalog import LogCatalog, parse_header
+
+
+class TestParseHeader(unittest.TestCase):
+    """Test log header parsing."""
+
+    def test_run_header(self):
+        """Test a local run header."""
+        fields = parse_header('=== Playbook: ping | Target: web | Worker: local-executor | Started: 2024-01-01T10:00:00 ===')
+        self.assertEqual(fields, {
+            'playbook': 'ping',
+            'target': 'web',
+            'worker': 'local-executor',
+            'started': '2024-01-01T10:00:00'
+        })
+
+    def test_batch_header(self):
+        """Test a batch header names its targets."""
+        fields = parse_header('=== Batch Job: abcd1234 | Playbook: ping | Targets: a, b | Worker: local-executor | Started: x ===')
+        self.assertEqual(fields['playbook'], 'ping')
+        self.assertEqual(fields['target'], 'a, b')
+
+    def test_not_a_header(self):
+        """Test ordinary output has no fields."""
+        self.assertEqual(parse_header('PLAY [all] ***'), {})
+
+
+class TestLogCatalog(unittest.TestCase):
+    """Test LogCatalog indexing and lookups."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.mtime = 1700000000
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write_log(self, name, playbook=None, content='ok\n'):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'w') as f:
+            if playbook:
+                f.write(f'=== Playbook: {playbook} | Target: all | Worker: local-executor | Started: now ===\n')
+            f.write(content)
+        self.mtime += 10
+        os.utime(path, (self.mtime, self.mtime))
+        return path
+
+    def test_rebuild_from_disk(self):
+        """Test the catalog is built from headers on first use."""
+        self.write_log('ping-all-1.log', 'ping')
+        self.write_log('ping-all-2.log', 'ping')
+        self.write_log('deploy-all-1.log', 'deploy')
+        self.write_log('ansible.log')
+        self.write_log('partial-job1.log')
+
+        catalog = LogCatalog(self.test_dir)
+
+        self.assertEqual(len(catalog), 3)
+        self.assertEqual(catalog.latest('ping')['log_file'], 'ping-all-2.log')
+        self.assertEqual(catalog.latest('deploy')['log_file'], 'deploy-all-1.log')
+        self.assertIsNone(catalog.latest('ping-all'))
+
+    def test_rebuild_uses_storage_jobs(self):
+        """Test cluster job logs get their metadata from storage."""
+        self.write_log('ping_abcd1234_20240101.log')
+        storage = MagicMock()
+        storage.get_history.return_value = []
+        storage.get_all_jobs.return_value = [{
+            'id': 'job-1', 'playbook': 'ping', 'status': 'failed',
+            'assigned_worker': 'w1', 'log_file': 'ping_abcd1234_20240101.log'
+        }]
+
+        catalog = LogCatalog(self.test_dir, lambda: storage)
+        entry = catalog.find_job('job-1')
+
+        self.assertEqual(entry['log_file'], 'ping_abcd1234_20240101.log')
+        self.assertEqual(entry['status'], 'failed')
+        self.assertEqual(entry['worker_id'], 'w1')
+        self.assertEqual(catalog.latest('ping')['log_file'], 'ping_abcd1234_20240101.log')
+
+    def test_page_newest_first(self):
+        """Test paging walks logs newest first."""
+        for i in range(5):
+            self.write_log(f'ping-{i}.log', 'ping')
+        catalog = LogCatalog(self.test_dir)
+
+        entries, total = catalog.page(offset=1, limit=2)
+        self.assertEqual(total, 5)
+        self.assertEqual([e['log_file'] for e in entries], ['ping-3.log', 'ping-2.log'])
+
+        entries, total = catalog.page(offset=4, limit=2, playbook='ping')
+        self.assertEqual([e['log_file'] for e in entries], ['ping-0.log'])
+        self.assertEqual(catalog.page(offset=10, limit=2), ([], 5))
+
+    def test_record_updates_entry(self):
+        """Test recording a run reorders and re-reads the log."""
+        self.write_log('ping-old.log', 'ping')
+        catalog = LogCatalog(self.test_dir)
+
+        self.write_log('ping-new.log', content='')
+        catalog.record('ping-new.log', playbook='ping', run_id='run-1', status='running')
+        self.assertEqual(catalog.latest('ping')['log_file'], 'ping-new.log')
+
+        self.write_log('ping-new.log', content='more output\n')
+        entry = catalog.record('ping-new.log', status='completed')
+        self.assertEqual(entry['status'], 'completed')
+        self.assertEqual(entry['run_id'], 'run-1')
+        self.assertGreater(entry['size'], 0)
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(catalog.find_job('run-1')['log_file'], 'ping-new.log')
+
+    def test_record_missing_log(self):
+        """Test a log that doesn't exist isn't catalogued."""
+        catalog = LogCatalog(self.test_dir)
+        self.assertIsNone(catalog.record('missing.log', playbook='ping'))
+        self.assertIsNone(catalog.latest('ping'))
+
+    def test_remove(self):
+        """Test removing a log drops it from every lookup."""
+        self.write_log('ping-1.log', 'ping')
+        catalog = LogCatalog(self.test_dir)
+        catalog.record('ping-1.log', job_id='job-1')
+
+        catalog.remove('ping-1.log')
+        self.assertIsNone(catalog.get('ping-1.log'))
+        self.assertIsNone(catalog.latest('ping'))
+        self.assertIsNone(catalog.find_job('job-1'))
+        self.assertEqual(catalog.page(), ([], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Unit tests for the sidecar line-offset index used to page through logs.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+import log_index
+from log_index import LineIndex, LineIndexWriter, index_path, remove_index
+from log_writer import BufferedLogWriter
+
+
+class TestLineIndex(unittest.TestCase):
+    """Test LineIndex paging over plain log files."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'job.log')
+        log_index._cache.clear()
+
+    def tearDown(self):
+        log_index._cache.clear()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write(self, content, mode='w'):
+        with open(self.path, mode) as f:
+            f.write(content)
+
+    def test_read_lines_page(self):
+        """Test a page is sliced by line number."""
+        self.write(''.join(f'line {i}\n' for i in range(100)))
+        page = LineIndex.open(self.path).read_lines(10, 3)
+
+        self.assertEqual(page['content'], 'line 10\nline 11\nline 12\n')
+        self.assertEqual(page['from_line'], 10)
+        self.assertEqual(page['count'], 3)
+        self.assertEqual(page['total_lines'], 100)
+
+    def test_tail_and_unterminated_last_line(self):
+        """Test tail counts a last line without a newline."""
+        self.write('a\nb\nc\nd')
+        index = LineIndex.open(self.path)
+
+        self.assertEqual(index.line_count(), 4)
+        self.assertEqual(index.tail(2)['content'], 'c\nd')
+        self.assertEqual(index.read_lines(-1, 5)['content'], 'd')
+
+    def test_out_of_range_page_is_empty(self):
+        """Test reading past the end returns no lines."""
+        self.write('a\nb\n')
+        page = LineIndex.open(self.path).read_lines(5, 10)
+
+        self.assertEqual(page['content'], '')
+        self.assertEqual(page['count'], 0)
+        self.assertEqual(page['from_line'], 2)
+
+    def test_sidecar_is_persisted_and_extended(self):
+        """Test the sidecar is written and only appended bytes are rescanned."""
+        self.write('a\nb\n')
+        LineIndex.open(self.path)
+        self.assertEqual(os.path.getsize(index_path(self.path)), 16)
+
+        self.write('c\n', mode='a')
+        log_index._cache.clear()
+        with patch('log_index.line_ends', wraps=log_index.line_ends) as scan:
+            index = LineIndex.open(self.path)
+        self.assertEqual(scan.call_args[0][0], b'c\n')
+        self.assertEqual(index.line_count(), 3)
+        self.assertEqual(os.path.getsize(index_path(self.path)), 24)
+
+    def test_replaced_log_is_reindexed(self):
+        """Test a log rewritten with different content is indexed from scratch."""
+        self.write('first line\nsecond\n')
+        LineIndex.open(self.path)
+        self.write('x\ny\nz\n')
+
+        page = LineIndex.open(self.path).read_lines(0, 10)
+        self.assertEqual(page['total_lines'], 3)
+        self.assertEqual(page['content'], 'x\ny\nz\n')
+
+    def test_remove_index(self):
+        """Test remove_index deletes the sidecar."""
+        self.write('a\n')
+        LineIndex.open(self.path)
+        remove_index(self.path)
+        self.assertFalse(os.path.exists(index_path(self.path)))
+
+
+class TestLineIndexWriter(unittest.TestCase):
+    """Test the index written alongside a streaming log."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'run.log')
+        log_index._cache.clear()
+
+    def tearDown(self):
+        log_index._cache.clear()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_writer_streams_index(self):
+        """Test BufferedLogWriter keeps the sidecar in step with the log."""
+        with patch('log_writer.os.fsync'):
+            with BufferedLogWriter(self.path, flush_interval=10) as writer:
+                writer.write('héllo\n')
+                writer.write('world\n')
+                writer.flush()
+                with open(index_path(self.path), 'rb') as f:
+                    ends = log_index._from_bytes(f.read())
+                self.assertEqual(list(ends), [7, 13])
+                writer.write('partial')
+
+        page = LineIndex.open(self.path).read_lines(1, 5)
+        self.assertEqual(page['content'], 'world\npartial')
+        self.assertEqual(page['total_lines'], 3)
+
+    def test_reader_does_not_write_sidecar_while_writing(self):
+        """Test readers leave a sidecar that a writer owns alone."""
+        with open(self.path, 'wb') as log:
+            writer = LineIndexWriter(self.path)
+            log.write(b'a\nb\n')
+            log.flush()
+            writer.add(b'a\n')
+
+            index = LineIndex.open(self.path)
+            self.assertEqual(index.line_count(), 2)
+            self.assertEqual(os.path.getsize(index_path(self.path)), 8)
+
+            writer.add(b'b\n')
+            writer.close()
+        self.assertEqual(os.path.getsize(index_path(self.path)), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+"""
+Unit tests for offset-addressed log ingest on the primary.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from log_ingest import LogIngestor, chunk_checksum, file_digest, missing_ranges
+
+
+class FakeStorage:
+    """Storage stub holding jobs and counting lookups."""
+
+    def __init__(self, jobs):
+        self.jobs = {j['id']: j for j in jobs}
+        self.lookups = 0
+
+    def get_job(self, job_id):
+        self.lookups += 1
+        return self.jobs.get(job_id)
+
+    def update_job(self, job_id, updates):
+        self.jobs[job_id].update(updates)
+        return True
+
+
+class TestLogIngestor(unittest.TestCase):
+    """Test LogIngestor offset handling, ownership and batching."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.storage = FakeStorage([
+            {'id': 'job-1', 'status': 'running', 'assigned_worker': 'worker-1'},
+            {'id': 'job-2', 'status': 'running', 'assigned_worker': 'worker-1'},
+            {'id': 'job-3', 'status': 'running', 'assigned_worker': 'worker-2'},
+            {'id': 'job-4', 'status': 'completed', 'assigned_worker': 'worker-1'}
+        ])
+        self.updates = []
+        self.ingestor = LogIngestor(lambda: self.storage, self.test_dir,
+                                    on_update=lambda *args: self.updates.append(args))
+
+    def tearDown(self):
+        self.ingestor.close_job('job-1')
+        self.ingestor.close_job('job-2')
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write(self, content, offset, append=True, job_id='job-1'):
+        return self.ingestor.ingest('worker-1', [{'job_id': job_id, 'content': content,
+                                                  'offset': offset, 'append': append}])[0]
+
+    def read(self, job_id='job-1'):
+        with open(self.ingestor.partial_log_path(job_id), encoding='utf-8') as f:
+            return f.read()
+
+    def test_sequential_chunks(self):
+        """Test chunks at the current end are appended."""
+        self.write('header\n', 0, append=False)
+        result = self.write('ok: [host1]\n', 7)
+
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['offset'], 19)
+        self.assertEqual(self.read(), 'header\nok: [host1]\n')
+        self.assertEqual(self.storage.jobs['job-1']['partial_log_file'], 'partial-job-1.log')
+
+    def test_duplicate_chunk_skipped(self):
+        """Test a retried chunk is acknowledged without writing."""
+        self.write('one\n', 0, append=False)
+        self.write('two\n', 4)
+        result = self.write('two\n', 4)
+
+        self.assertEqual(result['status'], 'duplicate')
+        self.assertEqual(self.read(), 'one\ntwo\n')
+
+    def test_overlapping_chunk_writes_tail(self):
+        """Test a chunk overlapping the end only adds its new bytes."""
+        self.write('one\ntwo\n', 0, append=False)
+        result = self.write('two\nthree\n', 4)
+
+        self.assertEqual(result['bytes_written'], 6)
+        self.assertEqual(self.read(), 'one\ntwo\nthree\n')
+
+    def test_gap_rejected(self):
+        """Test a chunk past the end reports the expected offset."""
+        self.write('one\n', 0, append=False)
+        result = self.write('three\n', 8)
+
+        self.assertEqual(result['status'], 'gap')
+        self.assertEqual(result['expected_offset'], 4)
+        self.assertEqual(self.read(), 'one\n')
+
+    def test_offsets_are_bytes(self):
+        """Test offsets count UTF-8 bytes, not characters."""
+        self.write('héader\n', 0, append=False)
+        result = self.write('ok\n', len('héader\n'.encode('utf-8')))
+
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(self.read(), 'héader\nok\n')
+
+    def test_replace_resets_file(self):
+        """Test a replace chunk truncates the partial log."""
+        self.write('stale content\n', 0, append=False)
+        self.write('fresh\n', 0, append=False)
+
+        self.assertEqual(self.read(), 'fresh\n')
+
+    def test_chunks_without_offset_append(self):
+        """Test legacy chunks without an offset append at the end."""
+        self.write('one\n', None)
+        self.write('two\n', None)
+
+        self.assertEqual(self.read(), 'one\ntwo\n')
+
+    def test_ownership_cached(self):
+        """Test a job's assignment is looked up once across batches."""
+        for i in range(5):
+            self.write(f'line {i}\n', None)
+
+        self.assertEqual(self.storage.lookups, 1)
+
+    def test_rejections(self):
+        """Test chunks for unknown, finished or foreign jobs are rejected."""
+        results = self.ingestor.ingest('worker-1', [
+            {'job_id': 'missing', 'content': 'x'},
+            {'job_id': 'job-3', 'content': 'x'},
+            {'job_id': 'job-4', 'content': 'x'},
+            {'job_id': 'job-1', 'content': 'x', 'checksum': 'bad'}
+        ])
+
+        self.assertEqual([r['code'] for r in results], [404, 403, 400, 400])
+        self.assertTrue(all(r['status'] == 'rejected' for r in results))
+
+    def test_malformed_chunks_rejected(self):
+        """Test malformed chunks are rejected without stopping the batch."""
+        results = self.ingestor.ingest('worker-1', [
+            {'job_id': 'job-1', 'content': 'a\n', 'offset': 0},
+            'not a chunk',
+            {'job_id': 'job-1', 'content': 42},
+            {'job_id': 'job-1', 'content': 'x', 'offset': 'two'},
+            {'job_id': 'job-1', 'content': 'x', 'offset': -1},
+            {'job_id': None, 'content': 'x'},
+            {'job_id': 'job-2', 'content': 'b\n', 'offset': 0}
+        ])
+
+        self.assertEqual([r['status'] for r in results],
+                         ['ok', 'rejected', 'rejected', 'rejected', 'rejected', 'rejected', 'ok'])
+        self.assertTrue(all(r['code'] == 400 for r in results[1:6]))
+        self.assertEqual(self.updates, [('job-1', 'a\n', True), ('job-2', 'b\n', True)])
+        self.assertEqual(self.storage.jobs['job-2']['partial_log_file'], 'partial-job-2.log')
+
+    def test_one_update_per_job_per_batch(self):
+        """Test a batch produces one coalesced update per job."""
+        self.ingestor.ingest('worker-1', [
+            {'job_id': 'job-1', 'content': 'a\n', 'offset': 0},
+            {'job_id': 'job-2', 'content': 'b\n', 'offset': 0},
+            {'job_id': 'job-1', 'content': 'c\n', 'offset': 2}
+        ])
+
+        self.assertEqual(self.updates, [('job-1', 'a\nc\n', True), ('job-2', 'b\n', True)])
+
+    def test_close_job_drops_cached_assignment(self):
+        """Test a closed job is looked up again (e.g. after completion)."""
+        self.write('one\n', 0)
+        self.ingestor.close_job('job-1')
+        self.storage.jobs['job-1']['status'] = 'completed'
+
+        self.assertEqual(self.write('two\n', 4)['code'], 400)
+
+    def test_sanitize_applied(self):
+        """Test the sanitize hook runs before writing."""
+        self.ingestor.sanitize = lambda text: text.replace('secret', '***')
+        self.write('pass=secret\n', None)
+
+        self.assertEqual(self.read(), 'pass=***\n')
+
+
+class TestMissingRanges(unittest.TestCase):
+    """Test completion verification."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'partial-job-1.log')
+        self.log = 'header\nok: [host1]\nfooter\n'.encode('utf-8')
+        self.digest = hashlib.sha256(self.log).hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_complete_log(self):
+        """Test a matching log needs nothing."""
+        self.write(self.log)
+
+        self.assertEqual(missing_ranges(self.path, len(self.log), self.digest), [])
+        self.assertEqual(file_digest(self.path), (len(self.log), self.digest))
+
+    def test_truncated_log_reports_tail(self):
+        """Test a short log reports the missing suffix."""
+        self.write(self.log[:7])
+
+        self.assertEqual(missing_ranges(self.path, len(self.log), self.digest), [[7, len(self.log)]])
+
+    def test_missing_file(self):
+        """Test no partial log reports the whole range."""
+        self.assertEqual(missing_ranges(self.path, len(self.log), self.digest), [[0, len(self.log)]])
+
+    def test_corrupt_log_resent(self):
+        """Test a same-length log with a different digest is resent in full."""
+        self.write(self.log.replace(b'host1', b'hostX'))
+
+        self.assertEqual(missing_ranges(self.path, len(self.log), self.digest), [[0, len(self.log)]])
+
+    def test_chunk_checksum(self):
+        """Test chunk checksums are SHA-256 of the UTF-8 bytes."""
+        self.assertEqual(chunk_checksum('é'), hashlib.sha256('é'.encode('utf-8')).hexdigest())
+
+
+if __name__ == '__main__':
+    unittest.main()
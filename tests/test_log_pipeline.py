@@ -0,0 +1,113 @@
+"""
+Unit tests for the shared chunked log pipeline.
+"""
+
+import io
+import os
+import re
+import sys
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from log_pipeline import LogPipeline, find_tasks, read_chunks, redact
+
+
+class TestRedact(unittest.TestCase):
+    """Test chunk-level redaction."""
+
+    def test_masks_values(self):
+        """Test the supported assignment styles are masked."""
+        self.assertEqual(redact('ansible_ssh_pass=hunter2 host=web01\n'), 'ansible_ssh_pass=***** host=web01\n')
+        self.assertEqual(redact('"ansible_password": "hunter2",\n'), '"ansible_password": *****,\n')
+        self.assertEqual(redact('ANSIBLE_BECOME_PASS: hunter2\n'), 'ANSIBLE_BECOME_PASS: *****\n')
+
+    def test_already_masked_unchanged(self):
+        """Test values masked by a worker are not masked again."""
+        self.assertEqual(redact('ansible_ssh_pass=***\n'), 'ansible_ssh_pass=***\n')
+
+    def test_chunk_matches_per_line(self):
+        """Test redacting a chunk gives the same result as redacting its lines."""
+        text = ('ok: [web01]\nansible_password\n=hunter2\n'
+                'ansible_ssh_pass = secret\nchanged: [web02]\nansible_become_pass:\n')
+        self.assertEqual(redact(text), ''.join(redact(line) for line in text.splitlines(keepends=True)))
+        self.assertIn('=hunter2', redact(text))
+
+    def test_precheck_skips_clean_chunks(self):
+        """Test chunks without a sensitive key are returned as is."""
+        text = 'ok: [web01]\n' * 100
+        self.assertIs(redact(text), text)
+
+
+class TestFindTasks(unittest.TestCase):
+    """Test play/task boundary detection."""
+
+    def test_boundaries_with_line_numbers(self):
+        """Test boundaries report absolute line numbers."""
+        text = ('PLAY [Web servers] ****\n\nTASK [Gathering Facts] ****\nok: [web01]\n'
+                'RUNNING HANDLER [restart nginx] ****\nPLAY RECAP ****\n')
+        self.assertEqual(find_tasks(text, first_line=10), [
+            (10, 'play', 'Web servers'),
+            (12, 'task', 'Gathering Facts'),
+            (14, 'handler', 'restart nginx'),
+            (15, 'recap', ''),
+        ])
+
+    def test_only_line_starts(self):
+        """Test banners quoted mid-line are ignored."""
+        self.assertEqual(find_tasks('msg: "TASK [fake]"\nok: [web01]\n'), [])
+
+
+class TestLogPipeline(unittest.TestCase):
+    """Test LogPipeline chunking and fan-out."""
+
+    def setUp(self):
+        self.chunks = []
+        self.pipeline = LogPipeline([self.chunks.append])
+
+    def test_chunks_end_on_line_boundaries(self):
+        """Test a partial line is held back until its newline arrives."""
+        self.pipeline.feed(b'ok: [web01]\nansible_ssh_')
+        self.pipeline.feed(b'pass=hunter2\nTASK [Install] ***\npartial')
+        self.pipeline.flush()
+
+        self.assertEqual([c.text for c in self.chunks],
+                         ['ok: [web01]\n', 'ansible_ssh_pass=*****\nTASK [Install] ***\n', 'partial'])
+        self.assertEqual([(c.offset, c.first_line) for c in self.chunks], [(0, 0), (12, 1), (54, 3)])
+        self.assertEqual(self.chunks[1].tasks, [(2, 'task', 'Install')])
+        self.assertEqual(self.pipeline.current_task, (2, 'task', 'Install'))
+
+    def test_split_utf8(self):
+        """Test a multi-byte character split across reads is decoded once whole."""
+        data = 'ok: [höst1]\n'.encode('utf-8')
+        split = data.index(b'\xc3') + 1
+        self.pipeline.feed(data[:split])
+        self.pipeline.feed(data[split:])
+        self.assertEqual(self.chunks[0].text, 'ok: [höst1]\n')
+        self.assertEqual(self.pipeline.offset, len(data))
+
+    def test_read_chunks(self):
+        """Test binary pipes are read in chunks, line iterables passed through."""
+        stream = io.BufferedReader(io.BytesIO(b'a\nb\nc\n'))
+        self.assertEqual(b''.join(read_chunks(stream, size=4)), b'a\nb\nc\n')
+        self.assertEqual(list(read_chunks(iter([b'a\n', b'b\n']))), [b'a\n', b'b\n'])
+
+    def test_matches_line_by_line(self):
+        """Test chunked output equals redacting line by line, for any read size."""
+        lines = [f'TASK [task {i}] ***\n' if i % 7 == 0 else f'ok: [web{i}] ansible_password={i}x\n'
+                 for i in range(200)]
+        expected = ''.join(redact(line) for line in lines)
+        data = ''.join(lines).encode('utf-8')
+        for size in (1, 5, 64, 4096):
+            chunks = []
+            pipeline = LogPipeline([chunks.append])
+            for i in range(0, len(data), size):
+                pipeline.feed(data[i:i + size])
+            pipeline.flush()
+            self.assertEqual(''.join(c.text for c in chunks), expected)
+            self.assertEqual(sum(len(c.tasks) for c in chunks), len(re.findall('TASK', expected)))
+
+
+if __name__ == '__main__':
+    unittest.main()
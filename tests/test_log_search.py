@@ -0,0 +1,157 @@
+"""
+Unit tests for the full-text log search index.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+import log_search
+from log_archive import archive_log
+from log_catalog import LogCatalog
+from log_retention import LogRetention
+from log_search import LogSearchIndex, fts_query, parse_query
+
+
+class TestQueryParsing(unittest.TestCase):
+    """Test search string handling."""
+
+    def test_terms_and_phrases(self):
+        """Test quoted text stays one term."""
+        self.assertEqual(parse_query('UNREACHABLE "host web01" x'), ['UNREACHABLE', 'host web01', 'x'])
+
+    def test_fts_query_is_quoted(self):
+        """Test FTS syntax in user input is neutralized."""
+        self.assertEqual(fts_query(['a"b', 'NOT']), '"a""b" "NOT"')
+
+
+class TestLogSearchIndex(unittest.TestCase):
+    """Test incremental indexing and searching."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.logs_dir = os.path.join(self.test_dir, 'logs')
+        os.makedirs(self.logs_dir)
+        self.db_path = os.path.join(self.test_dir, 'config', 'log_search.db')
+        self.entries = {}
+        self.index = LogSearchIndex(self.db_path, self.logs_dir, get_entry=self.entries.get)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write(self, name, content, mode='w', playbook='ping', status='completed', modified=1000.0):
+        with open(os.path.join(self.logs_dir, name), mode) as f:
+            f.write(content)
+        self.entries[name] = {'log_file': name, 'playbook': playbook, 'status': status,
+                              'modified': modified, 'size': os.path.getsize(os.path.join(self.logs_dir, name))}
+
+    def test_search_returns_lines_and_offsets(self):
+        """Test a hit names its exact line and byte offset."""
+        lines = [f'ok: [host{i}]\n' for i in range(120)]
+        lines[77] = 'fatal: [web01]: UNREACHABLE! => {"changed": false}\n'
+        content = ''.join(lines)
+        self.write('a.log', content)
+        self.index.notify('a.log')
+        self.index.run_pending()
+
+        results = self.index.search('unreachable web01')
+        self.assertEqual(len(results), 1)
+        match = results[0]['matches'][0]
+        self.assertEqual(match['line'], 77)
+        self.assertEqual(match['offset'], content.index('fatal:'))
+        self.assertIn('UNREACHABLE', match['text'])
+
+    def test_filters(self):
+        """Test playbook and since filters."""
+        self.write('a.log', 'UNREACHABLE\n', playbook='ping', modified=1000.0)
+        self.write('b.log', 'UNREACHABLE\n', playbook='deploy', modified=2000.0)
+        self.index.catch_up(self.entries.values())
+        self.index.run_pending()
+
+        self.assertEqual([r['log_file'] for r in self.index.search('UNREACHABLE')], ['b.log', 'a.log'])
+        self.assertEqual([r['log_file'] for r in self.index.search('UNREACHABLE', playbook='ping')], ['a.log'])
+        self.assertEqual([r['log_file'] for r in self.index.search('UNREACHABLE', since=1500)], ['b.log'])
+
+    def test_incremental_indexing(self):
+        """Test only appended complete lines are indexed while running."""
+        self.write('run.log', 'first line\npartial', status='running')
+        self.index.index_log('run.log')
+        self.assertEqual(self.index.search('partial'), [])
+
+        self.write('run.log', ' done\nsecond line\n', mode='a', status='running')
+        indexed = self.index.index_log('run.log')
+        self.assertEqual(indexed, len('partial done\nsecond line\n'))
+        self.assertEqual(self.index.search('first')[0]['matches'][0]['line'], 0)
+        self.assertEqual(self.index.search('done')[0]['matches'][0]['line'], 1)
+
+    def test_resumes_after_restart(self):
+        """Test a new index instance continues from the stored progress."""
+        self.write('a.log', 'alpha\n' * 10)
+        self.index.index_log('a.log')
+
+        self.write('a.log', 'beta\n', mode='a')
+        restarted = LogSearchIndex(self.db_path, self.logs_dir, get_entry=self.entries.get)
+        self.assertEqual(restarted.index_log('a.log'), len('beta\n'))
+        self.assertEqual(restarted.search('beta')[0]['matches'][0]['line'], 10)
+
+        restarted.catch_up(self.entries.values())
+        self.assertEqual(restarted.run_pending(), 0)
+
+    def test_replaced_and_removed_logs(self):
+        """Test a shrunk log is reindexed and a missing one dropped."""
+        self.write('a.log', 'old content that is long\n')
+        self.index.index_log('a.log')
+        self.write('a.log', 'new\n')
+        self.index.index_log('a.log')
+        self.assertEqual(self.index.search('old'), [])
+        self.assertEqual(len(self.index.search('new')), 1)
+
+        os.remove(os.path.join(self.logs_dir, 'a.log'))
+        self.index.index_log('a.log')
+        self.assertEqual(self.index.search('new'), [])
+
+    def test_remove_drops_queued_log(self):
+        """Test a removed log is not indexed again by a pending notify."""
+        self.write('partial-j1.log', 'streamed line\n', status='running')
+        self.index.notify('partial-j1.log')
+        self.index.remove('partial-j1.log')
+
+        self.assertEqual(self.index.run_pending(), 0)
+        self.assertEqual(self.index.search('streamed'), [])
+
+    def test_archived_log(self):
+        """Test archived logs are indexed through decompression."""
+        self.write('a.log', 'x\n' * 100 + 'needle\n')
+        archive_log(os.path.join(self.logs_dir, 'a.log'), chunk_size=64)
+        self.index.index_log('a.log')
+        self.assertEqual(self.index.search('needle')[0]['matches'][0]['line'], 100)
+
+    def test_block_boundaries(self):
+        """Test line numbers stay exact across indexed blocks."""
+        self.write('a.log', ''.join(f'line {i}\n' for i in range(log_search.BLOCK_LINES * 3)))
+        self.index.index_log('a.log')
+        n = log_search.BLOCK_LINES * 2 + 3
+        self.assertEqual(self.index.search(f'"line {n}"')[0]['matches'][0]['line'], n)
+
+    def test_retention_drops_deleted_logs(self):
+        """Test logs deleted by retention leave the index."""
+        path = os.path.join(self.logs_dir, 'old.log')
+        with open(path, 'w') as f:
+            f.write('=== Playbook: ping | Target: all | Worker: local-executor | Started: x ===\nneedle\n')
+        os.utime(path, (1000, 1000))
+        catalog = LogCatalog(self.logs_dir)
+        index = LogSearchIndex(self.db_path, self.logs_dir, get_entry=catalog.get)
+        index.index_log('old.log')
+        self.assertEqual(len(index.search('needle')), 1)
+
+        LogRetention(catalog, archive_after_days=0, max_age_days=1, on_delete=index.remove).run()
+        self.assertEqual(index.search('needle'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+"""
+Unit tests for the worker LogShipper.
+
+Uses a fake API client so delivery, spooling and replay can be checked
+without a primary server.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker.api_client import APIResponse
+from worker.log_shipper import LogShipper
+
+
+class FakeAPI:
+    """API client stub recording stream_log calls."""
+
+    def __init__(self, status_code=200, delay=0, batch_status_code=None):
+        self.status_code = status_code
+        self.batch_status_code = batch_status_code
+        self.delay = delay
+        self.calls = []
+        self.requests = 0
+        self.received = threading.Event()
+
+    def stream_log(self, job_id, worker_id, content, append=True, offset=None):
+        time.sleep(self.delay)
+        if self.status_code != 200:
+            return APIResponse(success=False, status_code=self.status_code, error='unavailable')
+        self.requests += 1
+        self.calls.append({'job_id': job_id, 'content': content, 'append': append, 'offset': offset})
+        self.received.set()
+        return APIResponse(success=True, status_code=200, data={'status': 'ok'})
+
+    def stream_logs(self, worker_id, chunks):
+        time.sleep(self.delay)
+        status_code = self.batch_status_code or self.status_code
+        if status_code != 200:
+            return APIResponse(success=False, status_code=status_code, error='unavailable')
+        self.requests += 1
+        for chunk in chunks:
+            self.calls.append({'job_id': chunk['job_id'], 'content': chunk['content'],
+                               'append': chunk['append'], 'offset': chunk['offset']})
+        self.received.set()
+        return APIResponse(success=True, status_code=200,
+                           data={'results': [{'status': 'ok'} for _ in chunks]})
+
+    def content(self, job_id):
+        return ''.join(c['content'] for c in self.calls if c['job_id'] == job_id)
+
+
+class TestLogShipper(unittest.TestCase):
+    """Test LogShipper delivery."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.spool_dir = os.path.join(self.test_dir, '.spool')
+        self.api = FakeAPI()
+        self.shipper = LogShipper(self.api, 'worker-1', self.spool_dir, flush_interval=0.05)
+
+    def tearDown(self):
+        self.shipper.stop()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_ship_never_waits_on_network(self):
+        """Test enqueueing stays fast while the primary is slow."""
+        self.api.delay = 0.5
+        started = time.monotonic()
+        for i in range(200):
+            self.shipper.ship('job-1', f'line {i}\n')
+
+        self.assertLess(time.monotonic() - started, 0.2)
+
+    def test_chunks_coalesced_with_offsets(self):
+        """Test a burst is sent as one request per job with byte offsets."""
+        self.shipper.ship('job-1', 'header\n', append=False)
+        self.shipper.ship('job-1', 'ok: [host1]\n')
+        self.shipper.ship('job-2', 'ok: [host2]\n')
+        self.shipper.finish_job('job-1')
+        self.shipper.finish_job('job-2')
+
+        job1 = [c for c in self.api.calls if c['job_id'] == 'job-1']
+        self.assertEqual(job1, [{'job_id': 'job-1', 'content': 'header\nok: [host1]\n',
+                                 'append': False, 'offset': 0}])
+        self.assertEqual(self.api.content('job-2'), 'ok: [host2]\n')
+
+    def test_jobs_share_batched_requests(self):
+        """Test chunks of several jobs go out in one request per flush."""
+        for job_id in ('job-1', 'job-2', 'job-3'):
+            self.shipper.ship(job_id, f'{job_id} output\n')
+        self.shipper.finish_job('job-1')
+
+        self.assertEqual(self.api.requests, 1)
+        self.assertEqual(len(self.api.calls), 3)
+
+    def test_falls_back_without_batch_endpoint(self):
+        """Test a primary without the batched endpoint gets per-job requests."""
+        self.api.batch_status_code = 404
+        self.shipper.ship('job-1', 'one\n')
+        self.shipper.ship('job-2', 'two\n')
+        self.shipper.finish_job('job-1')
+
+        self.assertEqual(self.api.content('job-1'), 'one\n')
+        self.assertEqual(self.api.content('job-2'), 'two\n')
+        self.assertFalse(self.shipper._batch_supported)
+
+    def test_rejected_batch_results_dropped(self):
+        """Test per-chunk rejections in a batch are dropped, not retried."""
+        self.api.stream_logs = lambda worker_id, chunks: APIResponse(
+            success=True, status_code=200,
+            data={'results': [{'status': 'rejected', 'error': 'Job is not running'}]})
+        self.shipper.ship('job-1', 'late line\n')
+        self.shipper.finish_job('job-1')
+
+        self.assertEqual(self.shipper.stats['chunks_dropped'], 1)
+        self.assertEqual(self.shipper._spooled_jobs(), set())
+
+    def test_appends_carry_byte_offsets(self):
+        """Test chunks sent in separate flushes carry their byte offsets."""
+        self.shipper.ship('job-1', 'héader\n', append=False)
+        self.assertTrue(self.api.received.wait(2))
+        self.shipper.ship('job-1', 'ok: [host1]\n')
+        self.shipper.finish_job('job-1')
+
+        self.assertEqual([c['offset'] for c in self.api.calls], [0, len('héader\n'.encode('utf-8'))])
+
+    def test_spools_and_replays_in_order(self):
+        """Test chunks are spooled while unreachable and replayed in order."""
+        self.shipper.RETRY_INTERVAL = 0.1
+        self.api.status_code = 0
+        self.shipper.ship('job-1', 'one\n')
+        self.shipper.ship('job-1', 'two\n')
+        time.sleep(0.2)
+
+        self.assertTrue(os.path.exists(os.path.join(self.spool_dir, 'job-1.spool')))
+        self.assertEqual(self.api.calls, [])
+
+        self.shipper.ship('job-1', 'three\n')
+        self.api.status_code = 200
+        self.shipper.finish_job('job-1')
+
+        self.assertEqual(self.api.content('job-1'), 'one\ntwo\nthree\n')
+        self.assertEqual(self.api.calls[0]['offset'], 0)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_rejected_chunks_dropped(self):
+        """Test chunks for jobs the primary rejects are not spooled."""
+        self.api.status_code = 400
+        self.shipper.ship('job-1', 'late line\n')
+        self.shipper.finish_job('job-1')
+
+        self.assertEqual(self.shipper.stats['chunks_dropped'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.spool_dir, 'job-1.spool')))
+
+    def test_queue_overflow_spools(self):
+        """Test a full queue spills to disk and output still arrives in order."""
+        shipper = LogShipper(self.api, 'worker-1', self.spool_dir,
+                             flush_interval=0.05, max_queue=2)
+        self.api.delay = 0.05
+        lines = [f'line {i}\n' for i in range(20)]
+        for line in lines:
+            shipper.ship('job-1', line)
+        self.assertGreater(shipper.stats['chunks_spooled'], 0)
+
+        deadline = time.monotonic() + 5
+        while self.api.content('job-1') != ''.join(lines) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        shipper.stop()
+
+        self.assertEqual(self.api.content('job-1'), ''.join(lines))
+
+    def test_stop_spools_undelivered(self):
+        """Test stopping while unreachable keeps chunks on disk."""
+        self.api.status_code = 503
+        self.shipper.ship('job-1', 'pending\n')
+        self.shipper.stop()
+
+        self.assertEqual(self.shipper._spooled_jobs(), {'job-1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
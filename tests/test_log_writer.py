@@ -0,0 +1,114 @@
+"""
+Unit tests for the group-commit log writer used by local runs.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from log_writer import BufferedLogWriter
+
+
+class TestBufferedLogWriter(unittest.TestCase):
+    """Test BufferedLogWriter group commits."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'run.log')
+        self.groups = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_burst_is_one_commit(self):
+        """Test a burst of lines is written and emitted as one group."""
+        with patch('log_writer.os.fsync') as fsync:
+            with BufferedLogWriter(self.path, flush_interval=10, on_flush=self.groups.append) as writer:
+                for i in range(1000):
+                    writer.write(f'ok: [host{i}]\n')
+                self.assertEqual(self.groups, [])
+
+            self.assertEqual(fsync.call_count, 1)
+        self.assertEqual(len(self.groups), 1)
+        self.assertEqual(len(self.groups[0]), 1000)
+        self.assertEqual(self.read(), ''.join(f'ok: [host{i}]\n' for i in range(1000)))
+
+    def test_size_budget_commits(self):
+        """Test reaching the byte budget commits immediately."""
+        writer = BufferedLogWriter(self.path, flush_interval=10, flush_bytes=10,
+                                   on_flush=self.groups.append)
+        writer.write('12345\n')
+        writer.write('67890\n')
+
+        self.assertEqual(self.groups, [['12345\n', '67890\n']])
+        self.assertEqual(self.read(), '12345\n67890\n')
+        writer.close()
+
+    def test_size_budget_counts_utf8_bytes(self):
+        """Test the byte budget counts encoded bytes, not characters."""
+        writer = BufferedLogWriter(self.path, flush_interval=10, flush_bytes=10,
+                                   on_flush=self.groups.append)
+        writer.write('ééé\n')
+        self.assertEqual(self.groups, [])
+        writer.write('ü\n')
+
+        self.assertEqual(self.groups, [['ééé\n', 'ü\n']])
+        writer.close()
+
+    def test_quiet_output_committed_by_timer(self):
+        """Test buffered lines are committed when the producer goes quiet."""
+        writer = BufferedLogWriter(self.path, flush_interval=0.05, on_flush=self.groups.append)
+        writer.write('TASK [long running] ***\n')
+
+        deadline = time.monotonic() + 2
+        while not self.groups and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.groups, [['TASK [long running] ***\n']])
+        self.assertEqual(self.read(), 'TASK [long running] ***\n')
+        writer.close()
+
+    def test_always_durability_syncs_each_line(self):
+        """Test 'always' keeps the per-line fsync behaviour."""
+        with patch('log_writer.os.fsync') as fsync:
+            with BufferedLogWriter(self.path, durability='always', flush_interval=10) as writer:
+                for line in ('one\n', 'two\n', 'three\n'):
+                    writer.write(line)
+            self.assertEqual(fsync.call_count, 3)
+
+    def test_none_durability_never_syncs(self):
+        """Test 'none' flushes to the OS without fsync."""
+        with patch('log_writer.os.fsync') as fsync:
+            with BufferedLogWriter(self.path, durability='none', flush_bytes=1) as writer:
+                writer.write('one\n')
+                self.assertEqual(self.read(), 'one\n')
+            fsync.assert_not_called()
+
+    def test_invalid_durability(self):
+        """Test an unknown durability mode is rejected."""
+        with self.assertRaises(ValueError):
+            BufferedLogWriter(self.path, durability='sometimes')
+
+    def test_callback_error_does_not_lose_lines(self):
+        """Test a failing emit callback does not stop file writes."""
+        def broken(lines):
+            raise RuntimeError('socket gone')
+
+        with BufferedLogWriter(self.path, flush_bytes=1, on_flush=broken) as writer:
+            writer.write('one\n')
+            writer.write('two\n')
+        self.assertEqual(self.read(), 'one\ntwo\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for gzip request body decompression on the primary.
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from flask import Flask, jsonify, request
+
+from utils.compression import GzipRequestMiddleware, MAX_LOG_BODY_SIZE, WORKER_GZIP_ROUTES
+
+WORKER_ID = 'worker-1'
+
+
+def create_app(routes=WORKER_GZIP_ROUTES):
+    """Create a Flask app whose worker upload routes echo JSON bodies."""
+    app = Flask(__name__)
+    app.wsgi_app = GzipRequestMiddleware(app.wsgi_app, authenticate=lambda worker_id: worker_id == WORKER_ID,
+                                         routes=routes)
+
+    @app.route('/api/workers/<worker_id>/logs', methods=['POST'])
+    @app.route('/api/jobs/<job_id>/complete', methods=['POST'])
+    @app.route('/api/schedules', methods=['POST'])
+    def echo(**kwargs):
+        return jsonify(request.get_json())
+
+    return app
+
+
+class TestGzipRequestMiddleware(unittest.TestCase):
+    """Test the GzipRequestMiddleware."""
+
+    def setUp(self):
+        self.client = create_app().test_client()
+
+    def _post_gzip(self, client, payload, path='/api/jobs/job-1/complete', worker_id=WORKER_ID):
+        body = gzip.compress(json.dumps(payload).encode('utf-8'))
+        headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+        if worker_id:
+            headers['X-Worker-Id'] = worker_id
+        return client.post(path, data=body, headers=headers)
+
+    def test_gzip_body_decompressed(self):
+        """Test handlers see the inflated JSON body."""
+        payload = {'content': 'ok: [host1]\n' * 500, 'append': True}
+        response = self._post_gzip(self.client, payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), payload)
+
+    def test_worker_in_path_authenticates(self):
+        """Test the worker named in the path is the one checked."""
+        payload = {'chunks': []}
+
+        ok = self._post_gzip(self.client, payload, path=f'/api/workers/{WORKER_ID}/logs', worker_id=None)
+        other = self._post_gzip(self.client, payload, path='/api/workers/unknown/logs')
+
+        self.assertEqual(ok.get_json(), payload)
+        self.assertEqual(other.status_code, 401)
+
+    def test_plain_body_passes_through(self):
+        """Test uncompressed requests are untouched."""
+        response = self.client.post('/api/schedules', json={'content': 'line'})
+
+        self.assertEqual(response.get_json(), {'content': 'line'})
+
+    def test_unauthenticated_body_not_read(self):
+        """Test gzip bodies from unknown senders are rejected before they are read."""
+        for worker_id in (None, 'unknown'):
+            environ_body = ReadTracker(gzip.compress(b'{}'))
+            response = self.client.post('/api/jobs/job-1/complete', input_stream=environ_body, headers={
+                'Content-Type': 'application/json', 'Content-Encoding': 'gzip',
+                **({'X-Worker-Id': worker_id} if worker_id else {})
+            })
+            self.assertEqual(response.status_code, 401)
+            self.assertFalse(environ_body.was_read)
+
+    def test_other_routes_reject_gzip(self):
+        """Test gzip bodies are only inflated on worker upload routes."""
+        response = self._post_gzip(self.client, {'name': 'x'}, path='/api/schedules')
+
+        self.assertEqual(response.status_code, 415)
+
+    def test_invalid_gzip_rejected(self):
+        """Test a corrupt gzip body returns 400."""
+        response = self.client.post('/api/jobs/job-1/complete', data=b'not gzip', headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+            'X-Worker-Id': WORKER_ID
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+
+    def test_oversized_body_rejected(self):
+        """Test bodies inflating past their route's limit return 413."""
+        response = self._post_gzip(self.client, {'chunks': [{'content': 'x' * MAX_LOG_BODY_SIZE}]},
+                                   path=f'/api/workers/{WORKER_ID}/logs')
+
+        self.assertEqual(response.status_code, 413)
+
+
+class ReadTracker(io.BytesIO):
+    """Request body that records whether it was read."""
+
+    was_read = False
+
+    def read(self, *args):
+        self.was_read = True
+        return super().read(*args)
+
+
+if __name__ == '__main__':
+    unittest.main()
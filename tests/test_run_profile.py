@@ -0,0 +1,100 @@
+"""
+Unit tests for task timing profiles and hot-spot reports.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from run_profile import build_report, normalize_profile, percentile
+from storage.flatfile import FlatFileStorage
+
+
+def profile(duration, **tasks):
+    return {'duration': duration, 'tasks': [{'name': name, 'hosts': hosts} for name, hosts in tasks.items()]}
+
+
+class TestRunProfile(unittest.TestCase):
+    """Test profile normalization and reports."""
+
+    def test_normalize_profile(self):
+        """Test malformed worker input is dropped or coerced."""
+        result = normalize_profile({'duration': '12.5', 'tasks': [
+            {'name': 'ok', 'hosts': {'web01': '1.23456', 'web02': 'nan', 'web03': -1}},
+            {'name': 'no hosts', 'hosts': {}},
+            'junk',
+        ]})
+        self.assertEqual(result, {'duration': 12.5, 'tasks': [
+            {'name': 'ok', 'hosts': {'web01': 1.235, 'web02': 0.0, 'web03': 0.0}},
+        ]})
+        self.assertEqual(normalize_profile(None), {'duration': 0.0, 'tasks': []})
+
+    def test_percentile(self):
+        """Test interpolated percentiles."""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_build_report(self):
+        """Test tasks rank by total time, hosts by average run time."""
+        runs = [  # Newest first, as stored
+            {'run_id': 'r2', 'finished_at': '2026-01-02', 'profile': profile(
+                30.0, facts={'web01': 2.0, 'web02': 9.0}, packages={'web01': 10.0, 'web02': 12.0})},
+            {'run_id': 'r1', 'finished_at': '2026-01-01', 'profile': profile(
+                20.0, facts={'web01': 1.0, 'web02': 8.0}, packages={'web01': 6.0})},
+        ]
+        report = build_report(runs)
+
+        self.assertEqual(report['runs'], 2)
+        self.assertEqual([t['name'] for t in report['tasks']], ['packages', 'facts'])
+        packages = report['tasks'][0]
+        self.assertEqual((packages['samples'], packages['p50'], packages['max'], packages['total']),
+                         (3, 10.0, 12.0, 28.0))
+
+        self.assertEqual(report['hosts'][0], {'host': 'web02', 'runs': 2, 'avg_seconds': 14.5, 'max_seconds': 21.0})
+
+        self.assertEqual([t['run_id'] for t in report['trend']], ['r1', 'r2'])
+        self.assertEqual(report['trend'][0]['slowest_task'], 'facts')
+        self.assertEqual(report['trend'][1]['slowest_task'], 'packages')
+        self.assertEqual(report['trend'][1]['duration'], 30.0)
+
+    def test_empty_report(self):
+        """Test a playbook with no profiled runs."""
+        self.assertEqual(build_report([]), {'runs': 0, 'tasks': [], 'hosts': [], 'trend': []})
+
+
+class TestRunProfileStorage(unittest.TestCase):
+    """Test run profiles in the flat file backend."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.storage = FlatFileStorage(config_dir=self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_latest_runs_of_playbook(self):
+        """Test profiles come back newest first, limited, per playbook."""
+        for i in range(5):
+            self.storage.save_run_profile(f'r{i}', 'system-health', f'2026-01-0{i + 1}T00:00:00',
+                                          profile(float(i), check={'web01': 1.0}))
+        self.storage.save_run_profile('other', 'ping', '2026-01-09T00:00:00', profile(1.0, ping={'web01': 0.1}))
+
+        runs = self.storage.get_run_profiles('system-health', limit=3)
+        self.assertEqual([r['run_id'] for r in runs], ['r4', 'r3', 'r2'])
+        self.assertEqual(runs[0]['profile'], profile(4.0, check={'web01': 1.0}))
+
+        # Saving a run again replaces it
+        self.storage.save_run_profile('r4', 'system-health', '2026-01-05T00:00:00', profile(9.0, check={'web01': 2.0}))
+        self.assertEqual(self.storage.get_run_profiles('system-health', limit=1)[0]['profile']['duration'], 9.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
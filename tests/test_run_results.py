@@ -0,0 +1,127 @@
+"""
+Unit tests for structured per-host run results and their storage.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add web directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+from run_results import (MAX_FAILED_TASKS, new_results_file, normalize,
+                         read_results_file, summarize)
+from storage.flatfile import FlatFileStorage
+
+
+def counts(**kwargs):
+    result = {'ok': 0, 'changed': 0, 'unreachable': 0, 'failed': 0,
+              'skipped': 0, 'rescued': 0, 'ignored': 0, 'failed_tasks': []}
+    result.update(kwargs)
+    return result
+
+
+class TestRunResults(unittest.TestCase):
+    """Test reading and summarizing the callback plugin's output."""
+
+    def test_read_results_file(self):
+        """Test the plugin's file is read, normalized and removed."""
+        path = new_results_file()
+        with open(path, 'w') as f:
+            json.dump({'playbook': 'ping.yml', 'hosts': {
+                'web01': {'ok': 3, 'changed': 1, 'failed': 1, 'failed_tasks': ['Install nginx']},
+            }}, f)
+
+        hosts = read_results_file(path)
+        self.assertEqual(hosts, {'web01': counts(ok=3, changed=1, failed=1, failed_tasks=['Install nginx'])})
+        self.assertFalse(os.path.exists(path))
+
+    def test_empty_results_file(self):
+        """Test a run that never reached the recap has no results."""
+        path = new_results_file()
+        self.assertIsNone(read_results_file(path))
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(read_results_file(path))
+
+    def test_normalize(self):
+        """Test untrusted worker input is coerced."""
+        hosts = normalize({
+            'web01': {'ok': '2', 'failed': 'x', 'unreachable': -1, 'bogus': 1,
+                      'failed_tasks': [f't{i}' for i in range(50)]},
+            'web02': 'not a dict',
+        })
+        self.assertEqual(list(hosts), ['web01'])
+        self.assertEqual(hosts['web01']['ok'], 2)
+        self.assertEqual(hosts['web01']['failed'], 0)
+        self.assertEqual(hosts['web01']['unreachable'], 0)
+        self.assertNotIn('bogus', hosts['web01'])
+        self.assertEqual(len(hosts['web01']['failed_tasks']), MAX_FAILED_TASKS)
+        self.assertEqual(normalize(None), {})
+
+    def test_summarize(self):
+        """Test totals and failed hosts."""
+        summary = summarize({
+            'web01': counts(ok=3, failed=1),
+            'web02': counts(ok=2, changed=2),
+            'db01': counts(unreachable=1),
+        })
+        self.assertEqual(summary['hosts'], 3)
+        self.assertEqual(summary['ok'], 5)
+        self.assertEqual(summary['changed'], 2)
+        self.assertEqual(summary['failed_hosts'], ['db01', 'web01'])
+
+
+class TestHostResultsStorage(unittest.TestCase):
+    """Test host results in the flat file backend."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.storage = FlatFileStorage(config_dir=self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_save_and_get(self):
+        """Test results round-trip and saving again replaces them."""
+        hosts = {'web01': counts(ok=3, failed=1, failed_tasks=['Install nginx'])}
+        self.assertTrue(self.storage.save_host_results('run-1', 'ping', '2026-01-01T10:00:00', hosts))
+        self.assertEqual(self.storage.get_host_results('run-1'), hosts)
+
+        self.storage.save_host_results('run-1', 'ping', '2026-01-01T10:00:00', {'web02': counts(ok=1)})
+        self.assertEqual(list(self.storage.get_host_results('run-1')), ['web02'])
+        self.assertEqual(self.storage.get_host_results('missing'), {})
+
+    def test_failing_hosts(self):
+        """Test hosts are ranked by failed runs within the window."""
+        runs = [
+            ('r1', 'ping', '2026-01-01T10:00:00', {'web01': counts(failed=1), 'web02': counts(ok=1)}),
+            ('r2', 'ping', '2026-01-02T10:00:00', {'web01': counts(failed=2), 'web02': counts(unreachable=1)}),
+            ('r3', 'deploy', '2026-01-03T10:00:00', {'web01': counts(ok=1), 'web02': counts(failed=1)}),
+            ('old', 'ping', '2025-01-01T10:00:00', {'db01': counts(failed=1)}),
+        ]
+        for run_id, playbook, finished, hosts in runs:
+            self.storage.save_host_results(run_id, playbook, finished, hosts)
+
+        failing = self.storage.get_failing_hosts('2026-01-01T00:00:00')
+        # Ties on failed runs are ordered by host
+        self.assertEqual([h['host'] for h in failing], ['web01', 'web02'])
+        self.assertEqual(failing[0]['last_failed'], '2026-01-02T10:00:00')
+        self.assertEqual(failing[1], {'host': 'web02', 'runs': 3, 'failed_runs': 2, 'unreachable_runs': 1,
+                                      'last_failed': '2026-01-03T10:00:00'})
+
+        ping = self.storage.get_failing_hosts('2026-01-01T00:00:00', playbook='ping')
+        self.assertEqual([(h['host'], h['failed_runs']) for h in ping], [('web01', 2), ('web02', 1)])
+        self.assertEqual(len(self.storage.get_failing_hosts('2026-01-01T00:00:00', limit=1)), 1)
+
+    def test_failing_hosts_uses_index(self):
+        """Test the fleet query is an index range scan, not a table scan."""
+        plan = ' '.join(r[3] for r in self.storage._get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT host FROM host_results WHERE finished_at >= ?", ('2026',)))
+        self.assertIn('idx_host_results_finished', plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
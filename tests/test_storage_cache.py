@@ -0,0 +1,132 @@
+"""
+Unit tests for the caching storage wrapper (web/storage/cached.py).
+
+Uses flat file storage as the wrapped backend.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web.storage.base import StorageBackend
+from web.storage.cached import CachedStorageBackend
+from web.storage.flatfile import FlatFileStorage
+
+
+class TestCachedStorageBackend(unittest.TestCase):
+    """Test read-through caching and write invalidation."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.backend = FlatFileStorage(config_dir=self.test_dir)
+        self.storage = CachedStorageBackend(self.backend)
+        self.storage.save_worker({'id': 'w1', 'name': 'worker-1', 'status': 'online'})
+        self.storage.save_user('alice', {'id': 'u1', 'username': 'alice', 'roles': ['operator'], 'enabled': True})
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_repeated_lookups_hit_cache(self):
+        """Test repeated lookups are served without storage round trips."""
+        with patch.object(self.backend, 'get_worker', wraps=self.backend.get_worker) as get_worker:
+            for _ in range(5):
+                self.assertEqual(self.storage.get_worker('w1')['name'], 'worker-1')
+        self.assertEqual(get_worker.call_count, 1)
+
+        stats = self.storage.get_cache_stats()['workers']
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (4, 1, 1))
+
+    def test_returned_values_are_copies(self):
+        """Test callers modifying a result do not change the cache."""
+        self.storage.get_user('alice')['roles'].append('admin')
+        self.assertEqual(self.storage.get_user('alice')['roles'], ['operator'])
+
+    def test_missing_entries_not_cached(self):
+        """Test failed lookups are not cached."""
+        self.assertIsNone(self.storage.get_worker('w2'))
+        self.storage.backend.save_worker({'id': 'w2', 'name': 'worker-2', 'status': 'online'})
+        self.assertIsNotNone(self.storage.get_worker('w2'))
+
+    def test_writes_invalidate(self):
+        """Test writes through the wrapper are seen by the next read."""
+        self.storage.get_worker('w1')
+        self.storage.update_worker_checkin('w1', {'status': 'busy'})
+        self.assertEqual(self.storage.get_worker('w1')['status'], 'busy')
+
+        self.storage.get_user_by_id('u1')
+        self.storage.save_user('alice', {'id': 'u1', 'username': 'alice', 'roles': [], 'enabled': False})
+        self.assertFalse(self.storage.get_user_by_id('u1')['enabled'])
+        self.assertFalse(self.storage.get_user('alice')['enabled'])
+
+        self.storage.delete_worker('w1')
+        self.assertIsNone(self.storage.get_worker('w1'))
+
+    def test_roles_invalidated_on_save(self):
+        """Test role changes reach permission resolution at once."""
+        before = len(self.storage.get_all_roles())
+        self.storage.save_role('auditor', {'name': 'auditor', 'permissions': ['audit:view']})
+        self.assertEqual(len(self.storage.get_all_roles()), before + 1)
+
+    def test_api_token_updates_write_through(self):
+        """Test updating a token refreshes its entry instead of dropping it."""
+        token = {'id': 't1', 'user_id': 'u1', 'token_hash': 'abc', 'last_used': None}
+        self.storage.save_api_token('t1', token)
+        self.storage.get_api_token_by_hash('abc')
+
+        with patch.object(self.backend, 'get_api_token_by_hash') as get_token:
+            self.storage.update_api_token('t1', {**token, 'last_used': '2026-01-01T00:00:00+00:00'})
+            self.assertEqual(self.storage.get_api_token_by_hash('abc')['last_used'], '2026-01-01T00:00:00+00:00')
+        get_token.assert_not_called()
+
+        self.storage.delete_api_token('t1')
+        self.assertIsNone(self.storage.get_api_token_by_hash('abc'))
+
+    def test_entries_expire(self):
+        """Test entries are reloaded after their entity's TTL."""
+        with patch('web.storage.cached.time.monotonic', return_value=1000.0):
+            self.storage.get_worker('w1')
+        self.backend.update_worker_checkin('w1', {'status': 'offline'})
+
+        with patch('web.storage.cached.time.monotonic', return_value=1005.0):
+            self.assertEqual(self.storage.get_worker('w1')['status'], 'online')
+        with patch('web.storage.cached.time.monotonic', return_value=1011.0):
+            self.assertEqual(self.storage.get_worker('w1')['status'], 'offline')
+
+    def test_lru_eviction(self):
+        """Test each entity keeps at most its max entries."""
+        storage = CachedStorageBackend(self.backend, max_entries={'workers': 2})
+        for i in range(3):
+            self.backend.save_worker({'id': f'x{i}', 'name': f'x{i}', 'status': 'online'})
+            storage.get_worker(f'x{i}')
+        self.assertEqual(storage.get_cache_stats()['workers']['size'], 2)
+
+    def test_invalidation_during_load_not_cached(self):
+        """Test a value loaded before a concurrent write is not cached."""
+        load = self.backend.get_worker
+
+        def racing_load(worker_id):
+            worker = load(worker_id)
+            self.storage.update_worker_checkin(worker_id, {'status': 'busy'})
+            return worker
+
+        with patch.object(self.backend, 'get_worker', side_effect=racing_load):
+            self.assertEqual(self.storage.get_worker('w1')['status'], 'online')
+        self.assertEqual(self.storage.get_worker('w1')['status'], 'busy')
+
+    def test_passthrough(self):
+        """Test uncached operations reach the wrapped backend."""
+        self.assertIsInstance(self.storage, StorageBackend)
+        self.assertEqual(self.storage.get_backend_type(), 'flatfile')
+        self.assertEqual(self.storage.config_dir, self.test_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -507,6 +507,231 @@ class TestJobQueueStorageFlatFile(unittest.TestCase):
         jobs = self.storage.get_worker_jobs('worker-no-jobs')
         self.assertEqual(jobs, [])
 
+    # =========================================================================
+    # Claim Tests
+    # =========================================================================
+
+    def test_claim_jobs_highest_priority_first(self):
+        """Test claiming picks highest priority queued jobs and assigns them."""
+        self.storage.save_job(self._create_test_job('job-low', priority=10))
+        self.storage.save_job(self._create_test_job('job-high', priority=90))
+        self.storage.save_job(self._create_test_job('job-mid', priority=50))
+
+        claimed = self.storage.claim_jobs('worker-1', [], slots=2)
+
+        self.assertEqual([j['id'] for j in claimed], ['job-high', 'job-mid'])
+        for job_id in ('job-high', 'job-mid'):
+            saved = self.storage.get_job(job_id)
+            self.assertEqual(saved['status'], 'assigned')
+            self.assertEqual(saved['assigned_worker'], 'worker-1')
+            self.assertIsNotNone(saved['assigned_at'])
+        self.assertEqual(self.storage.get_job('job-low')['status'], 'queued')
+
+    def test_claim_jobs_respects_required_tags(self):
+        """Test claiming skips jobs whose required tags the worker lacks."""
+        self.storage.save_job(self._create_test_job('job-gpu', required_tags=['gpu'], priority=90))
+        self.storage.save_job(self._create_test_job('job-any', priority=10))
+
+        claimed = self.storage.claim_jobs('worker-1', ['cpu'], slots=5)
+
+        self.assertEqual([j['id'] for j in claimed], ['job-any'])
+        self.assertEqual(self.storage.get_job('job-gpu')['status'], 'queued')
+
+    def test_claim_jobs_never_double_assigns(self):
+        """Test a job already claimed cannot be claimed again."""
+        self.storage.save_job(self._create_test_job('job-1'))
+
+        first = self.storage.claim_jobs('worker-1', [], slots=1, job_ids=['job-1'])
+        second = self.storage.claim_jobs('worker-2', [], slots=1, job_ids=['job-1'])
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(self.storage.get_job('job-1')['assigned_worker'], 'worker-1')
+
+    def test_claim_jobs_concurrent_claims_are_disjoint(self):
+        """Test concurrent claimers from several threads never share a job."""
+        import threading
+
+        for i in range(20):
+            self.storage.save_job(self._create_test_job(f'job-{i}'))
+
+        results = {}
+
+        def claim(worker_id):
+            results[worker_id] = self.storage.claim_jobs(worker_id, [], slots=5)
+
+        threads = [threading.Thread(target=claim, args=(f'worker-{i}',)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        claimed_ids = [j['id'] for jobs in results.values() for j in jobs]
+        self.assertEqual(len(claimed_ids), 20)
+        self.assertEqual(len(set(claimed_ids)), 20)
+
+    def test_claim_jobs_zero_slots(self):
+        """Test claiming with no free slots claims nothing."""
+        self.storage.save_job(self._create_test_job('job-1'))
+
+        self.assertEqual(self.storage.claim_jobs('worker-1', [], slots=0), [])
+        self.assertEqual(self.storage.get_job('job-1')['status'], 'queued')
+
+    def test_rank_queued_jobs_matches_router_order(self):
+        """Test storage-side ranking gives the router's dispatch order."""
+        from web.job_router import JobRouter
+
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        submitters = ['alice', 'bob', 'scheduler:abcd1234', 'batch:1234abcd']
+        for i in range(40):
+            self.storage.save_job(self._create_test_job(
+                f'job-{i:02d}',
+                status='running' if i % 7 == 0 else 'queued',
+                priority=[10, 50, 60, 90][i % 4],
+                submitted_by=submitters[i % 3 + (i % 5 == 0)],
+                required_tags=['gpu'] if i % 6 == 0 else [],
+                submitted_at=(now - timedelta(minutes=i * 9)).isoformat()
+            ))
+        router = JobRouter(self.storage)
+        expected = [job['id'] for job, _ in router.order_pending_jobs(now=now)]
+
+        ranked = self.storage.rank_queued_jobs(router.dispatch_policy(), now=now.isoformat())
+        cpu_only = self.storage.rank_queued_jobs(router.dispatch_policy(), worker_tags=['cpu'],
+                                                 limit=5, now=now.isoformat())
+
+        self.assertEqual(ranked, expected)
+        self.assertEqual(cpu_only, [j for j in expected if j not in
+                                    {f'job-{i:02d}' for i in range(0, 40, 6)}][:5])
+
+    # =========================================================================
+    # Paged Query Tests
+    # =========================================================================
+
+    def _save_history(self, count: int):
+        """Save count jobs with increasing submitted_at."""
+        base = datetime(2024, 1, 1)
+        for i in range(count):
+            self.storage.save_job(self._create_test_job(
+                f'job-{i:03d}',
+                status='completed' if i % 2 else 'queued',
+                submitted_by='alice' if i % 3 else 'bob',
+                submitted_at=(base + timedelta(minutes=i)).isoformat()
+            ))
+
+    def test_query_jobs_cursor_walks_all_pages(self):
+        """Test following next_cursor returns every job exactly once, newest first."""
+        self._save_history(25)
+
+        seen, cursor = [], None
+        while True:
+            page = self.storage.query_jobs(limit=10, cursor=cursor)
+            self.assertEqual(page['total'], None if cursor else 25)
+            seen.extend(j['id'] for j in page['jobs'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [f'job-{i:03d}' for i in reversed(range(25))])
+
+    def test_query_jobs_list_and_owner_filters(self):
+        """Test list-valued status filters combine with submitter filters."""
+        self._save_history(12)
+        self.storage.save_job(self._create_test_job('job-running', status='running', submitted_by='bob'))
+
+        page = self.storage.query_jobs({'status': ['queued', 'running'], 'submitted_by': 'bob'})
+
+        self.assertEqual(page['total'], 3)
+        self.assertEqual({j['id'] for j in page['jobs']}, {'job-000', 'job-006', 'job-running'})
+        self.assertIsNone(page['next_cursor'])
+
+    def test_query_jobs_sort_by_priority_ascending(self):
+        """Test sorting by priority in ascending order."""
+        for i, prio in enumerate([70, 10, 40]):
+            self.storage.save_job(self._create_test_job(f'job-{i}', priority=prio))
+
+        page = self.storage.query_jobs(sort_by='priority', descending=False)
+
+        self.assertEqual([j['priority'] for j in page['jobs']], [10, 40, 70])
+
+    def test_query_jobs_sort_by_completed_at_lists_unfinished_last(self):
+        """Test sorting by completed_at keeps unfinished jobs, after finished ones."""
+        self.storage.save_job(self._create_test_job('job-done', status='completed',
+                                                    completed_at='2024-01-01T00:00:00', exit_code=0))
+        self.storage.save_job(self._create_test_job('job-queued'))
+
+        page = self.storage.query_jobs(sort_by='completed_at')
+
+        self.assertEqual([j['id'] for j in page['jobs']], ['job-done', 'job-queued'])
+        self.assertEqual(page['total'], 2)
+
+    def test_query_jobs_cursor_crosses_unsorted_jobs(self):
+        """Test cursor and offset pages continue into jobs without a sort value."""
+        for i in range(7):
+            self.storage.save_job(self._create_test_job(
+                f'job-{i}', status='completed' if i % 2 else 'queued',
+                completed_at=f'2024-01-01T00:00:0{i}' if i % 2 else None))
+
+        for descending in (True, False):
+            expected = [j['id'] for j in self.storage.query_jobs(sort_by='completed_at', descending=descending)['jobs']]
+            seen, cursor = [], None
+            while True:
+                page = self.storage.query_jobs(sort_by='completed_at', descending=descending, limit=2, cursor=cursor)
+                seen.extend(j['id'] for j in page['jobs'])
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+            offset_page = self.storage.query_jobs(sort_by='completed_at', descending=descending, limit=2, offset=4)
+
+            self.assertEqual(seen, expected)
+            self.assertEqual(expected[:3], ['job-5', 'job-3', 'job-1'] if descending else ['job-1', 'job-3', 'job-5'])
+            self.assertEqual(len(expected), 7)
+            self.assertEqual([j['id'] for j in offset_page['jobs']], expected[4:6])
+
+    def test_query_jobs_rejects_unknown_fields(self):
+        """Test unknown filters, sort fields and cursors raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.storage.query_jobs({'data': 'x'})
+        with self.assertRaises(ValueError):
+            self.storage.query_jobs(sort_by='data')
+        with self.assertRaises(ValueError):
+            self.storage.query_jobs(cursor='not-a-cursor')
+
+    def test_update_job_refreshes_indexed_columns(self):
+        """Test updates are visible to column-based filters."""
+        self.storage.save_job(self._create_test_job('job-1'))
+        self.storage.update_job('job-1', {'status': 'completed', 'exit_code': 2,
+                                          'completed_at': datetime.now().isoformat()})
+
+        page = self.storage.query_jobs({'exit_code': 2})
+
+        self.assertEqual([j['id'] for j in page['jobs']], ['job-1'])
+
+    def test_get_job_counts(self):
+        """Test counting jobs grouped by status."""
+        self._save_history(5)
+
+        self.assertEqual(self.storage.get_job_counts(), {'queued': 3, 'completed': 2})
+
+    def test_legacy_jobs_table_is_migrated(self):
+        """Test a jobs table without indexed columns is upgraded and backfilled."""
+        legacy_dir = tempfile.mkdtemp()
+        try:
+            import sqlite3
+            job = self._create_test_job('job-legacy', playbook='legacy.yml', submitted_by='carol')
+            conn = sqlite3.connect(os.path.join(legacy_dir, 'storage.db'))
+            conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT, submitted_at TEXT, assigned_worker TEXT, data TEXT)")
+            conn.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?)",
+                         (job['id'], job['status'], job['submitted_at'], None, json.dumps(job)))
+            conn.commit()
+            conn.close()
+
+            storage = FlatFileStorage(config_dir=legacy_dir)
+            page = storage.query_jobs({'playbook': 'legacy.yml', 'submitted_by': 'carol'})
+
+            self.assertEqual([j['id'] for j in page['jobs']], ['job-legacy'])
+        finally:
+            shutil.rmtree(legacy_dir, ignore_errors=True)
+
     # =========================================================================
     # Cleanup Tests
     # =========================================================================
@@ -319,7 +319,7 @@ class TestServerSyncBroadcast(unittest.TestCase):
 class TestAPIClientSyncMethods(unittest.TestCase):
     """Test API client sync-related methods."""
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_get_sync_revision(self, mock_request):
         """Test getting sync revision from server."""
         mock_response = Mock()
@@ -339,7 +339,7 @@ class TestAPIClientSyncMethods(unittest.TestCase):
         self.assertEqual(result.data['revision'], 'abc123def456')
         mock_request.assert_called_once()
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_get_sync_status(self, mock_request):
         """Test getting sync status from server."""
         mock_response = Mock()
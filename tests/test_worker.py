@@ -119,7 +119,7 @@ class TestAPIClient(unittest.TestCase):
         client = PrimaryAPIClient('http://localhost:3001/')
         self.assertEqual(client.server_url, 'http://localhost:3001')
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_register_success(self, mock_request):
         """Test successful registration."""
         mock_response = Mock()
@@ -137,7 +137,7 @@ class TestAPIClient(unittest.TestCase):
         self.assertEqual(result.data['worker_id'], 'test-uuid')
         self.assertEqual(self.client.worker_id, 'test-uuid')
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_register_failure(self, mock_request):
         """Test failed registration."""
         mock_response = Mock()
@@ -151,7 +151,7 @@ class TestAPIClient(unittest.TestCase):
         self.assertFalse(result.success)
         self.assertEqual(result.status_code, 401)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_connection_error(self, mock_request):
         """Test handling of connection errors."""
         import requests
@@ -163,7 +163,7 @@ class TestAPIClient(unittest.TestCase):
         self.assertEqual(result.status_code, 0)
         self.assertIn('Connection error', result.error)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_checkin(self, mock_request):
         """Test worker check-in."""
         mock_response = Mock()
@@ -179,7 +179,70 @@ class TestAPIClient(unittest.TestCase):
 
         self.assertTrue(result.success)
 
-    @patch('worker.api_client.requests.request')
+    def test_session_pooled_with_retries(self):
+        """Test requests share one session with a sized pool and retry policy."""
+        client = PrimaryAPIClient('https://primary:3443', pool_size=6, retries=2)
+        adapter = client.session.get_adapter('https://primary:3443/api/jobs')
+
+        self.assertEqual(adapter._pool_maxsize, 6)
+        self.assertEqual(adapter.max_retries.connect, 2)
+        self.assertNotIn('POST', adapter.max_retries.allowed_methods)
+
+    @patch('worker.api_client.requests.Session.request')
+    def test_stream_log_compresses_large_chunks(self, mock_request):
+        """Test large log chunks are sent as a gzip body."""
+        import gzip
+        import json
+        mock_response = Mock()
+        mock_response.ok = True
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'success': True}
+        mock_request.return_value = mock_response
+
+        content = 'TASK [ping] ok: [host1]\n' * 200
+        self.client.stream_log('job-1', 'worker-1', content)
+
+        kwargs = mock_request.call_args[1]
+        self.assertNotIn('json', kwargs)
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertLess(len(kwargs['data']), len(content))
+        body = json.loads(gzip.decompress(kwargs['data']))
+        self.assertEqual(body['content'], content)
+
+    @patch('worker.api_client.requests.Session.request')
+    def test_small_payloads_not_compressed(self, mock_request):
+        """Test small chunks and disabled compression keep plain JSON."""
+        mock_response = Mock()
+        mock_response.ok = True
+        mock_response.status_code = 200
+        mock_response.json.return_value = {}
+        mock_request.return_value = mock_response
+
+        self.client.stream_log('job-1', 'worker-1', 'short line\n')
+        self.assertEqual(mock_request.call_args[1]['json']['content'], 'short line\n')
+
+        client = PrimaryAPIClient('http://localhost:3001', compress=False)
+        client.complete_job('job-1', 'worker-1', 0, log_content='x' * 5000)
+        self.assertEqual(mock_request.call_args[1]['json']['log_content'], 'x' * 5000)
+
+    @patch('worker.api_client.requests.Session.request')
+    def test_wait_for_jobs_outlasts_server_wait(self, mock_request):
+        """Test long-poll request timeout exceeds the server-side wait."""
+        mock_response = Mock()
+        mock_response.ok = True
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'jobs': []}
+        mock_request.return_value = mock_response
+
+        result = self.client.wait_for_jobs('worker-id', wait=30)
+
+        self.assertTrue(result.success)
+        args, kwargs = mock_request.call_args
+        self.assertEqual(args, ('GET', 'http://localhost:3001/api/workers/worker-id/jobs'))
+        self.assertEqual(kwargs['params'], {'wait': 30})
+        self.assertGreater(kwargs['timeout'], 30)
+
+    @patch('worker.api_client.requests.Session.request')
     def test_get_sync_revision(self, mock_request):
         """Test getting sync revision."""
         mock_response = Mock()
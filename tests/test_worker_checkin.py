@@ -336,7 +336,7 @@ class TestWorkerClientCheckin(unittest.TestCase):
         client = PrimaryAPIClient('http://localhost:3001')
         self.assertTrue(hasattr(client, 'checkin'))
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_checkin_sends_correct_data(self, mock_request):
         """Test that checkin sends correct data format."""
         mock_response = Mock()
@@ -368,7 +368,7 @@ class TestWorkerClientCheckin(unittest.TestCase):
         self.assertIn('worker-123', call_args[0][1])
         self.assertIn('checkin', call_args[0][1])
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_checkin_handles_sync_needed(self, mock_request):
         """Test that checkin response includes sync_needed flag."""
         mock_response = Mock()
@@ -391,7 +391,7 @@ class TestWorkerClientCheckin(unittest.TestCase):
         self.assertTrue(result.data.get('sync_needed'))
         self.assertEqual(result.data.get('current_revision'), 'abc1234')
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_checkin_with_active_jobs(self, mock_request):
         """Test checkin with active job status."""
         mock_response = Mock()
@@ -419,7 +419,7 @@ class TestWorkerClientCheckin(unittest.TestCase):
         sent_data = call_args[1]['json']
         self.assertEqual(len(sent_data['active_jobs']), 2)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_checkin_failure_handling(self, mock_request):
         """Test handling of checkin failure."""
         mock_response = Mock()
@@ -287,6 +287,48 @@ class TestJobExecutorExecution(unittest.TestCase):
             self.assertIn('not found', error)
 
 
+    def _run_job(self):
+        """Run a two-line job and return the local log bytes."""
+        mock_process = Mock()
+        mock_process.stdout = iter([b'PLAY [test]\n', b'ok: [h\xc3\xb6st1]\n'])
+        mock_process.returncode = 0
+        mock_process.wait.return_value = None
+        with patch('subprocess.Popen', return_value=mock_process):
+            self.executor._run_job({'id': 'job-1', 'playbook': 'test.yml', 'target': 'all'})
+
+        log_name = [n for n in os.listdir(self.logs_dir) if n.endswith('.log')][0]
+        with open(os.path.join(self.logs_dir, log_name), 'rb') as f:
+            return f.read()
+
+    def test_run_job_completes_with_log_digest(self):
+        """Test completion sends the log length and digest, not its content."""
+        import hashlib
+        log = self._run_job()
+
+        kwargs = self.api.complete_job.call_args[1]
+        self.assertNotIn('log_content', kwargs)
+        self.assertEqual(kwargs['log_length'], len(log))
+        self.assertEqual(kwargs['log_sha256'], hashlib.sha256(log).hexdigest())
+
+    def test_run_job_fills_missing_log_range(self):
+        """Test ranges the primary reports missing are streamed before completing."""
+        self.executor.LOG_FILL_CHUNK_BYTES = 16
+        self.api.stream_log.return_value = APIResponse(success=True, status_code=200)
+        self.api.complete_job.side_effect = [
+            APIResponse(success=False, status_code=409, data={'missing': [[10, 10**6]]}),
+            APIResponse(success=True, status_code=200)
+        ]
+        self.executor.log_shipper.ship = Mock()  # live streaming is not under test
+
+        log = self._run_job()
+
+        self.assertEqual(self.api.complete_job.call_count, 2)
+        fills = self.api.stream_log.call_args_list
+        self.assertEqual(fills[0][1]['offset'], 10)
+        self.assertTrue(all(len(c[0][2].encode('utf-8')) <= 16 for c in fills))
+        self.assertEqual(''.join(c[0][2] for c in fills).encode('utf-8'), log[10:])
+
+
 class TestJobPoller(unittest.TestCase):
     """Test JobPoller class."""
 
@@ -389,6 +431,39 @@ class TestJobPoller(unittest.TestCase):
         # Should still be 1 (not called again)
         self.assertEqual(self.executor.execute_job.call_count, 1)
 
+    def test_poll_once_claims_for_free_slots(self):
+        """Test that free slots left after assigned jobs are filled by claiming."""
+        self.api.get_assigned_jobs.return_value = APIResponse(
+            success=True,
+            status_code=200,
+            data={'jobs': [{'id': 'job-1', 'playbook': 'test.yml'}]}
+        )
+        self.api.claim_jobs.return_value = APIResponse(
+            success=True,
+            status_code=200,
+            data={'jobs': [{'id': 'job-2', 'playbook': 'deploy.yml'}]}
+        )
+
+        started = self.poller.poll_once()
+
+        self.assertEqual([j['id'] for j in started], ['job-1', 'job-2'])
+        self.api.claim_jobs.assert_called_once_with('test-worker', 1)
+
+    def test_poll_once_no_claim_when_slots_filled(self):
+        """Test that no claim is made when assigned jobs fill capacity."""
+        self.api.get_assigned_jobs.return_value = APIResponse(
+            success=True,
+            status_code=200,
+            data={'jobs': [
+                {'id': 'job-1', 'playbook': 'test.yml'},
+                {'id': 'job-2', 'playbook': 'deploy.yml'}
+            ]}
+        )
+
+        self.poller.poll_once()
+
+        self.api.claim_jobs.assert_not_called()
+
     def test_poll_once_api_failure(self):
         """Test handling of API failure during poll."""
         self.api.get_assigned_jobs.return_value = APIResponse(
@@ -401,6 +476,77 @@ class TestJobPoller(unittest.TestCase):
 
         self.assertEqual(len(started), 0)
 
+    # =========================================================================
+    # Long-poll Tests
+    # =========================================================================
+
+    def test_wait_once_starts_pushed_jobs(self):
+        """Test long-poll starts the jobs the primary returns."""
+        self.api.wait_for_jobs.return_value = APIResponse(
+            success=True,
+            status_code=200,
+            data={'jobs': [{'id': 'job-1', 'playbook': 'test.yml'}]}
+        )
+
+        started = self.poller.wait_once(wait=30)
+
+        self.assertEqual([j['id'] for j in started], ['job-1'])
+        self.api.wait_for_jobs.assert_called_once_with('test-worker', 30)
+
+    def test_wait_once_skips_request_when_full(self):
+        """Test no long-poll is made without free slots."""
+        self.executor.active_job_count = 2
+
+        self.assertEqual(self.poller.wait_once(), [])
+        self.api.wait_for_jobs.assert_not_called()
+
+    def test_wait_once_unsupported_primary_disables_push(self):
+        """Test a primary without the endpoint falls back to interval polling."""
+        self.api.wait_for_jobs.return_value = APIResponse(
+            success=False,
+            status_code=404,
+            error='Not Found'
+        )
+
+        self.assertIsNone(self.poller.wait_once())
+        self.assertFalse(self.poller._push_supported)
+
+    def test_wait_once_transient_failure_keeps_push(self):
+        """Test a connection error returns None but keeps long-poll enabled."""
+        self.api.wait_for_jobs.return_value = APIResponse(
+            success=False,
+            status_code=0,
+            error='Connection error'
+        )
+
+        self.assertIsNone(self.poller.wait_once())
+        self.assertTrue(self.poller._push_supported)
+
+    def test_long_poll_loop_reports_started_jobs(self):
+        """Test the background loop hands started jobs to callbacks."""
+        import threading
+
+        delivered = threading.Event()
+        received = []
+
+        def on_started(jobs):
+            received.extend(jobs)
+            delivered.set()
+            self.poller._running = False
+
+        self.api.wait_for_jobs.return_value = APIResponse(
+            success=True,
+            status_code=200,
+            data={'jobs': [{'id': 'job-1', 'playbook': 'test.yml'}]}
+        )
+        self.poller.on_started(on_started)
+
+        self.poller.start_long_poll(wait=30)
+        self.assertTrue(delivered.wait(2))
+        self.poller.stop()
+
+        self.assertEqual([j['id'] for j in received], ['job-1'])
+
 
 class TestJobResult(unittest.TestCase):
     """Test JobResult dataclass."""
@@ -443,7 +589,7 @@ class TestAPIClientJobMethods(unittest.TestCase):
         from worker.api_client import PrimaryAPIClient
         self.client = PrimaryAPIClient('http://localhost:3001')
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_start_job(self, mock_request):
         """Test start_job API call."""
         mock_response = Mock()
@@ -460,7 +606,7 @@ class TestAPIClientJobMethods(unittest.TestCase):
         self.assertEqual(call_args[0][0], 'POST')
         self.assertIn('job-1', call_args[0][1])
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_complete_job(self, mock_request):
         """Test complete_job API call."""
         mock_response = Mock()
@@ -479,7 +625,7 @@ class TestAPIClientJobMethods(unittest.TestCase):
         self.assertEqual(json_data['worker_id'], 'worker-1')
         self.assertEqual(json_data['exit_code'], 0)
 
-    @patch('worker.api_client.requests.request')
+    @patch('worker.api_client.requests.Session.request')
     def test_get_assigned_jobs(self, mock_request):
         """Test get_assigned_jobs API call."""
         mock_response = Mock()
@@ -1,8 +1,8 @@
-from flask import Flask, render_template, jsonify, request, send_file, redirect, url_for
+from flask import Flask, Response, render_template, jsonify, request, send_file, redirect, url_for
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import requests
+import atexit
 import os
-import re
 import glob
 import json
 import subprocess
@@ -12,27 +12,29 @@ import uuid
 import tempfile
 import fcntl
 import logging
-from datetime import datetime
-
-# Redact password-like values in log lines (Ansible may echo vars)
-_LOG_SENSITIVE_PATTERN = re.compile(
-    r'((?:ansible_ssh_pass|ansible_password|ansible_become_pass)\s*["\']?\s*[:=]\s*)(["\']?)[^"\'&\s\n]+(["\']?)',
-    re.IGNORECASE
-)
-
-def _sanitize_log_line(line: str) -> str:
-    """Redact sensitive variable values from a log line."""
-    return _LOG_SENSITIVE_PATTERN.sub(r'\1*****', line)
+from datetime import datetime, timedelta
 
 # Import scheduler components (initialized after app creation)
 from scheduler import ScheduleManager, build_recurrence_config
 
 # Import storage backend
-from storage import get_storage_backend
+from storage import CachedStorageBackend, get_storage_backend
 
 # Import content repository manager (for cluster sync)
 from content_repo import ContentRepository, get_content_repo
 from inventory_sync import run_inventory_sync
+from log_ingest import LogIngestor, discard_partial_log, missing_ranges, promote_partial_log
+from log_writer import BufferedLogWriter, DURABILITY_MODES
+from log_pipeline import LogPipeline, read_chunks, redact
+from log_buffer import LogBufferRegistry
+from log_index import LineIndex, remove_index
+from log_catalog import LogCatalog, PARTIAL_PREFIX, parse_header, job_log_fields
+from log_archive import is_archived, log_exists, log_size, open_log
+from log_retention import LogRetention
+from log_search import LogSearchIndex
+from run_results import RESULTS_ENV, new_results_file, normalize, read_results_file, summarize
+from run_profile import PROFILE_ENV, REPORT_RUNS, build_report, normalize_profile, read_profile_file
+from audit_writer import AUDIT_MODES, AuditWriter
 
 # Import auth module and routes
 from auth_routes import (
@@ -64,11 +66,21 @@ AUTH_ENABLED = os.environ.get('AUTH_ENABLED', 'false').lower() == 'true'
 
 # Import system utilities for hardware checks
 from utils.system import get_system_warnings
+from utils.compression import GzipRequestMiddleware
 
 app = Flask(__name__)
 app.system_warnings = get_system_warnings()
 
 
+def _gzip_sender_registered(worker_id):
+    """Check a gzip upload comes from a registered worker, before its body is inflated."""
+    return bool(storage_backend) and storage_backend.get_worker(worker_id) is not None
+
+
+# Workers gzip log chunks and completion payloads
+app.wsgi_app = GzipRequestMiddleware(app.wsgi_app, authenticate=_gzip_sender_registered)
+
+
 def _run_inventory_sync():
     """Run inventory sync (DB <-> static). Called on inventory changes and periodically."""
     if not storage_backend:
@@ -191,8 +203,35 @@ THEMES_DIR = '/app/config/themes'
 CLUSTER_MODE = os.environ.get('CLUSTER_MODE', 'standalone')
 REGISTRATION_TOKEN = os.environ.get('REGISTRATION_TOKEN', '')
 CHECKIN_INTERVAL = int(os.environ.get('CHECKIN_INTERVAL', '600'))  # seconds
+DISPATCH_INTERVAL = float(os.environ.get('DISPATCH_INTERVAL', '10'))  # dispatcher safety timer, seconds
+JOB_WAIT_MAX = 60  # longest a worker may hold GET /api/workers/<id>/jobs open, seconds
 LOCAL_WORKER_TAGS = [t.strip() for t in os.environ.get('LOCAL_WORKER_TAGS', 'local').split(',') if t.strip()]
 CONTENT_DIR = os.environ.get('CONTENT_DIR', '/app')  # Base dir for syncable content
+STORAGE_CACHE = os.environ.get('STORAGE_CACHE', 'true').lower() == 'true'  # cache worker/token/user/role lookups
+
+# Audit log: 'async' (queued, group commits) or 'sync' (written within each request)
+AUDIT_MODE = os.environ.get('AUDIT_MODE', 'async').strip().lower()
+if AUDIT_MODE not in AUDIT_MODES:
+    print(f"Warning: Unknown AUDIT_MODE '{AUDIT_MODE}', using 'async'")
+    AUDIT_MODE = 'async'
+AUDIT_SYNC_ACTIONS = [a.strip() for a in os.environ.get('AUDIT_SYNC_ACTIONS', '').split(',') if a.strip()]  # written synchronously in async mode
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '0.5'))  # max seconds an entry stays queued
+
+# Local run logs: 'always' (fsync per line), 'batch' (fsync per group) or 'none'
+LOG_DURABILITY = os.environ.get('LOG_DURABILITY', 'batch').strip().lower()
+if LOG_DURABILITY not in DURABILITY_MODES:
+    print(f"Warning: Unknown LOG_DURABILITY '{LOG_DURABILITY}', using 'batch'")
+    LOG_DURABILITY = 'batch'
+LOG_FLUSH_INTERVAL = float(os.environ.get('LOG_FLUSH_INTERVAL', '0.5'))  # max seconds output stays buffered
+LOG_PAGE_LINES = 1000  # lines per page in the log viewer and /api/logs
+LOG_PAGE_MAX_LINES = 10000  # largest page /api/logs returns
+LOG_LIST_PAGE_SIZE = 100  # logs per page on /logs
+
+# Log archival and retention (0 = off)
+LOG_ARCHIVE_AFTER_DAYS = float(os.environ.get('LOG_ARCHIVE_AFTER_DAYS', '7'))  # compress completed logs older than this
+LOG_RETENTION_DAYS = float(os.environ.get('LOG_RETENTION_DAYS', '0'))  # delete logs older than this
+LOG_RETENTION_COUNT = int(os.environ.get('LOG_RETENTION_COUNT', '0'))  # keep at most this many logs
+LOG_RETENTION_BYTES = int(os.environ.get('LOG_RETENTION_BYTES', '0'))  # keep logs within this many bytes on disk
 
 # Track running playbooks by run_id
 # Structure: {run_id: {playbook, target, status, started, log_file, ...}}
@@ -208,6 +247,49 @@ active_batch_jobs = {}
 # Lock for thread-safe access to active_batch_jobs
 batch_lock = threading.Lock()
 
+# Recent output of live runs, batch playbooks and cluster jobs for catch-up
+# Keys: run:<run_id>, batch:<batch_id>:<playbook>, job:<job_id>
+log_buffers = LogBufferRegistry()
+
+# Index of the logs in LOGS_DIR (built from disk on first use)
+log_catalog = LogCatalog(LOGS_DIR, lambda: storage_backend)
+
+
+def _search_entry(log_file):
+    """Catalog entry of a log for the search index; streamed partial logs are described by their job."""
+    entry = log_catalog.get(log_file)
+    if entry or not log_file.startswith(PARTIAL_PREFIX) or not storage_backend:
+        return entry
+    job = storage_backend.get_job(log_file[len(PARTIAL_PREFIX):-len('.log')])
+    if not job:
+        return None
+    entry = job_log_fields(job)
+    if job.get('status') in ('assigned', 'running'):
+        entry['status'] = 'running'
+    try:
+        entry['modified'] = os.path.getmtime(os.path.join(LOGS_DIR, log_file))
+    except OSError:
+        pass
+    return entry
+
+
+def _partial_log_active(job_id):
+    """Check if a job's partial log may still be written or tailed (kept while storage is down)."""
+    if not storage_backend:
+        return True
+    job = storage_backend.get_job(job_id)
+    return bool(job) and job.get('status') in ('assigned', 'running')
+
+
+# Full-text index of the logs (fed by notify(), indexed in the background)
+log_search = LogSearchIndex(os.path.join(CONFIG_DIR, 'log_search.db'), LOGS_DIR, get_entry=_search_entry)
+
+# Archives and prunes logs (run periodically by the scheduler)
+log_retention = LogRetention(log_catalog, archive_after_days=LOG_ARCHIVE_AFTER_DAYS,
+                             max_age_days=LOG_RETENTION_DAYS, max_count=LOG_RETENTION_COUNT,
+                             max_bytes=LOG_RETENTION_BYTES, on_delete=log_search.remove,
+                             partial_active=_partial_log_active)
+
 # Schedule manager (initialized in main block)
 schedule_manager = None
 
@@ -656,19 +738,14 @@ def get_playbooks():
 
 def get_latest_log(playbook_name):
     """Get the most recent log file for a playbook"""
-    pattern = f'{LOGS_DIR}/{playbook_name}-*.log'
-    log_files = glob.glob(pattern)
-    if log_files:
-        # Sort by modification time, most recent first
-        log_files.sort(key=os.path.getmtime, reverse=True)
-        return os.path.basename(log_files[0])
-    return None
+    entry = log_catalog.latest(playbook_name)
+    return entry['log_file'] if entry else None
 
 def get_log_timestamp(log_file):
     """Get timestamp from log file"""
-    if log_file and os.path.exists(f'{LOGS_DIR}/{log_file}'):
-        mtime = os.path.getmtime(f'{LOGS_DIR}/{log_file}')
-        return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
+    entry = log_catalog.get(log_file) if log_file else None
+    if entry:
+        return datetime.fromtimestamp(entry['modified']).strftime('%Y-%m-%d %H:%M:%S')
     return 'Never'
 
 def is_playbook_target_running(playbook_name, target):
@@ -724,6 +801,102 @@ def generate_log_filename(playbook_name, target, run_id):
     short_id = run_id[:8]
     return f"{playbook_name}-{safe_target}-{timestamp}-{short_id}.log"
 
+def _open_run_log(log_path, on_flush):
+    """
+    Open a local run's log with group commits (see log_writer).
+
+    Args:
+        log_path: Log file path
+        on_flush: Callback receiving each committed group of lines
+    """
+    return BufferedLogWriter(log_path, durability=LOG_DURABILITY,
+                             flush_interval=LOG_FLUSH_INTERVAL, on_flush=on_flush)
+
+
+def _store_host_results(run_id, playbook, finished_at, host_results):
+    """
+    Store a run's per-host results (see run_results) for fleet queries.
+
+    Args:
+        run_id: Job or run ID
+        playbook: Playbook name
+        finished_at: ISO timestamp the run finished
+        host_results: Hosts map, or None if the run produced none
+
+    Returns:
+        host_results
+    """
+    if host_results and storage_backend:
+        try:
+            storage_backend.save_host_results(run_id, playbook, finished_at, host_results)
+        except Exception as e:
+            print(f"Error storing host results for {run_id}: {e}")
+    return host_results
+
+
+def _store_run_profile(run_id, playbook, finished_at, profile):
+    """
+    Store a run's task timings (see run_profile) for profile reports.
+
+    Args:
+        run_id: Job or run ID
+        playbook: Playbook name
+        finished_at: ISO timestamp the run finished
+        profile: Normalized profile, or None if the run produced none
+    """
+    if profile and storage_backend:
+        try:
+            storage_backend.save_run_profile(run_id, playbook, finished_at, profile)
+        except Exception as e:
+            print(f"Error storing run profile for {run_id}: {e}")
+
+
+def _read_log_prefix(log_path, end_offset=None):
+    """Read a log file, up to end_offset bytes if given ('' if missing)."""
+    try:
+        with open_log(log_path) as f:
+            data = f.read(end_offset) if end_offset is not None else f.read()
+    except OSError:
+        return ''
+    return data.decode('utf-8', errors='replace')
+
+
+def _log_catchup(key, since_seq, log_path=None):
+    """
+    Catch-up payload for a live log stream.
+
+    Served from the stream's ring buffer when it still holds everything
+    after since_seq; otherwise the log file is read up to the offset the
+    buffer covers, so live deltas continue exactly where it ends.
+
+    Args:
+        key: log_buffers stream key
+        since_seq: Last seq the client has (0 for none)
+        log_path: Log file mirrored by the stream, for the fallback
+
+    Returns:
+        Dict with content, seq and reset (True: replaces the client's content)
+    """
+    buffer = log_buffers.get(key)
+    if buffer:
+        content, seq, reset = buffer.since(since_seq)
+        if content is not None:
+            return {'content': content, 'seq': seq, 'reset': reset}
+        seq, end_offset = buffer.snapshot()
+        content = _read_log_prefix(log_path, end_offset) if log_path else ''
+        return {'content': content, 'seq': seq, 'reset': True}
+    content = _read_log_prefix(log_path) if log_path else ''
+    return {'content': content, 'seq': 0, 'reset': True}
+
+
+def _since_seq(value):
+    """Parse a client's last seen seq (0 if missing or invalid)."""
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
 def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_path=None):
     """
     Run playbook with real-time streaming to WebSocket and log file.
@@ -736,6 +909,7 @@ def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_pa
         inventory_path: Optional path to custom inventory file (for managed hosts)
     """
     log_path = os.path.join(LOGS_DIR, log_file)
+    results_path = profile_path = None
 
     # Get worker info from active_runs (before try block for exception handling)
     with runs_lock:
@@ -768,37 +942,49 @@ def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_pa
         if inventory_path:
             cmd.extend(['-i', inventory_path])
         cmd.extend(['-l', target])
+        # The run_results and task_profile callback plugins write the
+        # per-host recap and task timings here
+        results_path, profile_path = new_results_file(), new_results_file()
         process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,  # Line buffered
-            cwd='/app'
+            cwd='/app',
+            env={**os.environ, RESULTS_ENV: results_path, PROFILE_ENV: profile_path}
         )
 
         # Store process reference for potential cancellation
         with runs_lock:
             active_runs[run_id]['process'] = process
 
-        # Open log file for writing
-        with open(log_path, 'w', buffering=1) as log_f:  # Line buffered
+        def emit_lines(chunks):
+            content = ''.join(chunks)
+            seq = log_buffers.append(f'run:{run_id}', content)
+            socketio.emit('log_line', {'line': content, 'lines': content.splitlines(keepends=True),
+                                       'seq': seq, 'run_id': run_id},
+                          room=f'run:{run_id}')
+            log_search.notify(log_file)
+
+        def track_task(chunk):
+            if chunk.tasks:
+                with runs_lock:
+                    active_runs[run_id]['current_task'] = dict(zip(('line', 'kind', 'name'), chunk.tasks[-1]))
+
+        # Lines are committed to the file in groups, then emitted as one message
+        with _open_run_log(log_path, emit_lines) as log_f:
             # Write header with worker info
-            header = f"=== Playbook: {playbook_name} | Target: {target} | Worker: {worker_name} | Started: {datetime.now().isoformat()} ===\n"
+            started = datetime.now().isoformat()
+            header = f"=== Playbook: {playbook_name} | Target: {target} | Worker: {worker_name} | Started: {started} ===\n"
             log_f.write(header)
             log_f.flush()
-            socketio.emit('log_line', {'line': header, 'run_id': run_id}, room=f'run:{run_id}')
+            log_catalog.record(log_file, playbook=playbook_name, target=target, run_id=run_id,
+                               worker=worker_name, status='running', started=started)
 
-            # Stream output line by line (sanitize to avoid passwords in logs)
-            for line in process.stdout:
-                safe_line = _sanitize_log_line(line)
-                # Write to file first (crash protection)
-                log_f.write(safe_line)
-                log_f.flush()
-                os.fsync(log_f.fileno())  # Force OS to write to disk
-
-                # Then emit to WebSocket
-                socketio.emit('log_line', {'line': safe_line, 'run_id': run_id}, room=f'run:{run_id}')
+            # Output is read, redacted and written in multi-line chunks (see log_pipeline)
+            pipeline = LogPipeline([lambda chunk: log_f.write(chunk.text), track_task])
+            for data in read_chunks(process.stdout):
+                pipeline.feed(data)
+            pipeline.flush()
 
             # Wait for process to complete
             process.wait()
@@ -808,15 +994,18 @@ def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_pa
             status = 'completed' if exit_code == 0 else 'failed'
             footer = f"\n=== Finished: {datetime.now().isoformat()} | Exit Code: {exit_code} | Status: {status.upper()} ===\n"
             log_f.write(footer)
-            log_f.flush()
-            os.fsync(log_f.fileno())
-            socketio.emit('log_line', {'line': footer, 'run_id': run_id}, room=f'run:{run_id}')
 
         # Update status
+        finished = datetime.now().isoformat()
+        log_catalog.record(log_file, status=status, finished=finished)
+        log_search.notify(log_file)
+        host_results = _store_host_results(run_id, playbook_name, finished, read_results_file(results_path))
+        _store_run_profile(run_id, playbook_name, finished, read_profile_file(profile_path))
         with runs_lock:
             active_runs[run_id]['status'] = status
-            active_runs[run_id]['finished'] = datetime.now().isoformat()
+            active_runs[run_id]['finished'] = finished
             active_runs[run_id]['exit_code'] = exit_code
+            active_runs[run_id]['host_results'] = host_results
             if 'process' in active_runs[run_id]:
                 del active_runs[run_id]['process']
 
@@ -827,7 +1016,8 @@ def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_pa
             'target': target,
             'status': status,
             'exit_code': exit_code,
-            'log_file': log_file
+            'log_file': log_file,
+            'recap': summarize(host_results) if host_results else None
         }, room=f'run:{run_id}')
 
         socketio.emit('status_update', {
@@ -846,6 +1036,7 @@ def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_pa
 
     except Exception as e:
         error_msg = f"Error: {str(e)}"
+        log_catalog.record(log_file, status='failed', finished=datetime.now().isoformat())
         with runs_lock:
             if run_id in active_runs:
                 active_runs[run_id]['status'] = 'failed'
@@ -865,6 +1056,16 @@ def run_playbook_streaming(run_id, playbook_name, target, log_file, inventory_pa
         }, room='status')
 
     finally:
+        log_buffers.finish(f'run:{run_id}')
+
+        # Plugin output files are left behind if the run raised before reading them
+        for path in (results_path, profile_path):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
         # Clean up temporary inventory file if one was created
         if inventory_path and os.path.exists(inventory_path):
             try:
@@ -1016,11 +1217,7 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
 
                 # Emit header to batch log
                 header = f"=== Batch Job: {batch_id[:8]} | Playbook: {playbook_name} | Targets: {', '.join(targets)} | Cluster Job: {job_id[:8]} | Started: {playbook_started} ===\n"
-                socketio.emit('batch_log_line', {
-                    'batch_id': batch_id,
-                    'playbook': playbook_name,
-                    'line': header
-                }, room=f'batch:{batch_id}')
+                _emit_batch_log(batch_id, playbook_name, header)
 
                 # Wait for job completion with progress updates and log streaming
                 import time
@@ -1048,11 +1245,8 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
 
                     # Emit status change
                     if current_status != last_status:
-                        socketio.emit('batch_log_line', {
-                            'batch_id': batch_id,
-                            'playbook': playbook_name,
-                            'line': f"[Cluster] Job status: {current_status} (worker: {current_worker_name or 'pending'})\n"
-                        }, room=f'batch:{batch_id}')
+                        _emit_batch_log(batch_id, playbook_name,
+                                        f"[Cluster] Job status: {current_status} (worker: {current_worker_name or 'pending'})\n")
                         last_status = current_status
 
                     # Stream partial log content to batch view
@@ -1066,13 +1260,7 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                                     new_content = pf.read()
                                     if new_content:
                                         last_log_pos = pf.tell()
-                                        # Emit each line separately for proper display
-                                        for line in new_content.splitlines(keepends=True):
-                                            socketio.emit('batch_log_line', {
-                                                'batch_id': batch_id,
-                                                'playbook': playbook_name,
-                                                'line': line
-                                            }, room=f'batch:{batch_id}')
+                                        _emit_batch_log(batch_id, playbook_name, new_content)
                         except Exception:
                             pass  # Ignore partial log read errors
 
@@ -1106,7 +1294,8 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                         'started': playbook_started,
                         'finished': playbook_finished,
                         'worker_id': worker_id,
-                        'worker_name': current_worker_name
+                        'worker_name': current_worker_name,
+                        'recap': summarize(final_job['host_results']) if final_job.get('host_results') else None
                     }
 
                     footer = f"\n=== Finished: {playbook_finished} | Exit Code: {exit_code} | Worker: {current_worker_name} | Status: {playbook_status.upper()} ===\n"
@@ -1122,11 +1311,7 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                     }
                     footer = f"\n=== Finished: {playbook_finished} | Status: FAILED (timeout) ===\n"
 
-                socketio.emit('batch_log_line', {
-                    'batch_id': batch_id,
-                    'playbook': playbook_name,
-                    'line': footer
-                }, room=f'batch:{batch_id}')
+                _emit_batch_log(batch_id, playbook_name, footer)
                 results.append(result)
 
             else:
@@ -1152,6 +1337,7 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                 }, room='batch_jobs')
 
                 # Build and execute the playbook command
+                results_path, profile_path = new_results_file(), new_results_file()
                 try:
                     cmd = ['bash', RUN_SCRIPT, '--stream', playbook_name]
                     if inventory_path:
@@ -1161,31 +1347,26 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                         cmd,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT,
-                        text=True,
-                        bufsize=1,
-                        cwd='/app'
+                        cwd='/app',
+                        env={**os.environ, RESULTS_ENV: results_path, PROFILE_ENV: profile_path}
                     )
 
-                    with open(log_path, 'w', buffering=1) as log_f:
+                    def emit_lines(chunks, playbook_name=playbook_name, log_file=log_file):
+                        _emit_batch_log(batch_id, playbook_name, ''.join(chunks))
+                        log_search.notify(log_file)
+
+                    with _open_run_log(log_path, emit_lines) as log_f:
                         header = f"=== Batch Job: {batch_id[:8]} | Playbook: {playbook_name} | Targets: {', '.join(targets)} | Worker: local-executor | Started: {playbook_started} ===\n"
                         log_f.write(header)
                         log_f.flush()
+                        log_catalog.record(log_file, playbook=playbook_name, target=', '.join(targets),
+                                           run_id=run_id, worker='local-executor', status='running',
+                                           started=playbook_started)
 
-                        socketio.emit('batch_log_line', {
-                            'batch_id': batch_id,
-                            'playbook': playbook_name,
-                            'line': header
-                        }, room=f'batch:{batch_id}')
-
-                        for line in process.stdout:
-                            safe_line = _sanitize_log_line(line)
-                            log_f.write(safe_line)
-                            log_f.flush()
-                            socketio.emit('batch_log_line', {
-                                'batch_id': batch_id,
-                                'playbook': playbook_name,
-                                'line': safe_line
-                            }, room=f'batch:{batch_id}')
+                        pipeline = LogPipeline([lambda chunk, log_f=log_f: log_f.write(chunk.text)])
+                        for data in read_chunks(process.stdout):
+                            pipeline.feed(data)
+                        pipeline.flush()
 
                         process.wait()
                         exit_code = process.returncode
@@ -1193,14 +1374,14 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                         playbook_status = 'completed' if exit_code == 0 else 'failed'
                         footer = f"\n=== Finished: {datetime.now().isoformat()} | Exit Code: {exit_code} | Worker: local-executor | Status: {playbook_status.upper()} ===\n"
                         log_f.write(footer)
-                        log_f.flush()
-                        socketio.emit('batch_log_line', {
-                            'batch_id': batch_id,
-                            'playbook': playbook_name,
-                            'line': footer
-                        }, room=f'batch:{batch_id}')
 
                     playbook_finished = datetime.now().isoformat()
+                    log_catalog.record(log_file, status=playbook_status, finished=playbook_finished)
+                    log_search.notify(log_file)
+                    host_results = _store_host_results(run_id, playbook_name, playbook_finished,
+                                                       read_results_file(results_path))
+                    _store_run_profile(run_id, playbook_name, playbook_finished,
+                                       read_profile_file(profile_path))
 
                     if exit_code == 0:
                         completed_count += 1
@@ -1215,12 +1396,17 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                         'exit_code': exit_code,
                         'started': playbook_started,
                         'finished': playbook_finished,
-                        'worker_name': 'local-executor'
+                        'worker_name': 'local-executor',
+                        'recap': summarize(host_results) if host_results else None
                     }
                     results.append(result)
 
                 except Exception as e:
                     failed_count += 1
+                    log_catalog.record(log_file, status='failed', finished=datetime.now().isoformat())
+                    # Reading removes the plugin output files
+                    read_results_file(results_path)
+                    read_profile_file(profile_path)
                     result = {
                         'playbook': playbook_name,
                         'status': 'failed',
@@ -1305,6 +1491,8 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
         }, room='batch_jobs')
 
     finally:
+        log_buffers.finish_prefix(f'batch:{batch_id}:')
+
         # Clean up temporary inventory file
         if inventory_path and os.path.exists(inventory_path):
             try:
@@ -1313,6 +1501,26 @@ def run_batch_job_streaming(batch_id, playbooks, targets, name=None):
                 pass
 
 
+def _emit_batch_log(batch_id, playbook, content, lines=None):
+    """
+    Record a batch playbook's output and send it to live viewers.
+
+    Args:
+        batch_id: Batch job ID
+        playbook: Playbook the output belongs to
+        content: Output text (one or more lines)
+        lines: content split into lines, if already known
+    """
+    seq = log_buffers.append(f'batch:{batch_id}:{playbook}', content)
+    socketio.emit('batch_log_line', {
+        'batch_id': batch_id,
+        'playbook': playbook,
+        'line': content,
+        'lines': lines if lines is not None else content.splitlines(keepends=True),
+        'seq': seq
+    }, room=f'batch:{batch_id}')
+
+
 def _update_batch_progress(batch_id, current_playbook, current_index, total,
                            completed, failed, results, status, worker_name=None):
     """Helper to update batch job progress in memory and storage."""
@@ -1528,11 +1736,7 @@ def _submit_cluster_job(playbook: str, target: str, priority: int = 50,
 
     if storage_backend.save_job(job):
         # Route the job immediately
-        try:
-            router = get_job_router()
-            router.route_job(job_id)
-        except Exception as e:
-            print(f"Warning: Auto-routing failed for job {job_id}: {e}")
+        _route_new_job(job_id)
         return job
     return None
 
@@ -1644,11 +1848,7 @@ def run_playbook(playbook_name):
 
         if storage_backend.save_job(job):
             # Trigger automatic job routing
-            try:
-                router = get_job_router()
-                router.route_job(job_id)
-            except Exception as e:
-                print(f"Warning: Auto-routing failed for job {job_id}: {e}")
+            _route_new_job(job_id)
 
             # Redirect to job status page
             return redirect(url_for('job_status_page', job_id=job_id))
@@ -1706,11 +1906,13 @@ def live_log(run_id):
 
     if not run_info:
         # Check if there's a log file we can show (run may have completed)
-        # Try to find the log file by run_id pattern
-        pattern = f'{LOGS_DIR}/*-{run_id[:8]}.log'
-        log_files = glob.glob(pattern)
-        if log_files:
+        entry = log_catalog.find_job(run_id)
+        if entry:
             # Redirect to static log view
+            return redirect(url_for('view_log', log_file=entry['log_file']))
+        # Runs from before a restart: find the log file by run_id pattern
+        log_files = glob.glob(f'{LOGS_DIR}/*-{run_id[:8]}.log')
+        if log_files:
             return redirect(url_for('view_log', log_file=os.path.basename(log_files[0])))
         return "Run not found", 404
 
@@ -1794,87 +1996,203 @@ def playbooks_page():
 @app.route('/logs')
 @require_permission('logs:view')
 def list_logs():
-    """List all log files"""
-    log_files = []
-    if os.path.exists(LOGS_DIR):
-        for file in sorted(glob.glob(f'{LOGS_DIR}/*.log'), key=os.path.getmtime, reverse=True):
-            if 'ansible.log' not in file:  # Skip main ansible.log
-                log_files.append({
-                    'name': os.path.basename(file),
-                    'size': os.path.getsize(file),
-                    'modified': datetime.fromtimestamp(os.path.getmtime(file)).strftime('%Y-%m-%d %H:%M:%S')
-                })
-    return render_template('logs.html', logs=log_files)
+    """
+    List log files, newest first.
+
+    Query params:
+        page: Page number, 1-based (default 1)
+        playbook: Only logs of this playbook
+    """
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+    except ValueError:
+        page = 1
+    playbook = request.args.get('playbook') or None
+
+    entries, total = log_catalog.page((page - 1) * LOG_LIST_PAGE_SIZE, LOG_LIST_PAGE_SIZE, playbook)
+    log_files = [{
+        'name': entry['log_file'],
+        'playbook': entry.get('playbook'),
+        'status': entry.get('status'),
+        'size': entry['size'],
+        'modified': datetime.fromtimestamp(entry['modified']).strftime('%Y-%m-%d %H:%M:%S')
+    } for entry in entries]
+    pages = max(1, -(-total // LOG_LIST_PAGE_SIZE))
+    return render_template('logs.html', logs=log_files, page=page, pages=pages,
+                           total=total, playbook=playbook)
 
 @app.route('/logs/<log_file>')
 @require_permission('logs:view')
 def view_log(log_file):
-    """View a specific log file"""
-    log_path = os.path.join(LOGS_DIR, log_file)
-    if not os.path.exists(log_path):
+    """
+    View a specific log file (one page; the rest loads on demand).
+
+    Query params:
+        from_line: First line shown, 0-based (default 0), e.g. a search hit
+    """
+    log_path = _log_file_path(log_file)
+    if not log_path:
         return "Log file not found", 404
 
-    # Read log file
-    with open(log_path, 'r') as f:
-        content = f.read()
+    try:
+        from_line = max(0, int(request.args.get('from_line', 0)))
+    except ValueError:
+        from_line = 0
+
+    index = LineIndex.open(log_path)
+    page = index.read_lines(from_line, LOG_PAGE_LINES)
+    content = page['content']
+    # Metadata comes from the header, even when the page starts further in
+    if page['from_line'] > 0:
+        content_head = index.read_lines(0, 1)['content']
+    else:
+        content_head = content
 
-    # Try to extract metadata from log header
+    # Metadata from the log header
     # Format: === Playbook: name | Target: target | Worker: worker | Started: timestamp ===
-    playbook_name = None
-    target = None
-    worker_name = None
-    started = None
-
-    first_line = content.split('\n')[0] if content else ''
-    if first_line.startswith('===') and '|' in first_line:
-        import re
-        # Extract playbook name
-        pb_match = re.search(r'Playbook:\s*([^|]+)', first_line)
-        if pb_match:
-            playbook_name = pb_match.group(1).strip()
-        # Extract target
-        tgt_match = re.search(r'Target:\s*([^|]+)', first_line)
-        if tgt_match:
-            target = tgt_match.group(1).strip()
-        # Extract worker
-        wkr_match = re.search(r'Worker:\s*([^|]+)', first_line)
-        if wkr_match:
-            worker_name = wkr_match.group(1).strip()
-        # Extract started time
-        st_match = re.search(r'Started:\s*([^=]+)', first_line)
-        if st_match:
-            started = st_match.group(1).strip()
-
-    # Find Job ID for Agent Review
-    job_id = None
-    if storage_backend:
-        try:
-            # Check recent history for matching log file
-            # Limit 100 to catch recent logs
-            history = storage_backend.get_history(limit=100)
-            for job in history:
-                if job.get('log_file') == log_file:
-                    job_id = job.get('run_id') or job.get('id')
-                    break
-        except Exception as e:
-            print(f"Error finding job_id for log: {e}")
-            
-    # Fallback: Check log header for Job ID (if added in newer logs)
-    if not job_id and first_line and 'Job ID:' in first_line:
-        import re
-        jid_match = re.search(r'Job ID:\s*([a-f0-9-]+)', first_line)
-        if jid_match:
-            job_id = jid_match.group(1).strip()
+    header = parse_header(content_head.split('\n')[0] if content_head else '')
+    playbook_name = header.get('playbook')
+    target = header.get('target')
+    worker_name = header.get('worker')
+    started = header.get('started')
+
+    # Job ID for Agent Review: from the catalog, else the header (if added in newer logs)
+    entry = log_catalog.get(log_file)
+    job_id = (entry or {}).get('job_id') or header.get('job_id')
 
     return render_template('log_view.html',
                           log_file=log_file,
                           content=content,
+                          first_line=page['from_line'],
+                          loaded_lines=page['from_line'] + page['count'],
+                          total_lines=page['total_lines'],
+                          page_lines=LOG_PAGE_LINES,
                           playbook_name=playbook_name,
                           target=target,
                           worker_name=worker_name,
                           started=started,
                           job_id=job_id)
 
+def _log_file_path(log_file):
+    """Path of an existing log in LOGS_DIR, or None for unknown/unsafe names."""
+    if not log_file or os.path.basename(log_file) != log_file or not log_file.endswith('.log'):
+        return None
+    log_path = os.path.join(LOGS_DIR, log_file)
+    return log_path if log_exists(log_path) else None
+
+
+def _read_log_page(log_path, args):
+    """
+    Read the page of a log selected by query args, via its line index.
+
+    Args:
+        log_path: Log file path
+        args: Request args with from_line and count, or tail
+
+    Returns:
+        Page dict from LineIndex.read_lines()
+
+    Raises:
+        ValueError: If an arg is not an integer
+    """
+    index = LineIndex.open(log_path)
+    count = min(int(args.get('count', LOG_PAGE_LINES)), LOG_PAGE_MAX_LINES)
+    if args.get('tail') is not None:
+        return index.tail(min(int(args['tail']), LOG_PAGE_MAX_LINES))
+    return index.read_lines(int(args.get('from_line', 0)), count)
+
+
+@app.route('/api/logs/<log_file>')
+@require_permission('logs:view')
+def api_log_page(log_file):
+    """
+    Read part of a log file without loading all of it.
+
+    Query params:
+        from_line: First line, 0-based (default 0; negative counts from the end)
+        count: Lines to return (default 1000, max 10000)
+        tail: Return the last N lines instead
+
+    With a `Range: bytes=...` header the raw bytes are returned instead
+    (206 Partial Content); archived logs are decompressed on the fly.
+    """
+    log_path = _log_file_path(log_file)
+    if not log_path:
+        return jsonify({'error': 'Log file not found'}), 404
+
+    if request.range:
+        if is_archived(log_path):
+            return _send_archived_log_range(log_path)
+        return send_file(log_path, mimetype='text/plain', conditional=True)
+
+    try:
+        page = _read_log_page(log_path, request.args)
+    except ValueError:
+        return jsonify({'error': 'from_line, count and tail must be integers'}), 400
+
+    return jsonify({
+        'log_file': log_file,
+        'size': log_size(log_path),
+        **page
+    })
+
+
+@app.route('/api/logs/search')
+@require_permission('logs:view')
+def api_log_search():
+    """
+    Full-text search across run logs.
+
+    Query params:
+        q: Search terms, all required ("quoted text" is a phrase)
+        playbook: Only logs of this playbook
+        since: Only logs modified since this ISO date/time
+        limit: Max logs returned (default 50, max 200)
+
+    Returns:
+        Matching logs, newest first, each with its first matching lines
+        (line number, byte offset, text and a viewer URL at that line)
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+
+    since = None
+    if request.args.get('since'):
+        try:
+            since = datetime.fromisoformat(request.args['since']).timestamp()
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO date or datetime'}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    results = log_search.search(q, playbook=request.args.get('playbook') or None, since=since, limit=limit)
+    for result in results:
+        if result['modified'] is not None:
+            result['modified'] = datetime.fromtimestamp(result['modified']).isoformat()
+        for match in result['matches']:
+            match['url'] = url_for('view_log', log_file=result['log_file'], from_line=match['line'])
+    return jsonify({'query': q, 'count': len(results), 'results': results})
+
+
+def _send_archived_log_range(log_path):
+    """Serve the requested byte range of an archived log (uncompressed offsets)."""
+    size = log_size(log_path)
+    byte_range = request.range.range_for_length(size)
+    if byte_range is None:
+        return Response(status=416, headers={'Content-Range': f'bytes */{size}'})
+    start, stop = byte_range
+    with open_log(log_path) as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    return Response(data, status=206, mimetype='text/plain', headers={
+        'Content-Range': request.range.to_content_range_header(size),
+        'Accept-Ranges': 'bytes'
+    })
+
+
 @app.route('/health')
 def health_check():
     """
@@ -1968,6 +2286,30 @@ def api_playbooks():
 
     return jsonify(result)
 
+@app.route('/api/playbooks/<name>/profile')
+@require_permission('playbooks:view')
+def api_playbook_profile(name):
+    """
+    Timing hot spots of a playbook across its recent runs.
+
+    Built from the task_profile callback plugin's per-task, per-host
+    durations (see run_profile).
+
+    Query params:
+        runs: Number of recent runs to aggregate (1-200, default 20)
+
+    Returns:
+        JSON with playbook, runs, tasks (p50/p95/max/total seconds, most
+        total time first), hosts (slowest by average seconds per run) and
+        trend (duration and slowest task per run, oldest first).
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    limit = min(max(request.args.get('runs', REPORT_RUNS, type=int), 1), 200)
+    report = build_report(storage_backend.get_run_profiles(name, limit=limit))
+    return jsonify({'playbook': name, **report})
+
 @app.route('/api/runs')
 @require_permission_or_worker('jobs:view')
 def api_runs():
@@ -1992,7 +2334,13 @@ def api_run_detail(run_id):
 @app.route('/api/runs/<run_id>/log')
 @require_permission('logs:view')
 def api_run_log(run_id):
-    """Get the log content for a run (for reconnection/catch-up)"""
+    """
+    Get the log content for a run (for reconnection/catch-up).
+
+    Query params:
+        since_seq: Last seq the client has; only newer output is returned
+            (reset=false) while the run's log buffer still holds it
+    """
     with runs_lock:
         run_info = active_runs.get(run_id)
 
@@ -2004,17 +2352,14 @@ def api_run_log(run_id):
         return jsonify({'error': 'No log file'}), 404
 
     log_path = os.path.join(LOGS_DIR, log_file)
-    if not os.path.exists(log_path):
-        return jsonify({'content': '', 'status': run_info['status']})
-
-    with open(log_path, 'r') as f:
-        content = f.read()
+    catchup = _log_catchup(f'run:{run_id}', _since_seq(request.args.get('since_seq')), log_path)
 
     return jsonify({
-        'content': content,
+        **catchup,
         'status': run_info['status'],
         'playbook': run_info['playbook'],
-        'target': run_info['target']
+        'target': run_info['target'],
+        'current_task': run_info.get('current_task')
     })
 
 
@@ -2166,7 +2511,7 @@ def api_batch_logs(batch_id):
                 'playbook': result.get('playbook'),
                 'log_file': log_file,
                 'status': result.get('status'),
-                'exists': os.path.exists(log_path)
+                'exists': log_exists(log_path)
             })
 
     return jsonify({
@@ -2178,7 +2523,12 @@ def api_batch_logs(batch_id):
 @app.route('/api/batch/<batch_id>/logs/<log_file>', methods=['GET'])
 @require_permission('logs:view')
 def api_batch_log_content(batch_id, log_file):
-    """Get the content of a specific log file from a batch job."""
+    """
+    Get the content of a specific log file from a batch job.
+
+    Accepts the paging params of /api/logs/<log_file> (from_line, count,
+    tail); without them the whole log is returned.
+    """
     batch_job = get_batch_job_status(batch_id)
 
     if not batch_job:
@@ -2195,10 +2545,17 @@ def api_batch_log_content(batch_id, log_file):
         return jsonify({'error': 'Log file not found for this batch job'}), 404
 
     log_path = os.path.join(LOGS_DIR, log_file)
-    if not os.path.exists(log_path):
+    if not log_exists(log_path):
         return jsonify({'error': 'Log file does not exist'}), 404
 
-    with open(log_path, 'r') as f:
+    if any(k in request.args for k in ('from_line', 'count', 'tail')):
+        try:
+            page = _read_log_page(log_path, request.args)
+        except ValueError:
+            return jsonify({'error': 'from_line, count and tail must be integers'}), 400
+        return jsonify({'batch_id': batch_id, 'log_file': log_file, **page})
+
+    with open_log(log_path, 'r') as f:
         content = f.read()
 
     return jsonify({
@@ -2474,10 +2831,11 @@ def api_data_backup():
                 # host_facts: build {hosts: {host: doc}} from MongoDB
                 try:
                     hosts = {}
-                    for doc in storage_backend.host_facts_collection.find():
-                        h = doc.get('host')
-                        if h:
-                            hosts[h] = {k: v for k, v in doc.items() if k != '_id'}
+                    for summary in storage_backend.get_all_hosts():
+                        h = summary.get('host')
+                        doc = storage_backend.export_host_facts(h) if h else None
+                        if doc:
+                            hosts[h] = doc
                     zf.writestr('host_facts.json', json_mod.dumps({'version': '1.0', 'hosts': hosts}, indent=2, default=_json_serial))
                 except Exception:
                     zf.writestr('host_facts.json', json_mod.dumps({'version': '1.0', 'hosts': {}}))
@@ -2576,6 +2934,8 @@ def api_data_restore():
                         for j in jobs:
                             j.pop('_id', None)
                         storage_backend.job_queue_collection.insert_many(jobs)
+        if isinstance(storage_backend, CachedStorageBackend):
+            storage_backend.clear_cache()
         return jsonify({'ok': True, 'message': 'Data restored'})
     except zipfile.BadZipFile:
         return jsonify({'error': 'Invalid zip file'}), 400
@@ -2607,7 +2967,9 @@ def api_storage():
             'STORAGE_BACKEND': os.environ.get('STORAGE_BACKEND', 'flatfile'),
             'MONGODB_HOST': os.environ.get('MONGODB_HOST', 'mongodb') if storage_backend.get_backend_type() == 'mongodb' else None,
             'MONGODB_DATABASE': os.environ.get('MONGODB_DATABASE', 'ansible_simpleweb') if storage_backend.get_backend_type() == 'mongodb' else None
-        }
+        },
+        'cache': storage_backend.get_cache_stats() if isinstance(storage_backend, CachedStorageBackend) else None,
+        'audit': audit_writer.get_stats()
     })
 
 
@@ -3506,6 +3868,54 @@ def api_history():
     return jsonify(history)
 
 
+@app.route('/api/runs/<run_id>/hosts')
+@require_permission('logs:view')
+def api_run_host_results(run_id):
+    """
+    Get the per-host PLAY RECAP of a run.
+
+    Works for cluster jobs (job ID) and local runs (run ID).
+
+    Returns:
+        JSON object mapping host to its ok/changed/unreachable/failed/
+        skipped/rescued/ignored counts and failed_tasks.
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    hosts = storage_backend.get_host_results(run_id)
+    if not hosts:
+        return jsonify({'error': 'No host results for this run'}), 404
+    return jsonify({'run_id': run_id, 'hosts': hosts, 'recap': summarize(hosts)})
+
+
+@app.route('/api/hosts/failures')
+@require_permission('logs:view')
+def api_failing_hosts():
+    """
+    Hosts failing most often, from the indexed per-host run results.
+
+    Query params:
+        days: Look-back window in days (default 7)
+        playbook: Only count runs of this playbook
+        limit: Max hosts to return (1-200, default 20)
+
+    Returns:
+        JSON with since and hosts: [{host, runs, failed_runs,
+        unreachable_runs, last_failed}], most failed runs first.
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    days = request.args.get('days', 7, type=float)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    since = (datetime.now() - timedelta(days=max(days, 0))).isoformat()
+
+    hosts = storage_backend.get_failing_hosts(since, playbook=request.args.get('playbook') or None,
+                                              limit=limit)
+    return jsonify({'since': since, 'hosts': hosts})
+
+
 # =============================================================================
 # Host Facts API (CMDB)
 # Endpoints for collected host data from playbook runs
@@ -4120,6 +4530,7 @@ def api_worker_register():
                 'status': 'online',
                 'is_reconnect': True
             }, room='workers')
+            _notify_dispatcher('worker_registered')
 
             return jsonify({
                 'worker_id': worker_id,
@@ -4163,6 +4574,7 @@ def api_worker_register():
         'status': 'online',
         'is_reconnect': False
     }, room='workers')
+    _notify_dispatcher('worker_registered')
 
     print(f"Worker registered: {name} ({worker_id}) with tags {tags}")
 
@@ -4316,6 +4728,7 @@ def api_worker_checkin(worker_id):
         'status': checkin_data.get('status', worker.get('status')),
         'stats': checkin_data.get('stats', {})
     }, room='workers')
+    _notify_dispatcher('worker_checkin')
 
     # Check if worker needs to sync
     needs_sync = False
@@ -4415,7 +4828,7 @@ def api_cluster_status():
         return jsonify({'error': 'Storage backend not initialized'}), 500
 
     workers = storage_backend.get_all_workers()
-    jobs = storage_backend.get_all_jobs()
+    status_counts = storage_backend.get_job_counts()
 
     # Count workers by status
     worker_counts = {'online': 0, 'offline': 0, 'busy': 0, 'stale': 0}
@@ -4426,10 +4839,9 @@ def api_cluster_status():
 
     # Count jobs by status
     job_counts = {'queued': 0, 'assigned': 0, 'running': 0, 'completed': 0, 'failed': 0}
-    for j in jobs:
-        status = j.get('status', 'unknown')
+    for status, count in status_counts.items():
         if status in job_counts:
-            job_counts[status] += 1
+            job_counts[status] += count
 
     # Find stale workers (no checkin in 2x interval)
     stale_threshold = datetime.now().timestamp() - (CHECKIN_INTERVAL * 2)
@@ -4466,14 +4878,17 @@ def api_cluster_status():
             'stale': stale_workers
         },
         'jobs': {
-            'total': len(jobs),
+            'total': sum(status_counts.values()),
             'queued': job_counts.get('queued', 0),
             'assigned': job_counts.get('assigned', 0),
             'running': job_counts.get('running', 0),
             'completed': job_counts.get('completed', 0),
             'failed': job_counts.get('failed', 0),
             'by_status': job_counts
-        }
+        },
+        'dispatcher': job_dispatcher.get_stats() if job_dispatcher else None,
+        'log_ingest': log_ingestor.get_stats(),
+        'log_buffers': log_buffers.get_stats()
     })
 
 
@@ -4568,6 +4983,9 @@ def detect_stale_workers(mark_stale=False, requeue_jobs=False):
                         'started_at': None,
                         'error_message': f"Requeued: Worker {worker.get('name', worker['id'])} became stale"
                     })
+                    # The stale worker's stream ends here; release its buffer and cached ownership
+                    log_ingestor.close_job(job['id'])
+                    log_buffers.finish(f"job:{job['id']}")
                     requeued_jobs.append({
                         'job_id': job['id'],
                         'playbook': job.get('playbook'),
@@ -4582,6 +5000,9 @@ def detect_stale_workers(mark_stale=False, requeue_jobs=False):
                         'worker_id': worker['id']
                     }, room='jobs')
 
+    if requeued_jobs:
+        _notify_dispatcher('jobs_requeued')
+
     return {
         'stale_workers': stale_workers,
         'requeued_jobs': requeued_jobs
@@ -4718,6 +5139,8 @@ def api_submit_job():
     if not storage_backend.save_job(job):
         return jsonify({'error': 'Failed to save job'}), 500
 
+    _notify_dispatcher('job_submitted')
+
     return jsonify({
         'job_id': job_id,
         'status': 'queued',
@@ -4735,10 +5158,17 @@ def api_list_jobs():
     - status: Filter by status (comma-separated, e.g., 'queued,running')
     - playbook: Filter by playbook name
     - worker: Filter by assigned worker ID
+    - submitted_by: Filter by submitter
+    - sort: submitted_at (default), priority or completed_at
+    - order: desc (default) or asc
     - limit: Maximum number of results (default: 100)
-    - offset: Skip first N results (default: 0)
+    - cursor: Continue after the page that returned this next_cursor
+    - offset: Skip first N results when no cursor is given (default: 0)
 
-    Returns list of job objects.
+    Returns one page of job objects plus next_cursor for the following page.
+    Jobs without a value for the sort field (e.g. unfinished jobs when
+    sorting by completed_at) are listed last. total is only counted for
+    the first page and is null when a cursor is given.
     Users with 'jobs.all:view' or admin see all jobs.
     Other users see only their own submitted jobs.
     """
@@ -4760,8 +5190,9 @@ def api_list_jobs():
     if worker_filter:
         filters['assigned_worker'] = worker_filter
 
-    # Get jobs from storage
-    jobs = storage_backend.get_all_jobs(filters)
+    submitter_filter = request.args.get('submitted_by')
+    if submitter_filter:
+        filters['submitted_by'] = submitter_filter
 
     # Filter by ownership unless user has all-view permission
     current_user = get_current_user()
@@ -4771,21 +5202,32 @@ def api_list_jobs():
                    check_permission(current_user, '*:*', storage_backend)
 
     if not has_all_view and current_user:
-        user_username = current_user.get('username', '')
-        jobs = [j for j in jobs if j.get('submitted_by') == user_username]
+        filters['submitted_by'] = current_user.get('username', '')
 
-    # Apply limit/offset
-    limit = min(500, max(1, int(request.args.get('limit', 100))))
-    offset = max(0, int(request.args.get('offset', 0)))
+    try:
+        limit = min(500, max(1, int(request.args.get('limit', 100))))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
 
-    total = len(jobs)
-    jobs = jobs[offset:offset + limit]
+    try:
+        page = storage_backend.query_jobs(
+            filters,
+            sort_by=request.args.get('sort', 'submitted_at'),
+            descending=request.args.get('order', 'desc').lower() != 'asc',
+            limit=limit,
+            cursor=request.args.get('cursor') or None,
+            offset=offset
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     return jsonify({
-        'jobs': jobs,
-        'total': total,
+        'jobs': page['jobs'],
+        'total': page['total'],
         'limit': limit,
-        'offset': offset
+        'offset': offset,
+        'next_cursor': page['next_cursor']
     })
 
 
@@ -4856,6 +5298,8 @@ def api_cancel_job(job_id):
 
     if not storage_backend.update_job(job_id, updates):
         return jsonify({'error': 'Failed to update job'}), 500
+    log_ingestor.close_job(job_id)
+    log_buffers.finish(f'job:{job_id}')
 
     return jsonify({
         'job_id': job_id,
@@ -4864,6 +5308,24 @@ def api_cancel_job(job_id):
     })
 
 
+def _emit_job_log_update(job_id: str, content: str, append: bool):
+    """Broadcast new partial-log content to live viewers of a job."""
+    seq = log_buffers.append(f'job:{job_id}', content, replace=not append)
+    log_search.notify(f'{PARTIAL_PREFIX}{job_id}.log')
+    if socketio:
+        socketio.emit('job_log_update', {
+            'job_id': job_id,
+            'content': content,
+            'append': append,
+            'seq': seq
+        }, room=f'job_{job_id}')
+
+
+# Writes streamed worker log chunks (open partial-log handles, cached ownership)
+log_ingestor = LogIngestor(lambda: storage_backend, LOGS_DIR,
+                           sanitize=redact, on_update=_emit_job_log_update)
+
+
 @app.route('/api/jobs/<job_id>/log/stream', methods=['POST'])
 @worker_auth_required
 def api_stream_job_log(job_id):
@@ -4871,70 +5333,94 @@ def api_stream_job_log(job_id):
     Stream log content from worker during job execution.
 
     This endpoint allows workers to send partial log content while a job
-    is running, enabling live log viewing in the web UI.
+    is running, enabling live log viewing in the web UI. Workers streaming
+    several jobs should prefer the batched POST /api/workers/<id>/logs.
 
     Expected JSON body:
     {
         "worker_id": "worker-uuid",
         "content": "log content chunk...",
         "append": true,           // true to append, false to replace
-        "offset": 0               // byte offset for append (optional)
+        "offset": 0,              // byte offset of the chunk (optional)
+        "checksum": "sha256-hex"  // SHA-256 of the chunk (optional)
     }
 
     The log content is written to a partial log file that is served
-    to the web UI during execution.
+    to the web UI during execution. Chunks with an offset are idempotent:
+    a chunk already on disk is acknowledged without writing, and a chunk
+    past the end of the file is rejected with 409 and expected_offset.
     """
     if not storage_backend:
         return jsonify({'error': 'Storage backend not initialized'}), 500
 
-    job = storage_backend.get_job(job_id)
-    if not job:
-        return jsonify({'error': 'Job not found'}), 404
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    chunk = {
+        'job_id': job_id,
+        'content': data.get('content', ''),
+        'append': data.get('append', True),
+        'offset': data.get('offset'),
+        'checksum': data.get('checksum')
+    }
 
-    if job.get('status') not in ('assigned', 'running'):
-        return jsonify({'error': 'Job is not running'}), 400
+    try:
+        result = log_ingestor.ingest(data.get('worker_id'), [chunk])[0]
+    except IOError as e:
+        return jsonify({'error': f'Failed to write log: {str(e)}'}), 500
 
-    data = request.get_json() or {}
-    worker_id = data.get('worker_id')
-    content = data.get('content', '')
-    append = data.get('append', True)
+    if result['status'] == 'rejected':
+        return jsonify({'error': result['error']}), result['code']
+    if result['status'] == 'gap':
+        return jsonify({'error': 'Chunk offset past end of log',
+                        'expected_offset': result['expected_offset']}), 409
 
-    # Sanitize so passwords never stored or broadcast (defense-in-depth; worker should already redact)
-    content_safe = '\n'.join(_sanitize_log_line(l) for l in content.split('\n'))
+    return jsonify({
+        'status': result['status'],
+        'bytes_written': result['bytes_written'],
+        'offset': result['offset']
+    })
 
-    # Verify worker owns this job
-    if job.get('assigned_worker') != worker_id:
-        return jsonify({'error': 'Worker does not own this job'}), 403
 
-    # Create partial log filename
-    partial_log_file = f"partial-{job_id}.log"
-    partial_log_path = os.path.join(LOGS_DIR, partial_log_file)
+@app.route('/api/workers/<worker_id>/logs', methods=['POST'])
+@worker_auth_required
+def api_ingest_worker_logs(worker_id):
+    """
+    Ingest log chunks for several of a worker's running jobs at once.
 
-    try:
-        os.makedirs(LOGS_DIR, exist_ok=True)
-        mode = 'a' if append else 'w'
-        with open(partial_log_path, mode) as f:
-            f.write(content_safe)
+    Expected JSON body:
+    {
+        "chunks": [
+            {"job_id": "...", "content": "...", "append": true,
+             "offset": 1024, "checksum": "sha256-hex"},
+            ...
+        ]
+    }
 
-        # Update job with partial log reference if not set
-        if not job.get('partial_log_file'):
-            storage_backend.update_job(job_id, {'partial_log_file': partial_log_file})
+    Chunks are applied in order with the same offset rules as
+    /api/jobs/<id>/log/stream. Ownership is checked against a cached
+    job assignment, so a batch normally needs no storage lookups, and
+    live viewers get one job_log_update event per job per batch.
 
-        # Broadcast log update via WebSocket for live viewing
-        if socketio:
-            socketio.emit('job_log_update', {
-                'job_id': job_id,
-                'content': content_safe,
-                'append': append
-            }, room=f'job_{job_id}')
+    Returns:
+        {"results": [{"job_id", "status", "offset", "bytes_written", ...}]}
+        with status 'ok', 'duplicate', 'gap' (plus expected_offset) or
+        'rejected' (plus error and code) for each chunk
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('chunks'), list):
+        return jsonify({'error': 'chunks must be a list'}), 400
+    chunks = data['chunks']
 
+    try:
+        results = log_ingestor.ingest(worker_id, chunks)
     except IOError as e:
         return jsonify({'error': f'Failed to write log: {str(e)}'}), 500
 
-    return jsonify({
-        'status': 'ok',
-        'bytes_written': len(content_safe)
-    })
+    return jsonify({'results': results})
 
 
 @app.route('/api/jobs/<job_id>/log', methods=['GET'])
@@ -4980,7 +5466,7 @@ def api_get_job_log(job_id):
 
     log_path = os.path.join(LOGS_DIR, log_file)
 
-    if not os.path.exists(log_path):
+    if not log_exists(log_path):
         return jsonify({
             'job_id': job_id,
             'status': job.get('status'),
@@ -4989,28 +5475,32 @@ def api_get_job_log(job_id):
             'message': 'Log file not found'
         })
 
-    # Read log file
-    try:
-        with open(log_path, 'r') as f:
-            log_content = f.read()
-    except IOError as e:
-        return jsonify({'error': f'Failed to read log: {str(e)}'}), 500
-
-    # Apply line limit if requested
+    # Apply line limit if requested (read through the line index, not the whole file)
+    num_lines = None
     lines_param = request.args.get('lines')
     if lines_param:
         try:
             num_lines = int(lines_param)
-            log_lines = log_content.splitlines()
+        except ValueError:
+            pass
+
+    try:
+        if num_lines is not None:
+            index = LineIndex.open(log_path)
             if num_lines < 0:
                 # Tail: last N lines
-                log_lines = log_lines[num_lines:]
+                page = index.tail(-num_lines)
             else:
                 # Head: first N lines
-                log_lines = log_lines[:num_lines]
-            log_content = '\n'.join(log_lines)
-        except ValueError:
-            pass
+                page = index.read_lines(0, num_lines)
+            log_content = page['content']
+            if log_content.endswith('\n'):
+                log_content = log_content[:-1]
+        else:
+            with open_log(log_path, 'r') as f:
+                log_content = f.read()
+    except IOError as e:
+        return jsonify({'error': f'Failed to read log: {str(e)}'}), 500
 
     # Return format
     output_format = request.args.get('format', 'text')
@@ -5042,6 +5532,89 @@ def api_get_pending_jobs():
     return jsonify({'jobs': jobs})
 
 
+@app.route('/api/workers/<worker_id>/jobs', methods=['GET'])
+@worker_auth_required
+def api_worker_wait_for_jobs(worker_id):
+    """
+    Long-poll for jobs assigned to a worker.
+
+    Returns immediately if the worker has assigned jobs; otherwise holds
+    the request until the dispatcher assigns one or `wait` runs out. This
+    gives near-zero pickup latency without idle workers polling.
+
+    Query parameters:
+    - wait: Seconds to hold the request (default: 0, max: 60)
+
+    Returns:
+    {
+        "jobs": [...assigned job objects...]
+    }
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    try:
+        wait = min(JOB_WAIT_MAX, max(0.0, float(request.args.get('wait', 0))))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number'}), 400
+
+    deadline = time.time() + wait
+    while True:
+        version = _get_worker_assignment_version(worker_id)
+        jobs = storage_backend.get_worker_jobs(worker_id, ['assigned'])
+        if jobs or time.time() >= deadline:
+            return jsonify({'jobs': jobs})
+
+        # Sleep in short ticks until this worker is signalled; re-check storage
+        # every few seconds for assignments made outside the router
+        recheck_at = min(deadline, time.time() + 5)
+        while time.time() < recheck_at and _get_worker_assignment_version(worker_id) == version:
+            socketio.sleep(0.1)
+
+
+@app.route('/api/workers/<worker_id>/jobs/claim', methods=['POST'])
+@worker_auth_required
+def api_worker_claim_jobs(worker_id):
+    """
+    Claim queued jobs for a worker that has free capacity.
+
+    Used by workers on the poll path to pull work directly instead of
+    waiting for the next routing pass. Jobs are claimed atomically in
+    dispatch order (priority, aging and fair share), limited to jobs
+    whose required_tags the worker has.
+
+    Expected JSON body:
+    {
+        "slots": 2    // Free execution slots on the worker (default: 1)
+    }
+
+    Returns:
+    {
+        "jobs": [...claimed job objects...]
+    }
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    worker = storage_backend.get_worker(worker_id)
+    if not worker:
+        return jsonify({'error': 'Worker not found'}), 404
+
+    if worker.get('status') not in ('online', 'busy'):
+        return jsonify({
+            'error': f'Worker not available (status: {worker.get("status")})'
+        }), 400
+
+    data = request.get_json(silent=True) or {}
+    try:
+        slots = min(50, max(0, int(data.get('slots', 1))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'slots must be an integer'}), 400
+
+    jobs = get_job_router().claim_for_worker(worker, slots)
+    return jsonify({'jobs': jobs})
+
+
 @app.route('/api/jobs/<job_id>/assign', methods=['POST'])
 @service_auth_required
 def api_assign_job(job_id):
@@ -5096,6 +5669,8 @@ def api_assign_job(job_id):
     if not storage_backend.update_job(job_id, updates):
         return jsonify({'error': 'Failed to assign job'}), 500
 
+    _signal_worker_assignments([{'assigned': True, 'worker_id': worker_id}])
+
     return jsonify({
         'job_id': job_id,
         'worker_id': worker_id,
@@ -5167,18 +5742,35 @@ def api_complete_job(job_id):
         "exit_code": 0,
         "log_file": "job-uuid-2024-01-01.log",    // Optional: log filename on worker
         "log_content": "...",                      // Optional: full log content
+        "log_length": 12345,                       // Optional: log size in bytes, with
+        "log_sha256": "hex...",                    //   its digest, instead of log_content
         "error_message": null,                     // Optional: error details if failed
         "duration_seconds": 120,                   // Optional: execution duration
+        "host_results": {                          // Optional: per-host PLAY RECAP
+            "hostname": {"ok": 5, "failed": 1, ..., "failed_tasks": [...]},
+            ...
+        },
+        "task_timings": {                          // Optional: task_profile plugin output
+            "duration": 42.1,
+            "tasks": [{"name": "...", "hosts": {"hostname": 1.25}}]
+        },
         "cmdb_facts": {                            // Optional: CMDB facts to store
             "hostname": {...},
             ...
         },
+        "cmdb_collection": "hardware",             // Optional: collection of cmdb_facts
+                                                   //   (default: from the playbook name)
         "checkin": {                               // Optional: piggyback checkin data
             "sync_revision": "abc123",
             "system_stats": {...}
         }
     }
 
+    With log_length/log_sha256 the final log is assembled from the chunks
+    already streamed to /api/jobs/<id>/log/stream. If they do not match,
+    the job is left running and 409 is returned with the missing byte
+    ranges; the worker streams those ranges and completes again.
+
     Returns job status and updated worker statistics.
     """
     if not storage_backend:
@@ -5197,6 +5789,22 @@ def api_complete_job(job_id):
     if job.get('assigned_worker') != worker_id:
         return jsonify({'error': 'Job not assigned to this worker'}), 403
 
+    log_length = None
+    if data.get('log_length') is not None and not data.get('log_content'):
+        try:
+            log_length = int(data['log_length'])
+        except (ValueError, TypeError):
+            return jsonify({'error': 'log_length must be an integer'}), 400
+
+    # Chunks for this job are done; release its open partial-log handle
+    log_ingestor.close_job(job_id)
+    log_buffers.finish(f'job:{job_id}')
+    partial_log_path = log_ingestor.partial_log_path(job_id)
+    if log_length is not None:
+        missing = missing_ranges(partial_log_path, log_length, data.get('log_sha256'))
+        if missing:
+            return jsonify({'error': 'Log incomplete', 'missing': missing}), 409
+
     exit_code = data.get('exit_code', 0)
     status = 'completed' if exit_code == 0 else 'failed'
     completed_at = datetime.now().isoformat()
@@ -5226,6 +5834,10 @@ def api_complete_job(job_id):
     if data.get('error_message'):
         updates['error_message'] = data['error_message']
 
+    host_results = normalize(data.get('host_results'))
+    if host_results:
+        updates['host_results'] = host_results
+
     # Store log content if provided
     log_stored = False
     if data.get('log_content'):
@@ -5235,14 +5847,39 @@ def api_complete_job(job_id):
             os.makedirs(LOGS_DIR, exist_ok=True)
             with open(log_path, 'w') as f:
                 f.write(data['log_content'])
+            remove_index(log_path)
             updates['log_file'] = log_filename
             log_stored = True
         except Exception as e:
             print(f"Error storing log for job {job_id}: {e}")
+    elif os.path.exists(partial_log_path):
+        # Promote the streamed log (verified above when a digest was sent)
+        log_filename = data.get('log_file') or f"job-{job_id}-{completed_at[:10]}.log"
+        log_path = os.path.join(LOGS_DIR, log_filename)
+        try:
+            promote_partial_log(partial_log_path, log_path)
+            updates['log_file'] = log_filename
+            log_stored = True
+        except OSError as e:
+            print(f"Error storing log for job {job_id}: {e}")
+
+    if log_stored:
+        updates['partial_log_file'] = None
 
     if not storage_backend.update_job(job_id, updates):
         return jsonify({'error': 'Failed to update job'}), 500
 
+    # The job now points at its final log; without the partial name that
+    # is the only copy, so archiving and retention free its disk space
+    if log_stored:
+        discard_partial_log(partial_log_path)
+
+    # Index per-host results for fleet queries, and task timings for profiles
+    _store_host_results(job_id, job.get('playbook'), completed_at, host_results)
+    profile = normalize_profile(data.get('task_timings'))
+    if profile['tasks']:
+        _store_run_profile(job_id, job.get('playbook'), completed_at, profile)
+
     # Update worker statistics
     worker = storage_backend.get_worker(worker_id)
     worker_stats_updated = False
@@ -5282,36 +5919,36 @@ def api_complete_job(job_id):
         storage_backend.update_worker_checkin(worker_id, {'stats': merged_stats})
         worker_stats_updated = True
 
-    # Process CMDB facts if provided
+    # Catalog the job's log and queue it for search indexing
+    if updates.get('log_file'):
+        log_catalog.record(updates['log_file'], **job_log_fields({**job, **updates}),
+                           worker=worker.get('name') if worker else None)
+        log_search.notify(updates['log_file'])
+        # The promoted log replaces the streamed one in search results
+        log_search.remove(os.path.basename(partial_log_path))
+
+    # Process CMDB facts if provided (one bulk save for the whole run)
     cmdb_facts_stored = 0
     if data.get('cmdb_facts') and isinstance(data['cmdb_facts'], dict):
-        for host, facts in data['cmdb_facts'].items():
-            try:
-                # Derive collection from playbook name
-                playbook = job.get('playbook', 'unknown')
-                collection = playbook.replace('.yml', '').replace('.yaml', '')
-
-                # Add metadata
-                facts_with_meta = {
-                    **facts,
-                    '_meta': {
-                        'job_id': job_id,
-                        'playbook': playbook,
-                        'collected_at': completed_at,
-                        'collector': 'job_completion'
-                    }
-                }
-
-                storage_backend.save_host_facts(
-                    host=host,
-                    collection=collection,
-                    data=facts_with_meta,
-                    groups=[],
-                    source='job'
-                )
-                cmdb_facts_stored += 1
-            except Exception as e:
-                print(f"Error storing CMDB facts for {host}: {e}")
+        playbook = job.get('playbook', 'unknown')
+        # Facts spooled by the cmdb_collector callback name their collection;
+        # otherwise derive it from the playbook name
+        collection = data.get('cmdb_collection') or playbook.replace('.yml', '').replace('.yaml', '')
+        meta = {
+            'job_id': job_id,
+            'playbook': playbook,
+            'collected_at': completed_at,
+            'collector': 'job_completion'
+        }
+        facts = [
+            {'host': host, 'collection': collection, 'data': {**host_facts, '_meta': meta}}
+            for host, host_facts in data['cmdb_facts'].items() if isinstance(host_facts, dict)
+        ]
+        try:
+            results = storage_backend.save_host_facts_bulk(facts, source='job')
+            cmdb_facts_stored = sum(1 for r in results if r.get('status') != 'error')
+        except Exception as e:
+            print(f"Error storing CMDB facts for job {job_id}: {e}")
 
     # Process piggyback checkin if provided
     checkin_processed = False
@@ -5331,9 +5968,13 @@ def api_complete_job(job_id):
         'exit_code': exit_code,
         'worker_id': worker_id,
         'duration_seconds': duration_seconds,
-        'completed_at': completed_at
+        'completed_at': completed_at,
+        'recap': summarize(host_results) if host_results else None
     }, room='jobs')
 
+    # A slot just freed up on this worker
+    _notify_dispatcher('job_completed')
+
     # Trigger Agent Review (Fire and Forget)
     # Set AGENT_TRIGGER_ENABLED=false to disable (e.g. if host Ollama keeps starting; helps isolate cause)
     if AGENT_SERVICE_URL and os.environ.get('AGENT_TRIGGER_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
@@ -5376,6 +6017,69 @@ def get_job_router():
     return JobRouter(storage_backend)
 
 
+# Background dispatcher (primary mode only, started with background tasks)
+job_dispatcher = None
+
+
+def _notify_dispatcher(reason: str) -> bool:
+    """
+    Wake the job dispatcher so queued jobs are routed right away.
+
+    Returns:
+        True if a dispatcher is running, False otherwise
+    """
+    if job_dispatcher and job_dispatcher.is_running():
+        job_dispatcher.notify(reason)
+        return True
+    return False
+
+
+def _route_new_job(job_id: str):
+    """Route a newly queued job via the dispatcher, or inline if none is running."""
+    if _notify_dispatcher('job_submitted'):
+        return
+    try:
+        router = get_job_router()
+        _signal_worker_assignments([router.route_job(job_id)])
+    except Exception as e:
+        print(f"Warning: Auto-routing failed for job {job_id}: {e}")
+
+
+# Per-worker assignment counters; long-polling workers wait for theirs to change
+_worker_assignment_versions = {}
+_worker_assignment_lock = threading.Lock()
+
+
+def _get_worker_assignment_version(worker_id: str) -> int:
+    """Get the assignment counter for a worker."""
+    with _worker_assignment_lock:
+        return _worker_assignment_versions.get(worker_id, 0)
+
+
+def _signal_worker_assignments(results: list):
+    """
+    Wake workers long-polling for jobs after routing.
+
+    Args:
+        results: Routing result dicts (as returned by JobRouter)
+    """
+    with _worker_assignment_lock:
+        for result in results:
+            if result and result.get('assigned') and result.get('worker_id'):
+                worker_id = result['worker_id']
+                _worker_assignment_versions[worker_id] = _worker_assignment_versions.get(worker_id, 0) + 1
+
+
+def init_job_dispatcher():
+    """Start the event-driven job dispatcher."""
+    global job_dispatcher
+    from job_dispatcher import JobDispatcher
+    job_dispatcher = JobDispatcher(get_job_router, safety_interval=DISPATCH_INTERVAL,
+                                   on_assigned=_signal_worker_assignments)
+    job_dispatcher.start()
+    job_dispatcher.notify('startup')
+
+
 @app.route('/api/jobs/route', methods=['POST'])
 @service_auth_required
 def api_route_pending_jobs():
@@ -5394,6 +6098,7 @@ def api_route_pending_jobs():
     router = get_job_router()
 
     results = router.route_pending_jobs(limit)
+    _signal_worker_assignments(results)
 
     assigned_count = sum(1 for r in results if r.get('assigned'))
 
@@ -5404,6 +6109,33 @@ def api_route_pending_jobs():
     })
 
 
+@app.route('/api/jobs/queue', methods=['GET'])
+@require_permission('jobs:view')
+def api_job_queue():
+    """
+    Show the pending queue in dispatch order.
+
+    Each entry includes the job's position, effective priority (with
+    aging), fair-share dispatch score and expected wait in seconds.
+
+    Query parameters:
+    - job_id: Only return the entry for this job
+    """
+    if not storage_backend:
+        return jsonify({'error': 'Storage backend not initialized'}), 500
+
+    status = get_job_router().get_queue_status()
+
+    job_id = request.args.get('job_id')
+    if job_id:
+        entry = next((e for e in status['queue'] if e['job_id'] == job_id), None)
+        if not entry:
+            return jsonify({'error': 'Job not queued'}), 404
+        return jsonify(entry)
+
+    return jsonify(status)
+
+
 @app.route('/api/jobs/<job_id>/route', methods=['POST'])
 @service_auth_required
 def api_route_specific_job(job_id):
@@ -5421,6 +6153,8 @@ def api_route_specific_job(job_id):
     if result.get('error'):
         return jsonify(result), 400
 
+    _signal_worker_assignments([result])
+
     return jsonify(result)
 
 
@@ -5749,7 +6483,12 @@ def handle_disconnect():
 
 @socketio.on('join_run')
 def handle_join_run(data):
-    """Join a specific run's room to receive log updates"""
+    """
+    Join a specific run's room to receive log updates.
+
+    Clients pass since_seq (the last log_line seq they have) when
+    reconnecting and get only what they missed.
+    """
     run_id = data.get('run_id')
     if run_id:
         join_room(f'run:{run_id}')
@@ -5759,16 +6498,13 @@ def handle_join_run(data):
 
         if run_info:
             log_file = run_info.get('log_file')
-            if log_file:
-                log_path = os.path.join(LOGS_DIR, log_file)
-                if os.path.exists(log_path):
-                    with open(log_path, 'r') as f:
-                        content = f.read()
-                    emit('log_catchup', {
-                        'content': content,
-                        'status': run_info['status'],
-                        'run_id': run_id
-                    })
+            log_path = os.path.join(LOGS_DIR, log_file) if log_file else None
+            catchup = _log_catchup(f'run:{run_id}', _since_seq(data.get('since_seq')), log_path)
+            emit('log_catchup', {
+                **catchup,
+                'status': run_info['status'],
+                'run_id': run_id
+            })
 
 @socketio.on('leave_run')
 def handle_leave_run(data):
@@ -5822,60 +6558,40 @@ def handle_join_batch(data):
                 'worker_name': batch_job.get('worker_name')
             })
 
-            # Send log catchup for completed/in-progress playbooks
-            results = batch_job.get('results', [])
-            for result in results:
-                playbook = result.get('playbook')
-                log_file = result.get('log_file')
-                job_id = result.get('job_id')
-
-                # Try to read from final log file first, then partial log
-                log_content = None
-                if log_file:
-                    log_path = os.path.join(LOGS_DIR, log_file)
-                    if os.path.exists(log_path):
-                        try:
-                            with open(log_path, 'r') as f:
-                                log_content = f.read()
-                        except:
-                            pass
-
-                if not log_content and job_id:
-                    # Try partial log
-                    partial_path = os.path.join(LOGS_DIR, f'partial-{job_id}.log')
-                    if os.path.exists(partial_path):
-                        try:
-                            with open(partial_path, 'r') as f:
-                                log_content = f.read()
-                        except:
-                            pass
-
-                if log_content:
-                    # Send log lines for this playbook
-                    for line in log_content.splitlines(keepends=True):
-                        emit('batch_log_line', {
-                            'batch_id': batch_id,
-                            'playbook': playbook,
-                            'line': line
-                        })
-
-            # Also check for current running job's partial log
-            current_job_id = batch_job.get('current_job_id')
-            current_playbook = batch_job.get('current_playbook')
-            if current_job_id and current_playbook and batch_job.get('status') == 'running':
-                partial_path = os.path.join(LOGS_DIR, f'partial-{current_job_id}.log')
-                if os.path.exists(partial_path):
-                    try:
-                        with open(partial_path, 'r') as f:
-                            log_content = f.read()
-                            for line in log_content.splitlines(keepends=True):
-                                emit('batch_log_line', {
-                                    'batch_id': batch_id,
-                                    'playbook': current_playbook,
-                                    'line': line
-                                })
-                    except:
-                        pass
+            # One compact log catch-up for all playbooks
+            since = data.get('since_seq') if isinstance(data.get('since_seq'), dict) else {}
+            logs = []
+            for playbook in batch_job.get('playbooks', []):
+                key = f'batch:{batch_id}:{playbook}'
+                buffer = log_buffers.get(key)
+                content, seq, reset = buffer.since(_since_seq(since.get(playbook))) if buffer else (None, 0, True)
+                if content is None:
+                    # Buffer gone (batch finished long ago) or evicted: read from disk
+                    content = _read_batch_playbook_log(batch_job, playbook)
+                if content or reset:
+                    logs.append({'playbook': playbook, 'content': content, 'seq': seq, 'reset': reset})
+            emit('batch_log_catchup', {'batch_id': batch_id, 'logs': logs})
+
+
+def _read_batch_playbook_log(batch_job, playbook):
+    """Read a batch playbook's log from disk: final log, else the job's partial log."""
+    job_ids = []
+    for result in batch_job.get('results', []):
+        if result.get('playbook') != playbook:
+            continue
+        if result.get('log_file'):
+            content = _read_log_prefix(os.path.join(LOGS_DIR, result['log_file']))
+            if content:
+                return content
+        if result.get('job_id'):
+            job_ids.append(result['job_id'])
+    if batch_job.get('current_playbook') == playbook and batch_job.get('current_job_id'):
+        job_ids.append(batch_job['current_job_id'])
+    for job_id in job_ids:
+        content = _read_log_prefix(os.path.join(LOGS_DIR, f'partial-{job_id}.log'))
+        if content:
+            return content
+    return ''
 
 
 @socketio.on('leave_batch')
@@ -5893,6 +6609,8 @@ def handle_join_job(data):
 
     This is used for jobs executed on remote workers. Workers stream
     log content to the primary, which broadcasts to connected clients.
+    Running jobs catch up from the job's log buffer after since_seq (the
+    last job_log_update seq the client has); finished jobs get the full log.
     """
     job_id = data.get('job_id')
     if job_id:
@@ -5906,25 +6624,20 @@ def handle_join_job(data):
                 partial_log_file = job.get('partial_log_file')
                 log_file = job.get('log_file')
 
-                log_content = None
-                log_path = None
-
-                # Prefer partial log for running jobs
-                if job.get('status') in ('assigned', 'running') and partial_log_file:
-                    log_path = os.path.join(LOGS_DIR, partial_log_file)
-                elif log_file:
-                    log_path = os.path.join(LOGS_DIR, log_file)
-
-                if log_path and os.path.exists(log_path):
-                    try:
-                        with open(log_path, 'r') as f:
-                            log_content = f.read()
-                    except IOError:
-                        pass
+                if job.get('status') in ('assigned', 'running'):
+                    log_path = os.path.join(LOGS_DIR, partial_log_file) if partial_log_file else None
+                    catchup = _log_catchup(f'job:{job_id}', _since_seq(data.get('since_seq')), log_path)
+                else:
+                    buffer = log_buffers.get(f'job:{job_id}')
+                    catchup = {
+                        'content': _read_log_prefix(os.path.join(LOGS_DIR, log_file)) if log_file else '',
+                        'seq': buffer.seq if buffer else 0,
+                        'reset': True
+                    }
 
                 emit('job_log_catchup', {
+                    **catchup,
                     'job_id': job_id,
-                    'content': log_content or '',
                     'status': job.get('status')
                 })
 
@@ -6127,11 +6840,28 @@ def agent_analyze_config():
 
 # Initialize storage backend and auth middleware early
 storage_backend = get_storage_backend()
-init_auth_middleware(app, storage_backend, auth_enabled=AUTH_ENABLED)
+if STORAGE_CACHE:
+    storage_backend = CachedStorageBackend(storage_backend)
+audit_writer = AuditWriter(lambda: storage_backend, mode=AUDIT_MODE, sync_actions=AUDIT_SYNC_ACTIONS,
+                           flush_interval=AUDIT_FLUSH_INTERVAL)
+atexit.register(audit_writer.close)
+init_auth_middleware(app, storage_backend, auth_enabled=AUTH_ENABLED, audit_writer=audit_writer)
 
 # Register blueprints statically (must be at module level for Flask routing)
 app.register_blueprint(auth_bp)
 
+def _run_log_retention():
+    """Archive and prune logs per the LOG_ARCHIVE_* / LOG_RETENTION_* settings."""
+    try:
+        stats = log_retention.run()
+        if stats['archived'] or stats['deleted'] or stats['partials_deleted']:
+            print(f"Log retention: archived {stats['archived']}, deleted {stats['deleted']}, "
+                  f"removed {stats['partials_deleted']} orphaned partial logs, "
+                  f"freed {stats['bytes_freed']} bytes")
+    except Exception as e:
+        print(f"Log retention failed: {e}")
+
+
 # Global flag to ensure background tasks run ONLY once across ALL processes
 _BACKGROUND_TASKS_LOCK_FILE = os.path.join(CONFIG_DIR, 'background_tasks.lock')
 
@@ -6168,6 +6898,8 @@ def start_background_tasks():
             init_local_worker()
             content_repo = get_content_repo(CONTENT_DIR)
             content_repo.init_repo()
+        if CLUSTER_MODE == 'primary':
+            init_job_dispatcher()
 
         # Initialize the schedule manager
         global schedule_manager
@@ -6197,6 +6929,18 @@ def start_background_tasks():
             replace_existing=True
         )
 
+        # Index logs for search (catching up with logs written while down)
+        log_search.start(get_entries=log_catalog.oldest)
+
+        # Hourly log archival and retention
+        schedule_manager.scheduler.add_job(
+            _run_log_retention,
+            trigger=IntervalTrigger(hours=1),
+            id='log_retention',
+            name='Log archival and retention',
+            replace_existing=True
+        )
+
         # Bootstrap deployment (background thread)
         def _bootstrap_if_needed():
             try:
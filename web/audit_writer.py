@@ -0,0 +1,186 @@
+"""
+Audit Writer
+
+Write-behind pipeline for audit log entries. Request handlers enqueue an
+entry and return; a background thread commits queued entries to the
+storage backend in groups (one add_audit_entries call, i.e. one
+transaction or insert_many, per group):
+- every flush interval, or
+- as soon as max_batch entries are waiting
+
+Compliance-critical actions can be written synchronously: the entry is
+committed, together with everything queued before it, before the request
+continues. In 'sync' mode every entry is. The commit thread starts with
+the first queued entry; close() stops it and drains the queue (the app
+registers it to run at exit).
+
+Sync rules are action names ('login'), resource/action pairs
+('users:delete') or whole resources ('roles:*').
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+# Write modes
+AUDIT_MODES = ('async', 'sync')
+
+
+class AuditWriter:
+    """
+    Queue audit entries in memory and commit them in batches.
+
+    Entries are written in the order they were added. A failed batch is
+    put back at the head of the queue and retried on the next flush; if
+    storage stays down, the oldest entries beyond max_queue are dropped
+    (and counted) rather than growing memory without bound.
+    """
+
+    # Seconds between group commits
+    DEFAULT_FLUSH_INTERVAL = 0.5
+
+    # Queued entries that trigger a commit before the interval is up
+    DEFAULT_MAX_BATCH = 200
+
+    # Entries kept queued while storage is failing
+    DEFAULT_MAX_QUEUE = 100000
+
+    def __init__(self, get_storage: Callable, mode: str = 'async',
+                 sync_actions: Iterable[str] = (), flush_interval: float = None,
+                 max_batch: int = None, max_queue: int = None):
+        """
+        Initialize the writer.
+
+        Args:
+            get_storage: Function returning the storage backend
+            mode: 'async' (write behind) or 'sync' (write every entry at once)
+            sync_actions: Rules for entries always written synchronously
+            flush_interval: Seconds between group commits
+            max_batch: Queued entries that trigger an early commit
+            max_queue: Max entries kept queued while storage is failing
+        """
+        self.get_storage = get_storage
+        self.mode = mode if mode in AUDIT_MODES else 'async'
+        self.sync_actions = {rule.strip() for rule in sync_actions if rule.strip()}
+        self.flush_interval = flush_interval or self.DEFAULT_FLUSH_INTERVAL
+        self.max_batch = max_batch or self.DEFAULT_MAX_BATCH
+        self.max_queue = max_queue or self.DEFAULT_MAX_QUEUE
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()         # guards the queue
+        self._flush_lock = threading.Lock()   # one commit at a time, in order
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'queued': 0,
+            'written': 0,
+            'batches': 0,
+            'sync_writes': 0,
+            'errors': 0,
+            'dropped': 0,
+            'last_batch_ms': None
+        }
+
+    def start(self):
+        """Start the commit thread (no-op if already running or in sync mode)."""
+        if self.mode == 'sync' or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 5):
+        """Stop the commit thread and write everything still queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def is_sync(self, entry: Dict) -> bool:
+        """Check if an entry must be written before the request continues."""
+        if self.mode == 'sync':
+            return True
+        if not self.sync_actions:
+            return False
+        action, resource = entry.get('action'), entry.get('resource')
+        return (action in self.sync_actions
+                or f'{resource}:{action}' in self.sync_actions
+                or f'{resource}:*' in self.sync_actions)
+
+    def add(self, entry: Dict) -> bool:
+        """
+        Add an audit entry.
+
+        Returns:
+            For synchronous entries, True if it was written; otherwise
+            True once queued
+        """
+        with self._lock:
+            self._queue.append(entry)
+            self.stats['queued'] += 1
+            waiting = len(self._queue)
+
+        if not self.is_sync(entry) and not self._stop.is_set():
+            # Started on first use, so every (forked) server process runs its own
+            self.start()
+            if waiting >= self.max_batch:
+                self._wake.set()
+            return True
+
+        # Synchronous entries, and anything added after close()
+        self.stats['sync_writes'] += 1
+        return self.flush()
+
+    def flush(self) -> bool:
+        """
+        Commit all queued entries now.
+
+        Returns:
+            True if the queue was written (or empty)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._queue)
+                self._queue.clear()
+            if not batch:
+                return True
+
+            started = time.monotonic()
+            try:
+                storage = self.get_storage()
+                ok = storage is not None and storage.add_audit_entries(batch)
+            except Exception as e:
+                print(f"Error writing audit entries: {e}")
+                ok = False
+
+            if ok:
+                self.stats['written'] += len(batch)
+                self.stats['batches'] += 1
+                self.stats['last_batch_ms'] = round((time.monotonic() - started) * 1000, 2)
+                return True
+
+            # Retry later, ahead of anything queued meanwhile
+            self.stats['errors'] += 1
+            with self._lock:
+                self._queue.extendleft(reversed(batch))
+                while len(self._queue) > self.max_queue:
+                    self._queue.popleft()
+                    self.stats['dropped'] += 1
+            return False
+
+    def get_stats(self) -> Dict:
+        """Get writer statistics."""
+        return {**self.stats, 'mode': self.mode, 'pending': len(self._queue),
+                'running': bool(self._thread and self._thread.is_alive())}
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
@@ -15,6 +15,9 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Tuple
 import hashlib
 
+# Seconds between writes of an API token's last_used time
+TOKEN_LAST_USED_INTERVAL = 60
+
 
 class AuthenticationError(Exception):
     """Raised when authentication fails"""
@@ -438,8 +441,11 @@ def authenticate_api_token(storage_backend, token: str) -> Optional[Dict]:
     if not user or not user.get('enabled', True):
         return None
 
-    # Update last used time
-    token_entry['last_used'] = datetime.now(timezone.utc).isoformat()
-    storage_backend.update_api_token(token_entry['id'], token_entry)
+    # Update last used time (at most once per TOKEN_LAST_USED_INTERVAL, not per request)
+    now = datetime.now(timezone.utc)
+    last_used = token_entry.get('last_used')
+    if not last_used or now - datetime.fromisoformat(last_used) >= timedelta(seconds=TOKEN_LAST_USED_INTERVAL):
+        token_entry['last_used'] = now.isoformat()
+        storage_backend.update_api_token(token_entry['id'], token_entry)
 
     return user
@@ -802,7 +802,7 @@ def api_delete_token(token_id):
         return jsonify({'error': 'Failed to delete token'}), 500
 
 
-def init_auth_middleware(app, storage_backend, auth_enabled=True):
+def init_auth_middleware(app, storage_backend, auth_enabled=True, audit_writer=None):
     """
     Initialize authentication middleware for the Flask app.
 
@@ -810,6 +810,8 @@ def init_auth_middleware(app, storage_backend, auth_enabled=True):
         app: Flask application instance
         storage_backend: Storage backend instance
         auth_enabled: Whether authentication is enabled
+        audit_writer: Optional AuditWriter that audit entries are queued to
+            (written to storage directly if not given)
     """
 
     # Public routes that don't require authentication
@@ -843,6 +845,7 @@ def init_auth_middleware(app, storage_backend, auth_enabled=True):
         """Check authentication for each request."""
         # Make storage available in request context
         g.storage_backend = storage_backend
+        g.audit_writer = audit_writer
 
         # Skip auth check if disabled
         if not auth_enabled:
@@ -954,7 +957,12 @@ def add_audit_entry(action: str, resource: str, resource_id: str = None, details
         'success': success
     }
 
-    storage.add_audit_entry(entry)
+    # Queued for a group commit unless the writer treats the action as synchronous
+    writer = getattr(g, 'audit_writer', None)
+    if writer:
+        writer.add(entry)
+    else:
+        storage.add_audit_entry(entry)
 
 
 def audit_action(action: str, resource: str, get_resource_id=None, get_details=None):
@@ -1029,20 +1037,26 @@ def api_audit_log():
         - end_time: Filter entries before this time (ISO format)
         - success: Filter by success (true/false)
         - limit: Number of entries to return (default 100, max 1000)
-        - offset: Number of entries to skip for pagination
+        - cursor: Continue after the page that returned this next_cursor
+        - offset: Number of entries to skip when no cursor is given
 
     Returns:
         {
             "entries": [...],
-            "total": 1234,
+            "total": 1234,        (null when a cursor is given)
             "limit": 100,
-            "offset": 0
+            "offset": 0,
+            "next_cursor": "..."  (null on the last page)
         }
     """
     storage = getattr(g, 'storage_backend', None)
     if not storage:
         return jsonify({'error': 'Storage backend not available'}), 500
 
+    # Include entries still queued for a group commit
+    if getattr(g, 'audit_writer', None):
+        g.audit_writer.flush()
+
     # Build filters from query params
     filters = {}
 
@@ -1065,20 +1079,29 @@ def api_audit_log():
         filters['success'] = request.args['success'].lower() == 'true'
 
     # Pagination
-    limit = min(1000, max(1, int(request.args.get('limit', 100))))
-    offset = max(0, int(request.args.get('offset', 0)))
-
-    entries = storage.get_audit_log(filters=filters, limit=limit, offset=offset)
+    try:
+        limit = min(1000, max(1, int(request.args.get('limit', 100))))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
 
-    # Get total count (without pagination) for UI
-    all_entries = storage.get_audit_log(filters=filters, limit=100000, offset=0)
-    total = len(all_entries)
+    # Keyset pagination: the total is only counted for the first page
+    try:
+        page = storage.query_audit_log(
+            filters,
+            limit=limit,
+            cursor=request.args.get('cursor') or None,
+            offset=offset
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     return jsonify({
-        'entries': entries,
-        'total': total,
+        'entries': page['entries'],
+        'total': page['total'],
         'limit': limit,
-        'offset': offset
+        'offset': offset,
+        'next_cursor': page['next_cursor']
     })
 
 
@@ -1100,6 +1123,10 @@ def api_audit_export():
     if not storage:
         return jsonify({'error': 'Storage backend not available'}), 500
 
+    # Include entries still queued for a group commit
+    if getattr(g, 'audit_writer', None):
+        g.audit_writer.flush()
+
     # Build filters from query params
     filters = {}
 
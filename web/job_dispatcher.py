@@ -0,0 +1,161 @@
+"""
+Job Dispatcher
+
+Background loop on the primary that routes queued jobs as soon as
+capacity or work appears, instead of waiting for a manual
+POST /api/jobs/route.
+
+The loop sleeps on an event that is set whenever something may make a
+job routable:
+- A job is submitted
+- A worker completes a job (a slot frees up)
+- A worker checks in or registers
+
+A safety timer wakes the loop periodically as well, so jobs are never
+stranded if a notification is missed (e.g. a worker that disappeared
+and came back without re-registering).
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+class JobDispatcher:
+    """
+    Event-driven dispatcher that routes pending jobs in the background.
+
+    Notifications arriving close together are coalesced into a single
+    routing pass. Each pass keeps routing windows of jobs until a window
+    assigns nothing or the queue is drained.
+    """
+
+    # Seconds between routing passes when nothing notifies the dispatcher
+    DEFAULT_SAFETY_INTERVAL = 10
+
+    # Jobs routed per JobRouter.route_pending_jobs() window
+    DEFAULT_BATCH_SIZE = 100
+
+    # Seconds to wait after a wake-up so a burst of notifications is one pass
+    COALESCE_DELAY = 0.05
+
+    def __init__(self, get_router: Callable, safety_interval: float = None,
+                 batch_size: int = None,
+                 on_assigned: Optional[Callable[[List[Dict]], None]] = None):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            get_router: Function returning a JobRouter
+            safety_interval: Seconds between passes without notifications
+            batch_size: Jobs routed per window
+            on_assigned: Optional callback receiving the assignment results
+                of each pass that assigned at least one job
+        """
+        self.get_router = get_router
+        self.safety_interval = safety_interval or self.DEFAULT_SAFETY_INTERVAL
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.on_assigned = on_assigned
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._reasons: Dict[str, int] = {}
+
+        self.stats = {
+            'passes': 0,
+            'jobs_assigned': 0,
+            'last_pass_at': None,
+            'last_pass_ms': None,
+            'last_wake_reasons': [],
+            'errors': 0
+        }
+
+    def start(self):
+        """Start the dispatcher thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='job-dispatcher', daemon=True)
+        self._thread.start()
+        print(f"Job dispatcher started (safety interval {self.safety_interval}s)")
+
+    def stop(self, timeout: float = 5):
+        """Stop the dispatcher thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """Return True if the dispatcher thread is alive."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def notify(self, reason: str = 'manual'):
+        """
+        Wake the dispatcher for an immediate routing pass.
+
+        Safe to call from request handlers; returns immediately.
+
+        Args:
+            reason: Why routing may now succeed (for stats/debugging)
+        """
+        with self._lock:
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+        self._wake.set()
+
+    def dispatch_once(self) -> List[Dict]:
+        """
+        Run one routing pass.
+
+        Returns:
+            List of successful assignment results from this pass
+        """
+        started = time.monotonic()
+        router = self.get_router()
+        assigned = []
+
+        while not self._stop.is_set():
+            results = router.route_pending_jobs(self.batch_size)
+            window_assigned = [r for r in results if r.get('assigned')]
+            assigned.extend(window_assigned)
+            if len(results) < self.batch_size or not window_assigned:
+                break
+
+        self.stats['passes'] += 1
+        self.stats['jobs_assigned'] += len(assigned)
+        self.stats['last_pass_at'] = datetime.now().isoformat()
+        self.stats['last_pass_ms'] = round((time.monotonic() - started) * 1000, 2)
+
+        if assigned and self.on_assigned:
+            self.on_assigned(assigned)
+
+        return assigned
+
+    def get_stats(self) -> Dict:
+        """Get dispatcher statistics."""
+        return {**self.stats, 'running': self.is_running(),
+                'safety_interval': self.safety_interval}
+
+    def _run(self):
+        """Dispatcher loop: wait for a notification or the safety timer, then route."""
+        while not self._stop.is_set():
+            if self._wake.wait(self.safety_interval):
+                # Let a burst of notifications land before routing
+                time.sleep(self.COALESCE_DELAY)
+            if self._stop.is_set():
+                break
+
+            self._wake.clear()
+            with self._lock:
+                self.stats['last_wake_reasons'] = sorted(self._reasons) or ['timer']
+                self._reasons = {}
+
+            try:
+                self.dispatch_once()
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Job dispatcher error: {e}")
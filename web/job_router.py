@@ -7,8 +7,13 @@ Automatic job routing and assignment based on:
 - Job type (normal vs long_running)
 - Worker health statistics
 - Priority scoring
+
+Pending jobs are dispatched in effective-priority order: submitted
+priority plus an aging bonus, minus a weighted fair-share penalty per
+submitter so no single user, schedule or batch can monopolize the queue.
 """
 
+import math
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
@@ -49,6 +54,23 @@ class JobRouter:
     LOAD_HIGH_THRESHOLD = 80  # CPU or memory above this is considered high load
     LOAD_MEDIUM_THRESHOLD = 50
 
+    # Queue aging: waiting jobs gain priority so low-priority work still runs
+    AGING_POINTS_PER_MINUTE = 0.5
+    MAX_AGING_BOOST = 50
+
+    # Fair share: each queued or active job a submitter already has costs this
+    # many priority points, divided by the weight of the submitter's class
+    FAIR_SHARE_STEP = 5
+    SUBMITTER_WEIGHTS = {'user': 1.0, 'scheduler': 1.0, 'batch': 0.5}
+
+    # Used for wait estimates when no worker has recorded a job duration yet
+    DEFAULT_JOB_DURATION = 300
+
+    # Batch routing: score points withheld from a worker per unit of demand
+    # later jobs in the window have for its remaining slots, so flexible jobs
+    # leave scarce (e.g. GPU-tagged) workers for jobs that can only run there
+    SCARCITY_WEIGHT = 20
+
     def __init__(self, storage_backend):
         """
         Initialize job router.
@@ -58,13 +80,39 @@ class JobRouter:
         """
         self.storage = storage_backend
 
-    def get_available_workers(self) -> List[Dict]:
+    def get_active_job_counts(self, active: List[Dict] = None) -> Dict[str, int]:
+        """
+        Count assigned/running jobs per worker.
+
+        Args:
+            active: Assigned/running jobs (defaults to one storage query)
+
+        Returns:
+            Dict mapping worker_id to its number of active jobs
+        """
+        if active is None:
+            active = self.storage.get_all_jobs({'status': ['assigned', 'running']})
+
+        counts = {}
+        for job in active:
+            worker_id = job.get('assigned_worker')
+            if worker_id:
+                counts[worker_id] = counts.get(worker_id, 0) + 1
+        return counts
+
+    def get_available_workers(self, active_counts: Dict[str, int] = None) -> List[Dict]:
         """
         Get workers available for job assignment.
 
+        Args:
+            active_counts: Active jobs per worker (see get_active_job_counts)
+
         Returns:
             List of worker dicts with status 'online' or 'busy' (but under capacity)
         """
+        if active_counts is None:
+            active_counts = self.get_active_job_counts()
+
         all_workers = self.storage.get_all_workers()
         available = []
 
@@ -75,12 +123,7 @@ class JobRouter:
 
             # Check if worker has capacity
             max_jobs = worker.get('max_concurrent_jobs', 2)
-            active_jobs = self.storage.get_worker_jobs(
-                worker['id'],
-                statuses=['assigned', 'running']
-            )
-
-            if len(active_jobs) < max_jobs:
+            if active_counts.get(worker['id'], 0) < max_jobs:
                 available.append(worker)
 
         return available
@@ -142,12 +185,13 @@ class JobRouter:
 
         return min(100, score)
 
-    def calculate_load_score(self, worker: Dict) -> float:
+    def calculate_load_score(self, worker: Dict, active_count: int = None) -> float:
         """
         Calculate worker load score (lower load = higher score).
 
         Args:
             worker: Worker dict with system_stats
+            active_count: Worker's assigned/running job count (looked up if None)
 
         Returns:
             Score from 0-100
@@ -160,12 +204,13 @@ class JobRouter:
         load_1m = stats.get('load_1m', 0)
 
         # Also consider active jobs
-        active_jobs = self.storage.get_worker_jobs(
-            worker['id'],
-            statuses=['assigned', 'running']
-        )
+        if active_count is None:
+            active_count = len(self.storage.get_worker_jobs(
+                worker['id'],
+                statuses=['assigned', 'running']
+            ))
         max_jobs = worker.get('max_concurrent_jobs', 2)
-        job_load_percent = (len(active_jobs) / max_jobs) * 100 if max_jobs > 0 else 100
+        job_load_percent = (active_count / max_jobs) * 100 if max_jobs > 0 else 100
 
         # Combined load metric (weighted average)
         combined_load = (
@@ -224,13 +269,14 @@ class JobRouter:
 
         return min(50, score)
 
-    def score_worker(self, worker: Dict, job: Dict) -> WorkerScore:
+    def score_worker(self, worker: Dict, job: Dict, active_count: int = None) -> WorkerScore:
         """
         Calculate overall score for a worker-job pair.
 
         Args:
             worker: Worker dict
             job: Job dict
+            active_count: Worker's assigned/running job count (looked up if None)
 
         Returns:
             WorkerScore with detailed breakdown
@@ -256,7 +302,7 @@ class JobRouter:
 
         # Calculate component scores
         tag_score = self.calculate_tag_score(worker, required_tags, preferred_tags)
-        load_score = self.calculate_load_score(worker)
+        load_score = self.calculate_load_score(worker, active_count)
         preference_score = self.calculate_preference_score(worker, job)
 
         # Calculate weighted total
@@ -293,14 +339,15 @@ class JobRouter:
         Returns:
             Tuple of (worker, score) or None if no eligible worker
         """
-        available = self.get_available_workers()
+        active_counts = self.get_active_job_counts()
+        available = self.get_available_workers(active_counts)
 
         if not available:
             return None
 
         scores = []
         for worker in available:
-            score = self.score_worker(worker, job)
+            score = self.score_worker(worker, job, active_counts.get(worker['id'], 0))
             if score.eligible:
                 scores.append((worker, score))
 
@@ -312,6 +359,200 @@ class JobRouter:
 
         return scores[0]
 
+    @staticmethod
+    def submitter_class(submitted_by: Optional[str]) -> str:
+        """
+        Classify a job submitter for fair-share weighting.
+
+        Args:
+            submitted_by: The job's submitted_by value
+
+        Returns:
+            'scheduler' for scheduler:*, 'batch' for batch:*, otherwise 'user'
+        """
+        prefix = (submitted_by or '').split(':', 1)[0]
+        return prefix if prefix in ('scheduler', 'batch') else 'user'
+
+    def calculate_effective_priority(self, job: Dict, now: datetime = None) -> float:
+        """
+        Calculate a job's priority including the aging bonus.
+
+        Args:
+            job: Job dict
+            now: Reference time (defaults to now)
+
+        Returns:
+            Submitted priority plus up to MAX_AGING_BOOST points for time queued
+        """
+        priority = job.get('priority')
+        priority = 50 if priority is None else priority
+
+        try:
+            submitted = datetime.fromisoformat(job.get('submitted_at', ''))
+        except (TypeError, ValueError):
+            return float(priority)
+
+        now = now or datetime.now()
+        if submitted.tzinfo is not None and now.tzinfo is None:
+            submitted = submitted.astimezone().replace(tzinfo=None)
+        elif submitted.tzinfo is None and now.tzinfo is not None:
+            now = now.astimezone().replace(tzinfo=None)
+
+        waited_minutes = max(0.0, (now - submitted).total_seconds() / 60)
+        return priority + min(self.MAX_AGING_BOOST, waited_minutes * self.AGING_POINTS_PER_MINUTE)
+
+    def order_pending_jobs(self, pending: List[Dict] = None,
+                           active: List[Dict] = None,
+                           now: datetime = None) -> List[Tuple[Dict, float]]:
+        """
+        Order queued jobs for dispatch.
+
+        Each submitter's jobs are ranked by effective priority; the n-th job
+        of a submitter (counting jobs already assigned or running) is then
+        penalized n * FAIR_SHARE_STEP / weight points, so a flood from one
+        submitter interleaves with everyone else instead of starving them.
+
+        Args:
+            pending: Queued jobs (defaults to storage pending jobs)
+            active: Assigned/running jobs (defaults to storage lookup)
+            now: Reference time for aging (defaults to now)
+
+        Returns:
+            List of (job, dispatch_score) tuples, first to dispatch first
+        """
+        now = now or datetime.now()
+        if pending is None:
+            pending = self.storage.get_pending_jobs()
+        if active is None:
+            active = self.storage.get_all_jobs({'status': ['assigned', 'running']})
+
+        held = {}
+        for job in active:
+            submitter = job.get('submitted_by') or ''
+            held[submitter] = held.get(submitter, 0) + 1
+
+        by_submitter = {}
+        for job in pending:
+            by_submitter.setdefault(job.get('submitted_by') or '', []).append(
+                (self.calculate_effective_priority(job, now), job)
+            )
+
+        ordered = []
+        for submitter, entries in by_submitter.items():
+            entries.sort(key=lambda e: (-e[0], e[1].get('submitted_at') or ''))
+            weight = self.SUBMITTER_WEIGHTS.get(self.submitter_class(submitter), 1.0)
+            for rank, (effective, job) in enumerate(entries, start=held.get(submitter, 0)):
+                ordered.append((job, effective - rank * self.FAIR_SHARE_STEP / weight))
+
+        ordered.sort(key=lambda e: (-e[1], e[0].get('submitted_at') or ''))
+        return ordered
+
+    def get_queue_status(self, now: datetime = None) -> Dict:
+        """
+        Describe the pending queue in dispatch order with wait estimates.
+
+        Expected waits assume every online worker can take any job and that
+        jobs take each worker's recorded average duration, so they are a
+        rough guide rather than a promise.
+
+        Args:
+            now: Reference time (defaults to now)
+
+        Returns:
+            Dict with the ordered queue entries and cluster capacity summary
+        """
+        now = now or datetime.now()
+        active = self.storage.get_all_jobs({'status': ['assigned', 'running']})
+        ordered = self.order_pending_jobs(active=active, now=now)
+
+        workers = [w for w in self.storage.get_all_workers()
+                   if w.get('status') in ('online', 'busy')]
+        worker_ids = {w['id'] for w in workers}
+        capacity = sum(w.get('max_concurrent_jobs', 2) for w in workers)
+        running = sum(1 for j in active if j.get('assigned_worker') in worker_ids)
+        free_slots = max(0, capacity - running)
+
+        durations = [w.get('stats', {}).get('avg_job_duration') or 0 for w in workers]
+        durations = [d for d in durations if d > 0]
+        avg_duration = sum(durations) / len(durations) if durations else self.DEFAULT_JOB_DURATION
+
+        entries = []
+        for position, (job, score) in enumerate(ordered, start=1):
+            if capacity == 0:
+                wait = None
+            elif position <= free_slots:
+                wait = 0
+            else:
+                wait = math.ceil((position - free_slots) / capacity) * avg_duration
+
+            entries.append({
+                'job_id': job['id'],
+                'playbook': job.get('playbook'),
+                'submitted_by': job.get('submitted_by'),
+                'submitter_class': self.submitter_class(job.get('submitted_by')),
+                'priority': job.get('priority'),
+                'effective_priority': round(self.calculate_effective_priority(job, now), 2),
+                'dispatch_score': round(score, 2),
+                'position': position,
+                'submitted_at': job.get('submitted_at'),
+                'expected_wait_seconds': round(wait) if wait is not None else None
+            })
+
+        return {
+            'queue': entries,
+            'queued': len(entries),
+            'capacity': capacity,
+            'free_slots': free_slots,
+            'avg_job_duration': round(avg_duration, 2)
+        }
+
+    def dispatch_policy(self) -> Dict:
+        """
+        Describe the dispatch order for storage-side ranking.
+
+        Returns:
+            Dict of the aging, fair-share and weight settings that
+            StorageBackend.rank_queued_jobs applies
+        """
+        return {
+            'default_priority': 50,
+            'aging_per_minute': self.AGING_POINTS_PER_MINUTE,
+            'max_aging': self.MAX_AGING_BOOST,
+            'fair_share_step': self.FAIR_SHARE_STEP,
+            'weights': dict(self.SUBMITTER_WEIGHTS)
+        }
+
+    def claim_for_worker(self, worker: Dict, slots: int) -> List[Dict]:
+        """
+        Claim queued jobs for a worker in dispatch order.
+
+        The storage backend ranks the queue and returns the first `slots`
+        jobs the worker is eligible for; they are claimed together in one
+        claim_jobs call. Jobs claimed concurrently by someone else are
+        skipped, and the worker picks up more on its next poll.
+
+        Args:
+            worker: Worker dict
+            slots: Number of free slots on the worker
+
+        Returns:
+            List of claimed job dicts, in dispatch order
+        """
+        if slots <= 0:
+            return []
+
+        tags = worker.get('tags', [])
+        job_ids = self.storage.rank_queued_jobs(
+            self.dispatch_policy(), worker_tags=tags, limit=slots,
+            now=datetime.now().isoformat()
+        )
+        if not job_ids:
+            return []
+
+        claimed = self.storage.claim_jobs(worker['id'], tags, slots, job_ids=job_ids)
+        claimed.sort(key=lambda job: job_ids.index(job['id']))
+        return claimed
+
     def route_job(self, job_id: str) -> Optional[Dict]:
         """
         Route a specific job to a worker.
@@ -339,16 +580,23 @@ class JobRouter:
 
         worker, score = result
 
-        # Update job assignment
-        updates = {
-            'status': 'assigned',
-            'assigned_worker': worker['id'],
-            'assigned_at': datetime.now().isoformat()
-        }
+        # Claim atomically so a concurrent router or worker pull cannot
+        # assign the same job twice between our read and this write
+        claimed = self.storage.claim_jobs(
+            worker['id'], worker.get('tags', []), 1, job_ids=[job_id]
+        )
+        if not claimed:
+            return {
+                'job_id': job_id,
+                'assigned': False,
+                'reason': 'Job was claimed concurrently'
+            }
 
-        if not self.storage.update_job(job_id, updates):
-            return {'error': 'Failed to update job'}
+        return self._assignment_result(job_id, worker, score)
 
+    @staticmethod
+    def _assignment_result(job_id: str, worker: Dict, score: WorkerScore) -> Dict:
+        """Build the result dict for a successful assignment."""
         return {
             'job_id': job_id,
             'assigned': True,
@@ -363,28 +611,115 @@ class JobRouter:
             }
         }
 
+    def plan_assignments(self, jobs: List[Dict], workers: List[Dict],
+                         active_counts: Dict[str, int]) -> List[Tuple[Dict, Optional[Dict], Optional[WorkerScore]]]:
+        """
+        Match a window of jobs to workers without touching storage.
+
+        Jobs are taken in the given (dispatch) order. Each goes to the eligible
+        worker with free capacity and the best score, less a scarcity penalty
+        for workers that later jobs in the window depend on. Capacity and load
+        are updated in memory as jobs are placed.
+
+        Args:
+            jobs: Jobs to place, in dispatch order
+            workers: Available workers snapshot
+            active_counts: Active jobs per worker at snapshot time
+
+        Returns:
+            List of (job, worker, score) tuples; worker and score are None
+            for jobs that could not be placed
+        """
+        load = dict(active_counts)
+        remaining = {
+            w['id']: w.get('max_concurrent_jobs', 2) - load.get(w['id'], 0)
+            for w in workers
+        }
+
+        candidates = []
+        demand = {w['id']: 0.0 for w in workers}
+        for job in jobs:
+            eligible = [
+                w for w in workers
+                if self.check_tag_eligibility(w, job.get('required_tags', []))[0]
+            ]
+            candidates.append(eligible)
+            for w in eligible:
+                demand[w['id']] += 1 / len(eligible)
+
+        plan = []
+        scores = {}
+        for job, eligible in zip(jobs, candidates):
+            # This job no longer competes with the ones after it
+            for w in eligible:
+                demand[w['id']] -= 1 / len(eligible)
+
+            # Jobs with the same tags and type score identically on a worker
+            # at a given load, so most windows only score a few distinct pairs
+            profile = (
+                tuple(sorted(job.get('required_tags') or [])),
+                tuple(sorted(job.get('preferred_tags') or [])),
+                job.get('job_type', 'normal')
+            )
+            best = None
+            for w in eligible:
+                if remaining[w['id']] <= 0:
+                    continue
+                key = (profile, w['id'], load.get(w['id'], 0))
+                score = scores.get(key)
+                if score is None:
+                    score = scores[key] = self.score_worker(w, job, key[2])
+                adjusted = score.total_score - self.SCARCITY_WEIGHT * demand[w['id']] / remaining[w['id']]
+                if best is None or adjusted > best[0]:
+                    best = (adjusted, w, score)
+
+            if best:
+                _, worker, score = best
+                remaining[worker['id']] -= 1
+                load[worker['id']] = load.get(worker['id'], 0) + 1
+                plan.append((job, worker, score))
+            else:
+                plan.append((job, None, None))
+
+        return plan
+
     def route_pending_jobs(self, limit: int = 10) -> List[Dict]:
         """
         Route multiple pending jobs.
 
-        Routes jobs in priority order until no more assignments can be made.
+        Takes one snapshot of workers and active jobs, plans the next
+        `limit` jobs in dispatch order (see order_pending_jobs) against it
+        with plan_assignments, and commits every assignment together.
 
         Args:
             limit: Maximum number of jobs to route
 
         Returns:
-            List of assignment results
+            List of assignment results, in dispatch order
         """
-        results = []
-        pending = self.storage.get_pending_jobs()[:limit]
+        active = self.storage.get_all_jobs({'status': ['assigned', 'running']})
+        active_counts = self.get_active_job_counts(active)
+        pending = [job for job, _ in self.order_pending_jobs(active=active)][:limit]
+        if not pending:
+            return []
 
-        for job in pending:
-            result = self.route_job(job['id'])
-            results.append(result)
+        workers = self.get_available_workers(active_counts)
+        plan = self.plan_assignments(pending, workers, active_counts)
+
+        assigned = set(self.storage.assign_jobs({
+            job['id']: worker['id'] for job, worker, _ in plan if worker
+        }))
 
-            # Stop if we hit capacity
-            if result and not result.get('assigned') and 'No eligible worker' in result.get('reason', ''):
-                break
+        results = []
+        for job, worker, score in plan:
+            if worker and job['id'] in assigned:
+                results.append(self._assignment_result(job['id'], worker, score))
+            else:
+                results.append({
+                    'job_id': job['id'],
+                    'assigned': False,
+                    'reason': 'Job was claimed concurrently' if worker else 'No eligible worker available'
+                })
 
         return results
 
@@ -402,11 +737,12 @@ class JobRouter:
         if not job:
             return []
 
-        available = self.get_available_workers()
+        active_counts = self.get_active_job_counts()
+        available = self.get_available_workers(active_counts)
         recommendations = []
 
         for worker in available:
-            score = self.score_worker(worker, job)
+            score = self.score_worker(worker, job, active_counts.get(worker['id'], 0))
             recommendations.append({
                 'worker_id': worker['id'],
                 'worker_name': worker.get('name'),
@@ -0,0 +1,319 @@
+"""
+Log Archive
+
+Compressed storage for completed logs that stays range-addressable.
+
+Archiving `name.log` replaces it with `name.log.gz`: the log cut into
+CHUNK_SIZE pieces, each compressed as its own gzip member. Concatenated
+members are a valid gzip file (zcat and gzip.open read it whole), and
+since every chunk but the last holds exactly CHUNK_SIZE bytes, a byte
+range of the log maps straight to the members covering it.
+
+The member table is `name.log.gz.idx`, a flat array of little-endian
+uint64 values: chunk size, uncompressed log size, then the compressed
+end offset of each member.
+
+open_log(), log_size(), stat_log() and log_exists() serve plain and
+archived logs alike, so readers don't care which tier a log is in.
+"""
+
+import gzip
+import io
+import os
+import sys
+import threading
+import zlib
+from array import array
+from typing import List, Tuple
+
+# Suffix of an archived log
+ARCHIVE_SUFFIX = '.gz'
+
+# Suffix of an archive's member table (after ARCHIVE_SUFFIX)
+TABLE_SUFFIX = '.idx'
+
+# Uncompressed bytes per gzip member
+CHUNK_SIZE = 1024 * 1024
+
+# gzip level used when archiving
+COMPRESS_LEVEL = 6
+
+
+def archive_path(log_path: str) -> str:
+    """Path of a log's archive."""
+    return log_path + ARCHIVE_SUFFIX
+
+
+def table_path(log_path: str) -> str:
+    """Path of a log archive's member table."""
+    return archive_path(log_path) + TABLE_SUFFIX
+
+
+def is_archived(log_path: str) -> bool:
+    """Check if a log exists only in archived form."""
+    return not os.path.exists(log_path) and os.path.exists(archive_path(log_path))
+
+
+def log_exists(log_path: str) -> bool:
+    """Check if a log exists, plain or archived."""
+    return os.path.isfile(log_path) or os.path.isfile(archive_path(log_path))
+
+
+def stat_log(log_path: str) -> Tuple[int, float]:
+    """
+    Size and modified time of a log, plain or archived.
+
+    Returns:
+        Tuple of (uncompressed size, mtime)
+
+    Raises:
+        OSError: If the log doesn't exist
+    """
+    try:
+        stat = os.stat(log_path)
+        return stat.st_size, stat.st_mtime
+    except FileNotFoundError:
+        stat = os.stat(archive_path(log_path))
+        return _load_table(log_path)[1], stat.st_mtime
+
+
+def log_size(log_path: str) -> int:
+    """Uncompressed size of a log (raises OSError if missing)."""
+    return stat_log(log_path)[0]
+
+
+def disk_size(log_path: str) -> int:
+    """Bytes a log takes on disk, archive included (0 if missing)."""
+    total = 0
+    for path in (log_path, archive_path(log_path), table_path(log_path)):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def open_log(log_path: str, mode: str = 'rb'):
+    """
+    Open a log for reading, plain or archived.
+
+    Args:
+        log_path: Path of the (plain) log
+        mode: 'rb' or 'r' (UTF-8, undecodable bytes replaced)
+
+    Returns:
+        Seekable file object addressing uncompressed offsets
+
+    Raises:
+        OSError: If the log doesn't exist
+    """
+    try:
+        f = open(log_path, 'rb')
+    except FileNotFoundError:
+        f = io.BufferedReader(ArchivedLogReader(log_path))
+    if mode == 'r':
+        return io.TextIOWrapper(f, encoding='utf-8', errors='replace')
+    return f
+
+
+def read_head(log_path: str, max_bytes: int) -> bytes:
+    """
+    Read the start of a log, plain or archived, decompressing no more
+    than needed.
+
+    Raises:
+        OSError: If the log doesn't exist
+    """
+    try:
+        with open(log_path, 'rb') as f:
+            return f.read(max_bytes)
+    except FileNotFoundError:
+        pass
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    head = b''
+    with open(archive_path(log_path), 'rb') as f:
+        while len(head) < max_bytes and not decompressor.eof:
+            data = decompressor.unconsumed_tail or f.read(io.DEFAULT_BUFFER_SIZE)
+            if not data:
+                break
+            head += decompressor.decompress(data, max_bytes - len(head))
+    return head
+
+
+def archive_log(log_path: str, chunk_size: int = None,
+                level: int = COMPRESS_LEVEL) -> Tuple[int, int]:
+    """
+    Compress a log into its archive and remove the plain file.
+
+    The archive keeps the log's modified time. Readers holding the plain
+    file open keep reading it; new readers get the archive.
+
+    Args:
+        log_path: Path of the plain log
+        chunk_size: Uncompressed bytes per member (default CHUNK_SIZE)
+        level: gzip compression level
+
+    Returns:
+        Tuple of (log size, archive size incl. member table)
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    stat = os.stat(log_path)
+    tmp_archive = archive_path(log_path) + '.tmp'
+    tmp_table = table_path(log_path) + '.tmp'
+
+    ends = array('Q')
+    size = 0
+    try:
+        with open(log_path, 'rb') as src, open(tmp_archive, 'wb') as dst:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                dst.write(gzip.compress(chunk, compresslevel=level, mtime=0))
+                ends.append(dst.tell())
+                size += len(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+        with open(tmp_table, 'wb') as f:
+            f.write(_to_bytes(array('Q', [chunk_size, size]) + ends))
+            f.flush()
+            os.fsync(f.fileno())
+        os.utime(tmp_archive, (stat.st_atime, stat.st_mtime))
+        os.replace(tmp_table, table_path(log_path))
+        os.replace(tmp_archive, archive_path(log_path))
+    except BaseException:
+        for path in (tmp_archive, tmp_table):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+
+    _invalidate_table(log_path)
+    os.remove(log_path)
+    return size, disk_size(log_path)
+
+
+def remove_log(log_path: str) -> int:
+    """
+    Delete a log in whichever tier it is.
+
+    Returns:
+        Bytes freed on disk
+    """
+    freed = 0
+    for path in (log_path, archive_path(log_path), table_path(log_path)):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            freed += size
+        except OSError:
+            pass
+    _invalidate_table(log_path)
+    return freed
+
+
+class ArchivedLogReader(io.RawIOBase):
+    """
+    Raw reader of an archived log, by uncompressed offset.
+
+    Only the members covering a read are decompressed; the most recent
+    one is kept for sequential reads.
+    """
+
+    def __init__(self, log_path: str):
+        super().__init__()
+        self.log_path = log_path
+        self.chunk_size, self.size, self.ends = _load_table(log_path)
+        self._file = open(archive_path(log_path), 'rb')
+        self._pos = 0
+        self._chunk_no = -1
+        self._chunk = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._pos = offset
+        return self._pos
+
+    def readinto(self, b) -> int:
+        if self._pos >= self.size:
+            return 0
+        chunk_no, start = divmod(self._pos, self.chunk_size)
+        data = self._read_chunk(chunk_no)[start:start + len(b)]
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+    def _read_chunk(self, chunk_no: int) -> bytes:
+        """Decompress one member."""
+        if chunk_no != self._chunk_no:
+            begin = self.ends[chunk_no - 1] if chunk_no > 0 else 0
+            self._file.seek(begin)
+            self._chunk = zlib.decompress(self._file.read(self.ends[chunk_no] - begin), 16 + zlib.MAX_WBITS)
+            self._chunk_no = chunk_no
+        return self._chunk
+
+
+def _to_bytes(values: array) -> bytes:
+    """Serialize values as little-endian uint64."""
+    if sys.byteorder != 'little':
+        values = array('Q', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _load_table(log_path: str) -> Tuple[int, int, List[int]]:
+    """
+    Read (and cache) an archive's member table.
+
+    Returns:
+        Tuple of (chunk size, uncompressed size, member end offsets)
+    """
+    with _tables_lock:
+        table = _tables.get(log_path)
+    if table is not None:
+        return table
+
+    with open(table_path(log_path), 'rb') as f:
+        values = array('Q')
+        values.frombytes(f.read())
+    if sys.byteorder != 'little':
+        values.byteswap()
+    if len(values) < 2:
+        raise OSError(f"Corrupt log archive table: {table_path(log_path)}")
+    table = (values[0], values[1], values[2:].tolist())
+
+    with _tables_lock:
+        _tables[log_path] = table
+        while len(_tables) > MAX_CACHED_TABLES:
+            _tables.pop(next(iter(_tables)))
+    return table
+
+
+def _invalidate_table(log_path: str):
+    """Drop a cached member table."""
+    with _tables_lock:
+        _tables.pop(log_path, None)
+
+
+# Member tables kept in memory (oldest entries are dropped)
+MAX_CACHED_TABLES = 256
+
+_tables = {}
+_tables_lock = threading.Lock()
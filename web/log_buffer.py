@@ -0,0 +1,187 @@
+"""
+Live Log Ring Buffers
+
+Keeps the recent output of each active run, batch playbook and cluster
+job in memory as sequence-numbered chunks, so live viewers can catch up
+without re-reading log files from disk:
+- Every chunk appended to a stream gets the next sequence number
+- A client that has seen up to seq N gets everything after N in one
+  message, then live deltas carrying their own seq
+- Buffers are bounded in bytes; once the oldest chunks are evicted, a
+  client too far behind falls back to a full read of the log file
+
+Streams also count the UTF-8 bytes appended since their last reset. For
+streams mirroring a log file (runs and cluster jobs), that is the file
+offset the buffer covers, so a disk fallback reads exactly up to it and
+live deltas continue without gaps or duplicates.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class LogRingBuffer:
+    """
+    Bounded buffer of sequence-numbered log chunks for one stream.
+
+    Sequence numbers start at 1 and keep increasing across resets, so a
+    client's last seen seq is always comparable.
+    """
+
+    # Bytes of chunk content kept per stream
+    DEFAULT_MAX_BYTES = 1024 * 1024
+
+    def __init__(self, max_bytes: int = None):
+        """
+        Initialize the buffer.
+
+        Args:
+            max_bytes: Max bytes of chunk content retained
+        """
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self._chunks: deque = deque()  # (seq, text, size)
+        self._size = 0
+        self._seq = 0
+        self._reset_seq = 0  # seq of the chunk that started the current content
+        self._evicted = False
+        self._end_offset = 0
+        self._lock = threading.Lock()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest chunk (0 if none)."""
+        return self._seq
+
+    def append(self, text: str, replace: bool = False) -> int:
+        """
+        Add a chunk.
+
+        Args:
+            text: Log content
+            replace: True if the chunk replaces all earlier content
+
+        Returns:
+            The chunk's sequence number
+        """
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            self._seq += 1
+            if replace:
+                self._chunks.clear()
+                self._size = 0
+                self._reset_seq = self._seq
+                self._evicted = False
+                self._end_offset = 0
+            self._chunks.append((self._seq, text, size))
+            self._size += size
+            self._end_offset += size
+            while self._size > self.max_bytes and len(self._chunks) > 1:
+                _, _, old_size = self._chunks.popleft()
+                self._size -= old_size
+                self._evicted = True
+            return self._seq
+
+    def since(self, seq: int) -> Tuple[Optional[str], int, bool]:
+        """
+        Content after a client's last seen sequence number.
+
+        Args:
+            seq: Last seq the client has (0 for none)
+
+        Returns:
+            Tuple of (content, newest seq, reset). Content is None if the
+            buffer no longer holds everything the client is missing; reset
+            is True if the content replaces what the client has.
+        """
+        with self._lock:
+            if seq >= self._seq:
+                return '', self._seq, False
+            # A client behind the last replace needs the current content from its start
+            reset = seq < self._reset_seq
+            start = self._reset_seq - 1 if reset else seq
+            if self._evicted and (not self._chunks or self._chunks[0][0] > start + 1):
+                return None, self._seq, True
+            return ''.join(text for s, text, _ in self._chunks if s > start), self._seq, reset
+
+    def snapshot(self) -> Tuple[int, int]:
+        """Newest seq and the byte offset (since the last reset) it ends at."""
+        with self._lock:
+            return self._seq, self._end_offset
+
+
+class LogBufferRegistry:
+    """
+    Ring buffers for all live streams, keyed by stream name.
+
+    Finished streams are kept for RETENTION seconds so viewers arriving
+    right after the end still catch up from memory. A finished stream
+    that is appended to again (a requeued job dispatched anew) is live
+    again.
+    """
+
+    # Seconds a finished stream's buffer is kept
+    RETENTION = 300
+
+    def __init__(self, max_bytes: int = None):
+        """
+        Initialize the registry.
+
+        Args:
+            max_bytes: Max bytes retained per stream
+        """
+        self.max_bytes = max_bytes
+        self._buffers: Dict[str, LogRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def append(self, key: str, text: str, replace: bool = False) -> int:
+        """Append to a stream (created on first use); returns the chunk's seq."""
+        with self._lock:
+            self._expire()
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = LogRingBuffer(self.max_bytes)
+            buffer.finished_at = None
+        return buffer.append(text, replace)
+
+    def get(self, key: str) -> Optional[LogRingBuffer]:
+        """Get a stream's buffer, or None if it is not (or no longer) held."""
+        with self._lock:
+            self._expire()
+            return self._buffers.get(key)
+
+    def finish(self, key: str):
+        """Mark a stream finished; it is dropped after RETENTION seconds."""
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer and buffer.finished_at is None:
+                buffer.finished_at = time.monotonic()
+
+    def finish_prefix(self, prefix: str):
+        """Mark every stream whose key starts with prefix finished."""
+        with self._lock:
+            now = time.monotonic()
+            for key, buffer in self._buffers.items():
+                if key.startswith(prefix) and buffer.finished_at is None:
+                    buffer.finished_at = now
+
+    def keys(self, prefix: str = '') -> List[str]:
+        """Keys of held streams starting with prefix."""
+        with self._lock:
+            self._expire()
+            return [k for k in self._buffers if k.startswith(prefix)]
+
+    def get_stats(self) -> Dict:
+        """Get buffer statistics."""
+        with self._lock:
+            return {'streams': len(self._buffers),
+                    'bytes': sum(b._size for b in self._buffers.values())}
+
+    def _expire(self):
+        """Drop finished streams past retention. Lock held."""
+        cutoff = time.monotonic() - self.RETENTION
+        for key in [k for k, b in self._buffers.items()
+                    if b.finished_at is not None and b.finished_at < cutoff]:
+            del self._buffers[key]
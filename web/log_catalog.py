@@ -0,0 +1,322 @@
+"""
+Log Catalog
+
+In-memory index of the log files in LOGS_DIR, so pages that list logs or
+show each playbook's latest run don't glob and stat the whole directory
+on every request.
+
+Each log has one entry (playbook, target, cluster job or local run ID,
+worker, status, size, disk usage, archive tier and times), kept in order of last modification:
+- Runs and job completions record their logs as they are written
+- Lookups by file, job ID and latest-per-playbook are dict/bisect based
+- Listing is paged newest first, touching only the requested page
+
+The catalog is built from disk once, on first use: every *.log is
+stat'ed and its header line parsed, then entries are enriched from the
+execution history and jobs in storage. Partial logs of running cluster jobs (partial-*.log)
+are not catalogued; their final log is, on completion.
+"""
+
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+from log_archive import ARCHIVE_SUFFIX, disk_size, read_head, stat_log
+
+# Logs in LOGS_DIR that are not run logs
+IGNORED_LOGS = ('ansible.log',)
+
+# Prefix of streamed cluster job logs (see log_ingest)
+PARTIAL_PREFIX = 'partial-'
+
+# Bytes read from the start of a log to find its header line
+HEADER_BYTES = 4096
+
+# Execution history entries read when building from disk
+HISTORY_LIMIT = 1000
+
+# Header fields, e.g.
+# === Playbook: name | Target: target | Worker: worker | Started: timestamp ===
+_HEADER_FIELDS = {
+    'playbook': re.compile(r'Playbook:\s*([^|]+)'),
+    'target': re.compile(r'Targets?:\s*([^|]+)'),
+    'worker': re.compile(r'Worker:\s*([^|]+)'),
+    'started': re.compile(r'Started:\s*([^=|]+)'),
+    'job_id': re.compile(r'Job ID:\s*([a-f0-9-]+)'),
+}
+
+
+def parse_header(line: str) -> Dict:
+    """
+    Parse the metadata header a run writes as the first line of its log.
+
+    Args:
+        line: First line of a log
+
+    Returns:
+        Dict with whichever of playbook, target, worker, started and
+        job_id the header carries (empty if it's not a header)
+    """
+    if not line.startswith('===') or '|' not in line:
+        return {}
+    fields = {}
+    for name, pattern in _HEADER_FIELDS.items():
+        match = pattern.search(line)
+        if match:
+            fields[name] = match.group(1).strip()
+    return fields
+
+
+def is_catalogued(log_file: str) -> bool:
+    """Check if a file in LOGS_DIR belongs in the catalog."""
+    return (log_file.endswith('.log') and log_file not in IGNORED_LOGS
+            and not log_file.startswith(PARTIAL_PREFIX))
+
+
+class LogCatalog:
+    """
+    Index of run logs with ordered, per-playbook and per-job lookups.
+
+    Thread-safe; entries returned are copies.
+    """
+
+    def __init__(self, logs_dir: str, get_storage: Callable = None):
+        """
+        Initialize the catalog (built on first use).
+
+        Args:
+            logs_dir: Directory holding the logs
+            get_storage: Optional function returning the storage backend,
+                whose jobs fill in metadata when building from disk
+        """
+        self.logs_dir = logs_dir
+        self.get_storage = get_storage
+
+        self._entries: Dict[str, Dict] = {}
+        self._order: List[Tuple[float, str]] = []  # (modified, log_file), oldest first
+        self._by_playbook: Dict[str, List[Tuple[float, str]]] = {}
+        self._by_job: Dict[str, str] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the catalog from the logs on disk.
+
+        Returns:
+            Number of logs catalogued
+        """
+        names = set()
+        try:
+            with os.scandir(self.logs_dir) as it:
+                for dirent in it:
+                    name = dirent.name
+                    if name.endswith(ARCHIVE_SUFFIX):
+                        name = name[:-len(ARCHIVE_SUFFIX)]
+                    if is_catalogued(name) and dirent.is_file():
+                        names.add(name)
+        except OSError:
+            pass
+
+        entries = {}
+        for name in names:
+            path = os.path.join(self.logs_dir, name)
+            file_fields = self._stat(name)
+            if file_fields:
+                entry = {'log_file': name, **file_fields, **self._read_header(path)}
+                entry.setdefault('status', 'completed')
+                entries[name] = entry
+
+        storage = self.get_storage() if self.get_storage else None
+        if storage:
+            try:
+                # Scheduled runs (run IDs), then cluster jobs
+                for run in storage.get_history(limit=HISTORY_LIMIT):
+                    entry = entries.get(run.get('log_file') or '')
+                    if entry and (run.get('run_id') or run.get('id')):
+                        entry['job_id'] = run.get('run_id') or run.get('id')
+                for job in storage.get_all_jobs():
+                    entry = entries.get(job.get('log_file') or '')
+                    if entry:
+                        entry.update(job_log_fields(job))
+            except Exception as e:
+                print(f"Warning: Could not read jobs for log catalog: {e}")
+
+        with self._lock:
+            self._entries = {}
+            self._order = []
+            self._by_playbook = {}
+            self._by_job = {}
+            for entry in entries.values():
+                self._insert(entry)
+            self._loaded = True
+            return len(self._entries)
+
+    def record(self, log_file: str, **fields) -> Optional[Dict]:
+        """
+        Add or update a log's entry; sizes and modified time are re-read.
+
+        Args:
+            log_file: Log filename in logs_dir
+            **fields: Metadata to set (playbook, target, job_id, run_id,
+                worker, worker_id, status, started, finished); None values
+                are ignored
+
+        Returns:
+            The updated entry, or None if the log isn't catalogued or
+            doesn't exist
+        """
+        if not is_catalogued(log_file):
+            return None
+        file_fields = self._stat(log_file)
+        if not file_fields:
+            self.remove(log_file)
+            return None
+
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._remove(log_file) or {'log_file': log_file}
+            entry.update({k: v for k, v in fields.items() if v is not None})
+            entry.update(file_fields)
+            self._insert(entry)
+            return dict(entry)
+
+    def remove(self, log_file: str):
+        """Drop a log's entry."""
+        with self._lock:
+            self._ensure_loaded()
+            self._remove(log_file)
+
+    def get(self, log_file: str) -> Optional[Dict]:
+        """Get a log's entry."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(log_file)
+            return dict(entry) if entry else None
+
+    def find_job(self, job_id: str) -> Optional[Dict]:
+        """Get the entry of the log written by a job or run."""
+        with self._lock:
+            self._ensure_loaded()
+            log_file = self._by_job.get(job_id)
+            return dict(self._entries[log_file]) if log_file else None
+
+    def latest(self, playbook: str) -> Optional[Dict]:
+        """Get the most recently modified log of a playbook."""
+        with self._lock:
+            self._ensure_loaded()
+            keys = self._by_playbook.get(playbook)
+            return dict(self._entries[keys[-1][1]]) if keys else None
+
+    def oldest(self) -> List[Dict]:
+        """Get all entries, oldest first."""
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(self._entries[name]) for _, name in self._order]
+
+    def page(self, offset: int = 0, limit: int = 100,
+             playbook: str = None) -> Tuple[List[Dict], int]:
+        """
+        Get a page of entries, newest first.
+
+        Args:
+            offset: Entries to skip
+            limit: Max entries to return
+            playbook: Only logs of this playbook
+
+        Returns:
+            Tuple of (entries, total matching entries)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            keys = self._by_playbook.get(playbook, []) if playbook else self._order
+            total = len(keys)
+            end = max(0, total - max(0, offset))
+            start = max(0, end - max(0, limit))
+            return [dict(self._entries[name]) for _, name in reversed(keys[start:end])], total
+
+    def _ensure_loaded(self):
+        """Build from disk on first use. Lock held."""
+        if not self._loaded:
+            self.rebuild()
+
+    def _insert(self, entry: Dict):
+        """Index an entry. Lock held."""
+        log_file = entry['log_file']
+        key = (entry['modified'], log_file)
+        self._entries[log_file] = entry
+        insort(self._order, key)
+        if entry.get('playbook'):
+            insort(self._by_playbook.setdefault(entry['playbook'], []), key)
+        for key_field in ('job_id', 'run_id'):
+            if entry.get(key_field):
+                self._by_job[entry[key_field]] = log_file
+
+    def _remove(self, log_file: str) -> Optional[Dict]:
+        """Unindex and return an entry. Lock held."""
+        entry = self._entries.pop(log_file, None)
+        if not entry:
+            return None
+        key = (entry['modified'], log_file)
+        _discard(self._order, key)
+        playbook = entry.get('playbook')
+        if playbook in self._by_playbook:
+            _discard(self._by_playbook[playbook], key)
+            if not self._by_playbook[playbook]:
+                del self._by_playbook[playbook]
+        for key_field in ('job_id', 'run_id'):
+            if entry.get(key_field) and self._by_job.get(entry[key_field]) == log_file:
+                del self._by_job[entry[key_field]]
+        return entry
+
+    def _stat(self, log_file: str) -> Optional[Dict]:
+        """Size, disk usage, modified time and tier of a log (None if missing)."""
+        path = os.path.join(self.logs_dir, log_file)
+        try:
+            size, modified = stat_log(path)
+        except OSError:
+            return None
+        archived = not os.path.exists(path)
+        return {
+            'size': size,
+            'disk_size': disk_size(path) if archived else size,
+            'modified': modified,
+            'archived': archived
+        }
+
+    @staticmethod
+    def _read_header(path: str) -> Dict:
+        """Metadata from a log's header line."""
+        try:
+            head = read_head(path, HEADER_BYTES)
+        except OSError:
+            return {}
+        return parse_header(head.split(b'\n', 1)[0].decode('utf-8', errors='replace'))
+
+
+def job_log_fields(job: Dict) -> Dict:
+    """Catalog fields of a cluster job's log."""
+    fields = {
+        'playbook': job.get('playbook'),
+        'target': job.get('target'),
+        'job_id': job.get('id'),
+        'worker_id': job.get('assigned_worker'),
+        'status': job.get('status'),
+        'started': job.get('started_at'),
+        'finished': job.get('completed_at'),
+    }
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def _discard(keys: List[Tuple[float, str]], key: Tuple[float, str]):
+    """Remove a key from a sorted list if present."""
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
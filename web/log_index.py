@@ -0,0 +1,280 @@
+"""
+Log Line Index
+
+Sidecar index of line positions for log files, so a page of lines can be
+read with one seek instead of reading the whole file.
+
+The index for `name.log` is `name.log.idx`: a flat array of little-endian
+uint64 values, the byte offset just past each complete line (i.e. after
+its newline). Line N (0-based) spans [end[N-1], end[N]), with end[-1] = 0.
+Bytes after the last indexed newline form an unterminated last line.
+
+Logs written by BufferedLogWriter get their index appended as they
+stream. Any other log (worker uploads, partial logs, older files) is
+indexed on first access, and from then on only the bytes appended since
+the last access are scanned. While a writer owns a sidecar, readers keep
+what they index in memory only.
+
+Offsets are always into the uncompressed log, so the index keeps working
+once a log is archived (see log_archive).
+"""
+
+import os
+import sys
+import threading
+from array import array
+from typing import Dict, Tuple
+
+from log_archive import is_archived, log_size, open_log
+
+# Suffix of the sidecar index file
+INDEX_SUFFIX = '.idx'
+
+# Block size used when scanning a log for newlines
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+# Cached indexes kept in memory (least recently used are dropped)
+MAX_CACHED_INDEXES = 64
+
+
+def index_path(log_path: str) -> str:
+    """Path of a log's sidecar index."""
+    return log_path + INDEX_SUFFIX
+
+
+def _to_bytes(offsets: array) -> bytes:
+    """Serialize offsets as little-endian uint64."""
+    if sys.byteorder != 'little':
+        offsets = array('Q', offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def _from_bytes(data: bytes) -> array:
+    """Parse little-endian uint64 offsets (a torn trailing entry is ignored)."""
+    offsets = array('Q')
+    offsets.frombytes(data[:len(data) - len(data) % offsets.itemsize])
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    return offsets
+
+
+def line_ends(data: bytes, base: int = 0) -> array:
+    """Offsets just past each newline in data, shifted by base."""
+    ends = array('Q')
+    pos = data.find(b'\n')
+    while pos != -1:
+        ends.append(base + pos + 1)
+        pos = data.find(b'\n', pos + 1)
+    return ends
+
+
+class LineIndex:
+    """
+    Line-offset index of one log file.
+
+    Use LineIndex.open() to get an index that is current with the log.
+    """
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.ends = array('Q')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, log_path: str) -> 'LineIndex':
+        """Get the (cached) index of a log, brought up to date."""
+        with _cache_lock:
+            index = _cache.pop(log_path, None)
+            if index is None:
+                index = cls(log_path)
+                index._load()
+            _cache[log_path] = index
+            while len(_cache) > MAX_CACHED_INDEXES:
+                _cache.pop(next(iter(_cache)))
+        index.refresh()
+        return index
+
+    @property
+    def indexed_bytes(self) -> int:
+        """Bytes of the log covered by complete indexed lines."""
+        return self.ends[-1] if self.ends else 0
+
+    def refresh(self):
+        """Index lines appended to the log since the last refresh."""
+        with self._lock:
+            try:
+                size = log_size(self.log_path)
+            except OSError:
+                self.ends = array('Q')
+                return
+            # Archives are immutable; only plain logs can have been replaced
+            if size < self.indexed_bytes or (not is_archived(self.log_path) and not self._still_valid()):
+                # Log was truncated or replaced: start over
+                self.ends = array('Q')
+                self._write()
+            if size == self.indexed_bytes:
+                return
+
+            new_ends = array('Q')
+            with open_log(self.log_path) as f:
+                f.seek(self.indexed_bytes)
+                pos = self.indexed_bytes
+                for block in iter(lambda: f.read(SCAN_BLOCK_SIZE), b''):
+                    new_ends.extend(line_ends(block, pos))
+                    pos += len(block)
+            if new_ends:
+                self._append(new_ends)
+
+    def line_count(self, size: int = None) -> int:
+        """Number of lines, counting an unterminated last line."""
+        if size is None:
+            size = self._size()
+        return len(self.ends) + (1 if size > self.indexed_bytes else 0)
+
+    def byte_range(self, from_line: int, count: int) -> Tuple[int, int]:
+        """Byte range [start, end) of count lines starting at from_line."""
+        size = self._size()
+        total = self.line_count(size)
+        from_line = max(0, min(from_line, total))
+        to_line = max(from_line, min(from_line + count, total))
+        start = self.ends[from_line - 1] if from_line > 0 else 0
+        end = self.ends[to_line - 1] if 0 < to_line <= len(self.ends) else (size if to_line else 0)
+        return start, end
+
+    def read_lines(self, from_line: int, count: int) -> Dict:
+        """
+        Read a page of lines.
+
+        Args:
+            from_line: First line (0-based); negative counts from the end
+            count: Max lines to return
+
+        Returns:
+            Dict with from_line, count, total_lines, content and the byte
+            range [start, end) the page covers
+        """
+        total = self.line_count()
+        if from_line < 0:
+            from_line = max(0, total + from_line)
+        start, end = self.byte_range(from_line, max(0, count))
+        with open_log(self.log_path) as f:
+            f.seek(start)
+            data = f.read(end - start)
+        content = data.decode('utf-8', errors='replace')
+        return {
+            'from_line': min(from_line, total),
+            'count': len(line_ends(data)) + (1 if data and not data.endswith(b'\n') else 0),
+            'total_lines': total,
+            'start': start,
+            'end': end,
+            'content': content
+        }
+
+    def tail(self, count: int) -> Dict:
+        """Read the last count lines."""
+        return self.read_lines(-count if count > 0 else self.line_count(), count)
+
+    def _size(self) -> int:
+        """Current log size, 0 if missing."""
+        try:
+            return log_size(self.log_path)
+        except OSError:
+            return 0
+
+    def _still_valid(self) -> bool:
+        """Cheap check that the indexed prefix still ends in a newline."""
+        if not self.ends:
+            return True
+        try:
+            with open_log(self.log_path) as f:
+                f.seek(self.indexed_bytes - 1)
+                return f.read(1) == b'\n'
+        except OSError:
+            return False
+
+    def _load(self):
+        """Load the sidecar, if any."""
+        try:
+            with open(index_path(self.log_path), 'rb') as f:
+                self.ends = _from_bytes(f.read())
+        except OSError:
+            self.ends = array('Q')
+
+    def _append(self, new_ends: array):
+        """Add entries in memory and to the sidecar."""
+        self.ends.extend(new_ends)
+        if self.log_path in _writing:
+            return
+        try:
+            with open(index_path(self.log_path), 'ab') as f:
+                f.write(_to_bytes(new_ends))
+        except OSError as e:
+            print(f"Warning: Could not write log index for {self.log_path}: {e}")
+
+    def _write(self):
+        """Rewrite the sidecar from memory."""
+        if self.log_path in _writing:
+            return
+        try:
+            with open(index_path(self.log_path), 'wb') as f:
+                f.write(_to_bytes(self.ends))
+        except OSError as e:
+            print(f"Warning: Could not write log index for {self.log_path}: {e}")
+
+
+class LineIndexWriter:
+    """
+    Appends to a log's sidecar index as the log is written.
+
+    Fed the exact bytes written to the log, in order, starting from an
+    empty log.
+    """
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self._offset = 0
+        invalidate(log_path)
+        _writing.add(log_path)
+        self._file = open(index_path(log_path), 'wb')
+
+    def add(self, data: bytes):
+        """Record the lines completed by bytes just written to the log."""
+        ends = line_ends(data, self._offset)
+        self._offset += len(data)
+        if ends:
+            self._file.write(_to_bytes(ends))
+            self._file.flush()
+
+    def close(self):
+        """Close the sidecar and hand it over to readers."""
+        self._file.close()
+        _writing.discard(self.log_path)
+        invalidate(self.log_path)
+
+
+def is_being_written(log_path: str) -> bool:
+    """Check if a LineIndexWriter is indexing a log as it is written."""
+    return log_path in _writing
+
+
+def invalidate(log_path: str):
+    """Drop a log's cached index (e.g. after it was replaced)."""
+    with _cache_lock:
+        _cache.pop(log_path, None)
+
+
+def remove_index(log_path: str):
+    """Delete a log's sidecar index and cached copy."""
+    invalidate(log_path)
+    try:
+        os.remove(index_path(log_path))
+    except OSError:
+        pass
+
+
+_cache: Dict[str, LineIndex] = {}
+_cache_lock = threading.Lock()
+
+# Logs whose sidecar is being written by a LineIndexWriter
+_writing = set()
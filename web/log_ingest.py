@@ -0,0 +1,358 @@
+"""
+Offset-Addressed Log Ingest
+
+Assembles a job's log on the primary from chunks streamed by the worker.
+Every chunk names the byte offset it starts at, so the partial log file
+is always a contiguous prefix of the worker's log:
+- Chunks already on disk (retries, spool replays) are acknowledged and skipped
+- Chunks overlapping the end of the file only write their new tail
+- Chunks past the end are rejected with the offset the primary expects
+
+At completion the worker sends only the log length and SHA-256 digest.
+If the assembled file does not match, the missing range is reported back
+and the worker fills it through the same chunk endpoint. The partial log
+is then linked to its final name and the partial name removed, so the
+archive and retention policy see the only copy.
+
+LogIngestor serves the high-volume path: it takes chunks for several jobs
+in one call, checks ownership against an in-memory assignment cache,
+keeps partial-log file handles open per running job and reports one
+coalesced update per job per call.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from log_index import remove_index
+
+# Block size used when hashing log files
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def chunk_checksum(content: str) -> str:
+    """SHA-256 hex digest of a chunk's UTF-8 bytes."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def file_digest(path: str) -> Tuple[int, Optional[str]]:
+    """
+    Length and SHA-256 digest of a file, read in blocks.
+
+    Returns:
+        Tuple of (length in bytes, hex digest), or (0, None) if missing
+    """
+    if not os.path.exists(path):
+        return 0, None
+    sha = hashlib.sha256()
+    length = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+            length += len(block)
+    return length, sha.hexdigest()
+
+
+def place_chunk(size: int, data: bytes, offset: int, append: bool) -> Tuple[str, bytes]:
+    """
+    Decide how a chunk lands on a partial log of `size` bytes.
+
+    Returns:
+        Tuple of (status, bytes to write). Status 'ok' means append the
+        bytes (or, when not append, replace the file with them).
+    """
+    if not append:
+        return ('ok', data) if offset == 0 else ('gap', b'')
+    if offset > size:
+        return 'gap', b''
+    if offset + len(data) <= size:
+        return 'duplicate', b''
+    return 'ok', data[size - offset:]
+
+
+def missing_ranges(path: str, length: int, digest: str) -> List[List[int]]:
+    """
+    Byte ranges the primary still needs to match the worker's log.
+
+    Args:
+        path: Partial log file path
+        length: Log length reported by the worker
+        digest: SHA-256 hex digest reported by the worker
+
+    Returns:
+        List of [start, end) ranges; empty if the file matches
+    """
+    size = _size(path)
+    if size < length:
+        return [[size, length]]
+    if size == length and file_digest(path)[1] == digest:
+        return []
+    # Longer than the worker's log or corrupted: resend everything
+    return [[0, length]]
+
+
+def promote_partial_log(partial_path: str, log_path: str):
+    """
+    Give a completed job's partial log its final name.
+
+    Hard-linked (copied where links are unsupported) so viewers still
+    tailing the partial file are unaffected; drop the partial name with
+    discard_partial_log() once the job points at the final log.
+    """
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    try:
+        os.link(partial_path, log_path)
+    except OSError:
+        shutil.copyfile(partial_path, log_path)
+    remove_index(log_path)
+
+
+def discard_partial_log(partial_path: str) -> int:
+    """
+    Delete a partial log and its line index.
+
+    Readers holding it open keep reading; the data is freed when they
+    close it (or, once promoted, lives on under the final name only).
+
+    Returns:
+        Bytes the partial name held (0 if missing)
+    """
+    size = _size(partial_path)
+    try:
+        os.remove(partial_path)
+    except OSError:
+        size = 0
+    remove_index(partial_path)
+    return size
+
+
+class LogIngestor:
+    """
+    Batched, offset-aware writer for worker log chunks.
+
+    Ownership of a job is looked up in storage once and then cached for
+    ASSIGNMENT_TTL seconds (or until close_job), so a batch costs no
+    storage round trips for jobs already seen.
+    """
+
+    # Seconds a cached job -> worker assignment is trusted
+    ASSIGNMENT_TTL = 30
+
+    # Partial-log file handles kept open (least recently used are closed)
+    MAX_OPEN_FILES = 256
+
+    def __init__(self, get_storage: Callable, logs_dir: str,
+                 sanitize: Callable[[str], str] = None,
+                 on_update: Callable[[str, str, bool], None] = None):
+        """
+        Initialize the ingestor.
+
+        Args:
+            get_storage: Function returning the storage backend
+            logs_dir: Directory for partial-{job_id}.log files
+            sanitize: Optional function redacting secrets from a chunk
+            on_update: Optional callback(job_id, content, append) called
+                once per job per ingest call with the coalesced content
+        """
+        self.get_storage = get_storage
+        self.logs_dir = logs_dir
+        self.sanitize = sanitize
+        self.on_update = on_update
+
+        self._assignments: Dict[str, Dict] = {}
+        self._files: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'chunks': 0,
+            'bytes_written': 0,
+            'duplicates': 0,
+            'rejected': 0,
+            'assignment_lookups': 0
+        }
+
+    def partial_log_path(self, job_id: str) -> str:
+        """Path of a job's partial log."""
+        return os.path.join(self.logs_dir, f"partial-{job_id}.log")
+
+    def ingest(self, worker_id: str, chunks: List[Dict]) -> List[Dict]:
+        """
+        Write a batch of chunks for jobs owned by a worker.
+
+        Each chunk is a dict with job_id, content and optionally append
+        (default True), offset (default: end of the partial log) and
+        checksum (SHA-256 hex of content). Malformed chunks are rejected
+        with code 400 without affecting the rest of the batch.
+
+        Args:
+            worker_id: Worker sending the chunks
+            chunks: Chunks in send order
+
+        Returns:
+            One result dict per chunk: job_id, status ('ok', 'duplicate',
+            'gap' or 'rejected'), offset (the partial log length after the
+            chunk), bytes_written, and error/code for rejected chunks
+        """
+        results = []
+        updates: 'OrderedDict[str, List]' = OrderedDict()
+        new_partials = []
+
+        with self._lock:
+            for chunk in chunks:
+                self.stats['chunks'] += 1
+                error = self._check_fields(chunk)
+                job_id = chunk.get('job_id') if isinstance(chunk, dict) else None
+                if error:
+                    self.stats['rejected'] += 1
+                    results.append({'job_id': job_id, 'status': 'rejected',
+                                    'error': error, 'code': 400})
+                    continue
+                content = chunk.get('content') or ''
+                append = chunk.get('append', True)
+
+                error = self._check_owner(job_id, worker_id)
+                if not error and chunk.get('checksum') and chunk['checksum'] != chunk_checksum(content):
+                    error = ('Checksum mismatch', 400)
+                if error:
+                    self.stats['rejected'] += 1
+                    results.append({'job_id': job_id, 'status': 'rejected',
+                                    'error': error[0], 'code': error[1]})
+                    continue
+
+                if self.sanitize:
+                    content = self.sanitize(content)
+                entry = self._open(job_id)
+                offset = chunk.get('offset')
+                if offset is None:
+                    offset = entry['size'] if append else 0
+                status, data = place_chunk(entry['size'], content.encode('utf-8'), offset, append)
+
+                if status == 'ok':
+                    if not append:
+                        entry['file'].seek(0)
+                        entry['file'].truncate()
+                        entry['size'] = 0
+                    entry['file'].write(data)
+                    entry['size'] += len(data)
+                    self.stats['bytes_written'] += len(data)
+                    self._coalesce_update(updates, job_id, data, append)
+                    if not self._assignments[job_id]['partial_set']:
+                        self._assignments[job_id]['partial_set'] = True
+                        new_partials.append(job_id)
+                elif status == 'duplicate':
+                    self.stats['duplicates'] += 1
+
+                result = {'job_id': job_id, 'status': status, 'offset': entry['size'],
+                          'bytes_written': len(data)}
+                if status == 'gap':
+                    result['expected_offset'] = entry['size']
+                results.append(result)
+
+            # Make the batch visible to readers of the partial files
+            for entry in self._files.values():
+                entry['file'].flush()
+
+        storage = self.get_storage()
+        for job_id in new_partials:
+            job = self._assignments.get(job_id, {}).get('job') or {}
+            if storage and not job.get('partial_log_file'):
+                storage.update_job(job_id, {'partial_log_file': f"partial-{job_id}.log"})
+
+        if self.on_update:
+            for job_id, (parts, append) in updates.items():
+                self.on_update(job_id, b''.join(parts).decode('utf-8', errors='replace'), append)
+
+        return results
+
+    def close_job(self, job_id: str):
+        """Close a job's partial log and drop its cached assignment."""
+        with self._lock:
+            self._assignments.pop(job_id, None)
+            entry = self._files.pop(job_id, None)
+            if entry:
+                entry['file'].close()
+
+    def get_stats(self) -> Dict:
+        """Get ingest statistics."""
+        return {**self.stats, 'open_files': len(self._files),
+                'cached_assignments': len(self._assignments)}
+
+    @staticmethod
+    def _check_fields(chunk) -> Optional[str]:
+        """Return an error if a chunk is not a well-formed dict."""
+        if not isinstance(chunk, dict):
+            return 'Chunk must be an object'
+        if not isinstance(chunk.get('job_id'), str):
+            return 'job_id must be a string'
+        if not isinstance(chunk.get('content') or '', str):
+            return 'content must be a string'
+        offset = chunk.get('offset')
+        if offset is not None and (isinstance(offset, bool) or not isinstance(offset, int) or offset < 0):
+            return 'offset must be a non-negative integer'
+        if not isinstance(chunk.get('append', True), bool):
+            return 'append must be a boolean'
+        if not isinstance(chunk.get('checksum') or '', str):
+            return 'checksum must be a string'
+        return None
+
+    def _check_owner(self, job_id: str, worker_id: str) -> Optional[Tuple[str, int]]:
+        """Return (error, http status) if the worker may not write the job's log."""
+        cached = self._assignments.get(job_id)
+        if cached and cached['expires'] > time.monotonic():
+            return None if cached['worker_id'] == worker_id else ('Worker does not own this job', 403)
+
+        self.stats['assignment_lookups'] += 1
+        storage = self.get_storage()
+        job = storage.get_job(job_id) if storage and job_id else None
+        if not job:
+            return 'Job not found', 404
+        if job.get('status') not in ('assigned', 'running'):
+            self._assignments.pop(job_id, None)
+            return 'Job is not running', 400
+        if job.get('assigned_worker') != worker_id:
+            return 'Worker does not own this job', 403
+
+        self._assignments[job_id] = {
+            'worker_id': worker_id,
+            'expires': time.monotonic() + self.ASSIGNMENT_TTL,
+            'partial_set': bool(cached and cached['partial_set']) or bool(job.get('partial_log_file')),
+            'job': job
+        }
+        return None
+
+    def _open(self, job_id: str) -> Dict:
+        """Get (or open) the append handle for a job's partial log."""
+        entry = self._files.get(job_id)
+        if entry:
+            self._files.move_to_end(job_id)
+            return entry
+
+        os.makedirs(self.logs_dir, exist_ok=True)
+        f = open(self.partial_log_path(job_id), 'ab')
+        entry = {'file': f, 'size': os.fstat(f.fileno()).st_size}
+        self._files[job_id] = entry
+        while len(self._files) > self.MAX_OPEN_FILES:
+            _, old = self._files.popitem(last=False)
+            old['file'].close()
+        return entry
+
+    @staticmethod
+    def _coalesce_update(updates: Dict, job_id: str, data: bytes, append: bool):
+        """Merge written bytes into the job's pending update."""
+        if job_id not in updates or not append:
+            updates[job_id] = ([data], append)
+        else:
+            updates[job_id][0].append(data)
+
+
+def _size(path: str) -> int:
+    """File size, 0 if missing."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,191 @@
+"""
+Log Pipeline
+
+Shared processing of playbook output for local runs (app.py), worker
+execution (worker/executor.py) and primary ingest (log_ingest.py).
+Output is handled in multi-line chunks, as read from the pipe, instead
+of line by line. Each chunk passes through these stages:
+- decode:  incremental UTF-8 (multi-byte characters may span reads)
+- redact:  mask password-like variable values; the regex only runs on
+           chunks that contain '_pass' at all
+- tasks:   PLAY/TASK/HANDLER/RECAP boundaries, found with literal
+           prechecks before the regex
+- offsets: byte offset and line number where the chunk starts
+- fan-out: every sink gets the same Chunk
+
+Chunks only ever end on a line boundary: an unterminated last line is
+held back until its newline arrives or the pipeline is flushed, so a
+secret can never be split across two chunks.
+
+This module only uses the standard library; workers load it through
+worker/log_pipeline.py (a link to this file).
+"""
+
+import codecs
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Bytes read from a pipe at once
+READ_SIZE = 64 * 1024
+
+# Variables whose values are masked in logs (Ansible may echo vars)
+SENSITIVE_KEYS = frozenset({'ansible_ssh_pass', 'ansible_password', 'ansible_become_pass'})
+
+# Handles: ansible_ssh_pass=val, "ansible_ssh_pass": "val", ansible_ssh_pass: val
+# Whitespace never crosses a newline, so a chunk redacts exactly like its lines
+SENSITIVE_PATTERN = re.compile(
+    r'((?:ansible_ssh_pass|ansible_password|ansible_become_pass)[^\S\n]*["\']?[^\S\n]*[:=][^\S\n]*)'
+    r'(["\']?)[^"\'&\s]+(["\']?)',
+    re.IGNORECASE
+)
+
+# Every sensitive key contains '_pass'; chunks without it skip the full regex
+# (a literal-prefix search, far cheaper than SENSITIVE_PATTERN)
+_SENSITIVE_MARKER = re.compile('_pass', re.IGNORECASE)
+
+# Mask written in place of a sensitive value
+MASK = '*****'
+
+# Ansible banner lines that start a play, task or the recap
+TASK_PATTERN = re.compile(r'^(PLAY|TASK|RUNNING HANDLER) \[(.*)\]|^(PLAY RECAP)\b', re.MULTILINE)
+
+# Literal prefixes of TASK_PATTERN, checked before running it
+_TASK_MARKERS = ('TASK [', 'PLAY [', 'HANDLER [', 'PLAY RECAP')
+
+
+def _redact_match(match) -> str:
+    """Mask a sensitive value, leaving values already masked unchanged."""
+    value = match.group(0)[len(match.group(1)):].strip('"\'')
+    if value and set(value) == {'*'}:
+        return match.group(0)
+    return match.group(1) + MASK
+
+
+def redact(text: str) -> str:
+    """Redact sensitive variable values from log text (any number of lines)."""
+    if not _SENSITIVE_MARKER.search(text):
+        return text
+    return SENSITIVE_PATTERN.sub(_redact_match, text)
+
+
+def find_tasks(text: str, first_line: int = 0) -> List[Tuple[int, str, str]]:
+    """
+    Play, task and handler boundaries in log text.
+
+    Args:
+        text: Log text
+        first_line: Line number of the text's first line
+
+    Returns:
+        List of (line number, kind, name) with kind 'play', 'task',
+        'handler' or 'recap'
+    """
+    if not any(marker in text for marker in _TASK_MARKERS):
+        return []
+    tasks = []
+    line, pos = first_line, 0
+    for match in TASK_PATTERN.finditer(text):
+        line += text.count('\n', pos, match.start())
+        pos = match.start()
+        if match.group(3):
+            tasks.append((line, 'recap', ''))
+        else:
+            kind = {'PLAY': 'play', 'TASK': 'task'}.get(match.group(1), 'handler')
+            tasks.append((line, kind, match.group(2)))
+    return tasks
+
+
+class Chunk:
+    """One processed chunk of log output, as handed to sinks."""
+
+    __slots__ = ('text', 'offset', 'first_line', 'lines', 'tasks', '_data')
+
+    def __init__(self, text: str, offset: int, first_line: int, tasks: List[Tuple[int, str, str]]):
+        self.text = text
+        self.offset = offset
+        self.first_line = first_line
+        self.lines = text.count('\n')
+        self.tasks = tasks
+        self._data = None
+
+    @property
+    def data(self) -> bytes:
+        """The chunk's UTF-8 bytes (encoded once, on first use)."""
+        if self._data is None:
+            self._data = self.text.encode('utf-8')
+        return self._data
+
+
+class LogPipeline:
+    """
+    Decode, redact, annotate and fan out log output in chunks.
+
+    Feed it bytes (or text) as read from a process; every complete group
+    of lines becomes one Chunk passed to each sink in order. Call flush()
+    at the end of the output to pass on an unterminated last line.
+    """
+
+    def __init__(self, sinks: Iterable[Callable[[Chunk], None]] = ()):
+        """
+        Initialize the pipeline.
+
+        Args:
+            sinks: Callables receiving each Chunk, in order
+        """
+        self.sinks = list(sinks)
+        self.offset = 0
+        self.line = 0
+        self.current_task: Optional[Tuple[int, str, str]] = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ''
+
+    def feed(self, data: Union[bytes, str]) -> Optional[Chunk]:
+        """
+        Process output and pass its complete lines to the sinks.
+
+        Returns:
+            The Chunk passed on, or None if no line was completed
+        """
+        text = self._decoder.decode(data) if isinstance(data, bytes) else data
+        end = text.rfind('\n') + 1
+        if not end:
+            self._pending += text
+            return None
+        if self._pending:
+            text, self._pending = self._pending + text, text[end:]
+            end = len(text) - len(self._pending)
+        else:
+            self._pending = text[end:]
+        return self._emit(text[:end])
+
+    def flush(self) -> Optional[Chunk]:
+        """Pass on buffered output that has no newline yet."""
+        text, self._pending = self._pending + self._decoder.decode(b'', final=True), ''
+        return self._emit(text) if text else None
+
+    def _emit(self, text: str) -> Chunk:
+        text = redact(text)
+        chunk = Chunk(text, self.offset, self.line, find_tasks(text, self.line))
+        self.offset += len(chunk.data)
+        self.line += chunk.lines
+        if chunk.tasks:
+            self.current_task = chunk.tasks[-1]
+        for sink in self.sinks:
+            sink(chunk)
+        return chunk
+
+
+def read_chunks(stream, size: int = READ_SIZE) -> Iterator[bytes]:
+    """
+    Read a binary pipe in chunks of whatever output is available.
+
+    Each read returns as soon as the process wrote something (at most
+    size bytes), so output is not held back until a buffer fills.
+    Streams without read1() (e.g. line iterables) are passed through.
+    """
+    read1 = getattr(stream, 'read1', None)
+    if read1 is None:
+        yield from stream
+        return
+    for data in iter(lambda: read1(size), b''):
+        yield data
@@ -0,0 +1,163 @@
+"""
+Log Retention
+
+Periodic pass over the log catalog that moves completed logs to the
+compressed archive tier (see log_archive) and prunes old logs:
+- Logs older than max_age_days are deleted
+- Beyond max_count logs, the oldest are deleted
+- Beyond max_bytes on disk (archives counted compressed), the oldest
+  are deleted
+- Remaining completed logs older than archive_after_days are archived
+
+Limits set to 0/None are off. Logs of running runs are never touched.
+
+Partial logs of cluster jobs (partial-*.log) are not catalogued; the
+pass also deletes those left behind by jobs that are no longer running
+(a job that was requeued, cancelled or lost its worker).
+"""
+
+import os
+import time
+from typing import Callable, Dict
+
+from log_archive import archive_log, remove_log
+from log_catalog import PARTIAL_PREFIX, LogCatalog
+from log_index import LineIndex, is_being_written, remove_index
+
+DAY = 24 * 60 * 60
+
+# Seconds a partial log must go unwritten before it can be deleted
+PARTIAL_GRACE = 60 * 60
+
+
+class LogRetention:
+    """
+    Archival and retention policy for the logs in a catalog.
+    """
+
+    def __init__(self, catalog: LogCatalog, archive_after_days: float = 7,
+                 max_age_days: float = None, max_count: int = None,
+                 max_bytes: int = None, on_delete: Callable[[str], None] = None,
+                 partial_active: Callable[[str], bool] = None):
+        """
+        Initialize the policy.
+
+        Args:
+            catalog: Catalog of the logs to manage
+            archive_after_days: Age at which completed logs are archived
+            max_age_days: Age at which logs are deleted
+            max_count: Max logs kept
+            max_bytes: Max disk bytes used by logs
+            on_delete: Optional callback(log_file) after a log is deleted
+            partial_active: Optional callback(job_id) telling if a job's
+                partial log is still in use; without it partial logs are
+                left alone
+        """
+        self.catalog = catalog
+        self.archive_after_days = archive_after_days
+        self.max_age_days = max_age_days
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.on_delete = on_delete
+        self.partial_active = partial_active
+
+    def run(self, now: float = None) -> Dict:
+        """
+        Apply the policy once.
+
+        Args:
+            now: Current time (default time.time())
+
+        Returns:
+            Dict with archived, deleted, partials_deleted, bytes_freed and
+            errors counts
+        """
+        now = now or time.time()
+        stats = {'archived': 0, 'deleted': 0, 'partials_deleted': 0, 'bytes_freed': 0, 'errors': 0}
+        if self.partial_active:
+            self._sweep_partials(now, stats)
+
+        entries = self.catalog.oldest()
+        count = len(entries)
+        total_bytes = sum(e.get('disk_size', e['size']) for e in entries)
+
+        kept = []
+        for entry in entries:
+            if entry.get('status') == 'running':
+                continue
+            if self._expired(entry, now, count, total_bytes):
+                freed = self._delete(entry)
+                count -= 1
+                total_bytes -= entry.get('disk_size', entry['size'])
+                stats['deleted'] += 1
+                stats['bytes_freed'] += freed
+            else:
+                kept.append(entry)
+
+        if self.archive_after_days:
+            cutoff = now - self.archive_after_days * DAY
+            for entry in kept:
+                if entry['modified'] > cutoff:
+                    break
+                path = os.path.join(self.catalog.logs_dir, entry['log_file'])
+                if entry.get('archived') or is_being_written(path):
+                    continue
+                try:
+                    stats['bytes_freed'] += self._archive(entry)
+                    stats['archived'] += 1
+                except OSError as e:
+                    print(f"Warning: Could not archive log {entry['log_file']}: {e}")
+                    stats['errors'] += 1
+
+        return stats
+
+    def _sweep_partials(self, now: float, stats: Dict):
+        """Delete partial logs whose job is no longer running."""
+        logs_dir = self.catalog.logs_dir
+        try:
+            names = [n for n in os.listdir(logs_dir) if n.startswith(PARTIAL_PREFIX) and n.endswith('.log')]
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(logs_dir, name)
+            try:
+                if os.path.getmtime(path) > now - PARTIAL_GRACE:
+                    continue
+                if self.partial_active(name[len(PARTIAL_PREFIX):-len('.log')]):
+                    continue
+            except OSError:
+                continue
+            stats['bytes_freed'] += remove_log(path)
+            remove_index(path)
+            stats['partials_deleted'] += 1
+            if self.on_delete:
+                self.on_delete(name)
+
+    def _expired(self, entry: Dict, now: float, count: int, total_bytes: int) -> bool:
+        """Check if a log is over any limit (given the logs still kept)."""
+        if self.max_age_days and entry['modified'] < now - self.max_age_days * DAY:
+            return True
+        if self.max_count and count > self.max_count:
+            return True
+        if self.max_bytes and total_bytes > self.max_bytes:
+            return True
+        return False
+
+    def _delete(self, entry: Dict) -> int:
+        """Delete a log, its sidecars and its entry. Returns bytes freed."""
+        path = os.path.join(self.catalog.logs_dir, entry['log_file'])
+        freed = remove_log(path)
+        remove_index(path)
+        self.catalog.remove(entry['log_file'])
+        if self.on_delete:
+            self.on_delete(entry['log_file'])
+        return freed
+
+    def _archive(self, entry: Dict) -> int:
+        """Archive a log and update its entry. Returns bytes saved."""
+        path = os.path.join(self.catalog.logs_dir, entry['log_file'])
+        # Complete the line index first; it stays valid for the archive
+        LineIndex.open(path)
+        size, archived_size = archive_log(path)
+        self.catalog.record(entry['log_file'])
+        return max(0, size - archived_size)
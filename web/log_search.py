@@ -0,0 +1,360 @@
+"""
+Log Search
+
+Full-text index of run logs in a SQLite FTS5 database (log_search.db,
+next to storage.db), whatever the storage backend.
+
+Logs are indexed in blocks of up to BLOCK_LINES lines; each block
+remembers its first line number and byte offset, so a hit maps back to
+exact lines that open the log viewer at the right place.
+
+Indexing is incremental and off the streaming path:
+- Writers only call notify(log_file), which queues the log
+- A background thread indexes queued logs from where it last stopped
+  (per-log progress is stored in the database, so restarts resume
+  instead of reindexing)
+- A log that shrank was replaced and is reindexed from the start
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from log_archive import log_size, open_log
+
+# Lines per indexed block
+BLOCK_LINES = 50
+
+# Bytes read per step while indexing
+READ_SIZE = 1024 * 1024
+
+# Seconds the indexer waits after a notify, so a burst is indexed once
+INDEX_DELAY = 2.0
+
+# Matching lines returned per log
+MAX_LINES_PER_LOG = 5
+
+# Longest line text returned in a result
+MAX_LINE_CHARS = 300
+
+_TERM_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def parse_query(q: str) -> List[str]:
+    """Split a search string into terms; "quoted text" is one term."""
+    return [m.group(1) or m.group(2) for m in _TERM_PATTERN.finditer(q or '')
+            if (m.group(1) or m.group(2)).strip('"')]
+
+
+def fts_query(terms: List[str]) -> str:
+    """FTS5 MATCH expression requiring every term, each as a phrase."""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class LogSearchIndex:
+    """
+    Incremental FTS5 index of the logs in a directory.
+    """
+
+    def __init__(self, db_path: str, logs_dir: str,
+                 get_entry: Callable[[str], Optional[Dict]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            db_path: SQLite database file
+            logs_dir: Directory holding the logs
+            get_entry: Optional function returning a log's catalog entry
+                (playbook, target, job_id, status, modified)
+        """
+        self.db_path = db_path
+        self.logs_dir = logs_dir
+        self.get_entry = get_entry
+
+        self._local = threading.local()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._index_lock = threading.Lock()
+
+        self.stats = {'logs_indexed': 0, 'bytes_indexed': 0, 'errors': 0}
+        self._initialized = False
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get or create a thread-local connection (creating the schema on first use)."""
+        if not hasattr(self._local, 'conn'):
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._initialized:
+                self._init_db(conn)
+                self._initialized = True
+            self._local.conn = conn
+        return self._local.conn
+
+    @staticmethod
+    def _init_db(conn: sqlite3.Connection):
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS logs (log_file TEXT PRIMARY KEY, playbook TEXT, target TEXT, job_id TEXT, modified REAL, indexed_bytes INTEGER, indexed_lines INTEGER)")
+            conn.execute("CREATE TABLE IF NOT EXISTS log_blocks (id INTEGER PRIMARY KEY AUTOINCREMENT, log_file TEXT, first_line INTEGER, first_offset INTEGER)")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5(content)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_blocks_log ON log_blocks(log_file)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_playbook ON logs(playbook, modified)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_modified ON logs(modified)")
+
+    # =========================================================================
+    # Feeding the index
+    # =========================================================================
+
+    def notify(self, log_file: str):
+        """Queue a log whose content grew (cheap; safe on the streaming path)."""
+        with self._pending_lock:
+            self._pending.add(log_file)
+        self._wakeup.set()
+
+    def start(self, get_entries: Callable[[], Iterable[Dict]] = None):
+        """
+        Start the background indexer (idempotent).
+
+        Args:
+            get_entries: Optional function returning all current catalog
+                entries; the indexer first catches up with them
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, args=(get_entries,),
+                                        name='log-search-indexer', daemon=True)
+        self._thread.start()
+
+    def catch_up(self, entries: Iterable[Dict]):
+        """
+        Queue logs that grew or appeared while nobody was indexing, and
+        drop logs that are gone.
+
+        Args:
+            entries: Catalog entries (log_file, size) of all current logs
+        """
+        conn = self._get_connection()
+        indexed = {r['log_file']: r['indexed_bytes'] for r in conn.execute("SELECT log_file, indexed_bytes FROM logs")}
+        current = set()
+        for entry in entries:
+            current.add(entry['log_file'])
+            if indexed.get(entry['log_file'], -1) != entry['size']:
+                self.notify(entry['log_file'])
+        for log_file in set(indexed) - current:
+            self.remove(log_file)
+
+    def remove(self, log_file: str):
+        """Drop a log from the index."""
+        with self._pending_lock:
+            self._pending.discard(log_file)
+        with self._index_lock:
+            conn = self._get_connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete_rows(conn, log_file)
+                conn.execute("DELETE FROM logs WHERE log_file = ?", (log_file,))
+
+    def run_pending(self) -> int:
+        """
+        Index every queued log now.
+
+        Returns:
+            Number of logs processed
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        for log_file in sorted(pending):
+            try:
+                self.index_log(log_file)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Could not index log {log_file}: {e}")
+                self.stats['errors'] += 1
+        return len(pending)
+
+    def index_log(self, log_file: str) -> int:
+        """
+        Index what was appended to a log since it was last indexed.
+
+        Only complete lines are indexed while the log's run is running.
+
+        Returns:
+            Bytes indexed
+        """
+        path = os.path.join(self.logs_dir, log_file)
+        entry = (self.get_entry(log_file) if self.get_entry else None) or {}
+
+        with self._index_lock:
+            conn = self._get_connection()
+            try:
+                size = log_size(path)
+            except OSError:
+                size = None
+            row = conn.execute("SELECT indexed_bytes, indexed_lines FROM logs WHERE log_file = ?", (log_file,)).fetchone()
+
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if size is None:
+                    self._delete_rows(conn, log_file)
+                    conn.execute("DELETE FROM logs WHERE log_file = ?", (log_file,))
+                    return 0
+
+                offset, line_no = (row['indexed_bytes'], row['indexed_lines']) if row else (0, 0)
+                if size < offset:
+                    # Replaced: start over
+                    self._delete_rows(conn, log_file)
+                    offset, line_no = 0, 0
+
+                start = offset
+                if size > offset:
+                    offset, line_no = self._index_range(conn, log_file, path, offset, line_no,
+                                                        final=entry.get('status') != 'running')
+
+                conn.execute("INSERT OR REPLACE INTO logs (log_file, playbook, target, job_id, modified, indexed_bytes, indexed_lines) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (log_file, entry.get('playbook'), entry.get('target'),
+                              entry.get('job_id') or entry.get('run_id'), entry.get('modified'), offset, line_no))
+
+        self.stats['logs_indexed'] += 1
+        self.stats['bytes_indexed'] += offset - start
+        return offset - start
+
+    def _index_range(self, conn, log_file: str, path: str, offset: int, line_no: int,
+                     final: bool):
+        """Insert blocks for the log from offset on. Returns (offset, line_no) reached."""
+        block, block_line, block_offset = [], line_no, offset
+        pos = offset
+
+        def add(line: bytes, length: int):
+            nonlocal block, block_line, block_offset, pos, line_no
+            if not block:
+                block_line, block_offset = line_no, pos
+            block.append(line)
+            pos += length
+            line_no += 1
+            if len(block) >= BLOCK_LINES:
+                self._insert_block(conn, log_file, block_line, block_offset, block)
+                block = []
+
+        with open_log(path) as f:
+            f.seek(offset)
+            rest = b''
+            for data in iter(lambda: f.read(READ_SIZE), b''):
+                lines = (rest + data).split(b'\n')
+                rest = lines.pop()
+                for line in lines:
+                    add(line, len(line) + 1)
+        if final and rest:
+            # Unterminated last line of a finished log
+            add(rest, len(rest))
+        if block:
+            self._insert_block(conn, log_file, block_line, block_offset, block)
+        return pos, line_no
+
+    @staticmethod
+    def _insert_block(conn, log_file: str, first_line: int, first_offset: int, lines: List[bytes]):
+        cur = conn.execute("INSERT INTO log_blocks (log_file, first_line, first_offset) VALUES (?, ?, ?)",
+                           (log_file, first_line, first_offset))
+        conn.execute("INSERT INTO log_fts (rowid, content) VALUES (?, ?)",
+                     (cur.lastrowid, b'\n'.join(lines).decode('utf-8', errors='replace')))
+
+    @staticmethod
+    def _delete_rows(conn, log_file: str):
+        conn.execute("DELETE FROM log_fts WHERE rowid IN (SELECT id FROM log_blocks WHERE log_file = ?)", (log_file,))
+        conn.execute("DELETE FROM log_blocks WHERE log_file = ?", (log_file,))
+
+    def _run(self, get_entries=None):
+        """Indexer loop."""
+        if get_entries:
+            try:
+                self.catch_up(get_entries())
+            except Exception as e:
+                print(f"Log search catch-up failed: {e}")
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            time.sleep(INDEX_DELAY)
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Log search indexer error: {e}")
+
+    # =========================================================================
+    # Searching
+    # =========================================================================
+
+    def search(self, q: str, playbook: str = None, since: float = None,
+               limit: int = 50) -> List[Dict]:
+        """
+        Find logs containing every term of a query.
+
+        Args:
+            q: Search string (terms ANDed; "quoted text" is a phrase)
+            playbook: Only logs of this playbook
+            since: Only logs modified at or after this time (epoch seconds)
+            limit: Max logs returned
+
+        Returns:
+            List of dicts (log_file, playbook, target, job_id, modified,
+            matches), newest log first; matches are the first matching
+            lines as dicts with line (0-based), offset and text
+        """
+        terms = parse_query(q)
+        if not terms:
+            return []
+
+        sql = ("SELECT b.log_file, b.first_line, b.first_offset, f.content, l.playbook, l.target, l.job_id, l.modified "
+               "FROM log_fts f JOIN log_blocks b ON b.id = f.rowid JOIN logs l ON l.log_file = b.log_file "
+               "WHERE log_fts MATCH ?")
+        params: list = [fts_query(terms)]
+        if playbook:
+            sql += " AND l.playbook = ?"
+            params.append(playbook)
+        if since is not None:
+            sql += " AND l.modified >= ?"
+            params.append(since)
+        sql += " ORDER BY l.modified DESC, b.log_file, b.id"
+
+        needles = [t.lower() for t in terms]
+        results: Dict[str, Dict] = {}
+        for r in self._get_connection().execute(sql, params):
+            result = results.get(r['log_file'])
+            if result is None:
+                if len(results) >= limit:
+                    break
+                result = results[r['log_file']] = {
+                    'log_file': r['log_file'],
+                    'playbook': r['playbook'],
+                    'target': r['target'],
+                    'job_id': r['job_id'],
+                    'modified': r['modified'],
+                    'matches': []
+                }
+            if len(result['matches']) < MAX_LINES_PER_LOG:
+                result['matches'].extend(_matching_lines(r['content'], r['first_line'], r['first_offset'],
+                                                         needles, MAX_LINES_PER_LOG - len(result['matches'])))
+        return list(results.values())
+
+
+def _matching_lines(content: str, first_line: int, first_offset: int,
+                    needles: List[str], limit: int) -> List[Dict]:
+    """Lines of a block containing every needle (else any), up to limit."""
+    lines = content.split('\n')
+    offsets, pos = [], first_offset
+    for line in lines:
+        offsets.append(pos)
+        pos += len(line.encode('utf-8')) + 1
+
+    hits = [i for i, line in enumerate(lines) if all(n in line.lower() for n in needles)]
+    if not hits:
+        hits = [i for i, line in enumerate(lines) if any(n in line.lower() for n in needles)]
+    return [{
+        'line': first_line + i,
+        'offset': offsets[i],
+        'text': lines[i][:MAX_LINE_CHARS]
+    } for i in hits[:limit]]
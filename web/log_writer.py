@@ -0,0 +1,148 @@
+"""
+Group-Commit Log Writer
+
+Buffers playbook output for local runs and commits it to the log file in
+groups, instead of flushing and fsyncing after every line. A group is
+committed when either budget is reached:
+- FLUSH_INTERVAL seconds since the first buffered line
+- FLUSH_BYTES of buffered output
+
+Each commit hands the group's lines to an optional callback, so live
+viewers get one multi-line Socket.IO message per group as well, and
+appends the group's line offsets to the log's sidecar index (log_index).
+
+Durability modes:
+- 'always': flush and fsync every line (previous behaviour)
+- 'batch':  flush and fsync once per group (default)
+- 'none':   flush to the OS once per group, never fsync
+"""
+
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from log_index import LineIndexWriter
+
+DURABILITY_MODES = ('always', 'batch', 'none')
+
+
+class BufferedLogWriter:
+    """
+    Log file writer with time/size-bounded group commits.
+
+    A background timer commits buffered lines when the producer goes quiet
+    (e.g. during a long-running task), so output never waits longer than
+    the flush interval. Use as a context manager or call close().
+    """
+
+    # Max seconds a line stays buffered
+    DEFAULT_FLUSH_INTERVAL = 0.5
+
+    # Buffered bytes that trigger an immediate commit
+    DEFAULT_FLUSH_BYTES = 64 * 1024
+
+    def __init__(self, path: str, durability: str = 'batch',
+                 flush_interval: float = None, flush_bytes: int = None,
+                 on_flush: Optional[Callable[[List[str]], None]] = None):
+        """
+        Open the log file (truncating it) and start the flush timer.
+
+        Args:
+            path: Log file path
+            durability: 'always', 'batch' or 'none'
+            flush_interval: Max seconds between commits
+            flush_bytes: Buffered bytes that force a commit
+            on_flush: Optional callback receiving each committed group's
+                writes (lines or chunks of lines), called after they were
+                written to the file
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Invalid log durability '{durability}', "
+                             f"expected one of: {', '.join(DURABILITY_MODES)}")
+        self.path = path
+        self.durability = durability
+        self.flush_interval = flush_interval or self.DEFAULT_FLUSH_INTERVAL
+        self.flush_bytes = flush_bytes or self.DEFAULT_FLUSH_BYTES
+        self.on_flush = on_flush
+
+        self._file = open(path, 'wb')
+        self._index = LineIndexWriter(path)
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._first_buffered = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self.stats = {
+            'lines': 0,
+            'commits': 0,
+            'fsyncs': 0
+        }
+
+        self._timer = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, line: str):
+        """Buffer output (a line or a chunk of lines), committing the group if a budget is reached."""
+        with self._lock:
+            if not self._buffer:
+                self._first_buffered = time.monotonic()
+            self._buffer.append(line)
+            self._buffered_bytes += len(line.encode('utf-8'))
+            self.stats['lines'] += 1
+            if (self.durability == 'always' or
+                    self._buffered_bytes >= self.flush_bytes or
+                    time.monotonic() - self._first_buffered >= self.flush_interval):
+                self._commit()
+
+    def flush(self):
+        """Commit buffered lines now."""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """Commit remaining lines and close the file."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._timer.join()
+        with self._lock:
+            self._commit()
+            self._file.close()
+            self._index.close()
+
+    def _commit(self):
+        """Write, flush and (per durability) fsync the buffered group. Lock held."""
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        self._buffered_bytes = 0
+
+        data = ''.join(lines).encode('utf-8')
+        self._file.write(data)
+        self._file.flush()
+        self._index.add(data)
+        self.stats['commits'] += 1
+        if self.durability != 'none':
+            os.fsync(self._file.fileno())
+            self.stats['fsyncs'] += 1
+
+        if self.on_flush:
+            try:
+                self.on_flush(lines)
+            except Exception as e:
+                print(f"Warning: Log flush callback failed: {e}")
+
+    def _run(self):
+        """Commit buffered lines once they are older than the flush interval."""
+        while not self._closed.wait(self.flush_interval / 2):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._first_buffered >= self.flush_interval:
+                    self._commit()
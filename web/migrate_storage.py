@@ -219,7 +219,8 @@ def migrate_host_facts(source, target, dry_run=False, force=False):
     Migrate host facts (CMDB data) from source to target.
 
     This includes all collected facts, history, and metadata for each host.
-    Uses import_host_facts() to preserve complete data including history.
+    Uses export_host_facts() and import_host_facts() to preserve complete
+    data including history.
 
     The import_host_facts() method bypasses the normal save_host_facts()
     diff-based history tracking, allowing raw import of the complete
@@ -268,7 +269,7 @@ def migrate_host_facts(source, target, dry_run=False, force=False):
             # - All collections (hardware, software, etc.)
             # - Full history with diffs for each collection
             # - Groups, timestamps, and other metadata
-            host_data = source.get_host_facts(hostname)
+            host_data = source.export_host_facts(hostname)
             if host_data:
                 # Use import_host_facts to write the raw document
                 # This preserves all data exactly as it exists in source
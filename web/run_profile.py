@@ -0,0 +1,144 @@
+"""
+Run Profile
+
+Per-task, per-host durations of playbook runs, written by the task_profile
+callback plugin (callback_plugins/task_profile.py) to the file named by
+RUN_PROFILE_FILE. Each run's profile is stored as one compact record by
+the storage backend; build_report() aggregates the recent runs of a
+playbook into hot spots:
+- tasks: p50/p95/max of per-host durations, ranked by total time spent
+- hosts: slowest hosts by average time per run
+- trend: run duration and slowest task of each run, oldest first
+
+Profile:
+    {"duration": 42.105,
+     "tasks": [{"name": "Gathering Facts", "hosts": {"web01": 2.311}}]}
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from run_results import read_json_file
+
+# Environment variable the callback plugin writes timings to
+PROFILE_ENV = 'RUN_PROFILE_FILE'
+
+# Max tasks kept per run profile
+MAX_TASKS = 2000
+
+# Runs aggregated by a report by default
+REPORT_RUNS = 20
+
+# Hosts listed in a report
+REPORT_HOSTS = 10
+
+
+def read_profile_file(path: str) -> Optional[Dict]:
+    """
+    Read and remove a run's profile file.
+
+    Returns:
+        Normalized profile, or None if the plugin wrote nothing
+    """
+    profile = normalize_profile(read_json_file(path))
+    return profile if profile['tasks'] else None
+
+
+def normalize_profile(data) -> Dict:
+    """
+    Validate a profile received from a worker or the plugin.
+
+    Durations are coerced to non-negative floats; malformed tasks and hosts
+    are dropped and tasks capped at MAX_TASKS.
+    """
+    profile = {'duration': _seconds(data.get('duration')) if isinstance(data, dict) else 0.0,
+               'tasks': []}
+    tasks = data.get('tasks') if isinstance(data, dict) else None
+    if not isinstance(tasks, list):
+        return profile
+    for task in tasks[:MAX_TASKS]:
+        if not isinstance(task, dict) or not isinstance(task.get('hosts'), dict):
+            continue
+        hosts = {str(h): _seconds(s) for h, s in task['hosts'].items()}
+        if hosts:
+            profile['tasks'].append({'name': str(task.get('name') or ''), 'hosts': hosts})
+    return profile
+
+
+def _seconds(value) -> float:
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return round(seconds, 3) if math.isfinite(seconds) and seconds > 0 else 0.0
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linearly interpolated percentile (0-100) of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = math.floor(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return round(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo), 3)
+
+
+def build_report(runs: List[Dict]) -> Dict:
+    """
+    Aggregate run profiles into a hot-spot report.
+
+    Args:
+        runs: Dicts with run_id, finished_at and profile, newest first
+            (as returned by the storage backend's get_run_profiles)
+
+    Returns:
+        Dict with runs (count), tasks, hosts and trend
+    """
+    task_samples = {}   # {task name: [seconds]}
+    host_totals = {}    # {host: [seconds per run]}
+    trend = []
+
+    for run in reversed(runs):
+        profile = run.get('profile') or {}
+        run_hosts = {}
+        slowest = None
+        for task in profile.get('tasks', []):
+            durations = list(task['hosts'].values())
+            task_samples.setdefault(task['name'], []).extend(durations)
+            for host, seconds in task['hosts'].items():
+                run_hosts[host] = run_hosts.get(host, 0.0) + seconds
+            task_max = max(durations)
+            if slowest is None or task_max > slowest[1]:
+                slowest = (task['name'], task_max)
+        for host, seconds in run_hosts.items():
+            host_totals.setdefault(host, []).append(seconds)
+        trend.append({
+            'run_id': run.get('run_id'),
+            'finished_at': run.get('finished_at'),
+            'duration': profile.get('duration', 0.0),
+            'slowest_task': slowest[0] if slowest else None,
+            'slowest_task_seconds': slowest[1] if slowest else None,
+        })
+
+    tasks = []
+    for name, samples in task_samples.items():
+        samples.sort()
+        tasks.append({
+            'name': name,
+            'samples': len(samples),
+            'p50': percentile(samples, 50),
+            'p95': percentile(samples, 95),
+            'max': samples[-1],
+            'total': round(sum(samples), 3),
+        })
+    tasks.sort(key=lambda t: t['total'], reverse=True)
+
+    hosts = [
+        {'host': host, 'runs': len(totals),
+         'avg_seconds': round(sum(totals) / len(totals), 3),
+         'max_seconds': round(max(totals), 3)}
+        for host, totals in host_totals.items()
+    ]
+    hosts.sort(key=lambda h: h['avg_seconds'], reverse=True)
+
+    return {'runs': len(runs), 'tasks': tasks, 'hosts': hosts[:REPORT_HOSTS], 'trend': trend}
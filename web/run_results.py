@@ -0,0 +1,116 @@
+"""
+Run Results
+
+Structured per-host outcomes of playbook runs, written by the run_results
+callback plugin (callback_plugins/run_results.py) to the file named by
+RUN_RESULTS_FILE. The executor creates that file per run, reads it back
+when the run ends and stores the hosts map on the job/run record and in
+the storage backend's indexed host results.
+
+Hosts map:
+    {"web01": {"ok": 5, "changed": 1, "unreachable": 0, "failed": 1,
+               "skipped": 2, "rescued": 0, "ignored": 0,
+               "failed_tasks": ["Install nginx"]}}
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, Optional
+
+# Environment variable the callback plugin writes results to
+RESULTS_ENV = 'RUN_RESULTS_FILE'
+
+# Per-host counters of the PLAY RECAP
+COUNT_FIELDS = ('ok', 'changed', 'unreachable', 'failed', 'skipped', 'rescued', 'ignored')
+
+# Max failed task names kept per host
+MAX_FAILED_TASKS = 20
+
+
+def new_results_file() -> str:
+    """Create an empty results file for one run and return its path."""
+    fd, path = tempfile.mkstemp(prefix='run-results-', suffix='.json')
+    os.close(fd)
+    return path
+
+
+def read_json_file(path: str) -> Optional[Dict]:
+    """
+    Read and remove a JSON file written by a callback plugin.
+
+    Returns:
+        The decoded object, or None if the plugin wrote nothing
+        (run failed before the recap, plugin not enabled)
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return data if isinstance(data, dict) else None
+
+
+def read_results_file(path: str) -> Optional[Dict[str, Dict]]:
+    """
+    Read and remove a run's results file.
+
+    Args:
+        path: File passed to the callback plugin
+
+    Returns:
+        Normalized hosts map, or None if the plugin wrote nothing
+    """
+    data = read_json_file(path)
+    hosts = normalize(data.get('hosts') if data else None)
+    return hosts or None
+
+
+def normalize(hosts) -> Dict[str, Dict]:
+    """
+    Validate a hosts map received from a worker or the plugin.
+
+    Unknown fields are dropped, counters coerced to ints and failed task
+    names capped at MAX_FAILED_TASKS.
+    """
+    if not isinstance(hosts, dict):
+        return {}
+    result = {}
+    for host, counts in hosts.items():
+        if not isinstance(counts, dict):
+            continue
+        entry = {}
+        for field in COUNT_FIELDS:
+            try:
+                entry[field] = max(0, int(counts.get(field) or 0))
+            except (TypeError, ValueError):
+                entry[field] = 0
+        tasks = counts.get('failed_tasks')
+        entry['failed_tasks'] = [str(t) for t in tasks[:MAX_FAILED_TASKS]] if isinstance(tasks, list) else []
+        result[str(host)] = entry
+    return result
+
+
+def host_failed(counts: Dict) -> bool:
+    """Check if a host failed a task or was unreachable."""
+    return bool(counts.get('failed') or counts.get('unreachable'))
+
+
+def summarize(hosts: Dict[str, Dict]) -> Dict:
+    """
+    Totals over a hosts map, for history entries and events.
+
+    Returns:
+        Dict with hosts (count), a total per COUNT_FIELDS and
+        failed_hosts (sorted names of failed/unreachable hosts)
+    """
+    summary = {'hosts': len(hosts)}
+    for field in COUNT_FIELDS:
+        summary[field] = sum(counts.get(field, 0) for counts in hosts.values())
+    summary['failed_hosts'] = sorted(host for host, counts in hosts.items() if host_failed(counts))
+    return summary
@@ -24,6 +24,8 @@ from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.executors.pool import ThreadPoolExecutor
 
+from run_results import summarize
+
 # Maximum history entries to keep
 MAX_HISTORY_ENTRIES = 1000
 
@@ -166,8 +168,8 @@ class ScheduleManager:
 
     def _record_execution(self, schedule_id: str, run_id: str, log_file: str,
                           status: str, started: datetime, finished: datetime = None,
-                          worker_name: str = 'local-executor'):
-        """Record execution in history."""
+                          worker_name: str = 'local-executor', host_results: Dict = None):
+        """Record execution in history, with a recap of its per-host results."""
         duration = None
         if finished and started:
             duration = (finished - started).total_seconds()
@@ -180,7 +182,8 @@ class ScheduleManager:
             'finished': finished.isoformat() if finished else None,
             'duration_seconds': duration,
             'status': status,
-            'worker_name': worker_name
+            'worker_name': worker_name,
+            'recap': summarize(host_results) if host_results else None
         }
 
         if self.storage:
@@ -340,6 +343,7 @@ class ScheduleManager:
         status = 'failed'
         job_id = None
         log_file = None
+        host_results = None
 
         try:
             # Submit job to cluster queue
@@ -368,6 +372,7 @@ class ScheduleManager:
                     exit_code = final_job.get('exit_code')
                     log_file = final_job.get('log_file')
                     worker_id = final_job.get('assigned_worker')
+                    host_results = final_job.get('host_results')
 
                     # Get worker name
                     if self.get_worker_name and worker_id:
@@ -410,7 +415,7 @@ class ScheduleManager:
         # Record in history with worker name
         self._record_execution(schedule_id, job_id or 'cluster-error',
                                log_file or 'cluster-dispatch', status, started, finished,
-                               worker_name=worker_name)
+                               worker_name=worker_name, host_results=host_results)
 
         # Remove from running jobs
         with self.running_jobs_lock:
@@ -470,6 +475,7 @@ class ScheduleManager:
         }, room='status')
 
         status = 'failed'
+        host_results = None
         inventory_path = None
         try:
             # Check if target is a managed host and generate temp inventory if needed
@@ -486,6 +492,7 @@ class ScheduleManager:
                 run_info = self.active_runs.get(run_id)
                 if run_info:
                     status = run_info.get('status', 'completed')
+                    host_results = run_info.get('host_results')
                 else:
                     status = 'completed'
 
@@ -519,7 +526,7 @@ class ScheduleManager:
 
         # Record in history
         self._record_execution(schedule_id, run_id, log_file, status, started, finished,
-                               worker_name='local-executor')
+                               worker_name='local-executor', host_results=host_results)
 
         # Remove from running jobs
         with self.running_jobs_lock:
@@ -18,6 +18,7 @@ from typing import Optional
 
 from .base import StorageBackend
 from .flatfile import FlatFileStorage
+from .cached import CachedStorageBackend
 # Note: MongoDBStorage is imported lazily to avoid requiring pymongo
 # when only using flatfile storage
 
@@ -85,4 +86,4 @@ def get_mongodb_storage_class():
     return MongoDBStorage
 
 
-__all__ = ['get_storage_backend', 'StorageBackend', 'FlatFileStorage', 'get_mongodb_storage_class']
+__all__ = ['get_storage_backend', 'StorageBackend', 'FlatFileStorage', 'CachedStorageBackend', 'get_mongodb_storage_class']
@@ -5,11 +5,25 @@ Defines the interface that all storage backends must implement.
 This ensures consistent behavior whether using flat files or MongoDB.
 """
 
+import base64
+import json
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 
+# Job fields stored as indexed columns and accepted by query_jobs() filters
+JOB_QUERY_FIELDS = ('id', 'status', 'priority', 'playbook', 'target', 'submitted_by',
+                    'assigned_worker', 'exit_code')
+# Fields query_jobs() can sort on (ties broken by job id)
+JOB_SORT_FIELDS = ('submitted_at', 'priority', 'completed_at')
+# History entries kept per host collection (older entries are deleted)
+FACTS_HISTORY_LIMIT = 100
+# Audit entry fields matched exactly by get_audit_log()/query_audit_log() filters
+# (plus start_time/end_time ranges on the timestamp)
+AUDIT_QUERY_FIELDS = ('user', 'action', 'resource', 'success')
+
+
 class StorageBackend(ABC):
     """
     Abstract base class for storage backends.
@@ -198,7 +212,9 @@ class StorageBackend(ABC):
 
     # =========================================================================
     # Host Facts Operations (CMDB/Asset Inventory)
-    # Stores collected data from playbook runs per host
+    # Stores collected data from playbook runs per host. Only the current
+    # data lives in the host document; history is kept separately, one
+    # entry per change, and read with get_host_history().
     # =========================================================================
 
     @abstractmethod
@@ -215,7 +231,7 @@ class StorageBackend(ABC):
                 "host": "192.168.1.50",
                 "groups": ["webservers"],
                 "collections": {
-                    "hardware": {"current": {...}, "last_updated": "...", "history": [...]},
+                    "hardware": {"current": {...}, "last_updated": "...", "source": "..."},
                     "software": {...}
                 },
                 "first_seen": "...",
@@ -240,7 +256,7 @@ class StorageBackend(ABC):
             Structure: {
                 "current": {...collected data...},
                 "last_updated": "...",
-                "history": [...] (if include_history=True)
+                "history": [...] (newest first, if include_history=True)
             }
         """
         pass
@@ -268,6 +284,24 @@ class StorageBackend(ABC):
         """
         pass
 
+    @abstractmethod
+    def save_host_facts_bulk(self, facts: List[Dict], source: str = None) -> List[Dict]:
+        """
+        Save collected facts for many hosts at once, e.g. a whole run's
+        facts from the CMDB callback or shipped by a worker. Each host is
+        read once and all diffs are computed in a single pass; the batch
+        is written in one transaction (SQLite) or bulk write (MongoDB).
+
+        Args:
+            facts: List of dicts with host, collection, data and
+                optionally groups (as for save_host_facts)
+            source: Source of data ('job', 'callback', ...)
+
+        Returns:
+            List of save results (as from save_host_facts), in input order
+        """
+        pass
+
     @abstractmethod
     def get_all_hosts(self) -> List[Dict]:
         """
@@ -308,7 +342,8 @@ class StorageBackend(ABC):
             limit: Max history entries to return
 
         Returns:
-            List of historical snapshots with diffs
+            List of historical snapshots with diffs, newest first:
+            [{"timestamp": "...", "source": "...", "diff_from_next": {...}}]
         """
         pass
 
@@ -326,6 +361,20 @@ class StorageBackend(ABC):
         """
         pass
 
+    @abstractmethod
+    def export_host_facts(self, host: str) -> Optional[Dict]:
+        """
+        Get a complete host facts document for backup or migration.
+
+        Args:
+            host: Hostname or IP address
+
+        Returns:
+            Host facts document with each collection's history embedded
+            (the format accepted by import_host_facts), or None if not found
+        """
+        pass
+
     @abstractmethod
     def import_host_facts(self, host_data: Dict) -> bool:
         """
@@ -333,6 +382,7 @@ class StorageBackend(ABC):
 
         This method imports raw host data including history without
         applying diff-based processing. Used by migration scripts.
+        Embedded history replaces the host's stored history.
 
         Args:
             host_data: Complete host document with structure:
@@ -580,6 +630,50 @@ class StorageBackend(ABC):
         """
         pass
 
+    @abstractmethod
+    def query_jobs(self, filters: Dict = None, sort_by: str = 'submitted_at',
+                   descending: bool = True, limit: int = 100, cursor: str = None,
+                   offset: int = 0) -> Dict:
+        """
+        Get one page of jobs using indexed filters and keyset pagination.
+
+        Unlike get_all_jobs(), only the requested page is loaded, so listing
+        stays fast with a large job history.
+
+        Args:
+            filters: Optional dict of filters. Keys from JOB_QUERY_FIELDS match
+                exactly (a list value matches any of its items); 'submitted_after',
+                'submitted_before', 'completed_after' and 'completed_before'
+                take ISO timestamps.
+            sort_by: One of JOB_SORT_FIELDS; jobs without a value for it
+                (e.g. unfinished jobs by completed_at) come last, by id
+            descending: Sort direction
+            limit: Maximum number of jobs to return
+            cursor: Opaque next_cursor from a previous page; continues after it
+            offset: Jobs to skip when no cursor is given
+
+        Returns:
+            Dict with:
+            - jobs: List of job dicts for this page
+            - total: Number of jobs matching the filters (first page only,
+              None when a cursor is given)
+            - next_cursor: Cursor for the following page, or None on the last page
+
+        Raises:
+            ValueError: On an unknown filter, sort field or malformed cursor
+        """
+        pass
+
+    @abstractmethod
+    def get_job_counts(self) -> Dict[str, int]:
+        """
+        Count jobs grouped by status.
+
+        Returns:
+            Dict mapping status to number of jobs
+        """
+        pass
+
     @abstractmethod
     def get_job(self, job_id: str) -> Optional[Dict]:
         """
@@ -663,6 +757,74 @@ class StorageBackend(ABC):
         """
         pass
 
+    @abstractmethod
+    def rank_queued_jobs(self, policy: Dict, worker_tags: List[str] = None,
+                         limit: int = None, now: str = None) -> List[str]:
+        """
+        Rank queued jobs in dispatch order inside the database.
+
+        A job's effective priority is its priority (policy['default_priority']
+        when unset) plus policy['aging_per_minute'] points per minute queued,
+        capped at policy['max_aging']. Each submitter's jobs are ranked by
+        effective priority; the n-th (counting the submitter's assigned and
+        running jobs) loses n * policy['fair_share_step'] / weight points,
+        where weight is policy['weights'] for the submitter's class
+        ('scheduler' for scheduler:*, 'batch' for batch:*, otherwise 'user').
+        This is the order JobRouter.order_pending_jobs() computes, without
+        loading the queue.
+
+        Args:
+            policy: Dispatch policy (see JobRouter.dispatch_policy)
+            worker_tags: Only return jobs whose required_tags are all in
+                these (None: any job); jobs are still ranked among the
+                whole queue
+            limit: Maximum number of job IDs to return
+            now: Reference time for aging, ISO format (defaults to now)
+
+        Returns:
+            List of job IDs, first to dispatch first
+        """
+        pass
+
+    @abstractmethod
+    def claim_jobs(self, worker_id: str, worker_tags: List[str], slots: int = 1,
+                   job_ids: List[str] = None) -> List[Dict]:
+        """
+        Atomically claim queued jobs for a worker.
+
+        Picks the highest-priority queued jobs whose required_tags are all
+        present in worker_tags and marks them 'assigned' to worker_id in a
+        single atomic operation, so concurrent routers (or a worker pulling
+        work) can never assign the same job twice.
+
+        Args:
+            worker_id: ID of the worker receiving the jobs
+            worker_tags: Tags the worker advertises
+            slots: Maximum number of jobs to claim
+            job_ids: Optional list restricting the claim to these job IDs
+
+        Returns:
+            List of claimed job dicts (already updated), highest priority
+            first. Empty if no eligible queued job was available.
+        """
+        pass
+
+    @abstractmethod
+    def assign_jobs(self, assignments: Dict[str, str]) -> List[str]:
+        """
+        Assign many queued jobs to workers in one commit.
+
+        Used by the router's batch routing pass. Jobs that are no longer
+        queued (claimed or cancelled concurrently) are skipped.
+
+        Args:
+            assignments: Dict mapping job_id to worker_id
+
+        Returns:
+            List of job IDs that were assigned
+        """
+        pass
+
     @abstractmethod
     def get_worker_jobs(self, worker_id: str, statuses: List[str] = None) -> List[Dict]:
         """
@@ -694,6 +856,94 @@ class StorageBackend(ABC):
         """
         pass
 
+    # =========================================================================
+    # Host Results Operations
+    # =========================================================================
+
+    @abstractmethod
+    def save_host_results(self, run_id: str, playbook: str, finished_at: str,
+                          hosts: Dict[str, Dict]) -> bool:
+        """
+        Store the per-host results of a run (see run_results).
+
+        Saving the same run again replaces its results.
+
+        Args:
+            run_id: Job ID (cluster) or run ID (local)
+            playbook: Playbook name
+            finished_at: ISO timestamp the run finished
+            hosts: Dict mapping host to its counts (ok, changed, unreachable,
+                failed, skipped, rescued, ignored) and failed_tasks
+
+        Returns:
+            True if successful
+        """
+        pass
+
+    @abstractmethod
+    def get_host_results(self, run_id: str) -> Dict[str, Dict]:
+        """
+        Get the per-host results of a run.
+
+        Args:
+            run_id: Job ID or run ID
+
+        Returns:
+            Hosts map as passed to save_host_results (empty if none)
+        """
+        pass
+
+    @abstractmethod
+    def get_failing_hosts(self, since: str, playbook: str = None, limit: int = 20) -> List[Dict]:
+        """
+        Hosts that failed most often, from the indexed host results.
+
+        A run counts as failed for a host if a task failed or the host
+        was unreachable.
+
+        Args:
+            since: ISO timestamp; only runs finished at or after it count
+            playbook: Optional playbook to restrict to
+            limit: Maximum number of hosts
+
+        Returns:
+            List of dicts with host, runs, failed_runs, unreachable_runs and
+            last_failed, for hosts with at least one failed run, most
+            failed runs first
+        """
+        pass
+
+    @abstractmethod
+    def save_run_profile(self, run_id: str, playbook: str, finished_at: str,
+                         profile: Dict) -> bool:
+        """
+        Store the task timings of a run (see run_profile) as one record.
+
+        Args:
+            run_id: Job ID (cluster) or run ID (local)
+            playbook: Playbook name
+            finished_at: ISO timestamp the run finished
+            profile: Dict with duration and tasks ([{name, hosts: {host: seconds}}])
+
+        Returns:
+            True if successful
+        """
+        pass
+
+    @abstractmethod
+    def get_run_profiles(self, playbook: str, limit: int = 20) -> List[Dict]:
+        """
+        Get the most recent run profiles of a playbook.
+
+        Args:
+            playbook: Playbook name
+            limit: Maximum number of runs
+
+        Returns:
+            List of dicts with run_id, finished_at and profile, newest first
+        """
+        pass
+
     # =========================================================================
     # User Operations (Authentication)
     # =========================================================================
@@ -1036,6 +1286,20 @@ class StorageBackend(ABC):
         """
         pass
 
+    @abstractmethod
+    def add_audit_entries(self, entries: List[Dict]) -> bool:
+        """
+        Add a batch of audit log entries in one write (one transaction
+        where the backend has them), in the given order.
+
+        Args:
+            entries: Audit entry dicts (as for add_audit_entry)
+
+        Returns:
+            True if all entries were written
+        """
+        pass
+
     @abstractmethod
     def get_audit_log(self, filters: Dict = None, limit: int = 100, offset: int = 0) -> List[Dict]:
         """
@@ -1057,6 +1321,34 @@ class StorageBackend(ABC):
         """
         pass
 
+    @abstractmethod
+    def query_audit_log(self, filters: Dict = None, limit: int = 100,
+                        cursor: str = None, offset: int = 0) -> Dict:
+        """
+        Get one page of audit log entries, newest first, using keyset
+        pagination on (timestamp, id).
+
+        Each page seeks into an index instead of skipping the entries
+        before it, so deep pages are as fast as the first.
+
+        Args:
+            filters: Optional filters (as for get_audit_log)
+            limit: Maximum number of entries to return
+            cursor: Opaque next_cursor from a previous page; continues after it
+            offset: Entries to skip when no cursor is given
+
+        Returns:
+            Dict with:
+            - entries: List of audit log entries for this page
+            - total: Number of entries matching the filters, counted only
+              for the first page (None when a cursor is given)
+            - next_cursor: Cursor for the following page, or None on the last page
+
+        Raises:
+            ValueError: On an unknown filter or malformed cursor
+        """
+        pass
+
     @abstractmethod
     def cleanup_audit_log(self, max_age_days: int = 90, keep_count: int = 10000) -> int:
         """
@@ -1096,6 +1388,46 @@ class StorageBackend(ABC):
         pass
 
 
+# =============================================================================
+# Utility Functions for Keyset Pagination
+# =============================================================================
+
+def encode_cursor(sort_value: Any, record_id: Any) -> str:
+    """
+    Encode the sort key of the last record on a page as an opaque cursor.
+
+    Args:
+        sort_value: Value of the sort field for the last record
+        record_id: Unique ID of the last record (tie breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([sort_value, record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        Tuple of (sort_value, record_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, record_id = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return sort_value, record_id
+
+
 # =============================================================================
 # Utility Functions for Diff-Based History
 # =============================================================================
@@ -0,0 +1,243 @@
+"""
+Cached Storage Backend
+
+Read-through cache in front of any StorageBackend for the lookups that
+every authenticated API request repeats:
+- workers:    get_worker (worker_auth_required)
+- api_tokens: get_api_token_by_hash (authenticate_api_token)
+- users:      get_user, get_user_by_id (get_current_user, token auth)
+- roles:      get_all_roles (resolve_user_permissions)
+
+Each entity has its own TTL and LRU size. Writes made through the wrapper
+invalidate the affected entries at once (API token updates refresh their
+entry instead), so this process never reads its own stale data; the TTL
+bounds how long writes by other processes or app instances go unseen.
+Values are copied in and out of the cache, so callers may modify them.
+
+Every other method and attribute is passed through to the wrapped backend.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .base import StorageBackend
+
+
+class _EntityCache:
+    """TTL/LRU cache of one entity type, with hit/miss counters."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Any, tuple]' = OrderedDict()  # key -> (expires, value)
+        self.generation = 0  # bumped on every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+
+class CachedStorageBackend:
+    """
+    Caching wrapper usable with either storage backend.
+
+    Usage:
+        storage = CachedStorageBackend(get_storage_backend())
+    """
+
+    # Seconds an entry is trusted, per entity
+    TTL = {'workers': 10, 'api_tokens': 60, 'users': 30, 'roles': 60}
+
+    # Entries kept per entity (least recently used are dropped)
+    MAX_ENTRIES = {'workers': 1024, 'api_tokens': 1024, 'users': 1024, 'roles': 1}
+
+    def __init__(self, backend: StorageBackend, ttl: Dict[str, float] = None,
+                 max_entries: Dict[str, int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Storage backend to wrap
+            ttl: Per-entity TTL overrides in seconds (0 disables an entity)
+            max_entries: Per-entity size overrides
+        """
+        self.backend = backend
+        ttl = {**self.TTL, **(ttl or {})}
+        max_entries = {**self.MAX_ENTRIES, **(max_entries or {})}
+        self._caches = {name: _EntityCache(ttl[name], max_entries[name]) for name in self.TTL}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined here: everything uncached
+        if name == 'backend':
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    # =========================================================================
+    # Cache Operations
+    # =========================================================================
+
+    def _get(self, entity: str, key, load: Callable[[], Any]):
+        cache = self._caches[entity]
+        now = time.monotonic()
+        with self._lock:
+            entry = cache.entries.get(key)
+            if entry and entry[0] > now:
+                cache.entries.move_to_end(key)
+                cache.hits += 1
+                return copy.deepcopy(entry[1])
+            cache.misses += 1
+            generation = cache.generation
+
+        value = load()
+        # Only successful lookups are cached, and only if nothing was
+        # invalidated while loading (the value may predate that write)
+        if value is not None and cache.ttl > 0:
+            self._put(entity, key, value, generation)
+        return value
+
+    def _put(self, entity: str, key, value, generation: int = None):
+        cache = self._caches[entity]
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and generation != cache.generation:
+                return
+            cache.entries[key] = (time.monotonic() + cache.ttl, value)
+            cache.entries.move_to_end(key)
+            while len(cache.entries) > cache.max_entries:
+                cache.entries.popitem(last=False)
+
+    def _invalidate(self, entity: str, key=None, match: Callable[[Any], bool] = None):
+        """Drop one key, the entries whose value matches, or (neither given) all entries."""
+        cache = self._caches[entity]
+        with self._lock:
+            cache.generation += 1
+            cache.invalidations += 1
+            if match is not None:
+                for k in [k for k, (_, v) in cache.entries.items() if match(v)]:
+                    del cache.entries[k]
+            elif key is not None:
+                cache.entries.pop(key, None)
+            else:
+                cache.entries.clear()
+
+    def clear_cache(self):
+        """Drop all cached entries (e.g. after data was restored behind the cache)."""
+        for entity in self._caches:
+            self._invalidate(entity)
+
+    def get_cache_stats(self) -> Dict[str, Dict]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict of entity -> {hits, misses, invalidations, size, ttl}
+        """
+        with self._lock:
+            return {
+                name: {'hits': c.hits, 'misses': c.misses, 'invalidations': c.invalidations,
+                       'size': len(c.entries), 'ttl': c.ttl}
+                for name, c in self._caches.items()
+            }
+
+    # =========================================================================
+    # Worker Operations
+    # =========================================================================
+
+    def get_worker(self, worker_id: str) -> Optional[Dict]:
+        return self._get('workers', worker_id, lambda: self.backend.get_worker(worker_id))
+
+    def save_worker(self, worker: Dict) -> bool:
+        try:
+            return self.backend.save_worker(worker)
+        finally:
+            self._invalidate('workers', worker.get('id'))
+
+    def delete_worker(self, worker_id: str) -> bool:
+        try:
+            return self.backend.delete_worker(worker_id)
+        finally:
+            self._invalidate('workers', worker_id)
+
+    def update_worker_checkin(self, worker_id: str, checkin_data: Dict) -> bool:
+        try:
+            return self.backend.update_worker_checkin(worker_id, checkin_data)
+        finally:
+            self._invalidate('workers', worker_id)
+
+    # =========================================================================
+    # User Operations
+    # =========================================================================
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        return self._get('users', ('username', username), lambda: self.backend.get_user(username))
+
+    def get_user_by_id(self, user_id: str) -> Optional[Dict]:
+        return self._get('users', ('id', user_id), lambda: self.backend.get_user_by_id(user_id))
+
+    def save_user(self, username: str, user: Dict) -> bool:
+        # Users are cached by name and by id: drop them all
+        try:
+            return self.backend.save_user(username, user)
+        finally:
+            self._invalidate('users')
+
+    def delete_user(self, username: str) -> bool:
+        try:
+            return self.backend.delete_user(username)
+        finally:
+            self._invalidate('users')
+
+    # =========================================================================
+    # Role Operations
+    # =========================================================================
+
+    def get_all_roles(self) -> List[Dict]:
+        return self._get('roles', 'all', self.backend.get_all_roles)
+
+    def save_role(self, role_name: str, role: Dict) -> bool:
+        try:
+            return self.backend.save_role(role_name, role)
+        finally:
+            self._invalidate('roles')
+
+    def delete_role(self, role_name: str) -> bool:
+        try:
+            return self.backend.delete_role(role_name)
+        finally:
+            self._invalidate('roles')
+
+    # =========================================================================
+    # API Token Operations
+    # =========================================================================
+
+    def get_api_token_by_hash(self, token_hash: str) -> Optional[Dict]:
+        return self._get('api_tokens', token_hash, lambda: self.backend.get_api_token_by_hash(token_hash))
+
+    def save_api_token(self, token_id: str, token: Dict) -> bool:
+        return self._write_api_token(self.backend.save_api_token, token_id, token)
+
+    def update_api_token(self, token_id: str, token: Dict) -> bool:
+        return self._write_api_token(self.backend.update_api_token, token_id, token)
+
+    def _write_api_token(self, write: Callable, token_id: str, token: Dict) -> bool:
+        # Cached by hash: drop the token's entries, then cache what was written
+        try:
+            saved = write(token_id, token)
+        finally:
+            self._invalidate('api_tokens', match=lambda t: t.get('id') == token_id)
+        if saved and token.get('token_hash'):
+            self._put('api_tokens', token['token_hash'], {**token, 'id': token_id})
+        return saved
+
+    def delete_api_token(self, token_id: str) -> bool:
+        try:
+            return self.backend.delete_api_token(token_id)
+        finally:
+            self._invalidate('api_tokens', match=lambda t: t.get('id') == token_id)
+
+
+# Code checking isinstance(storage, StorageBackend) accepts the wrapper
+StorageBackend.register(CachedStorageBackend)
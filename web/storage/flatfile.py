@@ -17,11 +17,14 @@ import threading
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any, Callable
-from .base import StorageBackend, compute_diff, is_empty_diff
+from .base import StorageBackend, compute_diff, is_empty_diff, encode_cursor, decode_cursor, JOB_QUERY_FIELDS, JOB_SORT_FIELDS, FACTS_HISTORY_LIMIT, AUDIT_QUERY_FIELDS
 
 logger = logging.getLogger(__name__)
 
 class FlatFileStorage(StorageBackend):
+    # History entries kept per host collection
+    history_limit = FACTS_HISTORY_LIMIT
+
     def __init__(self, config_dir: str = '/app/config'):
         self.config_dir = config_dir
         self.db_path = os.path.join(config_dir, 'storage.db')
@@ -44,25 +47,73 @@ class FlatFileStorage(StorageBackend):
     def _init_db(self):
         conn = self._get_connection()
         with conn:
+            migrate_history = not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'host_facts_history'").fetchone()
             # Table Schema with proper COLLATE NOCASE for indexing
             conn.execute("CREATE TABLE IF NOT EXISTS inventory (id TEXT PRIMARY KEY, hostname TEXT UNIQUE COLLATE NOCASE, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS host_facts (host TEXT PRIMARY KEY COLLATE NOCASE, last_updated TEXT, groups TEXT, data TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS host_facts_history (id INTEGER PRIMARY KEY AUTOINCREMENT, host TEXT COLLATE NOCASE, collection TEXT, timestamp TEXT, source TEXT, diff TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS schedules (id TEXT PRIMARY KEY, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, schedule_id TEXT, timestamp TEXT, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS batch_jobs (id TEXT PRIMARY KEY, status TEXT, created TEXT, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, status TEXT, data TEXT)")
-            conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, submitted_at TEXT, assigned_worker TEXT, data TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, submitted_at TEXT, assigned_worker TEXT, priority INTEGER, playbook TEXT, target TEXT, submitted_by TEXT, completed_at TEXT, exit_code INTEGER, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY COLLATE NOCASE, id TEXT UNIQUE, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS groups (name TEXT PRIMARY KEY COLLATE NOCASE, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS roles (name TEXT PRIMARY KEY COLLATE NOCASE, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS api_tokens (id TEXT PRIMARY KEY, token_hash TEXT UNIQUE, user_id TEXT, data TEXT)")
             conn.execute("CREATE TABLE IF NOT EXISTS audit_log (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, user TEXT, action TEXT, resource TEXT, success INTEGER, data TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS host_results (run_id TEXT, host TEXT COLLATE NOCASE, playbook TEXT, finished_at TEXT, failed INTEGER, unreachable INTEGER, data TEXT, PRIMARY KEY (run_id, host))")
+            conn.execute("CREATE TABLE IF NOT EXISTS run_profiles (run_id TEXT PRIMARY KEY, playbook TEXT, finished_at TEXT, data TEXT)")
             
             # Indexes for performance
             conn.execute("CREATE INDEX IF NOT EXISTS idx_inv_hostname ON inventory(hostname)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_updated ON host_facts(last_updated)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_history ON host_facts_history(host, collection, timestamp)")
+            if migrate_history: self._migrate_facts_history(conn)
             conn.execute("CREATE INDEX IF NOT EXISTS idx_hist_sid ON history(schedule_id)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_filter ON audit_log(user, action, resource, timestamp)")
+            # Audit pages seek on (timestamp, id) within each filter's index (id is the rowid, implicitly last)
+            conn.execute("DROP INDEX IF EXISTS idx_audit_filter")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_time ON audit_log(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_user_action ON audit_log(user, action, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_resource ON audit_log(resource, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_resource_action ON audit_log(resource, action, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_success ON audit_log(success, timestamp)")
+            self._migrate_job_columns(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, priority DESC, submitted_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_submitted ON jobs(submitted_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_submitted ON jobs(status, submitted_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs(submitted_by, submitted_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_playbook ON jobs(playbook, submitted_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_worker ON jobs(assigned_worker, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_completed ON jobs(completed_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_host_results_finished ON host_results(finished_at, host)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_host_results_host ON host_results(host, finished_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_run_profiles_playbook ON run_profiles(playbook, finished_at)")
+
+    def _migrate_facts_history(self, conn):
+        # Databases from before host_facts_history kept each collection's history inside the host blob: move it out
+        for r in conn.execute("SELECT host FROM host_facts").fetchall():
+            hd = json.loads(conn.execute("SELECT data FROM host_facts WHERE host = ?", (r['host'],)).fetchone()['data'])
+            rows = self._pop_history(hd)
+            self._insert_history(conn, hd['host'], rows)
+            conn.execute("UPDATE host_facts SET data = ? WHERE host = ?", (json.dumps(hd), r['host']))
+
+    def _migrate_job_columns(self, conn):
+        # Databases created before jobs had indexed columns: add them and backfill from the JSON blob
+        have = {r['name'] for r in conn.execute("PRAGMA table_info(jobs)")}
+        missing = [c for c in ('priority INTEGER', 'playbook TEXT', 'target TEXT', 'submitted_by TEXT', 'completed_at TEXT', 'exit_code INTEGER') if c.split()[0] not in have]
+        if not missing: return
+        for c in missing: conn.execute(f"ALTER TABLE jobs ADD COLUMN {c}")
+        rows = [json.loads(r['data']) for r in conn.execute("SELECT data FROM jobs")]
+        conn.executemany("UPDATE jobs SET status = ?, submitted_at = ?, assigned_worker = ?, priority = ?, playbook = ?, target = ?, submitted_by = ?, completed_at = ?, exit_code = ? WHERE id = ?", [self._job_columns(j)[1:-1] + (j['id'],) for j in rows])
+
+    @staticmethod
+    def _job_columns(j: Dict) -> tuple:
+        # Row values in column order: id, indexed fields, data
+        return (j['id'], j.get('status'), j.get('submitted_at'), j.get('assigned_worker'), j.get('priority'), j.get('playbook'), j.get('target'),
+                j.get('submitted_by'), j.get('completed_at'), j.get('exit_code'), json.dumps(j))
 
     def _migrate_json_data(self, config_dir):
         flag = os.path.join(config_dir, '.sqlite_migrated')
@@ -84,7 +135,9 @@ class FlatFileStorage(StorageBackend):
                 facts = load('host_facts.json', 'hosts')
                 if facts:
                     for h, d in facts.items():
-                        conn.execute("INSERT OR IGNORE INTO host_facts (host, last_updated, groups, data) VALUES (?, ?, ?, ?)", (h, d.get('last_updated'), json.dumps(d.get('groups', [])), json.dumps(d)))
+                        rows = self._pop_history(d)
+                        if conn.execute("INSERT OR IGNORE INTO host_facts (host, last_updated, groups, data) VALUES (?, ?, ?, ?)", (h, d.get('last_updated'), json.dumps(d.get('groups', [])), json.dumps(d))).rowcount:
+                            self._insert_history(conn, h, rows)
                 sc = load('schedules.json', 'schedules')
                 if sc:
                     for sid, sd in sc.items(): conn.execute("INSERT OR IGNORE INTO schedules (id, data) VALUES (?, ?)", (sid, json.dumps(sd)))
@@ -176,35 +229,55 @@ class FlatFileStorage(StorageBackend):
         if not hd: return None
         c = hd.get('collections', {}).get(coll)
         if not c: return None
-        return c if inc_hist else {'current': c.get('current'), 'last_updated': c.get('last_updated')}
+        return {**c, 'history': self.get_host_history(host, coll, self.history_limit)} if inc_hist else {'current': c.get('current'), 'last_updated': c.get('last_updated')}
     def save_host_facts(self, host: str, collection: str, data: Dict, groups: List[str] = None, source: str = None) -> Dict:
+        return self.save_host_facts_bulk([{'host': host, 'collection': collection, 'data': data, 'groups': groups}], source)[0]
+    def save_host_facts_bulk(self, facts: List[Dict], source: str = None) -> List[Dict]:
+        # One transaction: read every host of the batch at once, diff in memory, then write each changed host once
         now = datetime.now(timezone.utc).isoformat()
         conn = self._get_connection()
         with conn:
             conn.execute("BEGIN IMMEDIATE")
-            row = conn.execute("SELECT data FROM host_facts WHERE host = ?", (host,)).fetchone()
-            if not row:
-                hd = {'host': host, 'groups': groups or [], 'collections': {}, 'first_seen': now, 'last_updated': now}
-                status, changes, actual_host = 'created', None, host
-            else:
-                hd = json.loads(row['data']); actual_host = hd['host']
-                if groups: hd['groups'] = list(set(hd.get('groups', [])) | set(groups))
-                status = 'updated'
-            
-            coll = hd['collections'].get(collection)
-            if not coll:
-                hd['collections'][collection] = {'current': data, 'last_updated': now, 'source': source, 'history': []}
-                changes = None
-            else:
-                diff = compute_diff(coll.get('current', {}), data)
-                if is_empty_diff(diff): return {'status': 'unchanged', 'host': actual_host, 'collection': collection}
-                coll.setdefault('history', []).insert(0, {'timestamp': coll.get('last_updated', now), 'source': coll.get('source'), 'diff_from_next': diff})
-                coll['history'] = coll['history'][:100]
-                coll.update({'current': data, 'last_updated': now, 'source': source})
-                changes = diff
-            hd['last_updated'] = now
-            conn.execute("INSERT OR REPLACE INTO host_facts (host, last_updated, groups, data) VALUES (?, ?, ?, ?)", (actual_host, now, json.dumps(hd['groups']), json.dumps(hd)))
-            return {'status': status, 'host': actual_host, 'collection': collection, 'changes': changes}
+            docs, names = {}, list({f['host'] for f in facts})
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                for r in conn.execute(f"SELECT data FROM host_facts WHERE host IN ({','.join('?' * len(chunk))})", chunk):
+                    hd = json.loads(r['data']); docs[hd['host'].lower()] = hd
+            changed, history, results = {}, [], []
+            for f in facts:
+                collection, data, groups = f['collection'], f['data'], f.get('groups')
+                hd = docs.get(f['host'].lower())
+                if not hd:
+                    hd = docs[f['host'].lower()] = {'host': f['host'], 'groups': groups or [], 'collections': {}, 'first_seen': now, 'last_updated': now}
+                    status = 'created'
+                else:
+                    if groups: hd['groups'] = list(set(hd.get('groups', [])) | set(groups))
+                    status = 'updated'
+                coll, changes = hd['collections'].get(collection), None
+                if coll:
+                    changes = compute_diff(coll.get('current', {}), data)
+                    if is_empty_diff(changes): results.append({'status': 'unchanged', 'host': hd['host'], 'collection': collection}); continue
+                    history.append((hd['host'], collection, coll.get('last_updated', now), coll.get('source'), json.dumps(changes)))
+                hd['collections'].setdefault(collection, {}).update({'current': data, 'last_updated': now, 'source': source})
+                hd['last_updated'] = now
+                changed[hd['host'].lower()] = hd
+                results.append({'status': status, 'host': hd['host'], 'collection': collection, 'changes': changes})
+            conn.executemany("INSERT OR REPLACE INTO host_facts (host, last_updated, groups, data) VALUES (?, ?, ?, ?)", [(hd['host'], now, json.dumps(hd.get('groups', [])), json.dumps(hd)) for hd in changed.values()])
+            if history:
+                conn.executemany("INSERT INTO host_facts_history (host, collection, timestamp, source, diff) VALUES (?, ?, ?, ?, ?)", history)
+                # Keep the newest history_limit entries: one range delete per collection on idx_facts_history
+                conn.executemany("DELETE FROM host_facts_history WHERE host = ? AND collection = ? AND timestamp <= (SELECT timestamp FROM host_facts_history WHERE host = ? AND collection = ? ORDER BY timestamp DESC LIMIT 1 OFFSET ?)",
+                                 [(h, c, h, c, self.history_limit) for h, c in {(r[0], r[1]) for r in history}])
+            return results
+    def _pop_history(self, hd: Dict) -> List[tuple]:
+        # Remove history embedded in a host blob (backups, older databases): (collection, timestamp, source, diff) rows, oldest first
+        rows = []
+        for name, c in hd.get('collections', {}).items():
+            for e in reversed((c.pop('history', None) or [])[:self.history_limit]):
+                rows.append((name, e.get('timestamp'), e.get('source'), json.dumps(e.get('diff_from_next'))))
+        return rows
+    def _insert_history(self, conn, host: str, rows: List[tuple]):
+        conn.executemany("INSERT INTO host_facts_history (host, collection, timestamp, source, diff) VALUES (?, ?, ?, ?, ?)", [(host,) + r for r in rows])
 
     def get_all_hosts(self) -> List[Dict]:
         cursor = self._get_connection().execute("SELECT host, groups, last_updated, data FROM host_facts ORDER BY last_updated DESC")
@@ -212,20 +285,32 @@ class FlatFileStorage(StorageBackend):
     def get_hosts_by_group(self, group: str) -> List[Dict]:
         return [h for h in self.get_all_hosts() if group in h['groups']]
     def get_host_history(self, host: str, coll: str, limit: int = 50) -> List:
-        hd = self.get_host_facts(host)
-        return hd.get('collections', {}).get(coll, {}).get('history', [])[:limit] if hd else []
+        cursor = self._get_connection().execute("SELECT timestamp, source, diff FROM host_facts_history WHERE host = ? AND collection = ? ORDER BY timestamp DESC, id DESC LIMIT ?", (host, coll, limit))
+        return [{'timestamp': r['timestamp'], 'source': r['source'], 'diff_from_next': json.loads(r['diff'])} for r in cursor]
     def delete_host_facts(self, host: str, coll: str = None) -> bool:
         with self._get_connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
-            if not coll: conn.execute("DELETE FROM host_facts WHERE host = ?", (host,)); return True
+            if not coll:
+                conn.execute("DELETE FROM host_facts_history WHERE host = ?", (host,))
+                conn.execute("DELETE FROM host_facts WHERE host = ?", (host,)); return True
             hd = self.get_host_facts(host)
             if hd and coll in hd.get('collections', {}):
                 del hd['collections'][coll]
+                conn.execute("DELETE FROM host_facts_history WHERE host = ? AND collection = ?", (host, coll))
                 conn.execute("UPDATE host_facts SET data = ? WHERE host = ?", (json.dumps(hd), hd['host'])); return True
             return False
+    def export_host_facts(self, host: str) -> Optional[Dict]:
+        hd = self.get_host_facts(host)
+        if not hd: return None
+        for name, c in hd.get('collections', {}).items(): c['history'] = self.get_host_history(host, name, self.history_limit)
+        return hd
     def import_host_facts(self, hd: Dict) -> bool:
+        hd = {**hd, 'collections': {n: dict(c) for n, c in hd.get('collections', {}).items()}}
+        rows = self._pop_history(hd)
         with self._get_connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM host_facts_history WHERE host = ?", (hd['host'],))
+            self._insert_history(conn, hd['host'], rows)
             conn.execute("INSERT OR REPLACE INTO host_facts (host, last_updated, groups, data) VALUES (?, ?, ?, ?)", (hd['host'], hd.get('last_updated'), json.dumps(hd.get('groups', [])), json.dumps(hd))); return True
 
     def get_all_batch_jobs(self) -> List:
@@ -278,17 +363,50 @@ class FlatFileStorage(StorageBackend):
             if 'status' in cd: w['status'] = cd['status']
             conn.execute("UPDATE workers SET status = ?, data = ? WHERE id = ?", (w['status'], json.dumps(w), wid)); return True
 
+    def _job_where(self, f: Dict) -> tuple:
+        cl, p = [], []
+        ranges = {'submitted_after': 'submitted_at >= ?', 'submitted_before': 'submitted_at < ?', 'completed_after': 'completed_at >= ?', 'completed_before': 'completed_at < ?'}
+        for k, v in (f or {}).items():
+            if k in ranges: cl.append(ranges[k]); p.append(v)
+            elif k not in JOB_QUERY_FIELDS: raise ValueError(f"Unknown job filter: {k}")
+            elif isinstance(v, (list, tuple, set)): v = list(v); cl.append(f"{k} IN ({','.join(['?']*len(v))})" if v else "0"); p.extend(v)
+            elif v is None: cl.append(f"{k} IS NULL")
+            else: cl.append(f"{k} = ?"); p.append(v)
+        return cl, p
     def get_all_jobs(self, f: Dict = None) -> List:
-        sql = "SELECT data FROM jobs"; p = []
-        if f: cl = [f"{k} = ?" for k in f]; sql += " WHERE " + " AND ".join(cl); p.extend(f.values())
-        sql += " ORDER BY submitted_at DESC"
+        cl, p = self._job_where(f)
+        sql = "SELECT data FROM jobs" + (" WHERE " + " AND ".join(cl) if cl else "") + " ORDER BY submitted_at DESC"
         return [json.loads(r['data']) for r in self._get_connection().execute(sql, p)]
+    def query_jobs(self, f: Dict = None, sort_by: str = 'submitted_at', descending: bool = True, limit: int = 100, cursor: str = None, offset: int = 0) -> Dict:
+        if sort_by not in JOB_SORT_FIELDS: raise ValueError(f"Unknown job sort field: {sort_by}")
+        cl, p = self._job_where(f)
+        conn = self._get_connection()
+        total = None if cursor else conn.execute("SELECT COUNT(*) FROM jobs" + (" WHERE " + " AND ".join(cl) if cl else ""), p).fetchone()[0]
+        op, d = ('<', 'DESC') if descending else ('>', 'ASC')
+        # Jobs without a sort value (e.g. unfinished jobs by completed_at) come last, ordered by id;
+        # each part is read separately so both seek through their (sort_by, id) index
+        set_cl, set_p, null_cl, null_p = cl + [f"{sort_by} IS NOT NULL"], list(p), cl + [f"{sort_by} IS NULL"], list(p)
+        if cursor:
+            v, jid = decode_cursor(cursor); offset = 0
+            if v is None: set_cl = None; null_cl.append(f"id {op} ?"); null_p.append(jid)
+            else: set_cl.append(f"({sort_by} {op} ? OR ({sort_by} = ? AND id {op} ?))"); set_p.extend([v, v, jid])
+        rows = []
+        if set_cl:
+            rows = conn.execute(f"SELECT id, {sort_by} AS k, data FROM jobs WHERE {' AND '.join(set_cl)} ORDER BY {sort_by} {d}, id {d} LIMIT ? OFFSET ?", set_p + [limit + 1, max(0, offset)]).fetchall()
+            if not rows and offset > 0: offset -= conn.execute(f"SELECT COUNT(*) FROM jobs WHERE {' AND '.join(set_cl)}", set_p).fetchone()[0]
+            else: offset = 0
+        if len(rows) <= limit:
+            rows += conn.execute(f"SELECT id, NULL AS k, data FROM jobs WHERE {' AND '.join(null_cl)} ORDER BY id {d} LIMIT ? OFFSET ?", null_p + [limit + 1 - len(rows), max(0, offset)]).fetchall()
+        nc = encode_cursor(rows[limit - 1]['k'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return {'jobs': [json.loads(r['data']) for r in rows[:limit]], 'total': total, 'next_cursor': nc}
+    def get_job_counts(self) -> Dict:
+        return {r['status']: r['n'] for r in self._get_connection().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
     def get_job(self, jid: str) -> Optional[Dict]:
         r = self._get_connection().execute("SELECT data FROM jobs WHERE id = ?", (jid,)).fetchone(); return json.loads(r['data']) if r else None
     def save_job(self, j: Dict) -> bool:
         with self._get_connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
-            conn.execute("INSERT OR REPLACE INTO jobs (id, status, submitted_at, assigned_worker, data) VALUES (?, ?, ?, ?, ?)", (j['id'], j.get('status'), j.get('submitted_at'), j.get('assigned_worker'), json.dumps(j))); return True
+            conn.execute("INSERT OR REPLACE INTO jobs (id, status, submitted_at, assigned_worker, priority, playbook, target, submitted_by, completed_at, exit_code, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._job_columns(j)); return True
     def update_job(self, jid: str, up: Dict) -> bool:
         conn = self._get_connection()
         with conn:
@@ -297,16 +415,55 @@ class FlatFileStorage(StorageBackend):
             if not r: return False
             j = json.loads(r['data'])
             j.update(up)
-            conn.execute("UPDATE jobs SET status = ?, assigned_worker = ?, data = ? WHERE id = ?", (j.get('status'), j.get('assigned_worker'), json.dumps(j), jid)); return True
+            conn.execute("UPDATE jobs SET status = ?, submitted_at = ?, assigned_worker = ?, priority = ?, playbook = ?, target = ?, submitted_by = ?, completed_at = ?, exit_code = ?, data = ? WHERE id = ?", self._job_columns(j)[1:] + (jid,)); return True
     def delete_job(self, jid: str) -> bool:
         with self._get_connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
             res = conn.execute("DELETE FROM jobs WHERE id = ?", (jid,)); return res.rowcount > 0
     def get_pending_jobs(self) -> List:
-        return [json.loads(r['data']) for r in self._get_connection().execute("SELECT data FROM jobs WHERE status = 'queued' ORDER BY submitted_at ASC")]
-    def get_worker_jobs(self, wid: str, sl: List[str] = None) -> List:
+        return [json.loads(r['data']) for r in self._get_connection().execute("SELECT data FROM jobs WHERE status = 'queued' ORDER BY priority DESC, submitted_at ASC")]
+    def rank_queued_jobs(self, pol: Dict, worker_tags: List[str] = None, limit: int = None, now: str = None) -> List:
+        # Naive ISO timestamps compare as-is in julianday(), as the router's local-time arithmetic does
+        cls = [c for c in pol['weights'] if c != 'user']
+        weight = "CASE " + " ".join("WHEN s = ? OR substr(s, 1, ?) = ? THEN ?" for _ in cls) + " ELSE ? END"
+        wp = [x for c in cls for x in (c, len(c) + 1, c + ':', pol['weights'][c])] + [pol['weights'].get('user', 1.0)]
+        elig, ep = "", []
+        if worker_tags is not None:
+            elig = f"WHERE json_type(data, '$.required_tags') IS NOT 'array' OR NOT EXISTS (SELECT 1 FROM json_each(data, '$.required_tags') WHERE value NOT IN ({','.join(['?']*len(worker_tags))}))"; ep = list(worker_tags)
+        sql = ("WITH q AS (SELECT id, data, COALESCE(submitted_by, '') AS s, COALESCE(submitted_at, '') AS t, "
+               "COALESCE(priority, ?) + COALESCE(MIN(?, MAX(0, (julianday(?) - julianday(submitted_at)) * 1440 * ?)), 0) AS eff FROM jobs WHERE status = 'queued'), "
+               "h AS (SELECT COALESCE(submitted_by, '') AS s, COUNT(*) AS n FROM jobs WHERE status IN ('assigned', 'running') GROUP BY 1), "
+               "r AS (SELECT q.*, ROW_NUMBER() OVER (PARTITION BY q.s ORDER BY eff DESC, t) - 1 + COALESCE(h.n, 0) AS rk FROM q LEFT JOIN h ON h.s = q.s) "
+               f"SELECT id FROM r {elig} ORDER BY eff - rk * ? / ({weight}) DESC, t, id LIMIT ?")
+        p = [pol['default_priority'], pol['max_aging'], now or datetime.now().isoformat(), pol['aging_per_minute']] + ep + [pol['fair_share_step']] + wp + [-1 if limit is None else limit]
+        return [r['id'] for r in self._get_connection().execute(sql, p)]
+    def claim_jobs(self, wid: str, tags: List[str], slots: int = 1, job_ids: List[str] = None) -> List:
+        # Select and assign under one write lock; RETURNING needs SQLite 3.35+, newer than Rocky 9 ships
+        if slots <= 0 or job_ids == []: return []
+        ts, now = set(tags or []), datetime.now().isoformat()
+        conn = self._get_connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            sql = "SELECT data FROM jobs WHERE status = 'queued'"; p = []
+            if job_ids: sql += f" AND id IN ({','.join(['?']*len(job_ids))})"; p.extend(job_ids)
+            queued = [json.loads(r['data']) for r in conn.execute(sql + " ORDER BY priority DESC, submitted_at ASC", p)]
+            claimed = [j for j in queued if set(j.get('required_tags') or []) <= ts][:slots]
+            for j in claimed: j.update({'status': 'assigned', 'assigned_worker': wid, 'assigned_at': now})
+            conn.executemany("UPDATE jobs SET status = ?, assigned_worker = ?, data = ? WHERE id = ? AND status = 'queued'", [(j['status'], wid, json.dumps(j), j['id']) for j in claimed])
+            return claimed
+    def assign_jobs(self, a: Dict[str, str]) -> List:
+        if not a: return []
+        now, ids = datetime.now().isoformat(), list(a)
+        conn = self._get_connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            queued = [json.loads(r['data']) for r in conn.execute(f"SELECT data FROM jobs WHERE status = 'queued' AND id IN ({','.join(['?']*len(ids))})", ids)]
+            for j in queued: j.update({'status': 'assigned', 'assigned_worker': a[j['id']], 'assigned_at': now})
+            conn.executemany("UPDATE jobs SET status = ?, assigned_worker = ?, data = ? WHERE id = ? AND status = 'queued'", [(j['status'], j['assigned_worker'], json.dumps(j), j['id']) for j in queued])
+            return [j['id'] for j in queued]
+    def get_worker_jobs(self, wid: str, statuses: List[str] = None) -> List:
         sql = "SELECT data FROM jobs WHERE assigned_worker = ?"; p = [wid]
-        if sl: sql += f" AND status IN ({','.join(['?']*len(sl))})"; p.extend(sl)
+        if statuses: sql += f" AND status IN ({','.join(['?']*len(statuses))})"; p.extend(statuses)
         return [json.loads(r['data']) for r in self._get_connection().execute(sql, p)]
     def cleanup_jobs(self, m: int = 30, k: int = 500) -> int:
         with self._get_connection() as conn:
@@ -317,6 +474,26 @@ class FlatFileStorage(StorageBackend):
             res = conn.execute("DELETE FROM jobs WHERE status IN ('completed', 'failed', 'cancelled') AND submitted_at < ? AND id NOT IN (SELECT id FROM jobs ORDER BY submitted_at DESC LIMIT ?)", (cutoff, k))
             return res.rowcount
 
+    def save_host_results(self, rid: str, pb: str, fin: str, hosts: Dict[str, Dict]) -> bool:
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM host_results WHERE run_id = ?", (rid,))
+            conn.executemany("INSERT INTO host_results (run_id, host, playbook, finished_at, failed, unreachable, data) VALUES (?, ?, ?, ?, ?, ?, ?)", [(rid, h, pb, fin, c.get('failed', 0), c.get('unreachable', 0), json.dumps(c)) for h, c in hosts.items()]); return True
+    def get_host_results(self, rid: str) -> Dict[str, Dict]:
+        return {r['host']: json.loads(r['data']) for r in self._get_connection().execute("SELECT host, data FROM host_results WHERE run_id = ?", (rid,))}
+    def get_failing_hosts(self, since: str, playbook: str = None, limit: int = 20) -> List[Dict]:
+        sql = "SELECT host, COUNT(*) AS runs, SUM(failed > 0 OR unreachable > 0) AS failed_runs, SUM(unreachable > 0) AS unreachable_runs, MAX(CASE WHEN failed > 0 OR unreachable > 0 THEN finished_at END) AS last_failed FROM host_results WHERE finished_at >= ?"; p = [since]
+        if playbook: sql += " AND playbook = ?"; p.append(playbook)
+        sql += " GROUP BY host HAVING failed_runs > 0 ORDER BY failed_runs DESC, host LIMIT ?"; p.append(limit)
+        return [dict(r) for r in self._get_connection().execute(sql, p)]
+    def save_run_profile(self, rid: str, pb: str, fin: str, profile: Dict) -> bool:
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO run_profiles (run_id, playbook, finished_at, data) VALUES (?, ?, ?, ?)", (rid, pb, fin, json.dumps(profile, separators=(',', ':')))); return True
+    def get_run_profiles(self, pb: str, limit: int = 20) -> List[Dict]:
+        cursor = self._get_connection().execute("SELECT run_id, finished_at, data FROM run_profiles WHERE playbook = ? ORDER BY finished_at DESC LIMIT ?", (pb, limit))
+        return [{'run_id': r['run_id'], 'finished_at': r['finished_at'], 'profile': json.loads(r['data'])} for r in cursor]
+
     def get_user(self, u: str) -> Optional[Dict]:
         r = self._get_connection().execute("SELECT data FROM users WHERE username = ?", (u,)).fetchone(); return json.loads(r['data']) if r else None
     def get_user_by_id(self, uid: str) -> Optional[Dict]:
@@ -382,23 +559,32 @@ class FlatFileStorage(StorageBackend):
             res = conn.execute("DELETE FROM api_tokens WHERE id = ?", (tid,))
             return res.rowcount > 0
 
-    def add_audit_entry(self, e: Dict) -> bool:
-        if 'timestamp' not in e: e['timestamp'] = datetime.now(timezone.utc).isoformat()
+    def add_audit_entry(self, e: Dict) -> bool: return self.add_audit_entries([e])
+    def add_audit_entries(self, entries: List[Dict]) -> bool:
+        now = datetime.now(timezone.utc).isoformat()
+        for e in entries: e.setdefault('timestamp', now)
         with self._get_connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
-            conn.execute("INSERT INTO audit_log (timestamp, user, action, resource, success, data) VALUES (?, ?, ?, ?, ?, ?)", (e.get('timestamp'), e.get('user'), e.get('action'), e.get('resource'), 1 if e.get('success') else 0, json.dumps(e))); return True
+            conn.executemany("INSERT INTO audit_log (timestamp, user, action, resource, success, data) VALUES (?, ?, ?, ?, ?, ?)", [(e.get('timestamp'), e.get('user'), e.get('action'), e.get('resource'), 1 if e.get('success') else 0, json.dumps(e)) for e in entries]); return True
     def get_audit_log(self, f: Dict = None, limit: int = 100, offset: int = 0) -> List:
-        sql = "SELECT data FROM audit_log"; p = []
-        if f:
-            cl = []
-            for k,v in f.items():
-                if k == 'start_time': cl.append("timestamp >= ?"); p.append(v)
-                elif k == 'end_time': cl.append("timestamp <= ?"); p.append(v)
-                elif k == 'success': cl.append("success = ?"); p.append(1 if v else 0)
-                else: cl.append(f"{k} = ?"); p.append(v)
-            sql += " WHERE " + " AND ".join(cl)
-        sql += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"; p.extend([limit, offset])
-        return [json.loads(r['data']) for r in self._get_connection().execute(sql, p)]
+        return self.query_audit_log(f, limit=limit, offset=offset)['entries']
+    def query_audit_log(self, f: Dict = None, limit: int = 100, cursor: str = None, offset: int = 0) -> Dict:
+        cl, p = ["1"], []
+        for k, v in (f or {}).items():
+            if k == 'start_time': cl.append("timestamp >= ?"); p.append(v)
+            elif k == 'end_time': cl.append("timestamp <= ?"); p.append(v)
+            elif k == 'success': cl.append("success = ?"); p.append(1 if v else 0)
+            elif k in AUDIT_QUERY_FIELDS: cl.append(f"{k} = ?"); p.append(v)
+            else: raise ValueError(f"Unknown audit filter: {k}")
+        conn = self._get_connection()
+        total = None if cursor else conn.execute("SELECT COUNT(*) FROM audit_log WHERE " + " AND ".join(cl), p).fetchone()[0]
+        if cursor:
+            ts, aid = decode_cursor(cursor)
+            cl.append("(timestamp, id) < (?, ?)"); p.extend([ts, aid]); offset = 0
+        sql = f"SELECT id, timestamp, data FROM audit_log WHERE {' AND '.join(cl)} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+        rows = conn.execute(sql, p + [limit + 1, max(0, offset)]).fetchall()
+        nc = encode_cursor(rows[limit - 1]['timestamp'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return {'entries': [json.loads(r['data']) for r in rows[:limit]], 'total': total, 'next_cursor': nc}
     def cleanup_audit_log(self, m: int = 90, k: int = 10000) -> int:
         with self._get_connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
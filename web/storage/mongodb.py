@@ -9,16 +9,24 @@ Collections:
 - history - Execution history
 - inventory - Inventory items
 - host_facts - Collected host facts (CMDB)
+- host_facts_history - Diffs of host facts collections, newest kept
+- host_results - Per-host results of runs
+- run_profiles - Task timings of runs
 """
 
 import re
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
-from pymongo import MongoClient, DESCENDING
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import MongoClient, DESCENDING, DeleteMany, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
 
-from .base import StorageBackend, compute_diff, is_empty_diff
+from .base import (
+    StorageBackend, compute_diff, is_empty_diff, encode_cursor, decode_cursor,
+    JOB_QUERY_FIELDS, JOB_SORT_FIELDS, FACTS_HISTORY_LIMIT, AUDIT_QUERY_FIELDS
+)
 
 
 class MongoDBStorage(StorageBackend):
@@ -29,6 +37,9 @@ class MongoDBStorage(StorageBackend):
     Indexes are created automatically on first use.
     """
 
+    # History entries kept per host collection
+    history_limit = FACTS_HISTORY_LIMIT
+
     def __init__(self, host: str = 'mongodb', port: int = 27017,
                  database: str = 'ansible_simpleweb'):
         """
@@ -56,13 +67,19 @@ class MongoDBStorage(StorageBackend):
         self.history_collection = self.db['history']
         self.inventory_collection = self.db['inventory']
         self.host_facts_collection = self.db['host_facts']
+        self.host_facts_history_collection = self.db['host_facts_history']
         self.batch_jobs_collection = self.db['batch_jobs']
         self.workers_collection = self.db['workers']
         self.job_queue_collection = self.db['job_queue']
+        self.host_results_collection = self.db['host_results']
+        self.run_profiles_collection = self.db['run_profiles']
 
         # Ensure indexes
         self._ensure_indexes()
 
+        # History used to be embedded in host documents
+        self._migrate_facts_history()
+
     def _ensure_indexes(self):
         """Create indexes for efficient queries."""
         try:
@@ -83,6 +100,9 @@ class MongoDBStorage(StorageBackend):
             self.host_facts_collection.create_index('host', unique=True)
             self.host_facts_collection.create_index('groups')
             self.host_facts_collection.create_index([('last_updated', DESCENDING)])
+            self.host_facts_history_collection.create_index(
+                [('host', 1), ('collection', 1), ('timestamp', DESCENDING)]
+            )
 
             # Batch jobs - indexes for queries
             self.batch_jobs_collection.create_index('id', unique=True)
@@ -102,6 +122,24 @@ class MongoDBStorage(StorageBackend):
             self.job_queue_collection.create_index('playbook')
             self.job_queue_collection.create_index([('submitted_at', DESCENDING)])
             self.job_queue_collection.create_index([('priority', DESCENDING)])
+            self.job_queue_collection.create_index(
+                [('status', 1), ('priority', DESCENDING), ('submitted_at', 1)]
+            )
+            self.job_queue_collection.create_index([('submitted_at', DESCENDING), ('id', DESCENDING)])
+            self.job_queue_collection.create_index([('status', 1), ('submitted_at', DESCENDING), ('id', DESCENDING)])
+            self.job_queue_collection.create_index([('submitted_by', 1), ('submitted_at', DESCENDING), ('id', DESCENDING)])
+            self.job_queue_collection.create_index([('playbook', 1), ('submitted_at', DESCENDING), ('id', DESCENDING)])
+            self.job_queue_collection.create_index([('assigned_worker', 1), ('status', 1)])
+            self.job_queue_collection.create_index([('completed_at', DESCENDING), ('id', DESCENDING)])
+
+            # Host results - indexes for per-run lookups and fleet queries
+            self.host_results_collection.create_index([('run_id', 1), ('host', 1)], unique=True)
+            self.host_results_collection.create_index([('finished_at', DESCENDING), ('host', 1)])
+            self.host_results_collection.create_index([('host', 1), ('finished_at', DESCENDING)])
+
+            # Run profiles - latest runs of a playbook
+            self.run_profiles_collection.create_index('run_id', unique=True)
+            self.run_profiles_collection.create_index([('playbook', 1), ('finished_at', DESCENDING)])
         except Exception as e:
             print(f"Warning: Could not create indexes: {e}")
 
@@ -327,7 +365,9 @@ class MongoDBStorage(StorageBackend):
                             include_history: bool = False) -> Optional[Dict]:
         """Get a specific collection for a host."""
         try:
-            doc = self.host_facts_collection.find_one({'host': host})
+            doc = self.host_facts_collection.find_one(
+                {'host': host}, {f'collections.{collection}': 1}
+            )
             if not doc:
                 return None
 
@@ -336,7 +376,10 @@ class MongoDBStorage(StorageBackend):
                 return None
 
             if include_history:
-                return collection_data
+                return {
+                    **collection_data,
+                    'history': self.get_host_history(host, collection, self.history_limit)
+                }
             else:
                 return {
                     'current': collection_data.get('current'),
@@ -349,110 +392,159 @@ class MongoDBStorage(StorageBackend):
     def save_host_facts(self, host: str, collection: str, data: Dict,
                         groups: List[str] = None, source: str = None) -> Dict:
         """Save collected facts for a host with diff-based history."""
+        return self.save_host_facts_bulk([{
+            'host': host,
+            'collection': collection,
+            'data': data,
+            'groups': groups
+        }], source=source)[0]
+
+    def save_host_facts_bulk(self, facts: List[Dict], source: str = None) -> List[Dict]:
+        """
+        Save collected facts for many hosts at once.
+
+        The saved collections of all hosts in the batch are read with one
+        query and diffed in memory; host documents are then upserted with
+        one bulk_write and history entries added with one insert_many.
+        """
         try:
             now = datetime.now().isoformat()
-            existing = self.host_facts_collection.find_one({'host': host})
-
-            if not existing:
-                # Create new host document
-                new_doc = {
-                    'host': host,
-                    'groups': groups or [],
-                    'collections': {
-                        collection: {
-                            'current': data,
-                            'last_updated': now,
-                            'source': source,
-                            'history': []
-                        }
-                    },
-                    'first_seen': now,
-                    'last_updated': now
-                }
-                self.host_facts_collection.insert_one(new_doc)
-                return {
-                    'status': 'created',
-                    'host': host,
-                    'collection': collection
-                }
-
-            # Update existing host
-            # Update groups if provided
-            if groups:
-                existing_groups = set(existing.get('groups', []))
-                updated_groups = list(existing_groups | set(groups))
-            else:
-                updated_groups = existing.get('groups', [])
-
-            collections = existing.get('collections', {})
+            projection = {'host': 1}
+            projection.update({f"collections.{f['collection']}": 1 for f in facts})
+            docs = {
+                doc['host']: doc for doc in self.host_facts_collection.find(
+                    {'host': {'$in': list({f['host'] for f in facts})}}, projection
+                )
+            }
 
-            if collection not in collections:
-                # New collection for existing host
-                collections[collection] = {
-                    'current': data,
-                    'last_updated': now,
-                    'source': source,
-                    'history': []
-                }
-                changes = None
-            else:
-                # Update existing collection
-                coll = collections[collection]
-                old_data = coll.get('current', {})
-                diff = compute_diff(old_data, data)
-
-                if is_empty_diff(diff):
-                    return {
-                        'status': 'unchanged',
+            updates = {}  # {host: update document}
+            history = []
+            results = []
+            for f in facts:
+                host, collection = f['host'], f['collection']
+                doc = docs.get(host)
+                if doc is None:
+                    doc = docs[host] = {'host': host, 'collections': {}}
+                    result = {'status': 'created', 'host': host, 'collection': collection}
+                else:
+                    result = {'status': 'updated', 'host': host, 'collection': collection}
+
+                coll = doc.setdefault('collections', {}).get(collection)
+                if coll:
+                    diff = compute_diff(coll.get('current', {}), f['data'])
+
+                    if is_empty_diff(diff):
+                        results.append({
+                            'status': 'unchanged',
+                            'host': host,
+                            'collection': collection
+                        })
+                        continue
+
+                    # Store diff in history
+                    history.append({
                         'host': host,
-                        'collection': collection
-                    }
-
-                # Store diff in history
-                history_entry = {
-                    'timestamp': coll.get('last_updated', now),
-                    'source': coll.get('source'),
-                    'diff_from_next': diff
+                        'collection': collection,
+                        'timestamp': coll.get('last_updated', now),
+                        'source': coll.get('source'),
+                        'diff_from_next': diff
+                    })
+                    result['changes'] = diff
+
+                coll = doc['collections'][collection] = {
+                    'current': f['data'],
+                    'last_updated': now,
+                    'source': source
                 }
+                update = updates.setdefault(host, {
+                    '$set': {'last_updated': now},
+                    '$setOnInsert': {'first_seen': now}
+                })
+                update['$set'][f'collections.{collection}'] = coll
+                if f.get('groups'):
+                    update.setdefault('$addToSet', {'groups': {'$each': []}})
+                    update['$addToSet']['groups']['$each'].extend(f['groups'])
+                results.append(result)
+
+            operations = []
+            for host, update in updates.items():
+                if '$addToSet' not in update:
+                    update['$setOnInsert']['groups'] = []
+                operations.append(UpdateOne({'host': host}, update, upsert=True))
+            if operations:
+                self.host_facts_collection.bulk_write(operations, ordered=False)
+
+            if history:
+                self.host_facts_history_collection.insert_many(history, ordered=False)
+                self._prune_history(history)
 
-                history = coll.get('history', [])
-                history.insert(0, history_entry)
-                history = history[:100]  # Limit history
-
-                coll['current'] = data
-                coll['last_updated'] = now
-                coll['source'] = source
-                coll['history'] = history
-                changes = diff
-
-            # Update document
-            self.host_facts_collection.update_one(
-                {'host': host},
-                {'$set': {
-                    'groups': updated_groups,
-                    'collections': collections,
-                    'last_updated': now
-                }}
-            )
-
-            result = {
-                'status': 'updated',
-                'host': host,
-                'collection': collection
-            }
-            if 'changes' in dir() and changes:
-                result['changes'] = changes
-
-            return result
+            return results
 
         except Exception as e:
             print(f"Error saving host facts to MongoDB: {e}")
-            return {
+            return [{
                 'status': 'error',
                 'error': str(e),
-                'host': host,
-                'collection': collection
-            }
+                'host': f.get('host'),
+                'collection': f.get('collection')
+            } for f in facts]
+
+    def _prune_history(self, entries: List[Dict]):
+        """Delete history beyond history_limit for the entries' collections."""
+        # Per (host, collection): timestamp of the newest entry beyond the
+        # limit; it and all older entries go
+        cutoffs = self.host_facts_history_collection.aggregate([
+            {'$match': {
+                'host': {'$in': list({e['host'] for e in entries})},
+                'collection': {'$in': list({e['collection'] for e in entries})}
+            }},
+            {'$sort': {'host': 1, 'collection': 1, 'timestamp': DESCENDING}},
+            {'$group': {
+                '_id': {'host': '$host', 'collection': '$collection'},
+                'timestamps': {'$push': '$timestamp'}
+            }},
+            {'$project': {'cutoff': {'$arrayElemAt': ['$timestamps', self.history_limit]}}},
+            {'$match': {'cutoff': {'$exists': True}}}
+        ])
+        operations = [
+            DeleteMany({
+                'host': c['_id']['host'],
+                'collection': c['_id']['collection'],
+                'timestamp': {'$lte': c['cutoff']}
+            })
+            for c in cutoffs
+        ]
+        if operations:
+            self.host_facts_history_collection.bulk_write(operations, ordered=False)
+
+    def _pop_history(self, doc: Dict) -> List[Dict]:
+        """Remove history embedded in a host document (backups, older data)."""
+        entries = []
+        for name, coll in doc.get('collections', {}).items():
+            for entry in (coll.pop('history', None) or [])[:self.history_limit]:
+                entries.append({'host': doc['host'], 'collection': name, **entry})
+        return entries
+
+    def _migrate_facts_history(self):
+        """Move history embedded in host documents to host_facts_history."""
+        try:
+            if self.host_facts_history_collection.estimated_document_count():
+                return
+            cursor = self.host_facts_collection.find(
+                {'collections': {'$exists': True}}, {'host': 1, 'collections': 1}
+            )
+            for doc in cursor:
+                entries = self._pop_history(doc)
+                if not entries:
+                    continue
+                self.host_facts_history_collection.insert_many(entries)
+                self.host_facts_collection.update_one(
+                    {'_id': doc['_id']},
+                    {'$unset': {f'collections.{name}.history': ''
+                                for name in doc['collections']}}
+                )
+        except Exception as e:
+            print(f"Warning: Could not migrate host facts history: {e}")
 
     def get_all_hosts(self) -> List[Dict]:
         """Get summary of all hosts with collected facts."""
@@ -498,16 +590,11 @@ class MongoDBStorage(StorageBackend):
                          limit: int = 50) -> List[Dict]:
         """Get historical changes for a host's collection."""
         try:
-            doc = self.host_facts_collection.find_one({'host': host})
-            if not doc:
-                return []
-
-            coll = doc.get('collections', {}).get(collection)
-            if not coll:
-                return []
-
-            history = coll.get('history', [])
-            return history[:limit]
+            cursor = self.host_facts_history_collection.find(
+                {'host': host, 'collection': collection},
+                {'_id': 0, 'host': 0, 'collection': 0}
+            ).sort([('timestamp', DESCENDING), ('_id', DESCENDING)]).limit(limit)
+            return list(cursor)
         except Exception as e:
             print(f"Error getting host history from MongoDB: {e}")
             return []
@@ -521,21 +608,35 @@ class MongoDBStorage(StorageBackend):
                     {'host': host},
                     {'$unset': {f'collections.{collection}': ''}}
                 )
+                self.host_facts_history_collection.delete_many(
+                    {'host': host, 'collection': collection}
+                )
                 return result.modified_count > 0
             else:
                 # Delete entire host
                 result = self.host_facts_collection.delete_one({'host': host})
+                self.host_facts_history_collection.delete_many({'host': host})
                 return result.deleted_count > 0
         except Exception as e:
             print(f"Error deleting host facts from MongoDB: {e}")
             return False
 
+    def export_host_facts(self, host: str) -> Optional[Dict]:
+        """Get a complete host facts document with history embedded."""
+        doc = self.get_host_facts(host)
+        if not doc:
+            return None
+        for name, coll in doc.get('collections', {}).items():
+            coll['history'] = self.get_host_history(host, name, self.history_limit)
+        return doc
+
     def import_host_facts(self, host_data: Dict) -> bool:
         """
         Import a complete host facts document (used for migration).
 
         Directly inserts/replaces the host document without diff processing,
-        preserving all history and metadata from the source.
+        preserving all history and metadata from the source. History embedded
+        in the document replaces the host's stored history.
 
         Args:
             host_data: Complete host document
@@ -550,6 +651,10 @@ class MongoDBStorage(StorageBackend):
 
             # Remove MongoDB _id if present (from source export)
             doc = {k: v for k, v in host_data.items() if k != '_id'}
+            doc['collections'] = {
+                name: dict(coll) for name, coll in doc.get('collections', {}).items()
+            }
+            history = self._pop_history(doc)
 
             # Use replace_one with upsert to insert or replace
             self.host_facts_collection.replace_one(
@@ -557,6 +662,9 @@ class MongoDBStorage(StorageBackend):
                 doc,
                 upsert=True
             )
+            self.host_facts_history_collection.delete_many({'host': host})
+            if history:
+                self.host_facts_history_collection.insert_many(history)
             return True
         except Exception as e:
             print(f"Error importing host facts to MongoDB: {e}")
@@ -790,6 +898,93 @@ class MongoDBStorage(StorageBackend):
             print(f"Error loading jobs from MongoDB: {e}")
             return []
 
+    def _build_job_query(self, filters: Dict = None) -> Dict:
+        """Translate query_jobs() filters into a MongoDB query."""
+        ranges = {
+            'submitted_after': ('submitted_at', '$gte'),
+            'submitted_before': ('submitted_at', '$lt'),
+            'completed_after': ('completed_at', '$gte'),
+            'completed_before': ('completed_at', '$lt'),
+        }
+        query = {}
+        for key, value in (filters or {}).items():
+            if key in ranges:
+                field, op = ranges[key]
+                query.setdefault(field, {})[op] = value
+            elif key not in JOB_QUERY_FIELDS:
+                raise ValueError(f"Unknown job filter: {key}")
+            elif isinstance(value, (list, tuple, set)):
+                query[key] = {'$in': list(value)}
+            else:
+                query[key] = value
+        return query
+
+    def query_jobs(self, filters: Dict = None, sort_by: str = 'submitted_at',
+                   descending: bool = True, limit: int = 100, cursor: str = None,
+                   offset: int = 0) -> Dict:
+        """Get one page of jobs using indexed filters and keyset pagination."""
+        if sort_by not in JOB_SORT_FIELDS:
+            raise ValueError(f"Unknown job sort field: {sort_by}")
+        query = self._build_job_query(filters)
+        after = decode_cursor(cursor) if cursor else None
+        op = '$lt' if descending else '$gt'
+        direction = DESCENDING if descending else 1
+        try:
+            total = None if after else self.job_queue_collection.count_documents(query)
+            # Jobs without a sort value (e.g. unfinished jobs by completed_at)
+            # come last, ordered by id, after the jobs that have one
+            parts = []
+            if not after or after[0] is not None:
+                set_query = {sort_by: {'$ne': None}}
+                if after:
+                    value, last_id = after
+                    set_query = {'$or': [
+                        {sort_by: {op: value}},
+                        {sort_by: value, 'id': {op: last_id}}
+                    ]}
+                parts.append(({'$and': [query, set_query]}, [(sort_by, direction), ('id', direction)]))
+            null_query = {sort_by: None}
+            if after and after[0] is None:
+                null_query['id'] = {op: after[1]}
+            parts.append(({'$and': [query, null_query]}, [('id', direction)]))
+
+            jobs = []
+            skip = 0 if after else max(0, offset)
+            for part_query, sort in parts:
+                if len(jobs) > limit:
+                    break
+                find = self.job_queue_collection.find(part_query).sort(sort)
+                found = 0
+                for doc in find.skip(skip).limit(limit + 1 - len(jobs)):
+                    doc.pop('_id', None)
+                    jobs.append(doc)
+                    found += 1
+                if skip and not found:
+                    skip -= self.job_queue_collection.count_documents(part_query)
+                else:
+                    skip = 0
+            next_cursor = None
+            if len(jobs) > limit:
+                jobs = jobs[:limit]
+                next_cursor = encode_cursor(jobs[-1].get(sort_by), jobs[-1]['id'])
+            return {'jobs': jobs, 'total': total, 'next_cursor': next_cursor}
+        except Exception as e:
+            print(f"Error querying jobs from MongoDB: {e}")
+            return {'jobs': [], 'total': 0, 'next_cursor': None}
+
+    def get_job_counts(self) -> Dict[str, int]:
+        """Count jobs grouped by status."""
+        try:
+            return {
+                doc['_id']: doc['count']
+                for doc in self.job_queue_collection.aggregate([
+                    {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+                ])
+            }
+        except Exception as e:
+            print(f"Error counting jobs in MongoDB: {e}")
+            return {}
+
     def get_job(self, job_id: str) -> Optional[Dict]:
         """Get a single job by ID."""
         try:
@@ -857,6 +1052,138 @@ class MongoDBStorage(StorageBackend):
             print(f"Error getting pending jobs from MongoDB: {e}")
             return []
 
+    def rank_queued_jobs(self, policy: Dict, worker_tags: List[str] = None,
+                         limit: int = None, now: str = None) -> List[str]:
+        """Rank queued jobs in dispatch order with one aggregation."""
+        try:
+            # Naive ISO timestamps are read as UTC on both sides (millisecond
+            # precision), matching the router's local-time arithmetic
+            now_date = datetime.fromisoformat((now or datetime.now().isoformat())[:23])
+            held = {
+                doc['_id']: doc['count']
+                for doc in self.job_queue_collection.aggregate([
+                    {'$match': {'status': {'$in': ['assigned', 'running']}}},
+                    {'$group': {'_id': {'$ifNull': ['$submitted_by', '']}, 'count': {'$sum': 1}}}
+                ])
+            }
+            weight = {'$switch': {
+                'branches': [
+                    {'case': {'$or': [
+                        {'$eq': ['$_s', cls]},
+                        {'$eq': [{'$substrCP': ['$_s', 0, len(cls) + 1]}, cls + ':']}
+                    ]}, 'then': w}
+                    for cls, w in policy['weights'].items() if cls != 'user'
+                ] or [{'case': False, 'then': 1}],
+                'default': policy['weights'].get('user', 1.0)
+            }}
+            submitted = {'$dateFromString': {
+                'dateString': {'$substrCP': ['$submitted_at', 0, 23]},
+                'onError': now_date, 'onNull': now_date
+            }}
+            minutes = {'$divide': [{'$subtract': [now_date, submitted]}, 60000]}
+            pipeline = [
+                {'$match': {'status': 'queued'}},
+                {'$project': {
+                    'id': 1, 'required_tags': 1,
+                    '_s': {'$ifNull': ['$submitted_by', '']},
+                    '_t': {'$ifNull': ['$submitted_at', '']},
+                    '_eff': {'$add': [
+                        {'$ifNull': ['$priority', policy['default_priority']]},
+                        {'$min': [policy['max_aging'], {'$max': [0, {'$multiply': [minutes, policy['aging_per_minute']]}]}]}
+                    ]}
+                }},
+                {'$setWindowFields': {
+                    'partitionBy': '$_s',
+                    'sortBy': {'_eff': -1, '_t': 1},
+                    'output': {'_rank': {'$documentNumber': {}}}
+                }},
+            ]
+            if worker_tags is not None:
+                pipeline.append({'$match': {
+                    'required_tags': {'$not': {'$elemMatch': {'$nin': list(worker_tags)}}}
+                }})
+            held_count = {'$switch': {
+                'branches': [{'case': {'$eq': ['$_s', sub]}, 'then': n} for sub, n in held.items()]
+                or [{'case': False, 'then': 0}],
+                'default': 0
+            }}
+            pipeline += [
+                {'$addFields': {'_score': {'$subtract': ['$_eff', {'$divide': [
+                    {'$multiply': [{'$add': [{'$subtract': ['$_rank', 1]}, held_count]},
+                                   policy['fair_share_step']]},
+                    weight
+                ]}]}}},
+                {'$sort': {'_score': -1, '_t': 1, 'id': 1}},
+            ]
+            if limit is not None:
+                pipeline.append({'$limit': limit})
+            pipeline.append({'$project': {'_id': 0, 'id': 1}})
+            return [doc['id'] for doc in self.job_queue_collection.aggregate(pipeline)]
+        except Exception as e:
+            print(f"Error ranking queued jobs in MongoDB: {e}")
+            return []
+
+    def claim_jobs(self, worker_id: str, worker_tags: List[str], slots: int = 1,
+                   job_ids: List[str] = None) -> List[Dict]:
+        """Atomically claim queued jobs for a worker (one find_one_and_update per slot)."""
+        try:
+            # Eligible when no required tag falls outside the worker's tags
+            query = {
+                'status': 'queued',
+                'required_tags': {'$not': {'$elemMatch': {'$nin': list(worker_tags or [])}}}
+            }
+            if job_ids is not None:
+                query['id'] = {'$in': list(job_ids)}
+
+            now = datetime.now().isoformat()
+            claimed = []
+            for _ in range(max(0, slots)):
+                doc = self.job_queue_collection.find_one_and_update(
+                    query,
+                    {'$set': {
+                        'status': 'assigned',
+                        'assigned_worker': worker_id,
+                        'assigned_at': now
+                    }},
+                    sort=[('priority', DESCENDING), ('submitted_at', 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+                if not doc:
+                    break
+                doc.pop('_id', None)
+                claimed.append(doc)
+            return claimed
+        except Exception as e:
+            print(f"Error claiming jobs in MongoDB: {e}")
+            return []
+
+    def assign_jobs(self, assignments: Dict[str, str]) -> List[str]:
+        """Assign many queued jobs to workers with one bulk write."""
+        if not assignments:
+            return []
+        try:
+            # Stamp this pass so the jobs it won can be read back afterwards
+            assigned_at = datetime.now().isoformat()
+            self.job_queue_collection.bulk_write([
+                UpdateOne(
+                    {'id': job_id, 'status': 'queued'},
+                    {'$set': {'status': 'assigned', 'assigned_worker': worker_id,
+                              'assigned_at': assigned_at}}
+                )
+                for job_id, worker_id in assignments.items()
+            ], ordered=False)
+            return [
+                doc['id'] for doc in self.job_queue_collection.find(
+                    {'id': {'$in': list(assignments)}, 'status': 'assigned',
+                     'assigned_at': assigned_at},
+                    {'id': 1, 'assigned_worker': 1}
+                )
+                if doc.get('assigned_worker') == assignments[doc['id']]
+            ]
+        except Exception as e:
+            print(f"Error assigning jobs in MongoDB: {e}")
+            return []
+
     def get_worker_jobs(self, worker_id: str, statuses: List[str] = None) -> List[Dict]:
         """Get jobs assigned to a specific worker."""
         try:
@@ -913,6 +1240,95 @@ class MongoDBStorage(StorageBackend):
             print(f"Error cleaning up jobs in MongoDB: {e}")
             return 0
 
+    # =========================================================================
+    # Host Results Operations
+    # =========================================================================
+
+    def save_host_results(self, run_id: str, playbook: str, finished_at: str,
+                          hosts: Dict[str, Dict]) -> bool:
+        """Store the per-host results of a run."""
+        try:
+            self.host_results_collection.delete_many({'run_id': run_id})
+            if hosts:
+                self.host_results_collection.insert_many([
+                    {'run_id': run_id, 'host': host, 'playbook': playbook,
+                     'finished_at': finished_at, **counts}
+                    for host, counts in hosts.items()
+                ])
+            return True
+        except Exception as e:
+            print(f"Error saving host results to MongoDB: {e}")
+            return False
+
+    def get_host_results(self, run_id: str) -> Dict[str, Dict]:
+        """Get the per-host results of a run."""
+        try:
+            results = {}
+            for doc in self.host_results_collection.find({'run_id': run_id}):
+                host = doc['host']
+                for key in ('_id', 'run_id', 'host', 'playbook', 'finished_at'):
+                    doc.pop(key, None)
+                results[host] = doc
+            return results
+        except Exception as e:
+            print(f"Error getting host results from MongoDB: {e}")
+            return {}
+
+    def get_failing_hosts(self, since: str, playbook: str = None, limit: int = 20) -> List[Dict]:
+        """Hosts that failed most often since a timestamp."""
+        try:
+            match = {'finished_at': {'$gte': since}}
+            if playbook:
+                match['playbook'] = playbook
+            failed = {'$or': [{'$gt': ['$failed', 0]}, {'$gt': ['$unreachable', 0]}]}
+            pipeline = [
+                {'$match': match},
+                {'$group': {
+                    '_id': '$host',
+                    'runs': {'$sum': 1},
+                    'failed_runs': {'$sum': {'$cond': [failed, 1, 0]}},
+                    'unreachable_runs': {'$sum': {'$cond': [{'$gt': ['$unreachable', 0]}, 1, 0]}},
+                    'last_failed': {'$max': {'$cond': [failed, '$finished_at', None]}},
+                }},
+                {'$match': {'failed_runs': {'$gt': 0}}},
+                {'$sort': {'failed_runs': DESCENDING, '_id': 1}},
+                {'$limit': limit},
+            ]
+            return [
+                {'host': doc.pop('_id'), **doc}
+                for doc in self.host_results_collection.aggregate(pipeline)
+            ]
+        except Exception as e:
+            print(f"Error getting failing hosts from MongoDB: {e}")
+            return []
+
+    def save_run_profile(self, run_id: str, playbook: str, finished_at: str,
+                         profile: Dict) -> bool:
+        """Store the task timings of a run."""
+        try:
+            self.run_profiles_collection.replace_one(
+                {'run_id': run_id},
+                {'run_id': run_id, 'playbook': playbook, 'finished_at': finished_at,
+                 'profile': profile},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving run profile to MongoDB: {e}")
+            return False
+
+    def get_run_profiles(self, playbook: str, limit: int = 20) -> List[Dict]:
+        """Get the most recent run profiles of a playbook."""
+        try:
+            cursor = self.run_profiles_collection.find(
+                {'playbook': playbook},
+                {'_id': 0, 'run_id': 1, 'finished_at': 1, 'profile': 1}
+            ).sort('finished_at', DESCENDING).limit(limit)
+            return list(cursor)
+        except Exception as e:
+            print(f"Error getting run profiles from MongoDB: {e}")
+            return []
+
     # =========================================================================
     # User Operations (Authentication)
     # =========================================================================
@@ -937,11 +1353,12 @@ class MongoDBStorage(StorageBackend):
             self.db['api_tokens'].create_index('token_hash', unique=True)
             self.db['api_tokens'].create_index('user_id')
 
-            # Audit log collection
-            self.db['audit_log'].create_index([('timestamp', DESCENDING)])
-            self.db['audit_log'].create_index('user')
-            self.db['audit_log'].create_index('action')
-            self.db['audit_log'].create_index('resource')
+            # Audit log collection: pages seek on (timestamp, _id) after
+            # the equality filters of each common combination
+            audit_order = [('timestamp', DESCENDING), ('_id', DESCENDING)]
+            for prefix in ([], ['user'], ['user', 'action'], ['action'],
+                           ['resource'], ['resource', 'action'], ['success']):
+                self.db['audit_log'].create_index([(f, 1) for f in prefix] + audit_order)
         except Exception as e:
             print(f"Error creating auth indexes: {e}")
 
@@ -1191,35 +1608,86 @@ class MongoDBStorage(StorageBackend):
             print(f"Error adding audit entry to MongoDB: {e}")
             return False
 
-    def get_audit_log(self, filters: Dict = None, limit: int = 100, offset: int = 0) -> List[Dict]:
-        """Get audit log entries with optional filters."""
-        try:
-            query = {}
-            if filters:
-                if filters.get('user'):
-                    query['user'] = filters['user']
-                if filters.get('action'):
-                    query['action'] = filters['action']
-                if filters.get('resource'):
-                    query['resource'] = filters['resource']
-                if filters.get('success') is not None:
-                    query['success'] = filters['success']
-                if filters.get('start_time') or filters.get('end_time'):
-                    query['timestamp'] = {}
-                    if filters.get('start_time'):
-                        query['timestamp']['$gte'] = filters['start_time']
-                    if filters.get('end_time'):
-                        query['timestamp']['$lte'] = filters['end_time']
+    def add_audit_entries(self, entries: List[Dict]) -> bool:
+        """
+        Add a batch of audit log entries with one insert_many.
 
-            cursor = self.db['audit_log'].find(
-                query,
-                {'_id': 0}
-            ).sort('timestamp', DESCENDING).skip(offset).limit(limit)
+        Each entry is given its _id before the insert, so a batch retried
+        after a partial failure reuses the same ids; entries already
+        written then fail as duplicate keys and count as written.
+        """
+        try:
+            self._ensure_auth_indexes()
+            now = datetime.utcnow().isoformat()
+            for entry in entries:
+                entry.setdefault('timestamp', now)
+                entry.setdefault('_id', ObjectId())
+            if entries:
+                self.db['audit_log'].insert_many(entries, ordered=False)
+            return True
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            if errors and all(err.get('code') == 11000 for err in errors) and \
+                    not e.details.get('writeConcernErrors'):
+                return True
+            print(f"Error adding audit entries to MongoDB: {e}")
+            return False
+        except Exception as e:
+            print(f"Error adding audit entries to MongoDB: {e}")
+            return False
 
-            return list(cursor)
+    def get_audit_log(self, filters: Dict = None, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Get audit log entries with optional filters."""
+        return self.query_audit_log(filters, limit=limit, offset=offset)['entries']
+
+    def query_audit_log(self, filters: Dict = None, limit: int = 100,
+                        cursor: str = None, offset: int = 0) -> Dict:
+        """Get one page of audit log entries using keyset pagination on (timestamp, _id)."""
+        query = {}
+        for key, value in (filters or {}).items():
+            if key == 'start_time':
+                query.setdefault('timestamp', {})['$gte'] = value
+            elif key == 'end_time':
+                query.setdefault('timestamp', {})['$lte'] = value
+            elif key == 'success':
+                query['success'] = bool(value)
+            elif key in AUDIT_QUERY_FIELDS:
+                query[key] = value
+            else:
+                raise ValueError(f"Unknown audit filter: {key}")
+        after = None
+        if cursor:
+            timestamp, last_id = decode_cursor(cursor)
+            try:
+                after = (timestamp, ObjectId(last_id))
+            except (InvalidId, TypeError):
+                raise ValueError('Invalid cursor')
+        try:
+            total = None if after else self.db['audit_log'].count_documents(query)
+            if after:
+                # The $lte bound is the index seek; the $or only resolves
+                # entries sharing the cursor's timestamp
+                timestamp, last_id = after
+                query = {'$and': [query, {'timestamp': {'$lte': timestamp}}, {'$or': [
+                    {'timestamp': {'$lt': timestamp}},
+                    {'_id': {'$lt': last_id}}
+                ]}]}
+            find = self.db['audit_log'].find(query).sort(
+                [('timestamp', DESCENDING), ('_id', DESCENDING)]
+            )
+            if offset and not after:
+                find = find.skip(offset)
+            docs = list(find.limit(limit + 1))
+            next_cursor = None
+            if len(docs) > limit:
+                docs = docs[:limit]
+                next_cursor = encode_cursor(docs[-1].get('timestamp'), str(docs[-1]['_id']))
+            for doc in docs:
+                doc.pop('_id', None)
+            return {'entries': docs, 'total': total, 'next_cursor': next_cursor}
         except Exception as e:
             print(f"Error getting audit log from MongoDB: {e}")
-            return []
+            return {'entries': [], 'total': 0, 'next_cursor': None}
 
     def cleanup_audit_log(self, max_age_days: int = 90, keep_count: int = 10000) -> int:
         """Clean up old audit log entries."""
@@ -0,0 +1,112 @@
+"""
+Request body decompression for worker uploads.
+
+Workers gzip large JSON bodies (log chunks, job completion results) and
+mark them with `Content-Encoding: gzip`. This WSGI middleware inflates
+those bodies before Flask sees them, so route handlers keep using
+request.get_json() unchanged.
+
+Only the worker upload routes accept gzip, each with its own inflated
+size limit, and the sending worker is authenticated before anything is
+read or decompressed. Gzip bodies on any other route get 415.
+"""
+import io
+import json
+import re
+import zlib
+from typing import Callable, Optional, Sequence, Tuple
+
+# Inflated limit for log chunk uploads. Workers send at most 256 KiB of
+# log text per request (LogShipper.MAX_REQUEST_BYTES); the rest is room
+# for JSON escaping and per-chunk fields.
+MAX_LOG_BODY_SIZE = 4 * 1024 * 1024
+
+# Inflated limit for job completion: per-host results, task timings and
+# CMDB facts (the log itself is streamed, not sent with completion)
+MAX_COMPLETE_BODY_SIZE = 32 * 1024 * 1024
+
+# (path pattern, inflated size limit) of the routes that accept gzip bodies.
+# A 'worker_id' group names the worker in the path; otherwise the
+# X-Worker-Id header does.
+WORKER_GZIP_ROUTES = (
+    (re.compile(r'^/api/workers/(?P<worker_id>[^/]+)/logs$'), MAX_LOG_BODY_SIZE),
+    (re.compile(r'^/api/jobs/[^/]+/log/stream$'), MAX_LOG_BODY_SIZE),
+    (re.compile(r'^/api/jobs/[^/]+/complete$'), MAX_COMPLETE_BODY_SIZE),
+)
+
+
+class GzipRequestMiddleware:
+    """WSGI middleware that decompresses gzip-encoded worker request bodies."""
+
+    def __init__(self, wsgi_app, authenticate: Callable[[str], bool] = None,
+                 routes: Sequence[Tuple] = WORKER_GZIP_ROUTES):
+        """
+        Initialize the middleware.
+
+        Args:
+            wsgi_app: Wrapped WSGI application
+            authenticate: Function(worker_id) returning True for a registered
+                worker; when set, other senders get 401 before their body is read
+            routes: (compiled path pattern, max inflated bytes) pairs of the
+                routes that accept gzip bodies
+        """
+        self.wsgi_app = wsgi_app
+        self.authenticate = authenticate
+        self.routes = routes
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding != 'gzip':
+            return self.wsgi_app(environ, start_response)
+
+        match, max_size = self._route(environ.get('PATH_INFO', ''))
+        if not match or environ.get('REQUEST_METHOD') != 'POST':
+            return self._error(start_response, '415 UNSUPPORTED MEDIA TYPE',
+                               'gzip request bodies are only accepted on worker uploads')
+
+        if self.authenticate:
+            worker_id = match.groupdict().get('worker_id') or environ.get('HTTP_X_WORKER_ID')
+            if not worker_id or not self.authenticate(worker_id):
+                return self._error(start_response, '401 UNAUTHORIZED', 'Worker authentication required')
+
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        # JSON compresses well, so a compressed body over the inflated limit is not legitimate
+        if length > max_size:
+            return self._error(start_response, '413 REQUEST ENTITY TOO LARGE', 'Request body too large')
+        raw = environ['wsgi.input'].read(length if length > 0 else max_size + 1)
+        if len(raw) > max_size:
+            return self._error(start_response, '413 REQUEST ENTITY TOO LARGE', 'Request body too large')
+
+        # wbits 16+MAX_WBITS expects a gzip header and trailer
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(raw, max_size + 1)
+        except zlib.error:
+            return self._error(start_response, '400 BAD REQUEST', 'Invalid gzip request body')
+        if len(body) > max_size or inflater.unconsumed_tail:
+            return self._error(start_response, '413 REQUEST ENTITY TOO LARGE',
+                               'Decompressed request body too large')
+
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        del environ['HTTP_CONTENT_ENCODING']
+        return self.wsgi_app(environ, start_response)
+
+    def _route(self, path: str) -> Tuple[Optional[re.Match], int]:
+        """Match a path against the gzip routes; returns (match, max inflated bytes)."""
+        for pattern, max_size in self.routes:
+            match = pattern.match(path)
+            if match:
+                return match, max_size
+        return None, 0
+
+    @staticmethod
+    def _error(start_response, status: str, message: str):
+        """Return a JSON error response in the API's {'error': ...} shape."""
+        payload = json.dumps({'error': message}).encode('utf-8')
+        start_response(status, [('Content-Type', 'application/json'),
+                                ('Content-Length', str(len(payload)))])
+        return [payload]
@@ -8,11 +8,19 @@ Handles HTTP communication with the primary server for:
 - Content sync
 
 Supports HTTPS with optional certificate verification.
+
+All calls share one keep-alive requests.Session so checkins, polls and
+log chunks reuse pooled connections instead of paying a TCP (and TLS)
+handshake per request. Large log payloads are sent gzip-compressed.
 """
 
 import os
+import gzip
+import hashlib
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 
@@ -29,8 +37,16 @@ class APIResponse:
 class PrimaryAPIClient:
     """HTTP client for primary server API."""
 
+    # Request bodies smaller than this are sent uncompressed
+    COMPRESS_MIN_BYTES = 1024
+
+    # Statuses retried (with backoff) for idempotent methods
+    RETRY_STATUSES = (502, 503, 504)
+
     def __init__(self, server_url: str, timeout: int = 30,
-                 ssl_verify: Union[bool, str] = None):
+                 ssl_verify: Union[bool, str] = None, pool_size: int = 10,
+                 retries: int = 3, backoff_factor: float = 0.5,
+                 compress: bool = True):
         """
         Initialize API client.
 
@@ -42,10 +58,20 @@ class PrimaryAPIClient:
                 - False: Disable SSL verification (insecure, for self-signed certs)
                 - str: Path to CA certificate file
                 - None: Auto-detect from SSL_VERIFY env var
+            pool_size: Max keep-alive connections kept open to the primary
+                (should cover concurrent jobs plus the poll/checkin threads)
+            retries: Retries for connection failures and gateway errors.
+                Connection failures are retried for any method (the request
+                never reached the primary); 502/503/504 responses only for
+                idempotent methods so a POST is never applied twice.
+            backoff_factor: Exponential backoff factor between retries
+            compress: Gzip large request bodies (log chunks, completion)
         """
         self.server_url = server_url.rstrip('/')
         self.timeout = timeout
+        self.compress = compress
         self.worker_id: Optional[str] = None
+        self.session = self._create_session(pool_size, retries, backoff_factor)
 
         # Configure SSL verification
         if ssl_verify is None:
@@ -61,13 +87,51 @@ class PrimaryAPIClient:
         else:
             self.ssl_verify = ssl_verify
 
-    def _request(self, method: str, endpoint: str, **kwargs) -> APIResponse:
+    def _create_session(self, pool_size: int, retries: int,
+                        backoff_factor: float) -> requests.Session:
+        """Create the shared keep-alive session with pooling and retries."""
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+    def _compress_json(self, kwargs: Dict) -> None:
+        """Replace a large `json` payload in kwargs with a gzip body."""
+        body = json.dumps(kwargs['json']).encode('utf-8')
+        if len(body) < self.COMPRESS_MIN_BYTES:
+            return
+        del kwargs['json']
+        kwargs['data'] = gzip.compress(body, compresslevel=5)
+        headers = kwargs.get('headers', {})
+        headers['Content-Type'] = 'application/json'
+        headers['Content-Encoding'] = 'gzip'
+        kwargs['headers'] = headers
+
+    def _request(self, method: str, endpoint: str, compress: bool = False,
+                 **kwargs) -> APIResponse:
         """
         Make an HTTP request to the API.
 
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (e.g., /api/workers/register)
+            compress: Gzip the JSON body if it is large enough
             **kwargs: Additional arguments for requests
 
         Returns:
@@ -83,8 +147,11 @@ class PrimaryAPIClient:
             headers['X-Worker-Id'] = self.worker_id
             kwargs['headers'] = headers
 
+        if compress and self.compress and kwargs.get('json') is not None:
+            self._compress_json(kwargs)
+
         try:
-            response = requests.request(method, url, **kwargs)
+            response = self.session.request(method, url, **kwargs)
 
             # Try to parse JSON response
             try:
@@ -198,6 +265,45 @@ class PrimaryAPIClient:
             params={'worker': worker_id, 'status': 'assigned'}
         )
 
+    def wait_for_jobs(self, worker_id: str, wait: int = 30) -> APIResponse:
+        """
+        Long-poll for jobs assigned to this worker.
+
+        The primary holds the request open until a job is assigned or
+        `wait` seconds pass, so an idle worker makes about one request per
+        wait period and picks up new assignments immediately.
+
+        Args:
+            worker_id: This worker's ID
+            wait: Seconds the primary may hold the request
+
+        Returns:
+            APIResponse with list of assigned jobs (empty on timeout)
+        """
+        return self._request(
+            'GET',
+            f'/api/workers/{worker_id}/jobs',
+            params={'wait': wait},
+            timeout=wait + self.timeout
+        )
+
+    def claim_jobs(self, worker_id: str, slots: int) -> APIResponse:
+        """
+        Atomically claim queued jobs for this worker's free slots.
+
+        Args:
+            worker_id: This worker's ID
+            slots: Number of free execution slots
+
+        Returns:
+            APIResponse with list of claimed jobs
+        """
+        return self._request(
+            'POST',
+            f'/api/workers/{worker_id}/jobs/claim',
+            json={'slots': slots}
+        )
+
     def start_job(self, job_id: str, worker_id: str, log_file: str = None) -> APIResponse:
         """
         Mark a job as started.
@@ -235,7 +341,7 @@ class PrimaryAPIClient:
         )
 
     def stream_log(self, job_id: str, worker_id: str, content: str,
-                   append: bool = True) -> APIResponse:
+                   append: bool = True, offset: int = None) -> APIResponse:
         """
         Stream log content to primary during job execution.
 
@@ -247,24 +353,58 @@ class PrimaryAPIClient:
             worker_id: This worker's ID
             content: Log content chunk to send
             append: True to append to existing log, False to replace
+            offset: Byte offset of this chunk within the job's log. The
+                primary skips chunks it already has and answers 409 with
+                expected_offset for chunks past the end of its copy.
 
         Returns:
             APIResponse with bytes_written on success
         """
+        data = {
+            'worker_id': worker_id,
+            'content': content,
+            'append': append
+        }
+        if offset is not None:
+            data['offset'] = offset
+            data['checksum'] = hashlib.sha256(content.encode('utf-8')).hexdigest()
         return self._request(
             'POST',
             f'/api/jobs/{job_id}/log/stream',
-            json={
-                'worker_id': worker_id,
-                'content': content,
-                'append': append
-            }
+            compress=True,
+            json=data
+        )
+
+    def stream_logs(self, worker_id: str, chunks: List[Dict]) -> APIResponse:
+        """
+        Stream log chunks for several jobs in one request.
+
+        Args:
+            worker_id: This worker's ID
+            chunks: Dicts with job_id, content, append and offset
+
+        Returns:
+            APIResponse with a `results` list (one entry per chunk, with
+            status 'ok', 'duplicate', 'gap' or 'rejected')
+        """
+        payload = [
+            {**chunk, 'checksum': hashlib.sha256(chunk['content'].encode('utf-8')).hexdigest()}
+            for chunk in chunks
+        ]
+        return self._request(
+            'POST',
+            f'/api/workers/{worker_id}/logs',
+            compress=True,
+            json={'chunks': payload}
         )
 
     def complete_job(self, job_id: str, worker_id: str, exit_code: int,
                      log_file: str = None, log_content: str = None,
                      error_message: str = None, duration_seconds: float = None,
-                     cmdb_facts: Dict = None, checkin: Dict = None) -> APIResponse:
+                     cmdb_facts: Dict = None, checkin: Dict = None,
+                     log_length: int = None, log_sha256: str = None,
+                     host_results: Dict = None, task_timings: Dict = None,
+                     cmdb_collection: str = None) -> APIResponse:
         """
         Report job completion with full results.
 
@@ -274,10 +414,18 @@ class PrimaryAPIClient:
             exit_code: Process exit code (0 = success)
             log_file: Log file name
             log_content: Full log content (optional - for log upload)
+            log_length: Log size in bytes; with log_sha256, lets the primary
+                assemble the log from streamed chunks instead of log_content.
+                Answered with 409 and `missing` byte ranges if incomplete.
+            log_sha256: SHA-256 hex digest of the log
             error_message: Error message if failed
             duration_seconds: Job execution duration
-            cmdb_facts: CMDB facts collected during execution
+            cmdb_facts: CMDB facts collected during execution ({host: data})
+            cmdb_collection: CMDB collection of cmdb_facts (default: derived
+                from the playbook name by the primary)
             checkin: Piggyback checkin data
+            host_results: Per-host PLAY RECAP written by the run_results plugin
+            task_timings: Per-task, per-host durations written by the task_profile plugin
 
         Returns:
             APIResponse with completion status and worker stats update info
@@ -290,18 +438,28 @@ class PrimaryAPIClient:
             data['log_file'] = log_file
         if log_content:
             data['log_content'] = log_content
+        if log_length is not None:
+            data['log_length'] = log_length
+            data['log_sha256'] = log_sha256
         if error_message:
             data['error_message'] = error_message
         if duration_seconds is not None:
             data['duration_seconds'] = duration_seconds
+        if host_results:
+            data['host_results'] = host_results
+        if task_timings:
+            data['task_timings'] = task_timings
         if cmdb_facts:
             data['cmdb_facts'] = cmdb_facts
+            if cmdb_collection:
+                data['cmdb_collection'] = cmdb_collection
         if checkin:
             data['checkin'] = checkin
 
         return self._request(
             'POST',
             f'/api/jobs/{job_id}/complete',
+            compress=True,
             json=data
         )
 
@@ -334,7 +492,7 @@ class PrimaryAPIClient:
         url = f"{self.server_url}/api/sync/archive"
         headers = {'X-Worker-Id': self.worker_id} if self.worker_id else {}
         try:
-            response = requests.get(url, timeout=120, stream=True, verify=self.ssl_verify, headers=headers)
+            response = self.session.get(url, timeout=120, stream=True, verify=self.ssl_verify, headers=headers)
             if response.ok:
                 with open(output_path, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=8192):
@@ -359,7 +517,7 @@ class PrimaryAPIClient:
         url = f"{self.server_url}/api/sync/file/{filepath}"
         headers = {'X-Worker-Id': self.worker_id} if self.worker_id else {}
         try:
-            response = requests.get(url, timeout=30, verify=self.ssl_verify, headers=headers)
+            response = self.session.get(url, timeout=30, verify=self.ssl_verify, headers=headers)
             if response.ok:
                 with open(output_path, 'wb') as f:
                     f.write(response.content)
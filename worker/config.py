@@ -24,7 +24,8 @@ class WorkerConfig:
     # Timing settings (in seconds)
     checkin_interval: int = 600  # 10 minutes
     sync_interval: int = 300  # 5 minutes
-    poll_interval: int = 5  # Job polling
+    poll_interval: int = 5  # Job polling (fallback when long-poll is unavailable)
+    job_wait: int = 30  # Long-poll wait for job assignments (0 disables)
 
     # Execution settings
     max_concurrent_jobs: int = 2
@@ -49,6 +50,7 @@ class WorkerConfig:
             CHECKIN_INTERVAL: Seconds between check-ins (default 600)
             SYNC_INTERVAL: Seconds between sync checks (default 300)
             POLL_INTERVAL: Seconds between job polls (default 5)
+            JOB_WAIT: Long-poll wait for job assignments, 0 to disable (default 30)
             MAX_CONCURRENT_JOBS: Max parallel jobs (default 2)
             CONTENT_DIR: Base directory for Ansible content
             LOGS_DIR: Directory for job logs
@@ -76,6 +78,7 @@ class WorkerConfig:
             checkin_interval=int(os.environ.get('CHECKIN_INTERVAL', '600')),
             sync_interval=int(os.environ.get('SYNC_INTERVAL', '300')),
             poll_interval=int(os.environ.get('POLL_INTERVAL', '5')),
+            job_wait=int(os.environ.get('JOB_WAIT', '30')),
             max_concurrent_jobs=int(os.environ.get('MAX_CONCURRENT_JOBS', '2')),
             content_dir=os.environ.get('CONTENT_DIR', '/app'),
             logs_dir=os.environ.get('LOGS_DIR', '/app/logs'),
@@ -116,6 +119,7 @@ class WorkerConfig:
             'checkin_interval': self.checkin_interval,
             'sync_interval': self.sync_interval,
             'poll_interval': self.poll_interval,
+            'job_wait': self.job_wait,
             'max_concurrent_jobs': self.max_concurrent_jobs,
             'content_dir': self.content_dir,
             'logs_dir': self.logs_dir,
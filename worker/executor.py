@@ -9,35 +9,67 @@ Handles execution of Ansible playbooks for assigned jobs:
 """
 
 import os
-import re
 import json
+import hashlib
+import tempfile
 from typing import Dict, List, Optional, Callable
 
-# Keys that must not appear in logs (passwords, secrets)
-_SENSITIVE_KEYS = frozenset({'ansible_ssh_pass', 'ansible_password', 'ansible_become_pass'})
-
-# Redact password-like values in log lines (Ansible stdout may echo vars)
-# Handles: ansible_ssh_pass=val, "ansible_ssh_pass": "val", ansible_ssh_pass: val
-_SENSITIVE_PATTERN = re.compile(
-    r'((?:ansible_ssh_pass|ansible_password|ansible_become_pass)\s*["\']?\s*[:=]\s*)(["\']?)[^"\'&\s\n]+(["\']?)',
-    re.IGNORECASE
-)
-
-
-def _sanitize_log_line(line: str) -> str:
-    """Redact sensitive variable values from a log line."""
-    return _SENSITIVE_PATTERN.sub(r'\1***', line)
+# Shared with the primary: redaction, task boundaries, chunked reads
+from .log_pipeline import SENSITIVE_KEYS, LogPipeline, read_chunks
 
 
 def _recursive_sanitize(obj):
     """Recursively redact sensitive keys in dicts."""
     if isinstance(obj, dict):
-        return {k: ('***' if k in _SENSITIVE_KEYS else _recursive_sanitize(v)) for k, v in obj.items()}
+        return {k: ('***' if k in SENSITIVE_KEYS else _recursive_sanitize(v)) for k, v in obj.items()}
     if isinstance(obj, list):
         return [_recursive_sanitize(v) for v in obj]
     return obj
 
 
+def _file_digest(path: str) -> tuple:
+    """Return (length in bytes, SHA-256 hex digest) of a file, read in blocks."""
+    sha = hashlib.sha256()
+    length = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(64 * 1024), b''):
+            sha.update(block)
+            length += len(block)
+    return length, sha.hexdigest()
+
+
+def _new_plugin_file() -> str:
+    """Create an empty temp file for a callback plugin's output."""
+    fd, path = tempfile.mkstemp(prefix='run-results-', suffix='.json')
+    os.close(fd)
+    return path
+
+
+def _read_plugin_file(path: str) -> Optional[Dict]:
+    """Read and remove a callback plugin's JSON output (None if not written)."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _utf8_boundary(data: bytes) -> int:
+    """Length of the longest prefix of data that ends on a UTF-8 character boundary."""
+    i = len(data) - 1
+    while i > 0 and len(data) - i < 4 and (data[i] & 0xC0) == 0x80:
+        i -= 1
+    lead = data[i]
+    size = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    return i if i + size > len(data) else len(data)
+
+
 def _sanitize_cmd_for_log(cmd: List[str]) -> str:
     """Return command string safe for logging (redacts passwords in -e JSON)."""
     parts = []
@@ -67,6 +99,7 @@ from datetime import datetime
 from queue import Queue, Empty
 
 from .api_client import PrimaryAPIClient
+from .log_shipper import LogShipper
 
 
 @dataclass
@@ -79,6 +112,7 @@ class JobResult:
     error_message: Optional[str] = None
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
+    host_results: Optional[Dict] = None
 
 
 class JobExecutor:
@@ -93,8 +127,21 @@ class JobExecutor:
     5. Report completion to primary
     """
 
+    # Completion retries that stream log ranges missing on the primary
+    LOG_FILL_ATTEMPTS = 3
+
+    # Max bytes per log fill request
+    LOG_FILL_CHUNK_BYTES = 256 * 1024
+
+    # Environment variables the run_results, task_profile and cmdb_collector
+    # callback plugins write the per-host recap, task timings and CMDB facts to
+    RESULTS_ENV = 'RUN_RESULTS_FILE'
+    PROFILE_ENV = 'RUN_PROFILE_FILE'
+    CMDB_ENV = 'CMDB_FACTS_FILE'
+
     def __init__(self, api_client: PrimaryAPIClient, worker_id: str,
-                 content_dir: str, logs_dir: str, worker_name: str = None):
+                 content_dir: str, logs_dir: str, worker_name: str = None,
+                 log_shipper: LogShipper = None):
         """
         Initialize job executor.
 
@@ -104,12 +151,16 @@ class JobExecutor:
             content_dir: Directory containing playbooks/inventory
             logs_dir: Directory for job logs
             worker_name: Human-readable worker name for logs
+            log_shipper: Shipper for live log chunks (default: one spooling
+                to logs_dir/.spool)
         """
         self.api = api_client
         self.worker_id = worker_id
         self.worker_name = worker_name or worker_id[:8]
         self.content_dir = content_dir
         self.logs_dir = logs_dir
+        self.log_shipper = log_shipper or LogShipper(
+            api_client, worker_id, os.path.join(logs_dir, '.spool'))
 
         # Active jobs being executed
         self._active_jobs: Dict[str, Dict] = {}
@@ -222,7 +273,8 @@ class JobExecutor:
 
         return cmd
 
-    def _execute_playbook(self, job: Dict, log_path: str) -> tuple:
+    def _execute_playbook(self, job: Dict, log_path: str, results_path: str = None,
+                          profile_path: str = None, facts_path: str = None) -> tuple:
         """
         Execute ansible-playbook and capture output.
 
@@ -232,6 +284,9 @@ class JobExecutor:
         Args:
             job: Job dict
             log_path: Path to write log output
+            results_path: File for the run_results plugin's per-host recap
+            profile_path: File for the task_profile plugin's task timings
+            facts_path: File the cmdb_collector plugin spools CMDB facts to
 
         Returns:
             Tuple of (exit_code, error_message)
@@ -245,7 +300,7 @@ class JobExecutor:
         STREAM_INTERVAL_SECONDS = 2.0
 
         try:
-            with open(log_path, 'w') as log_file:
+            with open(log_path, 'w', encoding='utf-8') as log_file:
                 # Write header with worker identification
                 header = (
                     f"Worker: {self.worker_name} ({self.worker_id[:8]})\n"
@@ -263,42 +318,51 @@ class JobExecutor:
                 self._stream_log_chunk(job_id, header, append=False)
 
                 # Execute playbook
+                env = {**os.environ, 'ANSIBLE_FORCE_COLOR': 'false'}
+                if results_path:
+                    env[self.RESULTS_ENV] = results_path
+                if profile_path:
+                    env[self.PROFILE_ENV] = profile_path
+                if facts_path:
+                    env[self.CMDB_ENV] = facts_path
                 process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     cwd=self.content_dir,
-                    env={**os.environ, 'ANSIBLE_FORCE_COLOR': 'false'}
+                    env=env
                 )
 
                 # Buffer for streaming to primary
                 import time
                 stream_buffer = []
+                stream_lines = 0
                 last_stream_time = time.time()
 
-                # Stream output to log file and primary (sanitize to redact passwords)
-                for line in process.stdout:
-                    decoded_line = line.decode('utf-8', errors='replace')
-                    safe_line = _sanitize_log_line(decoded_line)
-                    log_file.write(safe_line)
+                def write_chunk(chunk):
+                    log_file.write(chunk.text)
                     log_file.flush()
 
-                    # Add to stream buffer
-                    stream_buffer.append(safe_line)
+                def stream_chunk(chunk):
+                    nonlocal stream_buffer, stream_lines, last_stream_time
+                    stream_buffer.append(chunk.text)
+                    stream_lines += chunk.lines
 
                     # Stream to primary when buffer is full or time elapsed
                     current_time = time.time()
-                    should_stream = (
-                        len(stream_buffer) >= STREAM_BUFFER_LINES or
-                        (current_time - last_stream_time) >= STREAM_INTERVAL_SECONDS
-                    )
-
-                    if should_stream and stream_buffer:
-                        content = ''.join(stream_buffer)
-                        self._stream_log_chunk(job_id, content, append=True)
+                    if (stream_lines >= STREAM_BUFFER_LINES or
+                            (current_time - last_stream_time) >= STREAM_INTERVAL_SECONDS):
+                        self._stream_log_chunk(job_id, ''.join(stream_buffer), append=True)
                         stream_buffer = []
+                        stream_lines = 0
                         last_stream_time = current_time
 
+                # Output is read, redacted and written in multi-line chunks
+                pipeline = LogPipeline([write_chunk, stream_chunk])
+                for data in read_chunks(process.stdout):
+                    pipeline.feed(data)
+                pipeline.flush()
+
                 process.wait()
 
                 # Stream any remaining buffer content
@@ -333,20 +397,45 @@ class JobExecutor:
         """
         Stream a log chunk to the primary server for live viewing.
 
-        Failures are logged but don't interrupt job execution.
+        The chunk is handed to the log shipper thread, so reading playbook
+        output never waits on the primary (slow or unreachable).
 
         Args:
             job_id: Job ID
             content: Log content to stream
             append: True to append, False to replace
         """
-        try:
-            response = self.api.stream_log(job_id, self.worker_id, content, append)
-            if not response.success:
-                # Log failure but don't interrupt job
-                print(f"Warning: Log stream failed for job {job_id}: {response.error}")
-        except Exception as e:
-            print(f"Warning: Log stream error for job {job_id}: {e}")
+        self.log_shipper.ship(job_id, content, append)
+
+    def _fill_log_ranges(self, job_id: str, log_path: str, ranges: List[List[int]]):
+        """
+        Stream byte ranges of a finished job's log the primary is missing.
+
+        Args:
+            job_id: Job ID
+            log_path: Local log file
+            ranges: [start, end) byte ranges from the primary
+        """
+        with open(log_path, 'rb') as f:
+            for start, end in ranges:
+                f.seek(start)
+                position = start
+                while position < end:
+                    data = f.read(min(self.LOG_FILL_CHUNK_BYTES, end - position))
+                    if not data:
+                        return
+                    # Never split a UTF-8 sequence across two chunks
+                    cut = len(data) if position + len(data) >= end else (_utf8_boundary(data) or len(data))
+                    data = data[:cut]
+                    f.seek(position + cut)
+
+                    response = self.api.stream_log(job_id, self.worker_id,
+                                                   data.decode('utf-8', errors='replace'),
+                                                   append=position > 0, offset=position)
+                    if not response.success:
+                        print(f"Warning: Log fill failed for job {job_id}: {response.error}")
+                        return
+                    position += cut
 
     def _run_job(self, job: Dict):
         """
@@ -376,8 +465,13 @@ class JobExecutor:
         if not start_response.success:
             print(f"Warning: Failed to notify job start: {start_response.error}")
 
-        # Execute the playbook
-        exit_code, error_message = self._execute_playbook(job, log_path)
+        # Execute the playbook; callback plugins write the recap, timings and
+        # CMDB facts to temp files (the primary stores the facts, not this worker)
+        results_path, profile_path, facts_path = _new_plugin_file(), _new_plugin_file(), _new_plugin_file()
+        exit_code, error_message = self._execute_playbook(job, log_path, results_path, profile_path, facts_path)
+        host_results = (_read_plugin_file(results_path) or {}).get('hosts') or None
+        task_timings = _read_plugin_file(profile_path)
+        cmdb = _read_plugin_file(facts_path) or {}
 
         end_time = datetime.now()
         completed_at = end_time.isoformat()
@@ -389,13 +483,15 @@ class JobExecutor:
         with self._lock:
             self._active_jobs.pop(job_id, None)
 
-        # Read log content for upload to primary
-        log_content = None
+        # Deliver the tail of the live log before the completion replaces it
+        self.log_shipper.finish_job(job_id)
+
+        # The primary assembles the log from streamed chunks; send only its digest
+        log_length, log_sha256 = None, None
         try:
             if os.path.exists(log_path):
-                with open(log_path, 'r') as f:
-                    log_content = f.read()
-        except Exception as e:
+                log_length, log_sha256 = _file_digest(log_path)
+        except OSError as e:
             print(f"Warning: Could not read log file for upload: {e}")
 
         # Create result
@@ -406,19 +502,32 @@ class JobExecutor:
             log_file=log_filename,
             error_message=error_message,
             started_at=started_at,
-            completed_at=completed_at
+            completed_at=completed_at,
+            host_results=host_results
         )
 
-        # Report completion to primary with full details
-        complete_response = self.api.complete_job(
-            job_id,
-            self.worker_id,
-            exit_code,
-            log_file=log_filename,
-            log_content=log_content,
-            error_message=error_message,
-            duration_seconds=duration_seconds
-        )
+        # Report completion to primary, filling in any log ranges it is missing
+        for attempt in range(self.LOG_FILL_ATTEMPTS + 1):
+            complete_response = self.api.complete_job(
+                job_id,
+                self.worker_id,
+                exit_code,
+                log_file=log_filename,
+                error_message=error_message,
+                duration_seconds=duration_seconds,
+                # Last attempt completes with whatever log the primary has
+                log_length=log_length if attempt < self.LOG_FILL_ATTEMPTS else None,
+                log_sha256=log_sha256,
+                host_results=host_results,
+                task_timings=task_timings,
+                cmdb_facts=cmdb.get('hosts') or None,
+                cmdb_collection=cmdb.get('collection')
+            )
+            missing = (complete_response.data or {}).get('missing') \
+                if complete_response.status_code == 409 else None
+            if not missing:
+                break
+            self._fill_log_ranges(job_id, log_path, missing)
 
         if not complete_response.success:
             print(f"Warning: Failed to report job completion: {complete_response.error}")
@@ -523,6 +632,18 @@ class JobPoller:
         self._running = False
         self._poll_thread: Optional[threading.Thread] = None
         self._processed_jobs: set = set()
+        self._on_started_callbacks: List[Callable[[List[Dict]], None]] = []
+
+        # Long-poll state: push_active is True while the primary is answering
+        # long-polls, so interval polling can stand down
+        self.push_active = False
+        self._push_supported = True
+        self._slot_freed = threading.Event()
+        executor.on_complete(lambda result: self._slot_freed.set())
+
+    def on_started(self, callback: Callable[[List[Dict]], None]):
+        """Register a callback receiving jobs started by the long-poll loop."""
+        self._on_started_callbacks.append(callback)
 
     def poll_once(self) -> List[Dict]:
         """
@@ -541,16 +662,112 @@ class JobPoller:
         if not response.success:
             return []
 
+        started_jobs = self._start_jobs(self._extract_jobs(response), available_slots)
+
+        # Pull queued work for any slots the router hasn't filled yet
+        free_slots = available_slots - len(started_jobs)
+        if free_slots > 0:
+            claim_response = self.api.claim_jobs(self.worker_id, free_slots)
+            if claim_response.success:
+                started_jobs.extend(
+                    self._start_jobs(self._extract_jobs(claim_response), free_slots)
+                )
+
+        return started_jobs
+
+    def wait_once(self, wait: int = 30) -> Optional[List[Dict]]:
+        """
+        Long-poll the primary for assigned jobs and execute any returned.
+
+        Args:
+            wait: Seconds the primary may hold the request
+
+        Returns:
+            List of jobs that were started, or None if the long-poll failed
+            and the caller should fall back to interval polling
+        """
+        available_slots = self.max_concurrent - self.executor.active_job_count
+        if available_slots <= 0:
+            return []
+
+        response = self.api.wait_for_jobs(self.worker_id, wait)
+        if not response.success:
+            # A primary without the endpoint answers 404/405 with no JSON body
+            if response.status_code in (404, 405) and not response.data:
+                self._push_supported = False
+                print("Primary does not support job long-poll, using interval polling")
+            return None
+
+        return self._start_jobs(self._extract_jobs(response), available_slots)
+
+    def _long_poll_loop(self, wait: int, retry_delay: float):
+        """Background long-poll loop; falls back to interval polling on failure."""
+        import time
+
+        while self._running and self._push_supported:
+            if self.max_concurrent - self.executor.active_job_count <= 0:
+                # Full: nothing to ask for until a job finishes
+                self._slot_freed.wait(retry_delay)
+                self._slot_freed.clear()
+                continue
+
+            requested_at = time.monotonic()
+            try:
+                started = self.wait_once(wait)
+            except Exception as e:
+                print(f"Error in job long-poll: {e}")
+                started = None
+
+            self.push_active = started is not None
+            if started:
+                for callback in self._on_started_callbacks:
+                    try:
+                        callback(started)
+                    except Exception as e:
+                        print(f"Error in job started callback: {e}")
+            elif started is None and self._running:
+                time.sleep(retry_delay)
+            elif time.monotonic() - requested_at < 1:
+                # Returned at once with only jobs we already started (their
+                # start report is still in flight); don't spin on them
+                time.sleep(1)
+
+        self.push_active = False
+
+    def start_long_poll(self, wait: int = 30, retry_delay: float = 5.0):
+        """
+        Start the background long-poll loop for push-style job pickup.
+
+        Args:
+            wait: Seconds the primary may hold each request
+            retry_delay: Seconds to back off after a failed long-poll
+        """
+        if self._running:
+            return
+
+        self._running = True
+        self._poll_thread = threading.Thread(
+            target=self._long_poll_loop,
+            args=(wait, retry_delay),
+            daemon=True,
+            name="job-long-poll"
+        )
+        self._poll_thread.start()
+
+    @staticmethod
+    def _extract_jobs(response) -> List[Dict]:
+        """Get the job list from a jobs API response."""
         jobs_data = response.data
         if isinstance(jobs_data, dict):
-            jobs = jobs_data.get('jobs', [])
-        elif isinstance(jobs_data, list):
-            jobs = jobs_data
-        else:
-            jobs = []
+            return jobs_data.get('jobs', [])
+        if isinstance(jobs_data, list):
+            return jobs_data
+        return []
 
+    def _start_jobs(self, jobs: List[Dict], slots: int) -> List[Dict]:
+        """Dispatch up to slots unprocessed jobs to the executor."""
         started_jobs = []
-        for job in jobs[:available_slots]:
+        for job in jobs[:slots]:
             job_id = job.get('id')
 
             # Skip already processed jobs
@@ -597,6 +814,7 @@ class JobPoller:
     def stop(self):
         """Stop background polling."""
         self._running = False
+        self._slot_freed.set()
         if self._poll_thread:
             self._poll_thread.join(timeout=5)
             self._poll_thread = None
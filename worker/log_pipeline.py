@@ -0,0 +1 @@
+../web/log_pipeline.py
\ No newline at end of file
@@ -0,0 +1,421 @@
+"""
+Log Shipper
+
+Ships live job log chunks to the primary from a single background
+thread, so reading ansible-playbook output never waits on the network:
+- Job threads enqueue chunks into a bounded queue and return immediately
+- Chunks from all running jobs are coalesced and flushed periodically,
+  in batched requests to POST /api/workers/<id>/logs
+- While the primary is unreachable, chunks are spooled to disk
+- Spooled chunks are replayed in byte-offset order once it comes back
+"""
+
+import os
+import json
+import threading
+import time
+from queue import Queue, Empty, Full
+from typing import Dict, List, Optional, Tuple
+
+from .api_client import PrimaryAPIClient
+
+
+class LogShipper:
+    """
+    Background shipper for streaming job logs to the primary.
+
+    Every chunk carries the byte offset it starts at within the job's
+    partial log, so the primary can place it even when chunks arrive
+    late (after a spool replay).
+    """
+
+    # Seconds between flushes of coalesced chunks
+    DEFAULT_FLUSH_INTERVAL = 2.0
+
+    # Chunks buffered in memory before new chunks go straight to the spool
+    DEFAULT_QUEUE_SIZE = 1000
+
+    # Upper bound on the log content of a single request
+    MAX_REQUEST_BYTES = 256 * 1024
+
+    # Seconds to keep spooling after the primary was found unreachable
+    RETRY_INTERVAL = 5.0
+
+    def __init__(self, api_client: PrimaryAPIClient, worker_id: str, spool_dir: str,
+                 flush_interval: float = None, max_queue: int = None):
+        """
+        Initialize log shipper.
+
+        Args:
+            api_client: API client for primary server
+            worker_id: This worker's ID
+            spool_dir: Directory for chunks that could not be delivered
+            flush_interval: Seconds between flushes
+            max_queue: Max chunks held in memory
+        """
+        self.api = api_client
+        self.worker_id = worker_id
+        self.spool_dir = spool_dir
+        self.flush_interval = flush_interval or self.DEFAULT_FLUSH_INTERVAL
+
+        self._queue: Queue = Queue(maxsize=max_queue or self.DEFAULT_QUEUE_SIZE)
+        self._offsets: Dict[str, int] = {}
+        self._pending: Dict[str, List[Dict]] = {}
+        self._delivered: Dict[str, int] = {}
+        self._unreachable_until = 0.0
+        self._batch_supported = True
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = False
+
+        self.stats = {
+            'chunks_queued': 0,
+            'chunks_spooled': 0,
+            'chunks_dropped': 0,
+            'requests_sent': 0,
+            'bytes_sent': 0,
+            'chunks_replayed': 0,
+            'errors': 0
+        }
+
+    def start(self):
+        """Start the shipper thread (no-op if already running)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            if not self._started:
+                # Jobs from a previous worker process are no longer running
+                for job_id in self._spooled_jobs():
+                    self._discard_spool(job_id)
+                self._started = True
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Flush outstanding chunks (spooling what cannot be sent) and stop."""
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)
+        except Full:
+            pass
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """Return True if the shipper thread is alive."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def ship(self, job_id: str, content: str, append: bool = True):
+        """
+        Queue a log chunk for the primary. Never blocks on network I/O.
+
+        Args:
+            job_id: Job ID
+            content: Log content chunk
+            append: True to append, False to replace the partial log
+        """
+        if not content and append:
+            return
+        if not self.is_running():
+            self.start()
+
+        with self._lock:
+            offset = self._offsets.get(job_id, 0) if append else 0
+            self._offsets[job_id] = offset + len(content.encode('utf-8'))
+            self.stats['chunks_queued'] += 1
+
+        chunk = {'offset': offset, 'append': append, 'content': content}
+        try:
+            self._queue.put_nowait((job_id, chunk))
+        except Full:
+            # Shipper is far behind; keep the reader moving and spool
+            self._spool(job_id, [chunk])
+
+    def finish_job(self, job_id: str, timeout: float = 10) -> bool:
+        """
+        Flush a finished job's chunks and forget it.
+
+        Any spool left for the job is discarded afterwards, since the full
+        log is uploaded with the job completion.
+
+        Args:
+            job_id: Job ID
+            timeout: Max seconds to wait for the flush
+
+        Returns:
+            True if the flush finished within the timeout
+        """
+        if self.is_running():
+            done = threading.Event()
+            try:
+                self._queue.put((job_id, done), timeout=timeout)
+                finished = done.wait(timeout)
+            except Full:
+                finished = False
+        else:
+            self._discard_spool(job_id)
+            finished = True
+
+        with self._lock:
+            self._offsets.pop(job_id, None)
+        return finished
+
+    def get_stats(self) -> Dict:
+        """Get shipper statistics."""
+        return {**self.stats, 'running': self.is_running(),
+                'queued': self._queue.qsize(),
+                'spooled_jobs': len(self._spooled_jobs())}
+
+    # =========================================================================
+    # Shipper thread
+    # =========================================================================
+
+    def _run(self):
+        """Collect chunks and flush them every flush interval."""
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except Empty:
+                item = None
+
+            if item is not None:
+                job_id, payload = item
+                if isinstance(payload, threading.Event):
+                    # A finishing job gets one delivery attempt even during backoff
+                    self._unreachable_until = 0.0
+                    self._safe_flush()
+                    self._discard_spool(job_id)
+                    payload.set()
+                    continue
+                self._pending.setdefault(job_id, []).append(payload)
+
+            if self._stop.is_set() and self._queue.empty():
+                self._safe_flush()
+                return
+            if time.monotonic() >= next_flush:
+                self._safe_flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _safe_flush(self):
+        """Flush, keeping the shipper thread alive on unexpected errors."""
+        try:
+            self._flush()
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Log shipper error: {e}")
+
+    def _flush(self):
+        """
+        Send pending and spooled chunks in byte-offset order.
+
+        Only the contiguous run from each job's last delivered offset is
+        sent; chunks past a gap (an earlier chunk is still queued) are
+        held in the spool until the gap is filled. Chunks of all jobs go
+        out together in batched requests.
+        """
+        pending, self._pending = self._pending, {}
+        items = []
+        for job_id in set(pending) | self._spooled_jobs():
+            chunks = pending.get(job_id, [])
+            if self._unreachable():
+                if chunks:
+                    self._spool(job_id, chunks)
+                continue
+
+            ready, held = self._split_ready(job_id, chunks + self._take_spool(job_id))
+            if held:
+                self._spool(job_id, held)
+            items.extend((job_id, group) for group in self._coalesce(ready))
+
+        if self._batch_supported:
+            self._send_batches(items)
+        else:
+            self._send_each(items)
+
+    def _send_batches(self, items: List[Tuple[str, Dict]]):
+        """Send chunks of several jobs per request via the batched endpoint."""
+        start = 0
+        while start < len(items):
+            end, size = start, 0
+            while end < len(items):
+                chunk_size = len(items[end][1]['content'])
+                if end > start and size + chunk_size > self.MAX_REQUEST_BYTES:
+                    break
+                size += chunk_size
+                end += 1
+            batch = items[start:end]
+
+            try:
+                response = self.api.stream_logs(self.worker_id, [{'job_id': job_id, **group}
+                                                                 for job_id, group in batch])
+            except Exception as e:
+                print(f"Warning: Log stream error: {e}")
+                response = None
+
+            if response is not None and response.success:
+                self.stats['requests_sent'] += 1
+                self.stats['bytes_sent'] += size
+                results = (response.data or {}).get('results')
+                if not isinstance(results, list):
+                    results = [{'status': 'ok'}] * len(batch)
+            elif response is not None and response.status_code in (404, 405) and not response.data:
+                # Primary without the batched endpoint
+                self._batch_supported = False
+                self._send_each(items[start:])
+                return
+            elif response is None or response.status_code == 0 or response.status_code >= 500:
+                self._unreachable_until = time.monotonic() + self.RETRY_INTERVAL
+                self._spool_items(items[start:])
+                return
+            else:
+                results = [{'status': 'rejected', 'error': response.error}] * len(batch)
+
+            for (job_id, group), result in zip(batch, results):
+                if result.get('status') not in ('ok', 'duplicate'):
+                    # Job finished, cancelled or reassigned: the chunk can never land
+                    print(f"Warning: Log stream rejected for job {job_id}: "
+                          f"{result.get('error') or result.get('status')}")
+                    self.stats['chunks_dropped'] += 1
+                self._mark_delivered(job_id, group)
+            start = end
+
+    def _send_each(self, items: List[Tuple[str, Dict]]):
+        """Send chunks one request at a time."""
+        for i, (job_id, group) in enumerate(items):
+            if not self._send(job_id, group):
+                self._spool_items(items[i:])
+                return
+            self._mark_delivered(job_id, group)
+
+    def _mark_delivered(self, job_id: str, chunk: Dict):
+        """Advance a job's delivered offset past a chunk."""
+        self._delivered[job_id] = chunk['offset'] + len(chunk['content'].encode('utf-8'))
+
+    def _split_ready(self, job_id: str, chunks: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split chunks into the contiguous sendable run and those past a gap."""
+        expected = self._delivered.get(job_id, 0)
+        ready, held = [], []
+        for chunk in sorted(chunks, key=lambda c: (c['offset'], c['append'])):
+            if held or (chunk['append'] and chunk['offset'] > expected):
+                held.append(chunk)
+            elif not chunk['append'] or chunk['offset'] == expected:
+                ready.append(chunk)
+                expected = chunk['offset'] + len(chunk['content'].encode('utf-8'))
+            # else: already delivered (offset behind the delivered position)
+        return ready, held
+
+    def _coalesce(self, chunks: List[Dict]) -> List[Dict]:
+        """Merge contiguous chunks into request-sized groups."""
+        groups: List[Dict] = []
+        for chunk in sorted(chunks, key=lambda c: c['offset']):
+            size = len(chunk['content'].encode('utf-8'))
+            last = groups[-1] if groups else None
+            if (last and chunk['append'] and
+                    chunk['offset'] == last['offset'] + last['size'] and
+                    last['size'] + size <= self.MAX_REQUEST_BYTES):
+                last['parts'].append(chunk['content'])
+                last['size'] += size
+            else:
+                groups.append({'offset': chunk['offset'], 'append': chunk['append'],
+                               'parts': [chunk['content']], 'size': size})
+        return [{'offset': g['offset'], 'append': g['append'], 'content': ''.join(g['parts'])}
+                for g in groups]
+
+    def _send(self, job_id: str, chunk: Dict) -> bool:
+        """
+        Send one chunk.
+
+        Returns:
+            False if the primary is unreachable and the chunk should be
+            kept; True if it was delivered or permanently rejected
+        """
+        try:
+            response = self.api.stream_log(job_id, self.worker_id, chunk['content'],
+                                           chunk['append'], offset=chunk['offset'])
+        except Exception as e:
+            print(f"Warning: Log stream error for job {job_id}: {e}")
+            response = None
+
+        if response is not None and response.success:
+            self.stats['requests_sent'] += 1
+            self.stats['bytes_sent'] += len(chunk['content'].encode('utf-8'))
+            return True
+        if response is None or response.status_code == 0 or response.status_code >= 500:
+            self._unreachable_until = time.monotonic() + self.RETRY_INTERVAL
+            return False
+
+        # Job finished, cancelled or reassigned: the chunk can never land
+        print(f"Warning: Log stream rejected for job {job_id}: {response.error}")
+        self.stats['chunks_dropped'] += 1
+        return True
+
+    def _unreachable(self) -> bool:
+        """True while backing off after the primary could not be reached."""
+        return time.monotonic() < self._unreachable_until
+
+    # =========================================================================
+    # Disk spool
+    # =========================================================================
+
+    def _spool_path(self, job_id: str) -> str:
+        """Path of a job's spool file."""
+        return os.path.join(self.spool_dir, f"{job_id}.spool")
+
+    def _spooled_jobs(self) -> set:
+        """Job IDs with chunks waiting on disk."""
+        try:
+            names = os.listdir(self.spool_dir)
+        except OSError:
+            return set()
+        return {n[:-len('.spool')] for n in names if n.endswith('.spool')}
+
+    def _spool(self, job_id: str, chunks: List[Dict]):
+        """Append chunks to the job's spool file (one JSON record per line)."""
+        try:
+            with self._spool_lock:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                with open(self._spool_path(job_id), 'a') as f:
+                    for chunk in chunks:
+                        f.write(json.dumps(chunk) + '\n')
+            self.stats['chunks_spooled'] += len(chunks)
+        except OSError as e:
+            print(f"Warning: Could not spool log for job {job_id}: {e}")
+            self.stats['chunks_dropped'] += len(chunks)
+
+    def _spool_items(self, items: List[Tuple[str, Dict]]):
+        """Spool (job_id, chunk) pairs, grouped per job."""
+        by_job: Dict[str, List[Dict]] = {}
+        for job_id, chunk in items:
+            by_job.setdefault(job_id, []).append(chunk)
+        for job_id, chunks in by_job.items():
+            self._spool(job_id, chunks)
+
+    def _take_spool(self, job_id: str) -> List[Dict]:
+        """Read and remove a job's spooled chunks."""
+        path = self._spool_path(job_id)
+        with self._spool_lock:
+            if not os.path.exists(path):
+                return []
+            chunks = []
+            with open(path) as f:
+                for line in f:
+                    try:
+                        chunks.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn write from a crash
+            os.remove(path)
+        self.stats['chunks_replayed'] += len(chunks)
+        return chunks
+
+    def _discard_spool(self, job_id: str):
+        """Remove a job's spool file and delivery position."""
+        self._delivered.pop(job_id, None)
+        path = self._spool_path(job_id)
+        with self._spool_lock:
+            if os.path.exists(path):
+                os.remove(path)
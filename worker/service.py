@@ -51,7 +51,9 @@ class WorkerService:
             config: Worker configuration
         """
         self.config = config
-        self.api = PrimaryAPIClient(config.server_url)
+        # Pool covers one connection per job slot plus long-poll, checkin and sync
+        self.api = PrimaryAPIClient(config.server_url,
+                                    pool_size=config.max_concurrent_jobs + 4)
         self.sync = ContentSync(self.api, config.content_dir)
 
         # Job execution components (initialized after registration)
@@ -297,6 +299,15 @@ class WorkerService:
 
         return self.poller.poll_once()
 
+    def _track_started_jobs(self, jobs: List[Dict]):
+        """Record jobs started by the poller as active."""
+        for job in jobs:
+            with self._lock:
+                self._active_jobs[job.get('id')] = {
+                    'status': 'running',
+                    'started': datetime.now().isoformat()
+                }
+
     def _on_job_complete(self, result: JobResult):
         """Callback for job completion."""
         print(f"Job completed: {result.job_id} (exit: {result.exit_code})")
@@ -330,6 +341,7 @@ class WorkerService:
             executor=self.executor,
             max_concurrent=self.config.max_concurrent_jobs
         )
+        self.poller.on_started(self._track_started_jobs)
 
         print(f"Job executor initialized (max concurrent: {self.config.max_concurrent_jobs})")
 
@@ -360,17 +372,14 @@ class WorkerService:
                     self._check_sync()
                     self._last_sync_check = current_time
 
-                # Poll for jobs at poll interval
-                if current_time - self._last_job_poll >= self.config.poll_interval:
+                # Poll for jobs at poll interval, unless the long-poll
+                # channel is delivering assignments as they happen
+                push_active = self.poller is not None and self.poller.push_active
+                if not push_active and current_time - self._last_job_poll >= self.config.poll_interval:
                     started = self._poll_jobs()
                     self._last_job_poll = current_time
                     if started:
-                        for job in started:
-                            with self._lock:
-                                self._active_jobs[job.get('id')] = {
-                                    'status': 'running',
-                                    'started': datetime.now().isoformat()
-                                }
+                        self._track_started_jobs(started)
 
                 # Update state based on executor's active jobs
                 if self.executor:
@@ -428,6 +437,10 @@ class WorkerService:
         # Initialize sync notifications
         self._init_sync_notifications()
 
+        # Receive job assignments by long-poll; interval polling stays as fallback
+        if self.poller and self.config.job_wait > 0:
+            self.poller.start_long_poll(wait=self.config.job_wait)
+
         # Start main loop
         self._running = True
         self._last_checkin = 0  # Force immediate checkin
@@ -445,6 +458,10 @@ class WorkerService:
         self._set_state(WorkerState.STOPPING)
         self._running = False
 
+        # Stop job long-poll
+        if self.poller:
+            self.poller.stop()
+
         # Stop sync notifications
         if self._sync_notify:
             self._sync_notify.stop()
@@ -459,6 +476,10 @@ class WorkerService:
             else:
                 print("Timeout waiting for jobs - some may still be running")
 
+        # Flush (or spool) live log chunks still queued
+        if self.executor:
+            self.executor.log_shipper.stop()
+
         # Final checkin
         if self._worker_id:
             checkin_data = {
@@ -469,6 +490,7 @@ class WorkerService:
             }
             self.api.checkin(self._worker_id, checkin_data)
 
+        self.api.close()
         print("Worker service stopped")
 
     def run(self):